@@ -0,0 +1,328 @@
+# archivo_prestamos.py
+# Archivo del historial de préstamos en columnas NumPy, con análisis
+# vectorizados (retrasos, multas, préstamos por mes y rankings) que recorren
+# millones de préstamos en C en lugar de llamar a dias_retraso uno por uno.
+# NumPy es opcional: el resto del sistema funciona sin él.
+from datetime import date
+
+from prestamo import DIAS_PRESTAMO, validar_fecha, dia_actual
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Número de día (date.toordinal) del 1970-01-01, origen de datetime64
+DIA_EPOCA = date(1970, 1, 1).toordinal()
+
+
+class Categorias:
+    """
+    Tabla de códigos para un campo de texto repetido (ID de usuario, ISBN).
+
+    Atributos:
+        textos (list): Código -> texto.
+        codigos (dict): Texto -> código.
+    """
+
+    def __init__(self, textos=()):
+        """Crea la tabla, opcionalmente con textos ya codificados en orden"""
+        self.textos = list(textos)
+        self.codigos = {texto: codigo for codigo, texto in enumerate(self.textos)}
+
+    def __len__(self):
+        """Devuelve el número de textos distintos"""
+        return len(self.textos)
+
+    def codigo(self, texto):
+        """Devuelve el código de un texto, asignándole uno nuevo si no lo tiene"""
+        codigo = self.codigos.get(texto)
+        if codigo is None:
+            codigo = self.codigos[texto] = len(self.textos)
+            self.textos.append(texto)
+        return codigo
+
+
+class ArchivoPrestamos:
+    """
+    Historial de préstamos en columnas NumPy para análisis masivos.
+
+    Cada préstamo es una fila de cinco columnas: día del préstamo y de la
+    devolución (int32, número de día; 0 = sin fecha), códigos de usuario y
+    de libro (int32, ver Categorias) y una máscara de préstamos activos. Las
+    consultas operan sobre columnas completas, así que su coste por préstamo
+    es el de unas pocas instrucciones en C.
+
+    El archivo es una copia del historial para análisis: se llena con
+    agregar() o se construye con desde_prestamos() / desde_historial().
+
+    Atributos:
+        total (int): Número de préstamos archivados.
+        dias_prestamo (ndarray): Día del préstamo de cada fila.
+        dias_devolucion (ndarray): Día de la devolución de cada fila.
+        codigos_usuario (ndarray): Código de usuario de cada fila.
+        codigos_libro (ndarray): Código de ISBN de cada fila.
+        activos (ndarray): Máscara booleana de préstamos activos.
+        usuarios (Categorias): Códigos de los IDs de usuario.
+        libros (Categorias): Códigos de los ISBN.
+    """
+
+    COLUMNAS = ('dias_prestamo', 'dias_devolucion', 'codigos_usuario', 'codigos_libro', 'activos')
+
+    def __init__(self, capacidad=1024):
+        """
+        Crea un archivo vacío.
+
+        Args:
+            capacidad (int): Filas reservadas inicialmente (crece al agregar).
+
+        Raises:
+            ImportError: Si NumPy no está instalado.
+        """
+        if np is None:
+            raise ImportError("ArchivoPrestamos necesita NumPy (pip install numpy)")
+        self.total = 0
+        self.dias_prestamo = np.zeros(capacidad, np.int32)
+        self.dias_devolucion = np.zeros(capacidad, np.int32)
+        self.codigos_usuario = np.zeros(capacidad, np.int32)
+        self.codigos_libro = np.zeros(capacidad, np.int32)
+        self.activos = np.zeros(capacidad, np.bool_)
+        self.usuarios = Categorias()
+        self.libros = Categorias()
+
+    def __len__(self):
+        """Devuelve el número de préstamos archivados"""
+        return self.total
+
+    # ----- Construcción -----
+
+    @classmethod
+    def desde_columnas(cls, dias_prestamo, dias_devolucion, codigos_usuario, codigos_libro,
+                       activos, usuarios, libros):
+        """
+        Crea un archivo a partir de columnas ya codificadas.
+
+        Args:
+            dias_prestamo, dias_devolucion, codigos_usuario, codigos_libro:
+                Secuencias de enteros de la misma longitud.
+            activos: Secuencia de booleanos (o 0/1).
+            usuarios (list): Código -> ID de usuario.
+            libros (list): Código -> ISBN.
+
+        Returns:
+            ArchivoPrestamos: El archivo con copias de las columnas.
+        """
+        archivo = cls(capacidad=0)
+        archivo.dias_prestamo = np.array(dias_prestamo, dtype=np.int32)
+        archivo.dias_devolucion = np.array(dias_devolucion, dtype=np.int32)
+        archivo.codigos_usuario = np.array(codigos_usuario, dtype=np.int32)
+        archivo.codigos_libro = np.array(codigos_libro, dtype=np.int32)
+        archivo.activos = np.array(activos, dtype=np.bool_)
+        archivo.total = len(archivo.activos)
+        archivo.usuarios = Categorias(usuarios)
+        archivo.libros = Categorias(libros)
+        return archivo
+
+    @classmethod
+    def desde_prestamos(cls, prestamos):
+        """Crea un archivo con los préstamos de un iterable (objetos Prestamo)"""
+        archivo = cls()
+        for prestamo in prestamos:
+            archivo.agregar(prestamo)
+        return archivo
+
+    @classmethod
+    def desde_historial(cls, historial):
+        """
+        Crea un archivo copiando las columnas de un HistorialColumnar.
+
+        Las columnas de array se copian en bloque, sin pasar por objetos; el
+        historial usa una sola tabla de textos para ISBN e IDs de usuario.
+
+        Args:
+            historial (HistorialColumnar): Historial de origen.
+
+        Returns:
+            ArchivoPrestamos: El archivo.
+        """
+        archivo = cls.desde_columnas(historial.dias_prestamo, historial.dias_devolucion,
+                                     historial.codigos_usuario, historial.codigos_libro,
+                                     historial.activos, historial.textos, historial.textos)
+        # Las filas especiales guardan sus fechas en el objeto, no en las columnas
+        for fila, prestamo in historial.especiales.items():
+            archivo._fechas(fila, prestamo)
+        return archivo
+
+    def _fechas(self, fila, prestamo):
+        """Copia a una fila los días de un préstamo (0 si la fecha no es válida)"""
+        self.dias_prestamo[fila] = prestamo.dia_prestamo if type(prestamo.dia_prestamo) is int else 0
+        self.dias_devolucion[fila] = prestamo.dia_devolucion if type(prestamo.dia_devolucion) is int else 0
+
+    def agregar(self, prestamo):
+        """
+        Agrega un préstamo al final del archivo.
+
+        Args:
+            prestamo (Prestamo): El préstamo a archivar (se copian sus valores).
+        """
+        fila = self.total
+        if fila == len(self.activos):
+            # Duplicar la capacidad: agregar cuesta O(1) amortizado
+            capacidad = max(1024, 2 * fila)
+            for nombre in self.COLUMNAS:
+                columna = getattr(self, nombre)
+                nueva = np.zeros(capacidad, columna.dtype)
+                nueva[:fila] = columna[:fila]
+                setattr(self, nombre, nueva)
+        self._fechas(fila, prestamo)
+        self.codigos_usuario[fila] = self.usuarios.codigo(prestamo.id_usuario)
+        self.codigos_libro[fila] = self.libros.codigo(prestamo.isbn_libro)
+        self.activos[fila] = prestamo.activo
+        self.total += 1
+
+    def _columnas(self):
+        """Devuelve las columnas recortadas a las filas ocupadas (vistas, sin copiar)"""
+        n = self.total
+        return (self.dias_prestamo[:n], self.dias_devolucion[:n], self.codigos_usuario[:n],
+                self.codigos_libro[:n], self.activos[:n])
+
+    # ----- Análisis -----
+
+    @staticmethod
+    def _dia(fecha):
+        """Convierte una fecha YYYY-MM-DD (None = hoy) en número de día"""
+        return dia_actual() if fecha is None else validar_fecha(fecha)
+
+    def dias_retraso(self, hoy=None, dias_prestamo=DIAS_PRESTAMO):
+        """
+        Calcula los días de retraso de todos los préstamos a la vez.
+
+        Para los préstamos devueltos es el mismo valor que Prestamo.dias_retraso;
+        los activos cuentan el retraso acumulado hasta la fecha indicada.
+
+        Args:
+            hoy (str, optional): Fecha de corte para los préstamos activos
+                                 (YYYY-MM-DD); por defecto, hoy.
+            dias_prestamo (int): Duración del préstamo en días.
+
+        Returns:
+            ndarray: Días de retraso (int32) por fila, 0 si no hay retraso o
+                     si falta alguna fecha.
+        """
+        prestados, devueltos, _, _, activos = self._columnas()
+        fin = np.where(activos, np.int32(self._dia(hoy)), devueltos)
+        retraso = fin - prestados - np.int32(dias_prestamo)
+        # Sin fecha de préstamo, o devuelto sin fecha de devolución: no se puede calcular
+        retraso[(prestados == 0) | (fin == 0)] = 0
+        return np.maximum(retraso, 0, out=retraso)
+
+    def multas(self, tarifa_diaria, maximo=None, hoy=None, dias_prestamo=DIAS_PRESTAMO):
+        """
+        Calcula la multa de cada préstamo según sus días de retraso.
+
+        Args:
+            tarifa_diaria (float): Importe por día de retraso.
+            maximo (float, optional): Tope de la multa por préstamo.
+            hoy (str, optional): Fecha de corte para los préstamos activos.
+            dias_prestamo (int): Duración del préstamo en días.
+
+        Returns:
+            ndarray: Multa (float64) por fila.
+        """
+        multas = self.dias_retraso(hoy, dias_prestamo) * float(tarifa_diaria)
+        if maximo is not None:
+            np.minimum(multas, maximo, out=multas)
+        return multas
+
+    def multas_por_usuario(self, tarifa_diaria, maximo=None, hoy=None, dias_prestamo=DIAS_PRESTAMO):
+        """
+        Suma las multas de cada usuario.
+
+        Returns:
+            dict: ID de usuario -> total de multas (solo usuarios con multa).
+        """
+        _, _, usuarios, _, _ = self._columnas()
+        totales = np.bincount(usuarios, weights=self.multas(tarifa_diaria, maximo, hoy, dias_prestamo),
+                              minlength=len(self.usuarios.textos))
+        con_multa = np.flatnonzero(totales)
+        return {self.usuarios.textos[codigo]: float(totales[codigo]) for codigo in con_multa}
+
+    def vencidos(self, hoy=None, dias_prestamo=DIAS_PRESTAMO):
+        """Devuelve cuántos préstamos activos están vencidos en una fecha"""
+        prestados, _, _, _, activos = self._columnas()
+        limite = np.int32(self._dia(hoy) - dias_prestamo)
+        return int(np.count_nonzero(activos & (prestados > 0) & (prestados < limite)))
+
+    def prestamos_por_mes(self):
+        """
+        Cuenta los préstamos iniciados en cada mes.
+
+        Returns:
+            list: Tuplas ("YYYY-MM", número de préstamos) en orden cronológico,
+                  solo para los meses con préstamos.
+        """
+        prestados = self._columnas()[0]
+        prestados = prestados[prestados > 0]
+        if not len(prestados):
+            return []
+        # Préstamos por día, y luego cada día sumado a su mes: la conversión de
+        # días a meses (datetime64) solo se hace una vez por día distinto
+        primer_dia = int(prestados.min())
+        por_dia = np.bincount(prestados - np.int32(primer_dia))
+        dias = np.arange(primer_dia, primer_dia + len(por_dia)) - DIA_EPOCA
+        meses = dias.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+        primero = int(meses[0])
+        cuentas = np.bincount(meses - primero, weights=por_dia).astype(np.int64)
+        resultado = []
+        for desplazamiento in np.flatnonzero(cuentas):
+            mes = primero + int(desplazamiento)
+            resultado.append((f"{1970 + mes // 12:04d}-{mes % 12 + 1:02d}", int(cuentas[desplazamiento])))
+        return resultado
+
+    @staticmethod
+    def _principales(codigos, categorias, n):
+        """Devuelve los n códigos más frecuentes como (texto, número de préstamos)"""
+        cuentas = np.bincount(codigos, minlength=len(categorias))
+        n = min(n, int(np.count_nonzero(cuentas)))
+        if n <= 0:
+            return []
+        # argpartition elige los n mayores en O(m); solo esos se ordenan
+        candidatos = np.argpartition(-cuentas, n - 1)[:n]
+        # Mayor número de préstamos primero; a igualdad, el código menor (el primero en aparecer)
+        orden = candidatos[np.lexsort((candidatos, -cuentas[candidatos]))]
+        return [(categorias.textos[codigo], int(cuentas[codigo])) for codigo in orden]
+
+    def principales_usuarios(self, n=10):
+        """Devuelve los n usuarios con más préstamos como (ID de usuario, préstamos)"""
+        return self._principales(self._columnas()[2], self.usuarios, n)
+
+    def principales_libros(self, n=10):
+        """Devuelve los n libros más prestados como (ISBN, préstamos)"""
+        return self._principales(self._columnas()[3], self.libros, n)
+
+
+# Bloque de prueba: compara los cálculos vectorizados con los de Prestamo
+if __name__ == "__main__":
+    import random
+    from prestamo import Prestamo
+
+    azar = random.Random(7)
+    prestamos = []
+    for i in range(1, 5001):
+        inicio = date(2023, 1, 1).toordinal() + azar.randrange(365)
+        prestamo = Prestamo(f"P{i:03d}", f"ISBN-{azar.randrange(300)}", f"U{azar.randrange(80)}",
+                            date.fromordinal(inicio).isoformat())
+        if azar.random() < 0.9:
+            prestamo.registrar_devolucion(date.fromordinal(inicio + azar.randrange(40)).isoformat())
+        prestamos.append(prestamo)
+
+    archivo = ArchivoPrestamos.desde_prestamos(prestamos)
+    retrasos = archivo.dias_retraso(hoy="2024-01-15")
+    devueltos = [fila for fila, p in enumerate(prestamos) if not p.activo]
+    iguales = all(int(retrasos[fila]) == prestamos[fila].dias_retraso() for fila in devueltos)
+    print(f"Retrasos de {len(devueltos)} devoluciones iguales a dias_retraso(): {iguales}")
+    print(f"Préstamos activos vencidos el 2024-01-15: {archivo.vencidos('2024-01-15')}")
+    print(f"Multas (0,25 por día, máximo 5): {archivo.multas(0.25, 5, hoy='2024-01-15').sum():.2f}")
+    print("Préstamos por mes:", archivo.prestamos_por_mes()[:3], "...")
+    print("Usuarios con más préstamos:", archivo.principales_usuarios(3))
+    print("Libros más prestados:", archivo.principales_libros(3))
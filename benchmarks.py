@@ -0,0 +1,986 @@
+# benchmarks.py
+# Microbenchmarks del sistema de biblioteca.
+# Uso: python benchmarks.py [nombre ...]   (sin argumentos ejecuta todos)
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from estructuras import ListaEnlazada, Nodo
+
+
+def medir(funcion, *args):
+    """
+    Ejecuta una función y mide su tiempo de ejecución.
+
+    Args:
+        funcion: La función a ejecutar.
+        *args: Argumentos para la función.
+
+    Returns:
+        tuple: (segundos transcurridos, valor devuelto por la función)
+    """
+    inicio = time.perf_counter()
+    resultado = funcion(*args)
+    return time.perf_counter() - inicio, resultado
+
+
+def imprimir_fila(*columnas):
+    """Imprime una fila de resultados con columnas alineadas."""
+    print("".join(f"{str(columna):>18}" for columna in columnas))
+
+
+# ===== LISTA ENLAZADA =====
+
+class ListaEnlazadaOriginal(ListaEnlazada):
+    """Versión anterior de ListaEnlazada: recorre la lista en cada inserción."""
+
+    def agregar(self, dato):
+        nuevo_nodo = Nodo(dato)
+        if self.cabeza is None:
+            self.cabeza = nuevo_nodo
+        else:
+            actual = self.cabeza
+            while actual.siguiente is not None:
+                actual = actual.siguiente
+            actual.siguiente = nuevo_nodo
+        self.tamanio += 1
+
+    def listar(self):
+        elementos = []
+        actual = self.cabeza
+        while actual is not None:
+            elementos.append(actual.dato)
+            actual = actual.siguiente
+        return elementos
+
+
+def llenar(lista, n):
+    """Agrega n enteros a la lista."""
+    for i in range(n):
+        lista.agregar(i)
+    return lista
+
+
+def recorrer_copiando(lista):
+    """Recorre la lista como antes: copiando a una lista Python y filtrando."""
+    return sum(1 for x in lista.listar() if x % 2 == 0)
+
+
+def recorrer_perezoso(lista):
+    """Recorre la lista con el iterador perezoso, sin copia intermedia."""
+    return sum(1 for x in lista.iterar(lambda x: x % 2 == 0))
+
+
+def benchmark_lista():
+    """Costo de agregar y recorrer ListaEnlazada antes y después de la cola."""
+    print("=== ListaEnlazada: agregar n elementos y recorrerlos ===")
+    imprimir_fila("n", "agregar antes", "agregar después", "recorrer antes", "recorrer después")
+
+    for n in (10_000, 100_000, 1_000_000):
+        # La versión anterior es O(n²) al agregar: solo se mide en el tamaño menor
+        if n <= 10_000:
+            t_antes, original = medir(llenar, ListaEnlazadaOriginal(), n)
+            t_antes = f"{t_antes:.3f}s"
+        else:
+            original = ListaEnlazadaOriginal()
+            actual = None
+            # Se construye la cadena directamente para poder medir el recorrido
+            for i in range(n):
+                nodo = Nodo(i)
+                if actual is None:
+                    original.cabeza = nodo
+                else:
+                    actual.siguiente = nodo
+                actual = nodo
+            original.tamanio = n
+            t_antes = "omitido (O(n²))"
+
+        t_despues, lista = medir(llenar, ListaEnlazada(), n)
+        t_rec_antes, _ = medir(recorrer_copiando, original)
+        t_rec_despues, _ = medir(recorrer_perezoso, lista)
+        imprimir_fila(n, t_antes, f"{t_despues:.3f}s", f"{t_rec_antes:.3f}s", f"{t_rec_despues:.3f}s")
+
+
+# ===== PERSISTENCIA =====
+
+def crear_base_prestamos(ruta, n_prestamos, n_libros=10_000, n_usuarios=5_000, fraccion_activos=0.005):
+    """
+    Crea una base SQLite con un historial sintético de préstamos.
+
+    Args:
+        ruta (str): Ruta del archivo de base de datos.
+        n_prestamos (int): Número de préstamos a generar.
+        n_libros (int): Número de libros del catálogo.
+        n_usuarios (int): Número de usuarios.
+        fraccion_activos (float): Fracción de préstamos que siguen activos.
+    """
+    from persistencia import AlmacenamientoSQLite
+
+    almacenamiento = AlmacenamientoSQLite(ruta)
+    n_activos = int(n_prestamos * fraccion_activos)
+    # Los últimos préstamos siguen activos: sus libros no están disponibles
+    prestados = {i % n_libros for i in range(n_prestamos - n_activos, n_prestamos)}
+    with almacenamiento.transaccion():
+        almacenamiento.conexion.executemany(
+            almacenamiento.SQL_GUARDAR_LIBRO,
+            ((f"ISBN-{i:07d}", f"Título {i}", f"Autor {i % 3000}", 1900 + i % 120, "Ficción",
+              int(i not in prestados), None)
+             for i in range(n_libros))
+        )
+        almacenamiento.conexion.executemany(
+            almacenamiento.SQL_GUARDAR_USUARIO,
+            ((f"U{i:06d}", f"Usuario {i}", f"u{i}@email.com") for i in range(n_usuarios))
+        )
+        almacenamiento.conexion.executemany(
+            almacenamiento.SQL_GUARDAR_PRESTAMO,
+            ((f"P{i + 1:03d}", f"ISBN-{i % n_libros:07d}", f"U{i % n_usuarios:06d}", "2023-01-01",
+              None if i >= n_prestamos - n_activos else "2023-01-10", int(i >= n_prestamos - n_activos), None)
+             for i in range(n_prestamos))
+        )
+        almacenamiento.guardar_contador_prestamos(n_prestamos + 1)
+    almacenamiento.cerrar()
+
+
+def benchmark_sqlite():
+    """Arranque en frío de SistemaBiblioteca sobre una base SQLite con 1M de préstamos."""
+    from main import SistemaBiblioteca
+    from persistencia import AlmacenamientoSQLite
+
+    print("=== SQLite: arranque en frío con 1M de préstamos ===")
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "biblioteca.db")
+        t_creacion, _ = medir(crear_base_prestamos, ruta, 1_000_000)
+        print(f"Creación de la base: {t_creacion:.2f}s")
+
+        t_arranque, sistema = medir(lambda: SistemaBiblioteca(AlmacenamientoSQLite(ruta)))
+        print(f"Arranque en frío: {t_arranque:.3f}s "
+              f"({len(sistema.libros)} libros, {len(sistema.usuarios)} usuarios, "
+              f"{len(sistema.prestamos_activos)} préstamos activos cargados)")
+
+        t_prestamo, _ = medir(sistema.registrar_prestamo, "ISBN-0000000", "U000000", "2024-01-01")
+        t_busqueda, _ = medir(sistema.buscar_prestamo_por_id, "P1234")
+        print(f"registrar_prestamo: {t_prestamo * 1000:.2f}ms, "
+              f"buscar préstamo histórico: {t_busqueda * 1000:.2f}ms")
+        # Lo que pide la tabla de préstamos al bajar hasta el final del historial
+        t_pagina, _ = medir(lambda: list(sistema.iterar_prestamos(999_000, 256)))
+        print(f"Bloque de 256 préstamos desde la posición 999.000: {t_pagina * 1000:.2f}ms")
+        # Los informes no se calculan al arrancar sino en la primera consulta
+        t_informe, _ = medir(sistema.prestamos_por_genero)
+        t_siguiente, _ = medir(sistema.prestamos_por_genero)
+        print(f"Primer informe (recorre el historial): {t_informe:.2f}s, "
+              f"siguientes: {t_siguiente * 1000:.3f}ms")
+        sistema.cerrar()
+
+
+# ===== IMPORTACIÓN =====
+
+def generar_csv_libros(ruta, n):
+    """Escribe un CSV sintético de n libros"""
+    import csv
+    with open(ruta, "w", encoding="utf-8", newline="") as archivo:
+        escritor = csv.writer(archivo)
+        escritor.writerow(['isbn', 'titulo', 'autor', 'año_publicacion', 'genero', 'disponible'])
+        for i in range(n):
+            escritor.writerow([f"ISBN-{i:07d}", f"Título {i}", f"Autor {i % 30000}",
+                               1900 + i % 120, "Ficción", "True"])
+
+
+def benchmark_importacion():
+    """Importación masiva de 1M de libros desde CSV en memoria."""
+    from main import SistemaBiblioteca
+    from importacion import importar_archivo
+
+    print("=== Importación: 1M de libros desde CSV ===")
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "libros.csv")
+        generar_csv_libros(ruta, 1_000_000)
+        sistema = SistemaBiblioteca(datos_ejemplo=False)
+        t_importacion, resultado = medir(importar_archivo, sistema, ruta, "libros")
+        print(f"{resultado} en {t_importacion:.2f}s "
+              f"({resultado.procesadas / t_importacion:,.0f} filas/s)")
+
+
+# ===== EXPORTACIÓN =====
+
+def benchmark_exportacion():
+    """Rendimiento de la exportación de 1M de libros y verificación del viaje de ida y vuelta."""
+    from libro import Libro
+    from main import SistemaBiblioteca
+    from exportacion import exportar_libros, respaldar, restaurar
+
+    print("=== Exportación: 1M de libros ===")
+    sistema = SistemaBiblioteca(datos_ejemplo=False)
+    sistema.importar_libros(Libro(f"ISBN-{i:07d}", f"Título, \"{i}\"", f"Autor {i % 30000}",
+                                  1900 + i % 120, "Ficción") for i in range(1_000_000))
+
+    with tempfile.TemporaryDirectory() as directorio:
+        imprimir_fila("formato", "tiempo", "registros/s", "tamaño")
+        for nombre in ("libros.jsonl", "libros.jsonl.gz", "libros.csv", "libros.csv.gz"):
+            ruta = os.path.join(directorio, nombre)
+            t_exportacion, total = medir(exportar_libros, sistema, ruta)
+            imprimir_fila(nombre, f"{t_exportacion:.2f}s", f"{total / t_exportacion:,.0f}",
+                          f"{os.path.getsize(ruta) / 1e6:.1f} MB")
+
+    # Viaje de ida y vuelta sobre los datos de ejemplo con préstamos
+    original = SistemaBiblioteca()
+    original.registrar_prestamo("978-0142437230", "U001", "2024-01-01")
+    original.registrar_prestamo("978-0061120084", "U002", "2024-01-02")
+    original.registrar_devolucion("P002", "2024-01-09")
+    for formato in ("jsonl", "csv"):
+        with tempfile.TemporaryDirectory() as directorio:
+            respaldar(original, directorio, formato)
+            copia = SistemaBiblioteca(datos_ejemplo=False)
+            restaurar(copia, directorio, formato)
+            iguales = all(
+                [o.to_dict() for o in a] == [o.to_dict() for o in b]
+                for a, b in ((original.iterar_libros(), copia.iterar_libros()),
+                             (original.iterar_usuarios(), copia.iterar_usuarios()),
+                             (original.iterar_prestamos(), copia.iterar_prestamos()))
+            )
+            print(f"Viaje de ida y vuelta en {formato}: {'sin pérdidas' if iguales else 'CON DIFERENCIAS'}")
+
+
+# ===== BÚSQUEDA =====
+
+def crear_catalogo(n):
+    """Crea un sistema en memoria con n libros sintéticos"""
+    from libro import Libro
+    from main import SistemaBiblioteca
+
+    generos = ("Ficción", "Ciencia Ficción", "Historia", "Poesía", "Ensayo")
+    sistema = SistemaBiblioteca(datos_ejemplo=False)
+    sistema.importar_libros(Libro(f"ISBN-{i:07d}", f"Crónica número {i}", f"García {i % 30000}",
+                                  1900 + i % 120, generos[i % len(generos)]) for i in range(n))
+    return sistema
+
+
+def benchmark_busqueda():
+    """Búsqueda por palabras clave con el índice invertido frente al recorrido parcial."""
+    print("=== Búsqueda: índice invertido sobre 1M de libros ===")
+    t_carga, sistema = medir(crear_catalogo, 1_000_000)
+    print(f"Carga e indexación: {t_carga:.2f}s")
+    # La primera búsqueda construye el índice pendiente de la carga y ordena su vocabulario
+    t_primera, _ = medir(sistema.buscar_libros, "garcia 12")
+    print(f"Primera búsqueda (indexa lo pendiente y ordena el vocabulario): {t_primera:.2f}s")
+
+    from estructuras import tokenizar
+
+    def recorrer(consulta, limite):
+        # Búsqueda sin índice: tokeniza todos los libros hasta reunir el límite
+        palabras = tokenizar(consulta)
+        encontrados = []
+        for libro in sistema.iterar_libros():
+            texto = tokenizar(f"{libro.titulo} {libro.autor} {libro.genero}")
+            if all(any(t.startswith(p) if i == len(palabras) - 1 else t == p for t in texto)
+                   for i, p in enumerate(palabras)):
+                encontrados.append(libro)
+                if len(encontrados) == limite:
+                    break
+        return encontrados
+
+    imprimir_fila("consulta", "recorrido", "índice", "resultados")
+    for consulta in ("garcia 2999", "cronica 123456", "poesia", "gar"):
+        t_recorrido, _ = medir(recorrer, consulta, 20)
+        t_indice, resultados = medir(sistema.buscar_libros, consulta, 20)
+        imprimir_fila(consulta, f"{t_recorrido * 1000:.1f}ms", f"{t_indice * 1000:.1f}ms", len(resultados))
+
+
+def benchmark_trigramas():
+    """Búsqueda parcial exacta con índice de trigramas frente al recorrido completo."""
+    print("=== Búsqueda parcial: índice de trigramas sobre 500k libros ===")
+    t_carga, sistema = medir(crear_catalogo, 500_000)
+    # La importación deja los trigramas pendientes: se indexan antes de medir las consultas
+    t_indice, _ = medir(sistema.trigramas_titulo.indexar_pendientes)
+    print(f"Carga: {t_carga:.2f}s, índice de trigramas del título: {t_indice:.2f}s")
+
+    def recorrer(texto):
+        # Búsqueda anterior: recorre todos los títulos
+        texto = texto.lower()
+        return [libro for libro in sistema.iterar_libros() if texto in libro.titulo.lower()]
+
+    imprimir_fila("consulta", "recorrido", "índice", "resultados", "iguales")
+    for consulta in ("nica número 4999", "MERO 12345", "o 77", "ón", "crónica"):
+        t_recorrido, esperado = medir(recorrer, consulta)
+        t_indice, resultados = medir(sistema.buscar_libros_por_titulo, consulta)
+        imprimir_fila(consulta, f"{t_recorrido * 1000:.1f}ms", f"{t_indice * 1000:.1f}ms",
+                      len(resultados), resultados == esperado)
+
+
+def palabras_sinteticas(n, semilla):
+    """Genera n palabras distintas pronunciables a partir de sílabas"""
+    import random
+    azar = random.Random(semilla)
+    silabas = [c + v for c in "bcdfglmnprstvz" for v in "aeiou"]
+    palabras = set()
+    while len(palabras) < n:
+        palabras.add("".join(azar.choice(silabas) for _ in range(azar.randint(2, 4))))
+    return sorted(palabras)
+
+
+def con_error(palabra, azar):
+    """Introduce un error de escritura: transposición, borrado, inserción o cambio"""
+    i = azar.randrange(len(palabra) - 1)
+    tipo = azar.randrange(4)
+    if tipo == 0:
+        return palabra[:i] + palabra[i + 1] + palabra[i] + palabra[i + 2:]
+    if tipo == 1:
+        return palabra[:i] + palabra[i + 1:]
+    letra = azar.choice("abcdefghijklmnopqrstuvwxyz")
+    if tipo == 2:
+        return palabra[:i] + letra + palabra[i:]
+    return palabra[:i] + letra + palabra[i + 1:]
+
+
+def benchmark_aproximada():
+    """Latencia de la búsqueda tolerante a errores sobre 500k libros."""
+    import random
+    from libro import Libro
+    from main import SistemaBiblioteca
+
+    print("=== Búsqueda aproximada: 500k libros con vocabulario de 60k palabras ===")
+    azar = random.Random(7)
+    vocabulario = palabras_sinteticas(50_000, 1)
+    nombres = palabras_sinteticas(2_000, 2)
+    apellidos = palabras_sinteticas(8_000, 3)
+
+    def crear():
+        sistema = SistemaBiblioteca(datos_ejemplo=False)
+        sistema.importar_libros(
+            Libro(f"ISBN-{i:07d}", " ".join(azar.sample(vocabulario, 3)),
+                  f"{azar.choice(nombres)} {azar.choice(apellidos)}", 1900 + i % 120, "Ficción")
+            for i in range(500_000))
+        return sistema
+
+    t_carga, sistema = medir(crear)
+    # La importación deja el índice pendiente: se construye antes de medir las consultas
+    t_indice, _ = medir(sistema.indice_texto.indexar_pendientes)
+    print(f"Carga: {t_carga:.2f}s, índice de texto: {t_indice:.2f}s "
+          f"({len(sistema.indice_texto.variantes):,} variantes)")
+
+    # Consultas de apellido y una palabra del título, con un error en cada una
+    # Sin guardar la lista de 500k libros: el recolector la recorrería en cada pasada
+    consultas = []
+    for libro in azar.sample(sistema.listar_libros(), 200):
+        palabras = (libro.autor.split()[-1], libro.titulo.split()[0])
+        consultas.append((libro, " ".join(con_error(p, azar) for p in palabras)))
+
+    tiempos = []
+    encontrados = 0
+    for libro, consulta in consultas:
+        t_consulta, resultados = medir(sistema.buscar_libros_aproximado, consulta, 10)
+        tiempos.append(t_consulta)
+        encontrados += libro in resultados
+    tiempos.sort()
+    print(f"p50: {tiempos[len(tiempos) // 2] * 1000:.2f}ms, "
+          f"p99: {tiempos[int(len(tiempos) * 0.99)] * 1000:.2f}ms, "
+          f"máximo: {tiempos[-1] * 1000:.2f}ms")
+    print(f"Libro buscado entre los 10 primeros: {encontrados}/{len(consultas)}")
+
+
+# ===== MEMORIA =====
+
+class PrestamoConDiccionario:
+    """Versión anterior de Prestamo: atributos en un diccionario y fechas como texto."""
+
+    def __init__(self, id_prestamo, isbn_libro, id_usuario, fecha_prestamo):
+        self.id_prestamo = id_prestamo
+        self.isbn_libro = isbn_libro
+        self.id_usuario = id_usuario
+        self.fecha_prestamo = fecha_prestamo
+        self.fecha_devolucion = None
+        self.activo = True
+
+
+def datos_prestamos(n):
+    """Genera n préstamos sintéticos como textos nuevos, igual que al leerlos de un archivo"""
+    for i in range(1, n + 1):
+        mes, dia = 1 + (i // 28) % 12, 1 + i % 28
+        # Uno de cada 200 sigue activo
+        devolucion = None if i % 200 == 0 else f"2024-{mes:02d}-{dia:02d}"
+        yield (f"P{i:03d}", f"ISBN-{i % 10_000:07d}", f"U{i % 5_000:05d}",
+               f"2023-{mes:02d}-{dia:02d}", devolucion)
+
+
+def generar_prestamos(clase, n):
+    """Genera n préstamos de una clase con la interfaz de Prestamo"""
+    for id_prestamo, isbn, id_usuario, fecha, devolucion in datos_prestamos(n):
+        prestamo = clase(id_prestamo, isbn, id_usuario, fecha)
+        if devolucion is not None:
+            prestamo.fecha_devolucion = devolucion
+            prestamo.activo = False
+        yield prestamo
+
+
+def memoria_usada(funcion, *args):
+    """Devuelve los bytes que siguen reservados tras ejecutar una función, y su resultado"""
+    tracemalloc.start()
+    resultado = funcion(*args)
+    actual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return actual, resultado
+
+
+def benchmark_memoria():
+    """Memoria de 1M de préstamos: objetos con diccionario, con __slots__ y en columnas."""
+    from historial import HistorialColumnar
+    from prestamo import Prestamo
+
+    n = 1_000_000
+    print(f"=== Memoria: historial de {n:,} préstamos (tracemalloc) ===")
+    variantes = (
+        ("diccionario", lambda: list(generar_prestamos(PrestamoConDiccionario, n))),
+        ("__slots__", lambda: list(generar_prestamos(Prestamo, n))),
+        # Los objetos solo existen mientras se copian a las columnas
+        ("columnas", lambda: HistorialColumnar(generar_prestamos(Prestamo, n))),
+    )
+    imprimir_fila("representación", "memoria", "por préstamo", "reducción")
+    base = None
+    for nombre, crear in variantes:
+        usada, historial = memoria_usada(crear)
+        base = base or usada
+        imprimir_fila(nombre, f"{usada / 2**20:.1f} MB", f"{usada / n:.0f} B", f"{base / usada:.1f}x")
+        del historial
+
+
+# ===== ANÁLISIS VECTORIZADO =====
+
+def benchmark_analitica():
+    """Retrasos, multas, préstamos por mes y rankings sobre 10M de préstamos con NumPy."""
+    try:
+        import numpy as np
+    except ImportError:
+        print("=== Análisis vectorizado: requiere NumPy (pip install numpy) ===")
+        return
+    from datetime import date
+    from archivo_prestamos import ArchivoPrestamos
+    from prestamo import Prestamo
+
+    n, n_usuarios, n_libros = 10_000_000, 200_000, 500_000
+    print(f"=== Análisis vectorizado: {n:,} préstamos históricos ===")
+    azar = np.random.default_rng(42)
+    primer_dia = date(2015, 1, 1).toordinal()
+    dias_prestamo = azar.integers(primer_dia, primer_dia + 3650, n, dtype=np.int32)
+    dias_devolucion = dias_prestamo + azar.integers(1, 45, n, dtype=np.int32)
+    activos = azar.random(n) < 0.005
+    dias_devolucion[activos] = 0
+    # Popularidad desigual: pocos usuarios y libros concentran muchos préstamos
+    usuarios = (azar.zipf(1.3, n) - 1) % n_usuarios
+    libros = (azar.zipf(1.2, n) - 1) % n_libros
+    archivo = ArchivoPrestamos.desde_columnas(
+        dias_prestamo, dias_devolucion, usuarios, libros, activos,
+        [f"U{i:06d}" for i in range(n_usuarios)], [f"ISBN-{i:07d}" for i in range(n_libros)])
+
+    hoy = "2025-01-01"
+    operaciones = (
+        ("días de retraso", lambda: archivo.dias_retraso(hoy)),
+        ("multas", lambda: archivo.multas(0.25, 10.0, hoy)),
+        ("vencidos", lambda: archivo.vencidos(hoy)),
+        ("préstamos por mes", archivo.prestamos_por_mes),
+        ("10 usuarios", archivo.principales_usuarios),
+        ("10 libros", archivo.principales_libros),
+    )
+    total = 0
+    for nombre, operacion in operaciones:
+        t_operacion, _ = medir(operacion)
+        total += t_operacion
+        imprimir_fila(nombre, f"{t_operacion * 1000:.0f}ms")
+    imprimir_fila("total", f"{total * 1000:.0f}ms")
+
+    # Referencia: dias_retraso() en un bucle de Python sobre una muestra
+    muestra = 200_000
+    prestamos = []
+    for fila in range(muestra):
+        prestamo = Prestamo(f"P{fila:03d}", "ISBN", "U", date.fromordinal(int(dias_prestamo[fila])).isoformat())
+        if not activos[fila]:
+            prestamo.registrar_devolucion(date.fromordinal(int(dias_devolucion[fila])).isoformat())
+        prestamos.append(prestamo)
+    t_bucle, retrasos = medir(lambda: [prestamo.dias_retraso() for prestamo in prestamos])
+    print(f"Bucle con dias_retraso(): {t_bucle * 1000:.0f}ms para {muestra:,} "
+          f"(~{t_bucle * n / muestra:.1f}s estimados para {n:,})")
+    vectorizados = archivo.dias_retraso(hoy)[:muestra]
+    iguales = all(retrasos[fila] == vectorizados[fila] for fila in range(muestra) if not activos[fila])
+    print(f"Resultados iguales en la muestra: {iguales}")
+
+
+def benchmark_informes():
+    """Informes de circulación mantenidos en cada préstamo frente a recalcularlos sobre 1M de préstamos."""
+    import random
+    from datetime import date
+    from prestamo import Prestamo
+    from usuario import Usuario
+
+    n, n_libros, n_usuarios = 1_000_000, 100_000, 20_000
+    print(f"=== Informes de circulación: {n:,} préstamos ===")
+    sistema = crear_catalogo(n_libros)
+    sistema.importar_usuarios(Usuario(f"U{i:06d}", f"Usuario {i}", "") for i in range(n_usuarios))
+    azar = random.Random(42)
+    primer_dia = date(2015, 1, 1).toordinal()
+
+    def historial():
+        for i in range(n):
+            dia = primer_dia + azar.randrange(3650)
+            prestamo = Prestamo(f"P{i + 1:03d}", f"ISBN-{int(azar.paretovariate(1.2)) % n_libros:07d}",
+                                f"U{int(azar.paretovariate(1.3)) % n_usuarios:06d}",
+                                date.fromordinal(dia).isoformat())
+            prestamo.registrar_devolucion(date.fromordinal(dia + azar.randrange(1, 45)).isoformat())
+            yield prestamo
+
+    t_carga, _ = medir(lambda: sistema.importar_prestamos(historial()))
+    print(f"Importación con agregados: {t_carga:.2f}s")
+
+    t_recalculo, exacto = medir(sistema.recalcular_reportes)
+    print(f"Recálculo exacto sobre el historial: {t_recalculo * 1000:.0f}ms")
+    imprimir_fila("informe", "mantenido")
+    for nombre, operacion in (("por género", sistema.prestamos_por_genero),
+                              ("100 libros", lambda: sistema.libros_mas_prestados(100)),
+                              ("100 usuarios", lambda: sistema.usuarios_mas_activos(100)),
+                              ("duración", sistema.duracion_promedio_prestamos)):
+        t_operacion, _ = medir(operacion)
+        imprimir_fila(nombre, f"{t_operacion * 1000:.3f}ms")
+    print(f"Coinciden con el recálculo: {exacto.resumen() == sistema.obtener_reportes().resumen()}")
+
+
+def verificar_invariantes(sistema, ids_entregados):
+    """Devuelve la lista de invariantes del sistema que no se cumplen tras la prueba concurrente"""
+    from collections import Counter
+
+    fallos = []
+    repetidos = [id_prestamo for id_prestamo, veces in Counter(ids_entregados).items() if veces > 1]
+    if repetidos:
+        fallos.append(f"{len(repetidos)} IDs de préstamo entregados más de una vez")
+    historial = list(sistema.iterar_prestamos())
+    if len(historial) != len(ids_entregados) or sistema.contador_prestamos != len(ids_entregados) + 1:
+        fallos.append(f"{len(ids_entregados)} préstamos registrados, {len(historial)} en el historial "
+                      f"y contador en {sistema.contador_prestamos}")
+    activos = [prestamo for prestamo in historial if prestamo.activo]
+    if len({prestamo.codigo_barras for prestamo in activos}) != len(activos):
+        fallos.append("Ejemplares con más de un préstamo activo")
+    activos_por_libro = Counter(prestamo.isbn_libro for prestamo in activos)
+    libros = sistema.listar_libros()
+    if any(libro.total_ejemplares - libro.ejemplares_disponibles != activos_por_libro[libro.isbn] for libro in libros):
+        fallos.append("Ejemplares libres distintos de los préstamos activos")
+    if (sistema.libros_disponibles != sum(libro.disponible for libro in libros)
+            or sistema.ejemplares_disponibles != sum(libro.ejemplares_disponibles for libro in libros)):
+        fallos.append("Contadores de disponibilidad desfasados")
+    if set(sistema.prestamos_activos) != {p.id_prestamo for p in historial if p.activo}:
+        fallos.append("Índice de préstamos activos desfasado")
+    if not sistema.verificar_reportes()[0]:
+        fallos.append("Informes de circulación desfasados")
+    return fallos
+
+
+def benchmark_concurrencia():
+    """Préstamos, devoluciones y búsquedas desde 32 hilos, con y sin el modo concurrente."""
+    import random
+    import threading
+    from main import SistemaBiblioteca
+    from usuario import Usuario
+
+    hilos, operaciones, n_libros = 32, 3000, 200
+    print(f"=== Concurrencia: {hilos} hilos x {operaciones} operaciones sobre {n_libros} libros ===")
+    intervalo = sys.getswitchinterval()
+    # Cambios de hilo muy frecuentes para que las carreras aparezcan enseguida
+    sys.setswitchinterval(1e-6)
+    try:
+        for concurrente in (False, True):
+            sistema = SistemaBiblioteca(datos_ejemplo=False, concurrente=concurrente)
+            for i in range(n_libros):
+                sistema.agregar_libro(f"ISBN-{i:04d}", f"Crónica número {i}", f"García {i % 20}", 2000, "Ficción",
+                                      1 + i % 3)
+            sistema.importar_usuarios(Usuario(f"U{i:03d}", f"Usuario {i}", "") for i in range(hilos))
+            ids_entregados = []
+            errores = []
+
+            def trabajar(numero):
+                azar = random.Random(numero)
+                id_usuario = f"U{numero:03d}"
+                try:
+                    for _ in range(operaciones):
+                        tipo = azar.random()
+                        if tipo < 0.5:
+                            exito, mensaje = sistema.registrar_prestamo(
+                                f"ISBN-{azar.randrange(n_libros):04d}", id_usuario, "2024-01-01")
+                            if exito:
+                                ids_entregados.append(mensaje.rsplit(" ", 1)[1])
+                        elif tipo < 0.8:
+                            activos = sistema.obtener_prestamos_activos_por_usuario(id_usuario)
+                            if activos:
+                                sistema.registrar_devolucion(azar.choice(activos).id_prestamo, "2024-01-10")
+                        else:
+                            sistema.buscar_libros(f"garcia {azar.randrange(20)}", 10)
+                            sistema.estadisticas("2024-02-01")
+                except Exception as error:
+                    errores.append(error)
+
+            trabajadores = [threading.Thread(target=trabajar, args=(numero,)) for numero in range(hilos)]
+            t_inicio = time.perf_counter()
+            for trabajador in trabajadores:
+                trabajador.start()
+            for trabajador in trabajadores:
+                trabajador.join()
+            duracion = time.perf_counter() - t_inicio
+
+            fallos = [f"{type(error).__name__}: {error}" for error in errores[:3]]
+            try:
+                fallos += verificar_invariantes(sistema, ids_entregados)
+            except Exception as error:
+                fallos.append(f"{type(error).__name__} al verificar: {error}")
+            modo = "con cerrojo" if concurrente else "sin cerrojo"
+            print(f"{modo}: {hilos * operaciones / duracion:,.0f} operaciones/s, "
+                  f"{len(ids_entregados)} préstamos, {len(errores)} excepciones")
+            for fallo in fallos:
+                print(f"  FALLO: {fallo}")
+            if not fallos:
+                print("  Invariantes verificados: IDs únicos, un préstamo activo por ejemplar, "
+                      "disponibilidad, contadores e informes")
+        benchmark_concurrencia_interfaz()
+    finally:
+        sys.setswitchinterval(intervalo)
+
+
+def benchmark_concurrencia_interfaz():
+    """Búsquedas en un hilo del ejecutor mientras se agregan libros, con el sistema creado como en la interfaz."""
+    import threading
+    from ejecutor import EjecutorConsultas
+    from libro import Libro
+    from main import obtener_sistema
+
+    n_libros, nuevos = 20_000, 6_000
+    for concurrente in (False, True):
+        # Con concurrente=True el sistema se crea igual que en BibliotecaApp
+        sistema = obtener_sistema(concurrente=concurrente)
+        esperados = sistema.contar_libros() + n_libros + nuevos
+        sistema.importar_libros(Libro(f"I{i:05d}", f"Título {i}", f"Autor {i % 500}", 2000, "Ficción")
+                                for i in range(n_libros))
+        ejecutor = EjecutorConsultas(hilos=1, leer=None if sistema.cerrojo is None else sistema.cerrojo.leer)
+        errores = []
+        terminar = threading.Event()
+
+        def buscar():
+            # Generador, como las consultas de la interfaz: cada ronda es un
+            # resultado parcial y entre rondas no se retiene el cerrojo
+            while not terminar.is_set():
+                try:
+                    yield (len(sistema.buscar_libros_por_titulo("ti")), len(sistema.buscar_libros("titulo")),
+                           len(sistema.listar_libros_disponibles()))
+                except Exception as error:
+                    errores.append(error)
+
+        ejecutor.ejecutar("libros", buscar, lambda _: None)
+        t_inicio = time.perf_counter()
+        for i in range(n_libros, n_libros + nuevos):
+            sistema.agregar_libro(f"I{i:05d}", f"Título {i}", f"Autor {i % 500}", 2000, "Ficción")
+        duracion = time.perf_counter() - t_inicio
+        terminar.set()
+        while ejecutor.actuales:
+            ejecutor.procesar_resultados()
+            time.sleep(0.01)
+        ejecutor.cerrar()
+
+        modo = "como la interfaz (con cerrojo)" if concurrente else "sin cerrojo"
+        print(f"{modo}: {nuevos:,} libros agregados en {duracion:.1f}s mientras el ejecutor busca, "
+              f"{len(errores)} excepciones")
+        fallos = sorted({f"{type(error).__name__}: {error}" for error in errores})[:3]
+        if sistema.contar_libros() != esperados:
+            fallos.append(f"{sistema.contar_libros():,} libros en el sistema")
+        for fallo in fallos:
+            print(f"  FALLO: {fallo}")
+
+
+# ===== LOTES =====
+
+def benchmark_lotes():
+    """10.000 préstamos y devoluciones de uno en uno frente a lotes de 10 por usuario."""
+    from libro import Libro
+    from main import SistemaBiblioteca
+    from persistencia import AlmacenamientoDiario, AlmacenamientoSQLite
+    from usuario import Usuario
+
+    n_usuarios, por_lote = 1_000, 10
+    n = n_usuarios * por_lote
+    print(f"=== Lotes: {n:,} préstamos, {n_usuarios:,} usuarios con {por_lote} libros cada uno ===")
+    imprimir_fila("Almacenamiento", "Modo", "Préstamos/s", "Devoluciones/s")
+    motores = (("memoria", lambda directorio: None),
+               ("diario", lambda directorio: AlmacenamientoDiario(directorio)),
+               ("sqlite", lambda directorio: AlmacenamientoSQLite(os.path.join(directorio, "biblioteca.db"))))
+    for nombre, crear in motores:
+        for modo in ("uno a uno", "por lotes"):
+            with tempfile.TemporaryDirectory() as directorio:
+                sistema = SistemaBiblioteca(crear(directorio), datos_ejemplo=False)
+                sistema.importar_libros(Libro(f"ISBN-{i:07d}", f"Crónica número {i}", f"García {i % 500}",
+                                              2000, "Ficción") for i in range(n))
+                sistema.importar_usuarios(Usuario(f"U{i:06d}", f"Usuario {i}", "") for i in range(n_usuarios))
+                lotes = [(f"U{u:06d}", [f"ISBN-{u * por_lote + j:07d}" for j in range(por_lote)])
+                         for u in range(n_usuarios)]
+
+                inicio = time.perf_counter()
+                for id_usuario, isbns in lotes:
+                    if modo == "por lotes":
+                        sistema.registrar_prestamos_lote(isbns, id_usuario, "2024-01-01")
+                    else:
+                        for isbn in isbns:
+                            sistema.registrar_prestamo(isbn, id_usuario, "2024-01-01")
+                t_prestamos = time.perf_counter() - inicio
+                assert len(sistema.prestamos_activos) == n
+
+                ids = [[prestamo.id_prestamo for prestamo in sistema.obtener_prestamos_activos_por_usuario(id_usuario)]
+                       for id_usuario, _ in lotes]
+                inicio = time.perf_counter()
+                for ids_usuario in ids:
+                    if modo == "por lotes":
+                        sistema.registrar_devoluciones_lote(ids_usuario, "2024-01-15")
+                    else:
+                        for id_prestamo in ids_usuario:
+                            sistema.registrar_devolucion(id_prestamo, "2024-01-15")
+                t_devoluciones = time.perf_counter() - inicio
+                assert not sistema.prestamos_activos and sistema.libros_disponibles == n
+                sistema.cerrar()
+            imprimir_fila(nombre, modo, f"{n / t_prestamos:,.0f}", f"{n / t_devoluciones:,.0f}")
+
+
+# ===== EJEMPLARES =====
+
+def benchmark_ejemplares():
+    """Préstamo de cualquier ejemplar libre y listado de disponibles con 1 a 1.000 ejemplares por título."""
+    from libro import Libro
+    from main import SistemaBiblioteca
+    from usuario import Usuario
+
+    n_titulos = 10_000
+    print(f"=== Ejemplares: {n_titulos:,} títulos ===")
+    imprimir_fila("por título", "ejemplares", "préstamo", "devolución", "listar libres")
+    for por_titulo in (1, 10, 100, 1_000):
+        sistema = SistemaBiblioteca(datos_ejemplo=False)
+        sistema.importar_libros(Libro(f"ISBN-{i:07d}", f"Crónica número {i}", f"García {i % 500}", 2000, "Ficción",
+                                      [f"ISBN-{i:07d}-{j}" for j in range(por_titulo)])
+                                for i in range(n_titulos))
+        sistema.importar_usuarios([Usuario("U000001", "Usuario", "")])
+        # Se prestan todos los ejemplares de los primeros títulos, hasta 10.000 préstamos
+        isbns = [f"ISBN-{i // por_titulo:07d}" for i in range(10_000)]
+        inicio = time.perf_counter()
+        for isbn in isbns:
+            sistema.registrar_prestamo(isbn, "U000001", "2024-01-01")
+        t_prestamo = (time.perf_counter() - inicio) / len(isbns)
+        t_listar, disponibles = medir(sistema.listar_libros_disponibles)
+        ids = list(sistema.prestamos_activos)
+        inicio = time.perf_counter()
+        for id_prestamo in ids:
+            sistema.registrar_devolucion(id_prestamo, "2024-01-10")
+        t_devolucion = (time.perf_counter() - inicio) / len(ids)
+        imprimir_fila(f"{por_titulo:,}", f"{sistema.total_ejemplares:,}", f"{t_prestamo * 1e6:.1f}µs",
+                      f"{t_devolucion * 1e6:.1f}µs", f"{t_listar * 1000:.1f}ms ({len(disponibles):,})")
+
+
+# ===== RESERVAS =====
+
+def benchmark_reservas():
+    """Reservas, devoluciones que atienden la cola, recogidas y vencimientos con 100.000 reservas pendientes."""
+    import random
+    from libro import Libro
+    from main import SistemaBiblioteca
+    from reservas import PENDIENTE
+    from usuario import Usuario
+
+    n_titulos, n_usuarios, n_reservas = 10_000, 20_000, 100_000
+    azar = random.Random(1)
+    sistema = SistemaBiblioteca(datos_ejemplo=False)
+    sistema.importar_libros(Libro(f"ISBN-{i:07d}", f"Crónica número {i}", f"García {i % 500}", 2000, "Ficción")
+                            for i in range(n_titulos))
+    sistema.importar_usuarios(Usuario(f"U{i:06d}", f"Usuario {i}", "") for i in range(n_usuarios))
+    # Todos los títulos prestados, para que se puedan reservar
+    sistema.registrar_prestamos_lote([f"ISBN-{i:07d}" for i in range(n_titulos)], "U000000", "2024-01-01")
+    print(f"=== Reservas: {n_reservas:,} sobre {n_titulos:,} títulos prestados (la mitad en 10 títulos) ===")
+
+    # La mitad de las reservas se concentra en unos pocos títulos muy pedidos
+    pedidos = [(f"ISBN-{azar.randrange(10) if i % 2 else azar.randrange(n_titulos):07d}",
+                f"U{azar.randrange(1, n_usuarios):06d}", azar.choice((0, 0, 0, 1)))
+               for i in range(n_reservas)]
+    inicio = time.perf_counter()
+    for isbn, id_usuario, prioridad in pedidos:
+        sistema.reservar_libro(isbn, id_usuario, "2024-01-02", prioridad)
+    t_reservar = (time.perf_counter() - inicio) / len(pedidos)
+    pendientes = sistema.reservas.total_pendientes
+    imprimir_fila("operación", "cantidad", "por operación")
+    imprimir_fila("reservar", f"{pendientes:,}", f"{t_reservar * 1e6:.1f}µs")
+
+    # Cada devolución aparta el ejemplar para la primera reserva de su cola
+    ids = list(sistema.prestamos_activos)
+    inicio = time.perf_counter()
+    for id_prestamo in ids:
+        sistema.registrar_devolucion(id_prestamo, "2024-01-10")
+    t_devolver = (time.perf_counter() - inicio) / len(ids)
+    imprimir_fila("devolver y apartar", f"{len(ids):,}", f"{t_devolver * 1e6:.1f}µs")
+
+    # La mitad de los avisados recoge su ejemplar; el resto deja vencer la reserva
+    listas = [reserva for reserva in sistema.reservas.reservas.values() if reserva.estado != PENDIENTE]
+    recogen = listas[::2]
+    inicio = time.perf_counter()
+    for reserva in recogen:
+        sistema.registrar_prestamo(reserva.isbn_libro, reserva.id_usuario, "2024-01-11")
+    t_recoger = (time.perf_counter() - inicio) / len(recogen)
+    imprimir_fila("recoger (préstamo)", f"{len(recogen):,}", f"{t_recoger * 1e6:.1f}µs")
+
+    inicio = time.perf_counter()
+    _, mensaje = sistema.procesar_reservas_vencidas("2024-01-14")
+    vencidas = int(mensaje.rsplit(" ", 1)[1])
+    t_vencer = (time.perf_counter() - inicio) / max(vencidas, 1)
+    imprimir_fila("vencer y pasar", f"{vencidas:,}", f"{t_vencer * 1e6:.1f}µs")
+
+    canceladas = [id_reserva for id_reserva, reserva in sistema.reservas.reservas.items()
+                  if reserva.estado == PENDIENTE][::4]
+    inicio = time.perf_counter()
+    for id_reserva in canceladas:
+        sistema.cancelar_reserva(id_reserva, "2024-01-14")
+    t_cancelar = (time.perf_counter() - inicio) / len(canceladas)
+    imprimir_fila("cancelar", f"{len(canceladas):,}", f"{t_cancelar * 1e6:.1f}µs")
+
+    # Sin colas por libro, elegir la siguiente reserva recorre todas las pendientes
+    todas = [reserva for reserva in sistema.reservas.reservas.values() if reserva.estado == PENDIENTE]
+    isbns = [f"ISBN-{azar.randrange(n_titulos):07d}" for _ in range(20)]
+    t_recorrido, _ = medir(lambda: [min((r for r in todas if r.isbn_libro == isbn),
+                                        key=lambda r: (r.prioridad, int(r.id_reserva[1:])), default=None)
+                                    for isbn in isbns])
+    imprimir_fila("recorrer todas", f"{len(todas):,}", f"{t_recorrido / len(isbns) * 1e6:.1f}µs")
+
+
+# ===== MULTAS =====
+
+def benchmark_multas():
+    """Multas por retraso sobre 5M de préstamos: pasada completa, pasada incremental y recálculo."""
+    import random
+    from datetime import date
+    from libro import Libro
+    from main import SistemaBiblioteca
+    from prestamo import Prestamo
+    from usuario import Usuario
+
+    n, n_libros, n_usuarios, por_dia = 5_000_000, 100_000, 200_000, 1_500
+    print(f"=== Multas: {n:,} préstamos, {n_usuarios:,} usuarios ===")
+    sistema = SistemaBiblioteca(datos_ejemplo=False, historial_columnar=True)
+    sistema.importar_libros(Libro(f"ISBN-{i:07d}", f"Crónica número {i}", f"García {i % 30000}", 2000, "Ficción")
+                            for i in range(n_libros))
+    sistema.importar_usuarios(Usuario(f"U{i:06d}", f"Usuario {i}", "") for i in range(n_usuarios))
+    azar = random.Random(7)
+    primer_dia = date(2016, 1, 1).toordinal()
+    hoy = primer_dia + n // por_dia
+
+    def prestamo(i):
+        nuevo = Prestamo(f"P{i + 1:03d}", f"ISBN-{i % n_libros:07d}", f"U{azar.randrange(n_usuarios):06d}", None)
+        nuevo.dia_prestamo = primer_dia + i // por_dia
+        return nuevo
+
+    inicio = time.perf_counter()
+    activos = []
+    for i in range(n):
+        nuevo = prestamo(i)
+        devolucion = nuevo.dia_prestamo + azar.randrange(1, 40)
+        if devolucion > hoy:
+            activos.append(nuevo)
+            continue
+        nuevo.dia_devolucion, nuevo.activo = devolucion, False
+        # El historial devuelto se copia directamente a las columnas; los
+        # préstamos activos se importan para que ocupen su ejemplar
+        sistema.prestamos.append(nuevo)
+    rechazados = sistema.importar_prestamos(activos)
+    print(f"Historial creado en {time.perf_counter() - inicio:.1f}s "
+          f"({len(sistema.prestamos_activos):,} activos, {len(rechazados)} rechazados)")
+
+    imprimir_fila("pasada", "revisados", "tiempo", "por préstamo")
+
+    def pasada(nombre, dia):
+        t_pasada, (_, mensaje) = medir(sistema.procesar_multas, date.fromordinal(dia).isoformat())
+        revisados = int(mensaje.split()[2])
+        imprimir_fila(nombre, f"{revisados:,}", f"{t_pasada * 1000:.0f}ms", f"{t_pasada / revisados * 1e6:.2f}µs")
+
+    pasada("completa", hoy)
+    # Un día de actividad: se devuelve un tercio de los activos y se prestan 1.500 libros más
+    manana = date.fromordinal(hoy + 1).isoformat()
+    sistema.registrar_devoluciones_lote(list(sistema.prestamos_activos)[::3], manana)
+    for i in range(n, n + por_dia):
+        sistema.registrar_prestamo(f"ISBN-{i % n_libros:07d}", f"U{azar.randrange(n_usuarios):06d}", manana)
+    pasada("incremental", hoy + 1)
+
+    t_recalculo, exacto = medir(sistema.recalcular_multas, manana)
+    imprimir_fila("recálculo", f"{n + por_dia:,}", f"{t_recalculo * 1000:.0f}ms",
+                  f"{t_recalculo / (n + por_dia) * 1e6:.2f}µs")
+    print(f"Coinciden con el recálculo: "
+          f"{exacto.saldos == sistema.multas.saldos and exacto.en_curso == sistema.multas.en_curso} "
+          f"({len(sistema.multas.saldos):,} usuarios con saldo, "
+          f"{sum(sistema.multas.saldos.values()) / 100:,.2f} en total)")
+
+
+def benchmark_fechas():
+    """Conversión de 1M de fechas YYYY-MM-DD a número de día y vuelta: strptime, fromisoformat y caché."""
+    import random
+    from datetime import date, datetime
+    from prestamo import fecha_a_dia, dia_a_fecha, _dia_de_texto, _texto_de_dia
+
+    n = 1_000_000
+    print(f"=== Fechas: {n:,} conversiones (10 años de fechas distintas) ===")
+    azar = random.Random(3)
+    primer_dia = date(2015, 1, 1).toordinal()
+    dias = [primer_dia + azar.randrange(3650) for _ in range(n)]
+    # Textos nuevos, igual que al leerlos de un archivo
+    textos = [date.fromordinal(dia).isoformat() for dia in dias]
+    _dia_de_texto.cache_clear()
+    _texto_de_dia.cache_clear()
+
+    imprimir_fila("operación", "método", "tiempo", "por fecha")
+
+    def fila(operacion, metodo, funcion, datos, esperado):
+        t_total, resultado = medir(lambda: [funcion(valor) for valor in datos])
+        imprimir_fila(operacion, metodo, f"{t_total * 1000:.0f}ms", f"{t_total / n * 1e9:.0f}ns")
+        assert resultado == esperado
+
+    fila("leer", "strptime", lambda texto: datetime.strptime(texto, "%Y-%m-%d").toordinal(), textos, dias)
+    fila("leer", "fromisoformat", lambda texto: date.fromisoformat(texto).toordinal(), textos, dias)
+    fila("leer", "caché", fecha_a_dia, textos, dias)
+    fila("escribir", "strftime", lambda dia: date.fromordinal(dia).strftime("%Y-%m-%d"), dias, textos)
+    fila("escribir", "isoformat", lambda dia: date.fromordinal(dia).isoformat(), dias, textos)
+    fila("escribir", "caché", dia_a_fecha, dias, textos)
+
+    # Con números de día, ordenar, filtrar por rango y calcular retrasos son operaciones con enteros
+    desde, hasta = primer_dia + 365, primer_dia + 730
+    desde_texto, hasta_texto = dia_a_fecha(desde), dia_a_fecha(hasta)
+    hoy = primer_dia + 3650
+    imprimir_fila("operación", "textos", "días", "mejora")
+    for operacion, con_textos, con_dias in (
+            ("ordenar", lambda: sorted(textos), lambda: sorted(dias)),
+            ("rango", lambda: [t for t in textos if desde_texto <= t < hasta_texto],
+             lambda: [d for d in dias if desde <= d < hasta]),
+            ("retraso", lambda: [hoy - fecha_a_dia(t) - 14 for t in textos], lambda: [hoy - d - 14 for d in dias])):
+        t_textos, _ = medir(con_textos)
+        t_dias, _ = medir(con_dias)
+        imprimir_fila(operacion, f"{t_textos * 1000:.0f}ms", f"{t_dias * 1000:.0f}ms", f"{t_textos / t_dias:.1f}x")
+
+
+BENCHMARKS = {
+    "lista": benchmark_lista,
+    "sqlite": benchmark_sqlite,
+    "importacion": benchmark_importacion,
+    "exportacion": benchmark_exportacion,
+    "busqueda": benchmark_busqueda,
+    "trigramas": benchmark_trigramas,
+    "aproximada": benchmark_aproximada,
+    "memoria": benchmark_memoria,
+    "analitica": benchmark_analitica,
+    "informes": benchmark_informes,
+    "concurrencia": benchmark_concurrencia,
+    "lotes": benchmark_lotes,
+    "ejemplares": benchmark_ejemplares,
+    "reservas": benchmark_reservas,
+    "multas": benchmark_multas,
+    "fechas": benchmark_fechas,
+}
+
+
+if __name__ == "__main__":
+    nombres = sys.argv[1:] or list(BENCHMARKS)
+    for nombre in nombres:
+        if nombre not in BENCHMARKS:
+            print(f"Benchmark desconocido: {nombre}. Disponibles: {', '.join(BENCHMARKS)}")
+            sys.exit(1)
+        BENCHMARKS[nombre]()
+        print()
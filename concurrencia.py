@@ -0,0 +1,207 @@
+# concurrencia.py
+# Cerrojo de lectores y escritor para usar SistemaBiblioteca desde varios
+# hilos: las consultas se ejecutan a la vez y los préstamos, devoluciones y
+# demás cambios de uno en uno, sin ninguna consulta en curso.
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from itertools import islice
+
+
+class CerrojoLectoresEscritor:
+    """
+    Cerrojo que admite muchos lectores a la vez o un único escritor.
+
+    Da preferencia a los escritores: cuando uno espera, los lectores nuevos
+    esperan también, para que una corriente continua de búsquedas no deje
+    sin turno a los préstamos. Es reentrante por hilo: un escritor puede
+    volver a tomar el cerrojo para leer o escribir (un préstamo busca el
+    libro y el usuario), y un lector puede volver a leer aunque haya un
+    escritor esperando. Un lector no puede pasar a escritor.
+
+    Atributos:
+        condicion (threading.Condition): Protege el estado del cerrojo.
+        lectores (int): Hilos que tienen el cerrojo para leer.
+        escritor (int): Identificador del hilo que escribe, o None.
+        escritores_esperando (int): Hilos esperando para escribir.
+    """
+
+    def __init__(self):
+        """Inicializa el cerrojo libre."""
+        self.condicion = threading.Condition(threading.Lock())
+        self.lectores = 0
+        self.escritor = None
+        self.escritores_esperando = 0
+        self.escrituras_anidadas = 0
+        # Lecturas anidadas de cada hilo
+        self.local = threading.local()
+
+    def _lecturas(self):
+        """Devuelve las lecturas que tiene abiertas el hilo actual"""
+        return getattr(self.local, "lecturas", 0)
+
+    def adquirir_lectura(self):
+        """Toma el cerrojo para leer (espera si hay un escritor activo o esperando)"""
+        if self.escritor == threading.get_ident() or self._lecturas():
+            # Reentrada: el hilo ya tiene el cerrojo
+            self.local.lecturas = self._lecturas() + 1
+            return
+        with self.condicion:
+            while self.escritor is not None or self.escritores_esperando:
+                self.condicion.wait()
+            self.lectores += 1
+        self.local.lecturas = 1
+
+    def liberar_lectura(self):
+        """Suelta una lectura tomada con adquirir_lectura()"""
+        lecturas = self._lecturas() - 1
+        self.local.lecturas = lecturas
+        if lecturas or self.escritor == threading.get_ident():
+            return
+        with self.condicion:
+            self.lectores -= 1
+            if not self.lectores:
+                self.condicion.notify_all()
+
+    def adquirir_escritura(self):
+        """Toma el cerrojo para escribir (espera a que no quede ningún lector ni escritor)"""
+        hilo = threading.get_ident()
+        if self.escritor == hilo:
+            self.escrituras_anidadas += 1
+            return
+        if self._lecturas():
+            raise RuntimeError("Un hilo que lee no puede pasar a escribir")
+        with self.condicion:
+            self.escritores_esperando += 1
+            try:
+                while self.escritor is not None or self.lectores:
+                    self.condicion.wait()
+            finally:
+                self.escritores_esperando -= 1
+            self.escritor = hilo
+            self.escrituras_anidadas = 1
+
+    def liberar_escritura(self):
+        """Suelta una escritura tomada con adquirir_escritura()"""
+        self.escrituras_anidadas -= 1
+        if self.escrituras_anidadas:
+            return
+        with self.condicion:
+            self.escritor = None
+            self.condicion.notify_all()
+
+    @contextmanager
+    def leer(self):
+        """Contexto con el cerrojo tomado para leer"""
+        self.adquirir_lectura()
+        try:
+            yield
+        finally:
+            self.liberar_lectura()
+
+    @contextmanager
+    def escribir(self):
+        """Contexto con el cerrojo tomado para escribir"""
+        self.adquirir_escritura()
+        try:
+            yield
+        finally:
+            self.liberar_escritura()
+
+
+# Decoradores para los métodos de SistemaBiblioteca. Sin cerrojo (modo de un
+# solo hilo, self.cerrojo es None) llaman al método directamente.
+
+def lectura(metodo):
+    """Ejecuta el método con el cerrojo del objeto tomado para leer"""
+    @wraps(metodo)
+    def envoltura(self, *args, **kwargs):
+        cerrojo = self.cerrojo
+        if cerrojo is None:
+            return metodo(self, *args, **kwargs)
+        # Sin contextmanager: este envoltorio se ejecuta en cada consulta
+        cerrojo.adquirir_lectura()
+        try:
+            return metodo(self, *args, **kwargs)
+        finally:
+            cerrojo.liberar_lectura()
+    return envoltura
+
+
+def escritura(metodo):
+    """Ejecuta el método con el cerrojo del objeto tomado para escribir"""
+    @wraps(metodo)
+    def envoltura(self, *args, **kwargs):
+        cerrojo = self.cerrojo
+        if cerrojo is None:
+            return metodo(self, *args, **kwargs)
+        cerrojo.adquirir_escritura()
+        try:
+            return metodo(self, *args, **kwargs)
+        finally:
+            cerrojo.liberar_escritura()
+    return envoltura
+
+
+# Elementos que un recorrido lee con el cerrojo tomado antes de soltarlo
+LOTE_RECORRIDO = 1000
+
+
+def lectura_por_lotes(metodo):
+    """
+    Para métodos que devuelven un iterador: lo recorre por lotes, tomando el
+    cerrojo para leer cada lote y soltándolo entre uno y otro.
+
+    Así un recorrido largo (o uno que el llamador consume despacio) no
+    bloquea los préstamos mientras dura. Entre lotes pueden aplicarse
+    cambios: el recorrido sigue desde donde iba, como con una lista que se
+    modifica mientras se lee.
+    """
+    @wraps(metodo)
+    def envoltura(self, *args, **kwargs):
+        cerrojo = self.cerrojo
+        if cerrojo is None:
+            return metodo(self, *args, **kwargs)
+        with cerrojo.leer():
+            iterador = iter(metodo(self, *args, **kwargs))
+
+        def recorrer():
+            while True:
+                with cerrojo.leer():
+                    lote = list(islice(iterador, LOTE_RECORRIDO))
+                if not lote:
+                    return
+                yield from lote
+        return recorrer()
+    return envoltura
+
+
+# Bloque de prueba
+if __name__ == "__main__":
+    import time
+
+    cerrojo = CerrojoLectoresEscritor()
+    registro = []
+
+    def lector(numero):
+        with cerrojo.leer():
+            registro.append(f"lee {numero}")
+            time.sleep(0.05)
+            with cerrojo.leer():  # Reentrada
+                pass
+
+    def escritor():
+        with cerrojo.escribir():
+            registro.append("escribe")
+            with cerrojo.leer():  # Un escritor también puede leer
+                pass
+
+    hilos = [threading.Thread(target=lector, args=(i,)) for i in range(3)]
+    hilos.append(threading.Thread(target=escritor))
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    print("Orden:", registro)
+    print(f"Tres lectores de 50ms a la vez: {(time.perf_counter() - inicio) * 1000:.0f}ms en total")
@@ -0,0 +1,318 @@
+# ejecutor.py
+# Ejecución de consultas fuera del hilo de la interfaz: un grupo de hilos
+# resuelve las búsquedas y deja los resultados en una cola que el bucle de Tk
+# revisa con after(), así la ventana sigue respondiendo mientras se busca.
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from itertools import islice
+
+# Marca el final de un generador en _trabajar
+_FIN = object()
+
+
+def por_lotes(iterable, tamanio=500):
+    """
+    Agrupa los elementos de un iterable en listas de un tamaño fijo.
+
+    Sirve para escribir consultas que entregan resultados parciales: una
+    función generadora que hace "yield from por_lotes(...)" va mostrando las
+    filas a medida que las encuentra.
+
+    Args:
+        iterable: Elementos a agrupar.
+        tamanio (int): Elementos por lote (el último puede tener menos).
+
+    Returns:
+        generator: Listas de elementos.
+    """
+    iterador = iter(iterable)
+    lote = list(islice(iterador, tamanio))
+    while lote:
+        yield lote
+        lote = list(islice(iterador, tamanio))
+
+
+class Consulta:
+    """
+    Una consulta enviada a EjecutorConsultas.
+
+    Atributos:
+        canal (str): Canal de la consulta; una consulta nueva en el mismo
+                     canal cancela la anterior.
+        cancelada (bool): Si ya no interesa su resultado.
+        al_terminar: Función que recibe el resultado final.
+        al_recibir: Función que recibe cada resultado parcial, o None.
+        al_fallar: Función que recibe la excepción si la consulta falla, o None.
+    """
+
+    def __init__(self, canal, al_terminar, al_recibir=None, al_fallar=None):
+        """
+        Inicializa la consulta.
+
+        Args:
+            canal (str): Canal de la consulta.
+            al_terminar: Función resultado -> None.
+            al_recibir (optional): Función lote -> None para resultados parciales.
+            al_fallar (optional): Función excepción -> None.
+        """
+        self.canal = canal
+        self.cancelada = False
+        self.al_terminar = al_terminar
+        self.al_recibir = al_recibir
+        self.al_fallar = al_fallar
+        self.futuro = None
+
+    def cancelar(self):
+        """Marca la consulta como cancelada y la quita de la cola si no empezó"""
+        self.cancelada = True
+        if self.futuro is not None:
+            self.futuro.cancel()
+
+
+class EjecutorConsultas:
+    """
+    Ejecuta consultas en segundo plano y entrega sus resultados en el hilo de Tk.
+
+    Las funciones se ejecutan en un grupo de hilos. Si una función devuelve
+    un generador, cada valor que produce es un resultado parcial que llega a
+    al_recibir en cuanto está listo, y entre uno y otro se comprueba si la
+    consulta fue cancelada. Los resultados pasan por una cola que se vacía
+    desde el bucle de eventos (con widget.after), de modo que los callbacks
+    siempre se ejecutan en el hilo de la interfaz y pueden tocar los widgets.
+
+    Cada consulta pertenece a un canal ("libros", "usuarios"...). Enviar una
+    consulta nueva a un canal cancela la anterior, y los resultados que aún
+    estuvieran en la cola se descartan: la tabla solo muestra la última
+    búsqueda aunque las anteriores terminen más tarde.
+
+    Si los datos que leen las consultas se modifican desde otro hilo, leer
+    indica cómo protegerlos: los hilos de trabajo toman ese contexto
+    mientras ejecutan la función y mientras calculan cada resultado
+    parcial. Si quien modifica los datos toma el mismo cerrojo, los cambios
+    esperan a que termine el lote en curso, y entre lotes las consultas no
+    lo retienen.
+
+    Atributos:
+        widget: Widget de Tk cuyo after() programa la revisión de la cola, o
+                None para llamar a procesar_resultados() a mano.
+        leer: Función sin argumentos que devuelve el contexto que toman las
+              consultas para leer (un cerrojo), o None.
+        actuales (dict): Canal -> última Consulta enviada.
+        resultados (queue.Queue): Mensajes (tipo, consulta, valor) de los hilos.
+        esperas (dict): Canal -> identificador de after() de diferir().
+    """
+
+    # Milisegundos entre revisiones de la cola
+    INTERVALO = 25
+    # Mensajes atendidos como mucho en cada revisión (la interfaz no se bloquea)
+    MAXIMO_POR_REVISION = 50
+    # Espera por defecto de diferir(), en milisegundos
+    RETARDO = 300
+
+    def __init__(self, widget=None, hilos=2, leer=None):
+        """
+        Crea el ejecutor y, si hay widget, empieza a revisar la cola.
+
+        Args:
+            widget (optional): Widget de Tk (normalmente la ventana principal).
+            hilos (int): Número de hilos de trabajo.
+            leer (optional): Función que devuelve el contexto con el que
+                             se leen los datos (None si no se comparten).
+        """
+        self.widget = widget
+        self.leer = leer
+        self.actuales = {}
+        self.resultados = queue.Queue()
+        self.hilos = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="consulta")
+        self.esperas = {}
+        self.cerrado = False
+        if widget is not None:
+            self.widget.after(self.INTERVALO, self._revisar)
+
+    def ejecutar(self, canal, funcion, al_terminar, al_recibir=None, al_fallar=None):
+        """
+        Envía una consulta a los hilos de trabajo.
+
+        Args:
+            canal (str): Canal de la consulta (cancela la anterior del canal).
+            funcion: Función sin argumentos que resuelve la consulta. Si
+                     devuelve un generador, sus valores son resultados parciales.
+            al_terminar: Recibe el valor devuelto (None si era un generador).
+            al_recibir (optional): Recibe cada resultado parcial.
+            al_fallar (optional): Recibe la excepción si la función falla.
+
+        Returns:
+            Consulta: La consulta enviada (se puede cancelar).
+        """
+        self.cancelar(canal)
+        consulta = Consulta(canal, al_terminar, al_recibir, al_fallar)
+        self.actuales[canal] = consulta
+        consulta.futuro = self.hilos.submit(self._trabajar, consulta, funcion)
+        return consulta
+
+    def cancelar(self, canal):
+        """Cancela la consulta en curso de un canal, si la hay"""
+        consulta = self.actuales.pop(canal, None)
+        if consulta is not None:
+            consulta.cancelar()
+        espera = self.esperas.pop(canal, None)
+        if espera is not None and self.widget is not None:
+            self.widget.after_cancel(espera)
+
+    def diferir(self, canal, funcion, retardo=None):
+        """
+        Llama a una función cuando pasa un rato sin otra llamada del mismo canal.
+
+        Se usa para buscar mientras se escribe: cada tecla reprograma la
+        búsqueda, que solo se lanza cuando el usuario hace una pausa.
+
+        Args:
+            canal (str): Canal de la espera (comparte nombre con las consultas).
+            funcion: Función sin argumentos a llamar en el hilo de Tk.
+            retardo (int, optional): Milisegundos de espera (RETARDO por defecto).
+        """
+        espera = self.esperas.pop(canal, None)
+        if espera is not None:
+            self.widget.after_cancel(espera)
+
+        def lanzar():
+            del self.esperas[canal]
+            funcion()
+
+        self.esperas[canal] = self.widget.after(self.RETARDO if retardo is None else retardo, lanzar)
+
+    def _leer(self):
+        """Contexto con el cerrojo de los datos tomado para leer (si lo hay)"""
+        return nullcontext() if self.leer is None else self.leer()
+
+    def _trabajar(self, consulta, funcion):
+        """Ejecuta una consulta en un hilo de trabajo y encola sus resultados"""
+        if consulta.cancelada:
+            return
+        try:
+            with self._leer():
+                resultado = funcion()
+            if hasattr(resultado, 'send'):
+                # Generador: cada valor es un resultado parcial, calculado
+                # con el cerrojo tomado
+                while True:
+                    with self._leer():
+                        if consulta.cancelada:
+                            resultado.close()
+                            return
+                        parcial = next(resultado, _FIN)
+                    if parcial is _FIN:
+                        break
+                    self.resultados.put(('parcial', consulta, parcial))
+                resultado = None
+        except Exception as error:
+            self.resultados.put(('error', consulta, error))
+        else:
+            self.resultados.put(('fin', consulta, resultado))
+
+    def procesar_resultados(self, maximo=None):
+        """
+        Entrega a sus callbacks los resultados que esperan en la cola.
+
+        Debe llamarse desde el hilo de la interfaz; los mensajes de consultas
+        canceladas o reemplazadas se descartan.
+
+        Args:
+            maximo (int, optional): Mensajes a atender como mucho.
+
+        Returns:
+            int: Número de mensajes sacados de la cola.
+        """
+        atendidos = 0
+        while maximo is None or atendidos < maximo:
+            try:
+                tipo, consulta, valor = self.resultados.get_nowait()
+            except queue.Empty:
+                break
+            atendidos += 1
+            if consulta.cancelada or self.actuales.get(consulta.canal) is not consulta:
+                continue
+            if tipo == 'parcial':
+                if consulta.al_recibir is not None:
+                    consulta.al_recibir(valor)
+                continue
+            del self.actuales[consulta.canal]
+            if tipo == 'fin':
+                consulta.al_terminar(valor)
+            elif consulta.al_fallar is not None:
+                consulta.al_fallar(valor)
+        return atendidos
+
+    def _revisar(self):
+        """Revisa la cola desde el bucle de Tk y se vuelve a programar"""
+        if self.cerrado:
+            return
+        self.procesar_resultados(self.MAXIMO_POR_REVISION)
+        self.widget.after(self.INTERVALO, self._revisar)
+
+    def cerrar(self):
+        """Cancela todas las consultas y detiene los hilos de trabajo"""
+        self.cerrado = True
+        for canal in list(self.actuales) + list(self.esperas):
+            self.cancelar(canal)
+        self.hilos.shutdown(wait=False, cancel_futures=True)
+
+
+# Bloque de prueba
+if __name__ == "__main__":
+    import time
+
+    def lenta(texto, pausa):
+        """Simula una búsqueda que tarda"""
+        time.sleep(pausa)
+        return f"resultados de '{texto}'"
+
+    def por_partes():
+        """Simula un recorrido que entrega resultados parciales"""
+        for lote in por_lotes(range(10), 4):
+            time.sleep(0.01)
+            yield lote
+
+    ejecutor = EjecutorConsultas()
+    mostrados = []
+    # Tres búsquedas seguidas en el mismo canal: solo debe mostrarse la última
+    for texto in ("g", "ga", "gar"):
+        ejecutor.ejecutar("libros", lambda texto=texto: lenta(texto, 0.05), mostrados.append)
+    parciales = []
+    ejecutor.ejecutar("informe", por_partes, lambda _: parciales.append("fin"), parciales.append)
+
+    limite = time.time() + 2
+    while ejecutor.actuales and time.time() < limite:
+        ejecutor.procesar_resultados()
+        time.sleep(0.01)
+
+    print("Mostrado:", mostrados)
+    print("Parciales:", parciales)
+    ejecutor.cerrar()
+
+    # Con cerrojo, cada resultado parcial se calcula sin cambios a medias:
+    # el hilo principal actualiza a la vez los dos valores de un par y la
+    # consulta comprueba que siguen siendo iguales
+    import sys
+    import threading
+    sys.setswitchinterval(1e-6)
+
+    def comprobar(par):
+        for _ in range(2000):
+            yield sum(par[0] == par[1] for _ in range(50))
+
+    for cerrojo in (None, threading.Lock()):
+        par = [0, 0]
+        ejecutor = EjecutorConsultas(leer=None if cerrojo is None else lambda: cerrojo)
+        iguales = []
+        ejecutor.ejecutar("par", lambda: comprobar(par), lambda _: None, iguales.append)
+        while ejecutor.actuales:
+            with cerrojo or nullcontext():
+                par[0] += 1
+                time.sleep(0)  # Cede el turno a mitad del cambio
+                par[1] += 1
+            ejecutor.procesar_resultados()
+        print("Con cerrojo:" if cerrojo else "Sin cerrojo:",
+              f"{len(iguales) * 50 - sum(iguales)} lecturas de un cambio a medias")
+        ejecutor.cerrar()
@@ -1,4 +1,14 @@
 # estructuras.py
+import heapq
+import re
+import threading
+import unicodedata
+from array import array
+from bisect import bisect_left, insort
+from functools import lru_cache
+from itertools import islice
+
+
 class Nodo:
     """
     Clase que representa un nodo en una lista enlazada.
@@ -8,6 +18,9 @@ class Nodo:
         siguiente: Referencia al siguiente nodo en la lista.
     """
     
+    # Sin diccionario por nodo: la lista tiene un nodo por cada libro o usuario
+    __slots__ = ('dato', 'siguiente')
+    
     def __init__(self, dato):
         """
         Inicializa un nuevo nodo con el dato proporcionado.
@@ -25,12 +38,14 @@ class ListaEnlazada:
     
     Atributos:
         cabeza: Referencia al primer nodo de la lista.
+        cola: Referencia al último nodo de la lista.
         tamanio: Número de elementos en la lista.
     """
     
     def __init__(self):
         """Inicializa una lista enlazada vacía."""
         self.cabeza = None  # La lista comienza vacía
+        self.cola = None    # Último nodo, para agregar sin recorrer la lista
         self.tamanio = 0    # Tamaño inicial es cero
     
     def esta_vacia(self):
@@ -56,12 +71,9 @@ class ListaEnlazada:
         if self.esta_vacia():
             self.cabeza = nuevo_nodo
         else:
-            # Recorrer hasta el último nodo
-            actual = self.cabeza
-            while actual.siguiente is not None:
-                actual = actual.siguiente
-            # Enlazar el último nodo con el nuevo nodo
-            actual.siguiente = nuevo_nodo
+            # Enlazar el último nodo con el nuevo nodo (O(1) gracias a la cola)
+            self.cola.siguiente = nuevo_nodo
+        self.cola = nuevo_nodo
         
         # Incrementar el tamaño de la lista
         self.tamanio += 1
@@ -83,6 +95,8 @@ class ListaEnlazada:
         # Si el primer nodo cumple el criterio
         if criterio(self.cabeza.dato):
             self.cabeza = self.cabeza.siguiente  # La cabeza ahora es el siguiente nodo
+            if self.cabeza is None:
+                self.cola = None  # La lista quedó vacía
             self.tamanio -= 1  # Decrementar el tamaño
             return True
         
@@ -93,6 +107,8 @@ class ListaEnlazada:
             if criterio(actual.siguiente.dato):
                 # Saltar el nodo a eliminar
                 actual.siguiente = actual.siguiente.siguiente
+                if actual.siguiente is None:
+                    self.cola = actual  # Se eliminó el último nodo
                 self.tamanio -= 1  # Decrementar el tamaño
                 return True
             actual = actual.siguiente
@@ -128,15 +144,58 @@ class ListaEnlazada:
         Returns:
             list: Una lista con todos los datos almacenados en la lista enlazada.
         """
-        elementos = []  # Lista para almacenar los elementos
-        actual = self.cabeza
+        return list(self)
+    
+    def iterar(self, criterio=None):
+        """
+        Recorre la lista de forma perezosa, sin copiarla.
         
-        # Recorrer todos los nodos y agregar sus datos a la lista
+        Args:
+            criterio: Función opcional que toma un dato y devuelve True si debe incluirse.
+            
+        Yields:
+            Los datos de la lista (los que cumplen el criterio, si se indica).
+        """
+        actual = self.cabeza
         while actual is not None:
-            elementos.append(actual.dato)
+            if criterio is None or criterio(actual.dato):
+                yield actual.dato
             actual = actual.siguiente
+    
+    def __iter__(self):
+        """
+        Permite recorrer la lista con un for sin materializar una copia.
         
-        return elementos
+        Returns:
+            iterator: Un generador sobre los datos de la lista.
+        """
+        return self.iterar()
+    
+    def __len__(self):
+        """
+        Devuelve el número de elementos de la lista.
+        
+        Returns:
+            int: El tamaño de la lista.
+        """
+        return self.tamanio
+    
+    def __reversed__(self):
+        """
+        Recorre la lista desde el último elemento hasta el primero.
+        
+        Como los nodos solo enlazan hacia adelante, se guardan primero las
+        referencias a los nodos y luego se recorren en sentido inverso.
+        
+        Returns:
+            iterator: Un iterador sobre los datos en orden inverso.
+        """
+        nodos = []
+        actual = self.cabeza
+        while actual is not None:
+            nodos.append(actual)
+            actual = actual.siguiente
+        return (nodo.dato for nodo in reversed(nodos))
     
     def actualizar(self, criterio, nuevos_datos):
         """
@@ -170,15 +229,1398 @@ class ListaEnlazada:
         Returns:
             str: Una representación legible de la lista.
         """
-        elementos = []
+        elementos = [str(dato) for dato in self]
+        return " -> ".join(elementos) if elementos else "Lista vacía"
+
+
+class NodoDoble(Nodo):
+    """
+    Clase que representa un nodo con enlace al nodo anterior.
+    
+    Atributos:
+        dato: El dato almacenado en el nodo.
+        siguiente: Referencia al siguiente nodo en la lista.
+        anterior: Referencia al nodo anterior en la lista.
+        numero (int): Número de inserción que le asigna la lista indexada.
+    """
+    
+    __slots__ = ('anterior', 'numero')
+    
+    def __init__(self, dato):
+        """
+        Inicializa un nuevo nodo doble con el dato proporcionado.
+        
+        Args:
+            dato: El dato a almacenar en el nodo.
+        """
+        super().__init__(dato)
+        self.anterior = None  # Inicialmente no hay nodo anterior
+        self.numero = 0
+
+
+class ListaIndexada(ListaEnlazada):
+    """
+    Lista enlazada que además mantiene un índice hash por clave primaria.
+    
+    Conserva el orden de inserción y la interfaz de ListaEnlazada (listar,
+    buscar, eliminar y actualizar por criterio), pero las operaciones por
+    clave (obtener, agregar con verificación de duplicados y eliminar) se
+    resuelven en O(1) a través del diccionario en lugar de recorrer la lista.
+    
+    Atributos:
+        cabeza: Referencia al primer nodo de la lista.
+        cola: Referencia al último nodo de la lista.
+        tamanio: Número de elementos en la lista.
+        clave: Función que obtiene la clave primaria de un dato.
+        indice: Diccionario que asocia cada clave con su nodo.
+        siguiente_numero (int): Número de inserción del próximo elemento;
+            crece siempre, así que los números siguen el orden de la lista.
+    """
+    
+    def __init__(self, clave):
+        """
+        Inicializa una lista indexada vacía.
+        
+        Args:
+            clave: Función que toma un dato y devuelve su clave primaria.
+        """
+        super().__init__()
+        self.clave = clave  # Función para obtener la clave de cada dato
+        self.indice = {}    # Clave -> nodo
+        self.siguiente_numero = 0
+    
+    def agregar(self, dato):
+        """
+        Agrega un nuevo elemento al final de la lista si su clave no existe.
+        
+        Args:
+            dato: El dato a agregar a la lista.
+            
+        Returns:
+            bool: True si se agregó el elemento, False si la clave ya existía.
+        """
+        clave = self.clave(dato)
+        if clave in self.indice:
+            return False
+        
+        nuevo_nodo = NodoDoble(dato)
+        nuevo_nodo.numero = self.siguiente_numero
+        self.siguiente_numero += 1
+        
+        # Enlazar el nuevo nodo después de la cola
+        if self.cola is None:
+            self.cabeza = nuevo_nodo
+        else:
+            self.cola.siguiente = nuevo_nodo
+            nuevo_nodo.anterior = self.cola
+        self.cola = nuevo_nodo
+        
+        self.indice[clave] = nuevo_nodo
+        self.tamanio += 1
+        return True
+    
+    def contiene(self, clave):
+        """
+        Verifica si existe un elemento con la clave indicada.
+        
+        Args:
+            clave: La clave primaria a verificar.
+            
+        Returns:
+            bool: True si existe un elemento con esa clave.
+        """
+        return clave in self.indice
+    
+    def obtener(self, clave):
+        """
+        Obtiene el elemento asociado a una clave.
+        
+        Args:
+            clave: La clave primaria del elemento.
+            
+        Returns:
+            El dato encontrado o None si no existe.
+        """
+        nodo = self.indice.get(clave)
+        return nodo.dato if nodo is not None else None
+    
+    def _desenlazar(self, nodo):
+        """
+        Quita un nodo de la cadena y del índice.
+        
+        Args:
+            nodo: El nodo a quitar.
+        """
+        if nodo.anterior is None:
+            self.cabeza = nodo.siguiente
+        else:
+            nodo.anterior.siguiente = nodo.siguiente
+        
+        if nodo.siguiente is None:
+            self.cola = nodo.anterior
+        else:
+            nodo.siguiente.anterior = nodo.anterior
+        
+        del self.indice[self.clave(nodo.dato)]
+        self.tamanio -= 1
+    
+    def iterar_desde(self, clave):
+        """
+        Recorre los elementos que siguen al de una clave, sin recorrer los anteriores.
+        
+        Sirve para paginar por cursor: la clave del último elemento de una
+        página indica dónde empieza la siguiente, aunque entre tanto se
+        agreguen o eliminen otros elementos.
+        
+        Args:
+            clave: La clave primaria del elemento anterior al primero a recorrer.
+            
+        Returns:
+            iterator: Un generador sobre los datos posteriores al de la clave.
+        
+        Raises:
+            KeyError: Si no existe un elemento con esa clave.
+        """
+        # El nodo se busca ahora y no al empezar a recorrer, para que el error sea inmediato
+        actual = self.indice[clave].siguiente
+        
+        def recorrer(actual):
+            while actual is not None:
+                yield actual.dato
+                actual = actual.siguiente
+        
+        return recorrer(actual)
+    
+    def iterar_numerados(self, clave=None, numero=None):
+        """
+        Recorre pares (número de inserción, dato), desde el principio o desde
+        el elemento que sigue al de una clave.
+        
+        Con el número de inserción del elemento de la clave, el recorrido
+        sirve aunque ese elemento se haya eliminado (o se haya vuelto a
+        agregar más tarde): sigue por el primer elemento con un número mayor.
+        Así un cursor de paginación no se pierde si se borra el último
+        elemento de su página.
+        
+        Args:
+            clave: Clave del elemento anterior al primero a recorrer (None: desde el principio).
+            numero (int): Número de inserción que tenía ese elemento.
+            
+        Returns:
+            iterator: Un generador sobre los pares posteriores al de la clave.
+        
+        Raises:
+            KeyError: Si no existe la clave y no se indica su número.
+        """
+        if clave is None:
+            actual = self.cabeza
+        else:
+            nodo = self.indice.get(clave)
+            if nodo is not None and numero in (None, nodo.numero):
+                actual = nodo.siguiente
+            elif numero is None:
+                raise KeyError(clave)
+            else:
+                actual = self._primero_tras_numero(numero)
+        
+        def recorrer(actual):
+            while actual is not None:
+                yield actual.numero, actual.dato
+                actual = actual.siguiente
+        
+        return recorrer(actual)
+    
+    def _primero_tras_numero(self, numero):
+        """
+        Busca el primer nodo con número de inserción mayor que uno dado.
+        
+        Los números crecen a lo largo de la lista, así que se recorre desde
+        el extremo más cercano según el número: en el peor caso, media lista.
+        Solo hace falta cuando el elemento del cursor ya no existe.
+        
+        Args:
+            numero (int): Número de inserción de referencia.
+            
+        Returns:
+            El nodo encontrado o None si no hay ninguno posterior.
+        """
+        if self.cola is None or self.cola.numero <= numero:
+            return None
+        if numero - self.cabeza.numero < self.cola.numero - numero:
+            actual = self.cabeza
+            while actual.numero <= numero:
+                actual = actual.siguiente
+            return actual
+        actual = self.cola
+        while actual.anterior is not None and actual.anterior.numero > numero:
+            actual = actual.anterior
+        return actual
+    
+    def __reversed__(self):
+        """
+        Recorre la lista desde el último elemento hasta el primero.
+        
+        Returns:
+            iterator: Un generador sobre los datos en orden inverso.
+        """
+        actual = self.cola
+        while actual is not None:
+            yield actual.dato
+            actual = actual.anterior
+    
+    def eliminar_por_clave(self, clave):
+        """
+        Elimina el elemento asociado a una clave.
+        
+        Args:
+            clave: La clave primaria del elemento a eliminar.
+            
+        Returns:
+            bool: True si se eliminó un elemento, False en caso contrario.
+        """
+        nodo = self.indice.get(clave)
+        if nodo is None:
+            return False
+        
+        self._desenlazar(nodo)
+        return True
+    
+    def eliminar(self, criterio):
+        """
+        Elimina el primer elemento que cumpla con el criterio especificado.
+        
+        Args:
+            criterio: Función que toma un dato y devuelve True si cumple el criterio de eliminación.
+            
+        Returns:
+            bool: True si se eliminó un elemento, False en caso contrario.
+        """
         actual = self.cabeza
+        while actual is not None:
+            if criterio(actual.dato):
+                self._desenlazar(actual)
+                return True
+            actual = actual.siguiente
         
-        # Recorrer todos los nodos y agregar sus datos a la lista
+        return False
+    
+    def _aplicar_cambios(self, nodo, nuevos_datos):
+        """
+        Actualiza los campos de un nodo manteniendo el índice coherente.
+        
+        Si la actualización cambia la clave primaria y la nueva clave ya
+        pertenece a otro elemento, los cambios se revierten.
+        
+        Args:
+            nodo: El nodo cuyo dato se actualiza.
+            nuevos_datos: Diccionario con los campos a actualizar y sus nuevos valores.
+            
+        Returns:
+            bool: True si se aplicaron los cambios, False si se revirtieron.
+        """
+        elemento = nodo.dato
+        clave_anterior = self.clave(elemento)
+        valores_anteriores = {}
+        
+        for campo, valor in nuevos_datos.items():
+            # Verificar que el elemento tenga el atributo antes de actualizarlo
+            if hasattr(elemento, campo):
+                valores_anteriores[campo] = getattr(elemento, campo)
+                setattr(elemento, campo, valor)
+        
+        clave_nueva = self.clave(elemento)
+        if clave_nueva != clave_anterior:
+            if clave_nueva in self.indice:
+                # La nueva clave ya existe: deshacer los cambios
+                for campo, valor in valores_anteriores.items():
+                    setattr(elemento, campo, valor)
+                return False
+            del self.indice[clave_anterior]
+            self.indice[clave_nueva] = nodo
+        
+        return True
+    
+    def actualizar(self, criterio, nuevos_datos):
+        """
+        Actualiza el primer elemento que cumpla con el criterio especificado.
+        
+        Args:
+            criterio: Función que toma un dato y devuelve True si cumple el criterio de actualización.
+            nuevos_datos: Diccionario con los campos a actualizar y sus nuevos valores.
+            
+        Returns:
+            bool: True si se actualizó un elemento, False en caso contrario.
+        """
+        actual = self.cabeza
         while actual is not None:
-            elementos.append(str(actual.dato))
+            if criterio(actual.dato):
+                return self._aplicar_cambios(actual, nuevos_datos)
             actual = actual.siguiente
         
-        return " -> ".join(elementos) if elementos else "Lista vacía"
+        return False
+    
+    def actualizar_por_clave(self, clave, nuevos_datos):
+        """
+        Actualiza el elemento asociado a una clave.
+        
+        Args:
+            clave: La clave primaria del elemento a actualizar.
+            nuevos_datos: Diccionario con los campos a actualizar y sus nuevos valores.
+            
+        Returns:
+            bool: True si se actualizó el elemento, False en caso contrario.
+        """
+        nodo = self.indice.get(clave)
+        if nodo is None:
+            return False
+        
+        return self._aplicar_cambios(nodo, nuevos_datos)
+
+
+def _quitar_diacriticos(texto):
+    """Descompone un texto y quita las marcas diacríticas (tildes, diéresis...)"""
+    descompuesto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+# Tabla para str.translate con las letras latinas acentuadas más comunes;
+# traducir en C es mucho más rápido que descomponer carácter por carácter
+TABLA_SIN_DIACRITICOS = {
+    codigo: _quitar_diacriticos(chr(codigo))
+    for codigo in range(0xC0, 0x250)
+    if _quitar_diacriticos(chr(codigo)) not in ("", chr(codigo))
+}
+
+
+def normalizar(texto):
+    """
+    Normaliza un texto para búsquedas: minúsculas y sin tildes ni diéresis.
+    
+    Por ejemplo, "García" y "GARCIA" se normalizan ambos a "garcia".
+    
+    Args:
+        texto (str): El texto a normalizar.
+        
+    Returns:
+        str: El texto normalizado.
+    """
+    texto = str(texto).lower().translate(TABLA_SIN_DIACRITICOS)
+    if texto.isascii():
+        return texto
+    # Caracteres fuera de la tabla: descomposición Unicode completa
+    return _quitar_diacriticos(texto)
+
+
+PATRON_TOKEN = re.compile(r"\w+")
+
+
+@lru_cache(maxsize=1 << 16)
+def tokenizar(texto):
+    """
+    Divide un texto normalizado en palabras.
+    
+    Los resultados se guardan en caché porque autores y géneros se repiten
+    mucho entre libros.
+    
+    Args:
+        texto (str): El texto a dividir.
+        
+    Returns:
+        tuple: Las palabras normalizadas del texto.
+    """
+    return tuple(PATRON_TOKEN.findall(normalizar(texto)))
+
+
+class IndiceInvertido:
+    """
+    Índice invertido de texto completo sobre varios campos de los datos.
+    
+    Cada palabra normalizada apunta a las claves de los datos que la
+    contienen, con un peso según el campo donde aparece. Permite buscar por
+    palabras completas o por prefijos (la búsqueda "tolk" encuentra
+    "Tolkien") y ordena los resultados por relevancia. Se actualiza de forma
+    incremental al agregar, actualizar o eliminar datos.
+    
+    Las importaciones masivas usan agregar_diferido(): los datos quedan
+    pendientes y se indexan todos juntos, en una sola pasada, antes de la
+    siguiente búsqueda o modificación del índice.
+    
+    Atributos:
+        campos (dict): Nombre del atributo -> peso de las coincidencias en ese campo.
+        postings (dict): Palabra -> {clave: peso}.
+        palabras_por_clave (dict): Clave -> palabras indexadas de ese dato.
+        vocabulario (list): Palabras indexadas en orden alfabético, para buscar prefijos.
+        vocabulario_nuevo (set): Palabras recientes aún no fusionadas con
+                                 vocabulario (evita desplazar la lista grande en
+                                 cada inserción; se fusionan al buscar).
+        orden (dict): Clave -> número de inserción, para desempatar resultados.
+        desordenadas (set): Claves reindexadas con su número de inserción
+                            anterior; las demás aparecen en cada posting en
+                            el mismo orden que sus números de inserción.
+        pendientes (list): Pares (clave, dato) agregados con agregar_diferido()
+                           y aún no indexados.
+    """
+    
+    # Factor aplicado a las coincidencias por prefijo frente a las exactas
+    FACTOR_PREFIJO = 0.5
+    # Longitud mínima de una palabra de la consulta para buscarla como prefijo
+    MINIMO_PREFIJO = 2
+    # Tamaño de vocabulario_nuevo a partir del cual una búsqueda lo fusiona
+    # con vocabulario en lugar de recorrerlo
+    MAXIMO_VOCABULARIO_NUEVO = 4096
+    
+    def __init__(self, campos):
+        """
+        Inicializa un índice vacío.
+        
+        Args:
+            campos (dict): Nombre del atributo -> peso de las coincidencias en ese campo.
+        """
+        self.campos = campos
+        self.postings = {}
+        self.palabras_por_clave = {}
+        self.vocabulario = []
+        self.vocabulario_nuevo = set()
+        # Las búsquedas fusionan el vocabulario; con varios hilos buscando, de a una
+        self.cerrojo_vocabulario = threading.Lock()
+        self.orden = {}
+        self.siguiente_orden = 0
+        self.desordenadas = set()
+        self.pendientes = []
+        # Con varios hilos buscando, solo uno indexa los pendientes
+        self.cerrojo_pendientes = threading.Lock()
+    
+    def __len__(self):
+        """
+        Devuelve el número de datos indexados (incluidos los pendientes).
+        
+        Returns:
+            int: Cantidad de claves en el índice.
+        """
+        return len(self.palabras_por_clave) + len(self.pendientes)
+    
+    def _pesos(self, dato):
+        """Devuelve las palabras de un dato con el mayor peso de los campos donde aparecen"""
+        pesos = {}
+        for campo, peso in self.campos.items():
+            valor = getattr(dato, campo)
+            if not valor:
+                continue
+            for palabra in tokenizar(valor):
+                # Si la palabra aparece en varios campos se queda con el mayor peso
+                if peso > pesos.get(palabra, 0):
+                    pesos[palabra] = peso
+        return pesos
+    
+    def agregar_diferido(self, clave, dato):
+        """
+        Deja un dato nuevo pendiente de indexar.
+        
+        Los pendientes se indexan juntos (ver indexar_pendientes) antes de
+        la siguiente búsqueda o modificación, así que importar muchos datos
+        no paga el índice dato por dato.
+        
+        Args:
+            clave: Clave primaria del dato (no debe estar indexada ya).
+            dato: Objeto con los atributos indicados en campos.
+        """
+        self.pendientes.append((clave, dato))
+    
+    def indexar_pendientes(self):
+        """Indexa en una sola pasada los datos agregados con agregar_diferido()"""
+        if not self.pendientes:
+            return
+        with self.cerrojo_pendientes:
+            pendientes = self.pendientes
+            if not pendientes:
+                # Otra búsqueda acaba de indexarlos
+                return
+            postings = self.postings
+            palabras_por_clave = self.palabras_por_clave
+            orden = self.orden
+            siguiente = self.siguiente_orden
+            pesos_de = self._pesos
+            nuevas = []
+            for clave, dato in pendientes:
+                pesos = pesos_de(dato)
+                for palabra, peso in pesos.items():
+                    claves = postings.get(palabra)
+                    if claves is None:
+                        postings[palabra] = {clave: peso}
+                        nuevas.append(palabra)
+                    else:
+                        claves[clave] = peso
+                palabras_por_clave[clave] = tuple(pesos)
+                orden[clave] = siguiente
+                siguiente += 1
+            self.siguiente_orden = siguiente
+            # El vocabulario (y el diccionario de borrados de IndiceAproximado)
+            # recibe cada palabra nueva una sola vez por lote
+            for palabra in nuevas:
+                self._agregar_al_vocabulario(palabra)
+            # Se vacía al final: las búsquedas que lo ven con datos esperan al cerrojo
+            self.pendientes = []
+    
+    def agregar(self, clave, dato, orden=None):
+        """
+        Indexa los campos de un dato.
+        
+        Args:
+            clave: Clave primaria del dato.
+            dato: Objeto con los atributos indicados en campos.
+            orden (int, optional): Posición para desempatar; por defecto, al final.
+        """
+        self.indexar_pendientes()
+        if clave in self.palabras_por_clave:
+            self.eliminar(clave)
+        
+        pesos = self._pesos(dato)
+        postings = self.postings
+        for palabra, peso in pesos.items():
+            claves = postings.get(palabra)
+            if claves is None:
+                postings[palabra] = {clave: peso}
+                self._agregar_al_vocabulario(palabra)
+            else:
+                claves[clave] = peso
+        
+        self.palabras_por_clave[clave] = tuple(pesos)
+        if orden is None:
+            orden = self.siguiente_orden
+            self.siguiente_orden += 1
+        else:
+            self.desordenadas.add(clave)
+        self.orden[clave] = orden
+    
+    def eliminar(self, clave):
+        """
+        Quita un dato del índice.
+        
+        Args:
+            clave: Clave primaria del dato.
+            
+        Returns:
+            bool: True si el dato estaba indexado.
+        """
+        self.indexar_pendientes()
+        palabras = self.palabras_por_clave.pop(clave, None)
+        if palabras is None:
+            return False
+        
+        for palabra in palabras:
+            claves = self.postings[palabra]
+            del claves[clave]
+            if not claves:
+                # Nadie más usa la palabra: quitarla también del vocabulario
+                del self.postings[palabra]
+                self._quitar_del_vocabulario(palabra)
+        del self.orden[clave]
+        self.desordenadas.discard(clave)
+        return True
+    
+    def _agregar_al_vocabulario(self, palabra):
+        """Agrega una palabra nueva al vocabulario"""
+        self.vocabulario_nuevo.add(palabra)
+    
+    def _quitar_del_vocabulario(self, palabra):
+        """Quita una palabra sin uso del vocabulario"""
+        if palabra in self.vocabulario_nuevo:
+            self.vocabulario_nuevo.discard(palabra)
+            return
+        posicion = bisect_left(self.vocabulario, palabra)
+        if posicion < len(self.vocabulario) and self.vocabulario[posicion] == palabra:
+            del self.vocabulario[posicion]
+    
+    def _fusionar_vocabulario(self):
+        """Incorpora las palabras nuevas a la lista ordenada del vocabulario"""
+        with self.cerrojo_vocabulario:
+            if not self.vocabulario_nuevo:
+                # Otra búsqueda acaba de fusionarlo
+                return
+            # La lista grande ya está ordenada: sorted() la fusiona con las nuevas en tiempo lineal.
+            # Se reemplaza primero la lista y después el conjunto: una búsqueda
+            # simultánea puede ver una palabra repetida, pero nunca perderla
+            self.vocabulario = sorted(self.vocabulario + sorted(self.vocabulario_nuevo))
+            self.vocabulario_nuevo = set()
+    
+    def actualizar(self, clave_anterior, clave, dato):
+        """
+        Reindexa un dato modificado conservando su posición para desempates.
+        
+        Args:
+            clave_anterior: Clave con la que estaba indexado el dato.
+            clave: Clave actual del dato (puede ser la misma).
+            dato: El dato con sus valores nuevos.
+        """
+        self.indexar_pendientes()
+        orden = self.orden.get(clave_anterior)
+        self.eliminar(clave_anterior)
+        self.agregar(clave, dato, orden)
+    
+    def palabras_con_prefijo(self, prefijo):
+        """
+        Devuelve las palabras del vocabulario que comienzan con un prefijo.
+        
+        Args:
+            prefijo (str): Prefijo normalizado.
+            
+        Returns:
+            list: Palabras que comienzan con el prefijo.
+        """
+        self.indexar_pendientes()
+        if len(self.vocabulario_nuevo) > self.MAXIMO_VOCABULARIO_NUEVO:
+            self._fusionar_vocabulario()
+        
+        # El conjunto se lee antes que la lista (al revés de como los reemplaza la
+        # fusión); una palabra repetida no cambia el resultado de buscar()
+        vocabulario_nuevo = self.vocabulario_nuevo
+        vocabulario = self.vocabulario
+        inicio = bisect_left(vocabulario, prefijo)
+        fin = bisect_left(vocabulario, prefijo + "\U0010ffff")
+        palabras = vocabulario[inicio:fin]
+        # Pocas palabras nuevas: es más barato recorrerlas que fusionarlas
+        palabras.extend(palabra for palabra in vocabulario_nuevo if palabra.startswith(prefijo))
+        return palabras
+    
+    def buscar(self, consulta, limite=None):
+        """
+        Busca los datos que contienen todas las palabras de la consulta.
+        
+        Las palabras deben coincidir completas, salvo la última, que también
+        puede ser el prefijo de una palabra indexada (para poder buscar
+        mientras se escribe). La puntuación de un dato suma, por cada palabra
+        de la consulta, el peso del campo donde coincide (reducido si la
+        coincidencia es solo por prefijo).
+        
+        Args:
+            consulta (str): Texto a buscar.
+            limite (int, optional): Número máximo de resultados.
+            
+        Returns:
+            list: Claves de los datos encontrados, de mayor a menor relevancia.
+        """
+        palabras = tokenizar(consulta)
+        if not palabras:
+            return []
+        self.indexar_pendientes()
+        
+        # Cada término es una lista de (postings, factor) que pueden satisfacerlo
+        terminos = []
+        for posicion, palabra in enumerate(palabras):
+            termino = []
+            if palabra in self.postings:
+                termino.append((self.postings[palabra], 1))
+            if posicion == len(palabras) - 1 and len(palabra) >= self.MINIMO_PREFIJO:
+                termino.extend((self.postings[extendida], self.FACTOR_PREFIJO)
+                               for extendida in self.palabras_con_prefijo(palabra)
+                               if extendida != palabra)
+            if not termino:
+                return []
+            terminos.append(termino)
+        
+        # El término más selectivo genera los candidatos; los demás solo los filtran
+        terminos.sort(key=lambda termino: sum(len(claves) for claves, _ in termino))
+        if limite is not None and len(terminos) == 1 and len(terminos[0]) == 1:
+            # Una sola lista: no hace falta puntuar todas las claves para quedarse con las primeras
+            return self._primeras_por_peso(terminos[0][0][0], limite)
+        if len(terminos[0]) == 1:
+            claves, factor = terminos[0][0]
+            puntuaciones = {clave: peso * factor for clave, peso in claves.items()}
+        else:
+            puntuaciones = {}
+            for claves, factor in terminos[0]:
+                for clave, peso in claves.items():
+                    peso *= factor
+                    if peso > puntuaciones.get(clave, 0):
+                        puntuaciones[clave] = peso
+        
+        for termino in terminos[1:]:
+            filtradas = {}
+            for clave, puntuacion in puntuaciones.items():
+                mejor = 0
+                for claves, factor in termino:
+                    peso = claves.get(clave)
+                    if peso is not None and peso * factor > mejor:
+                        mejor = peso * factor
+                if mejor:
+                    filtradas[clave] = puntuacion + mejor
+            puntuaciones = filtradas
+            if not puntuaciones:
+                return []
+        
+        # Hay pocas puntuaciones distintas: se agrupan las claves por puntuación
+        # y dentro de cada grupo se desempata por orden de inserción
+        grupos = {}
+        for clave, puntuacion in puntuaciones.items():
+            grupo = grupos.get(puntuacion)
+            if grupo is None:
+                grupos[puntuacion] = [clave]
+            else:
+                grupo.append(clave)
+        
+        por_orden = self.orden.__getitem__
+        resultado = []
+        for puntuacion in sorted(grupos, reverse=True):
+            faltan = None if limite is None else limite - len(resultado)
+            if faltan is not None and faltan <= 0:
+                break
+            grupo = grupos[puntuacion]
+            if faltan is not None and faltan < len(grupo):
+                resultado.extend(heapq.nsmallest(faltan, grupo, key=por_orden))
+            else:
+                grupo.sort(key=por_orden)
+                resultado.extend(grupo)
+        return resultado
+    
+    def _primeras_por_peso(self, claves, limite):
+        """Devuelve las limite claves de mayor peso de una lista, desempatando por orden de inserción"""
+        por_orden = self.orden.__getitem__
+        desordenadas = self.desordenadas
+        pesos = set(claves.values())
+        resultado = []
+        for peso in sorted(pesos, reverse=True):
+            faltan = limite - len(resultado)
+            if faltan <= 0:
+                break
+            if len(pesos) == 1:
+                grupo = iter(claves)
+                fuera = [clave for clave in desordenadas if clave in claves]
+            else:
+                grupo = (clave for clave, p in claves.items() if p == peso)
+                fuera = [clave for clave in desordenadas if claves.get(clave) == peso]
+            # La lista está en orden de inserción salvo las claves desordenadas:
+            # basta con las primeras de la lista más las desordenadas del grupo
+            if desordenadas:
+                grupo = (clave for clave in grupo if clave not in desordenadas)
+            candidatas = list(islice(grupo, faltan)) + fuera
+            resultado.extend(heapq.nsmallest(faltan, candidatas, key=por_orden))
+        return resultado
+
+
+def distancia_edicion(a, b, maximo):
+    """
+    Calcula la distancia de edición entre dos palabras, con un máximo.
+    
+    Cuenta inserciones, eliminaciones, sustituciones y transposiciones de
+    letras vecinas ("tolkein" está a distancia 1 de "tolkien"). El cálculo se
+    abandona en cuanto la distancia supera el máximo.
+    
+    Args:
+        a (str): Primera palabra.
+        b (str): Segunda palabra.
+        maximo (int): Distancia máxima que interesa.
+        
+    Returns:
+        int: La distancia, o maximo + 1 si es mayor que el máximo.
+    """
+    if a == b:
+        return 0
+    if abs(len(a) - len(b)) > maximo:
+        return maximo + 1
+    
+    # El principio y el final comunes no cambian la distancia: las palabras
+    # candidatas suelen compartir casi todas sus letras con la consulta
+    inicio = 0
+    limite = min(len(a), len(b))
+    while inicio < limite and a[inicio] == b[inicio]:
+        inicio += 1
+    fin = 0
+    while fin < limite - inicio and a[-1 - fin] == b[-1 - fin]:
+        fin += 1
+    if inicio or fin:
+        a = a[inicio:len(a) - fin]
+        b = b[inicio:len(b) - fin]
+        if not a or not b:
+            distancia = len(a) + len(b)
+            return distancia if distancia <= maximo else maximo + 1
+    
+    # Solo se calculan las celdas a menos de "maximo" de la diagonal: las
+    # demás ya superan el máximo y se dejan en "fuera"
+    fuera = maximo + 1
+    largo = len(b)
+    anterior2 = None
+    anterior = [j if j <= maximo else fuera for j in range(largo + 1)]
+    for i in range(1, len(a) + 1):
+        actual = [fuera] * (largo + 1)
+        if i <= maximo:
+            actual[0] = i
+        letra = a[i - 1]
+        mejor = actual[0]
+        for j in range(max(1, i - maximo), min(largo, i + maximo) + 1):
+            valor = anterior[j - 1] if letra == b[j - 1] else anterior[j - 1] + 1
+            if anterior[j] + 1 < valor:
+                valor = anterior[j] + 1
+            if actual[j - 1] + 1 < valor:
+                valor = actual[j - 1] + 1
+            if (j > 1 and anterior2 is not None and letra == b[j - 2]
+                    and a[i - 2] == b[j - 1] and anterior2[j - 2] + 1 < valor):
+                valor = anterior2[j - 2] + 1
+            if valor > fuera:
+                valor = fuera
+            actual[j] = valor
+            if valor < mejor:
+                mejor = valor
+        if mejor > maximo:
+            return fuera
+        anterior2, anterior = anterior, actual
+    return anterior[largo]
+
+
+def variantes_por_borrado(palabra, distancia):
+    """
+    Devuelve las variantes de una palabra con hasta "distancia" letras borradas.
+    
+    Args:
+        palabra (str): La palabra original (incluida en el resultado).
+        distancia (int): Número máximo de letras a borrar.
+        
+    Returns:
+        set: La palabra y todas sus variantes.
+    """
+    variantes = {palabra}
+    frontera = {palabra}
+    for _ in range(distancia):
+        siguiente = set()
+        for variante in frontera:
+            if len(variante) > 1:
+                for i in range(len(variante)):
+                    siguiente.add(variante[:i] + variante[i + 1:])
+        siguiente -= variantes
+        variantes |= siguiente
+        frontera = siguiente
+    return variantes
+
+
+class IndiceAproximado(IndiceInvertido):
+    """
+    Índice invertido que además tolera errores de escritura en la consulta.
+    
+    Mantiene un diccionario de borrados al estilo SymSpell: cada palabra del
+    vocabulario se registra bajo todas sus variantes con hasta
+    DISTANCIA_MAXIMA letras borradas (calculadas sobre sus primeras
+    LONGITUD_PREFIJO letras). Dos palabras a distancia de edición d comparten
+    alguna variante con d borrados o menos, así que una consulta solo calcula
+    la distancia exacta contra las palabras que comparten variantes con ella,
+    sin recorrer el vocabulario.
+    
+    Las palabras formadas solo por dígitos (años, números de tomo) no entran
+    en el diccionario de borrados: se buscan únicamente de forma exacta.
+    
+    Atributos:
+        variantes (dict): Variante -> conjunto de palabras del vocabulario.
+    """
+    
+    # Distancia de edición máxima admitida por palabra
+    DISTANCIA_MAXIMA = 2
+    # Letras de cada palabra que se usan para generar las variantes
+    LONGITUD_PREFIJO = 7
+    
+    def __init__(self, campos):
+        """
+        Inicializa un índice vacío.
+        
+        Args:
+            campos (dict): Nombre del atributo -> peso de las coincidencias en ese campo.
+        """
+        super().__init__(campos)
+        self.variantes = {}
+    
+    def _agregar_al_vocabulario(self, palabra):
+        """Agrega una palabra nueva al vocabulario y al diccionario de borrados"""
+        super()._agregar_al_vocabulario(palabra)
+        if palabra.isdigit():
+            return
+        variantes = self.variantes
+        for variante in variantes_por_borrado(palabra[:self.LONGITUD_PREFIJO], self.DISTANCIA_MAXIMA):
+            palabras = variantes.get(variante)
+            if palabras is None:
+                variantes[variante] = {palabra}
+            else:
+                palabras.add(palabra)
+    
+    def _quitar_del_vocabulario(self, palabra):
+        """Quita una palabra sin uso del vocabulario y del diccionario de borrados"""
+        super()._quitar_del_vocabulario(palabra)
+        if palabra.isdigit():
+            return
+        for variante in variantes_por_borrado(palabra[:self.LONGITUD_PREFIJO], self.DISTANCIA_MAXIMA):
+            palabras = self.variantes.get(variante)
+            if palabras is not None:
+                palabras.discard(palabra)
+                if not palabras:
+                    del self.variantes[variante]
+    
+    def distancia_permitida(self, palabra):
+        """
+        Devuelve cuántos errores se admiten en una palabra de la consulta.
+        
+        Las palabras cortas admiten menos errores: "sol" a distancia 2
+        coincidiría con casi cualquier palabra de tres letras.
+        
+        Args:
+            palabra (str): Palabra normalizada de la consulta.
+            
+        Returns:
+            int: Distancia de edición máxima para esa palabra.
+        """
+        if len(palabra) <= 2 or palabra.isdigit():
+            return 0
+        if len(palabra) <= 5:
+            return min(1, self.DISTANCIA_MAXIMA)
+        return self.DISTANCIA_MAXIMA
+    
+    def palabras_similares(self, palabra):
+        """
+        Busca las palabras del vocabulario cercanas a una palabra de la consulta.
+        
+        Args:
+            palabra (str): Palabra normalizada.
+            
+        Returns:
+            dict: Palabra del vocabulario -> distancia de edición.
+        """
+        self.indexar_pendientes()
+        maximo = self.distancia_permitida(palabra)
+        similares = {}
+        if palabra in self.postings:
+            similares[palabra] = 0
+        if maximo == 0:
+            return similares
+        
+        revisadas = set(similares)
+        for variante in variantes_por_borrado(palabra[:self.LONGITUD_PREFIJO], maximo):
+            for candidata in self.variantes.get(variante, ()):
+                if candidata in revisadas:
+                    continue
+                revisadas.add(candidata)
+                distancia = distancia_edicion(palabra, candidata, maximo)
+                if distancia <= maximo:
+                    similares[candidata] = distancia
+        return similares
+    
+    def buscar_aproximado(self, consulta, limite=10):
+        """
+        Busca los datos que contienen palabras parecidas a todas las de la consulta.
+        
+        Los resultados se ordenan por la suma de las distancias de edición
+        (los más parecidos primero), luego por el peso de los campos donde
+        coinciden y por último por orden de inserción.
+        
+        Args:
+            consulta (str): Texto a buscar, posiblemente con errores.
+            limite (int, optional): Número máximo de resultados.
+            
+        Returns:
+            list: Tuplas (clave, distancia total) de los mejores resultados.
+        """
+        palabras = set(tokenizar(consulta))
+        if not palabras:
+            return []
+        
+        # Cada término es una lista de (postings, distancia) ordenada por distancia
+        terminos = []
+        for palabra in palabras:
+            similares = self.palabras_similares(palabra)
+            if not similares:
+                return []
+            terminos.append(sorted(((self.postings[similar], distancia)
+                                    for similar, distancia in similares.items()),
+                                   key=lambda par: par[1]))
+        terminos.sort(key=lambda termino: sum(len(claves) for claves, _ in termino))
+        
+        # El término más selectivo genera los candidatos: clave -> (distancia, -peso)
+        candidatos = {}
+        for claves, distancia in terminos[0]:
+            for clave, peso in claves.items():
+                puntuacion = (distancia, -peso)
+                if clave not in candidatos or puntuacion < candidatos[clave]:
+                    candidatos[clave] = puntuacion
+        
+        for termino in terminos[1:]:
+            filtrados = {}
+            entradas = sum(len(claves) for claves, _ in termino)
+            if len(candidatos) * len(termino) > entradas:
+                # Muchas palabras similares: es más barato recorrer sus postings una
+                # vez que buscar cada candidato en todos ellos
+                mejores = {}
+                for claves, distancia in termino:
+                    for clave, peso in claves.items():
+                        if clave not in mejores:
+                            mejores[clave] = (distancia, peso)
+                for clave, (distancia_total, peso_total) in candidatos.items():
+                    mejor = mejores.get(clave)
+                    if mejor is not None:
+                        filtrados[clave] = (distancia_total + mejor[0], peso_total - mejor[1])
+            else:
+                for clave, (distancia_total, peso_total) in candidatos.items():
+                    for claves, distancia in termino:
+                        peso = claves.get(clave)
+                        if peso is not None:
+                            # Los postings van de menor a mayor distancia: el primero es el mejor
+                            filtrados[clave] = (distancia_total + distancia, peso_total - peso)
+                            break
+            candidatos = filtrados
+            if not candidatos:
+                return []
+        
+        orden = self.orden
+        mejores = heapq.nsmallest(limite, candidatos,
+                                  key=lambda clave: (candidatos[clave], orden[clave]))
+        return [(clave, candidatos[clave][0]) for clave in mejores]
+
+
+@lru_cache(maxsize=1 << 16)
+def trigramas(texto):
+    """
+    Devuelve los trigramas (subcadenas de tres caracteres) distintos de un texto.
+    
+    Args:
+        texto (str): El texto, ya en minúsculas.
+        
+    Returns:
+        frozenset: Los trigramas del texto.
+    """
+    return frozenset([texto[i:i + 3] for i in range(len(texto) - 2)])
+
+
+class IndiceTrigramas:
+    """
+    Índice de trigramas para búsquedas exactas de subcadenas en un campo.
+    
+    Cada trigrama del texto en minúsculas apunta a los documentos que lo
+    contienen. Una búsqueda toma la lista del trigrama menos frecuente de la
+    consulta como candidatos y verifica en ellos la subcadena completa, así
+    que devuelve exactamente lo mismo que "consulta in texto.lower()" sin
+    recorrer todos los datos. Las consultas de menos de tres caracteres
+    recorren los textos guardados.
+    
+    Cada dato recibe un número de documento al agregarse que conserva aunque
+    se actualice o cambie de clave; los resultados se devuelven en ese orden,
+    que coincide con el de inserción en la lista.
+    
+    Como en IndiceInvertido, las importaciones masivas usan agregar_diferido()
+    y las listas de todos los pendientes se construyen juntas antes de la
+    siguiente búsqueda o modificación.
+    
+    Atributos:
+        campo (str): Nombre del atributo indexado.
+        postings (dict): Trigrama -> array de números de documento.
+        documentos (dict): Clave -> número de documento.
+        datos (dict): Número de documento -> dato indexado.
+        textos (dict): Número de documento -> texto en minúsculas.
+        entradas (int): Total de entradas en postings.
+        obsoletas (int): Entradas de postings que ya no corresponden al texto
+                         actual de su documento.
+        pendientes (list): Pares (clave, dato) agregados con agregar_diferido()
+                           y aún no indexados.
+    """
+    
+    def __init__(self, campo):
+        """
+        Inicializa un índice vacío.
+        
+        Args:
+            campo (str): Nombre del atributo a indexar.
+        """
+        self.campo = campo
+        self.postings = {}
+        self.documentos = {}
+        self.datos = {}
+        self.textos = {}
+        self.entradas = 0
+        self.obsoletas = 0
+        self.siguiente_documento = 0
+        self.pendientes = []
+        # Con varios hilos buscando, solo uno indexa los pendientes
+        self.cerrojo_pendientes = threading.Lock()
+    
+    def __len__(self):
+        """
+        Devuelve el número de datos indexados (incluidos los pendientes).
+        
+        Returns:
+            int: Cantidad de claves en el índice.
+        """
+        return len(self.documentos) + len(self.pendientes)
+    
+    def _texto(self, dato):
+        """Devuelve el texto indexable de un dato, en minúsculas"""
+        return (getattr(dato, self.campo) or "").lower()
+    
+    def _publicar(self, documento, grupos):
+        """Agrega un documento a las listas de los trigramas indicados"""
+        postings = self.postings
+        for trigrama in grupos:
+            lista = postings.get(trigrama)
+            if lista is None:
+                postings[trigrama] = array("q", (documento,))
+            else:
+                lista.append(documento)
+        self.entradas += len(grupos)
+    
+    def agregar_diferido(self, clave, dato):
+        """
+        Deja un dato nuevo pendiente de indexar (ver indexar_pendientes).
+        
+        Args:
+            clave: Clave única del dato (no debe estar indexada ya).
+            dato: El dato a indexar.
+        """
+        self.pendientes.append((clave, dato))
+    
+    def indexar_pendientes(self):
+        """Indexa juntos los datos agregados con agregar_diferido()"""
+        if not self.pendientes:
+            return
+        with self.cerrojo_pendientes:
+            pendientes = self.pendientes
+            if not pendientes:
+                # Otra búsqueda acaba de indexarlos
+                return
+            documentos = self.documentos
+            datos = self.datos
+            textos = self.textos
+            campo = self.campo
+            documento = self.siguiente_documento
+            # Se reúnen primero los documentos de cada trigrama en listas y
+            # después se extiende cada array una sola vez
+            nuevas = {}
+            entradas = 0
+            for clave, dato in pendientes:
+                texto = (getattr(dato, campo) or "").lower()
+                documentos[clave] = documento
+                datos[documento] = dato
+                textos[documento] = texto
+                grupos = trigramas(texto)
+                entradas += len(grupos)
+                for trigrama in grupos:
+                    lista = nuevas.get(trigrama)
+                    if lista is None:
+                        nuevas[trigrama] = [documento]
+                    else:
+                        lista.append(documento)
+                documento += 1
+            self.siguiente_documento = documento
+            postings = self.postings
+            for trigrama, lista in nuevas.items():
+                anterior = postings.get(trigrama)
+                if anterior is None:
+                    postings[trigrama] = array("q", lista)
+                else:
+                    anterior.extend(lista)
+            self.entradas += entradas
+            # Se vacía al final: las búsquedas que lo ven con datos esperan al cerrojo
+            self.pendientes = []
+    
+    def agregar(self, clave, dato):
+        """
+        Agrega un dato al índice.
+        
+        Args:
+            clave: Clave única del dato.
+            dato: El dato a indexar.
+        """
+        self.indexar_pendientes()
+        if clave in self.documentos:
+            self.eliminar(clave)
+        documento = self.siguiente_documento
+        self.siguiente_documento += 1
+        texto = self._texto(dato)
+        self.documentos[clave] = documento
+        self.datos[documento] = dato
+        self.textos[documento] = texto
+        self._publicar(documento, trigramas(texto))
+    
+    def eliminar(self, clave):
+        """
+        Quita un dato del índice.
+        
+        Las entradas de sus trigramas se descartan de forma perezosa: las
+        búsquedas las ignoran y se limpian al compactar.
+        
+        Args:
+            clave: Clave del dato a quitar.
+            
+        Returns:
+            bool: True si el dato estaba indexado, False en caso contrario.
+        """
+        self.indexar_pendientes()
+        documento = self.documentos.pop(clave, None)
+        if documento is None:
+            return False
+        del self.datos[documento]
+        self.obsoletas += len(trigramas(self.textos.pop(documento)))
+        self._compactar_si_conviene()
+        return True
+    
+    def actualizar(self, clave_anterior, clave, dato):
+        """
+        Reindexa un dato modificado conservando su número de documento.
+        
+        Args:
+            clave_anterior: Clave con la que estaba indexado el dato.
+            clave: Clave actual del dato (puede ser la misma).
+            dato: El dato con sus valores nuevos.
+        """
+        self.indexar_pendientes()
+        documento = self.documentos.pop(clave_anterior, None)
+        if documento is None:
+            self.agregar(clave, dato)
+            return
+        self.documentos[clave] = documento
+        self.datos[documento] = dato
+        
+        anteriores = trigramas(self.textos[documento])
+        texto = self._texto(dato)
+        self.textos[documento] = texto
+        nuevos = trigramas(texto)
+        # Solo se publican los trigramas que el texto anterior no tenía
+        self._publicar(documento, nuevos - anteriores)
+        self.obsoletas += len(anteriores - nuevos)
+        self._compactar_si_conviene()
+    
+    def _compactar_si_conviene(self):
+        """Reconstruye las listas cuando la mitad de sus entradas están obsoletas"""
+        if self.obsoletas * 2 > self.entradas:
+            self.compactar()
+    
+    def compactar(self):
+        """Reconstruye las listas de trigramas a partir de los textos actuales"""
+        self.indexar_pendientes()
+        self.postings = {}
+        self.entradas = 0
+        self.obsoletas = 0
+        for documento, texto in self.textos.items():
+            self._publicar(documento, trigramas(texto))
+    
+    def buscar(self, consulta):
+        """
+        Busca los datos cuyo campo contiene la consulta (sin distinguir mayúsculas).
+        
+        Args:
+            consulta (str): Texto a buscar.
+            
+        Returns:
+            list: Los datos encontrados, en orden de inserción.
+        """
+        self.indexar_pendientes()
+        consulta = consulta.lower()
+        textos = self.textos
+        if len(consulta) < 3:
+            encontrados = [documento for documento, texto in textos.items() if consulta in texto]
+        else:
+            candidatos = None
+            for trigrama in trigramas(consulta):
+                lista = self.postings.get(trigrama)
+                if lista is None:
+                    return []
+                if candidatos is None or len(lista) < len(candidatos):
+                    candidatos = lista
+            # Las entradas obsoletas se descartan al verificar
+            encontrados = [documento for documento in candidatos
+                           if consulta in textos.get(documento, "")]
+            # Las listas están casi ordenadas: solo las actualizaciones agregan
+            # al final números antiguos (y, si hay obsoletas, repetidos)
+            encontrados.sort()
+            if self.obsoletas:
+                encontrados = list(dict.fromkeys(encontrados))
+        datos = self.datos
+        return [datos[documento] for documento in encontrados]
+
+
+class IndiceFechas:
+    """
+    Índice de datos ordenado por número de día (ver prestamo.fecha_a_dia).
+
+    Agrupa los datos en un cubo por día y mantiene ordenada la lista de días
+    distintos. Como hay muchos menos días distintos que datos (los préstamos
+    activos vencen en unos pocos cientos de fechas), agregar y eliminar
+    cuestan O(1) más una búsqueda binaria, y un rango de fechas se recorre en
+    O(log d + k): solo se visitan los cubos del rango.
+
+    Atributos:
+        cubos (dict): Día -> {clave: dato}, en orden de inserción.
+        dias (list): Días con algún dato, ordenados.
+        dia_de (dict): Clave -> día en que está el dato.
+    """
+
+    def __init__(self):
+        """Inicializa un índice vacío."""
+        self.cubos = {}
+        self.dias = []
+        self.dia_de = {}
+
+    def __len__(self):
+        """Devuelve el número de datos del índice"""
+        return len(self.dia_de)
+
+    def agregar(self, dia, clave, dato):
+        """
+        Agrega un dato en un día; si la clave ya estaba, se mueve.
+
+        Args:
+            dia (int): Número de día.
+            clave: Clave única del dato.
+            dato: El dato.
+        """
+        if clave in self.dia_de:
+            self.eliminar(clave)
+        cubo = self.cubos.get(dia)
+        if cubo is None:
+            cubo = self.cubos[dia] = {}
+            insort(self.dias, dia)
+        cubo[clave] = dato
+        self.dia_de[clave] = dia
+
+    def eliminar(self, clave):
+        """
+        Quita un dato del índice.
+
+        Args:
+            clave: Clave del dato.
+
+        Returns:
+            int: Día en que estaba, o None si no estaba.
+        """
+        dia = self.dia_de.pop(clave, None)
+        if dia is None:
+            return None
+        cubo = self.cubos[dia]
+        del cubo[clave]
+        if not cubo:
+            del self.cubos[dia]
+            del self.dias[bisect_left(self.dias, dia)]
+        return dia
+
+    def dia(self, clave):
+        """Devuelve el día de un dato, o None si no está"""
+        return self.dia_de.get(clave)
+
+    def _dias(self, desde, hasta):
+        """Devuelve los días con datos en [desde, hasta); None no limita"""
+        inicio = 0 if desde is None else bisect_left(self.dias, desde)
+        fin = len(self.dias) if hasta is None else bisect_left(self.dias, hasta)
+        return self.dias[inicio:fin]
+
+    def rango(self, desde=None, hasta=None):
+        """
+        Recorre en orden de día los datos con desde <= día < hasta.
+
+        Args:
+            desde (int, optional): Primer día incluido (sin límite si es None).
+            hasta (int, optional): Primer día excluido (sin límite si es None).
+
+        Returns:
+            generator: Los datos, ordenados por día (a igual día, por inserción).
+        """
+        cubos = self.cubos
+        for dia in self._dias(desde, hasta):
+            yield from cubos[dia].values()
+
+    def contar(self, desde=None, hasta=None):
+        """Cuenta los datos con desde <= día < hasta (recorre solo los días, no los datos)"""
+        cubos = self.cubos
+        return sum(len(cubos[dia]) for dia in self._dias(desde, hasta))
 
 
 # Bloque de prueba para verificar el funcionamiento de las estructuras
@@ -207,8 +1649,63 @@ if __name__ == "__main__":
     print(f"Lista después de eliminar: {lista}")
     print(f"Tamaño de la lista: {lista.tamanio}")
     
+    # Recorrer la lista sin copiarla
+    print(f"Longitud con len(): {len(lista)}")
+    print(f"En orden inverso: {list(reversed(lista))}")
+    
     # Listar todos los elementos
     todos = lista.listar()
     print(f"Todos los elementos: {todos}")
     
+    # Prueba de la ListaIndexada
+    indexada = ListaIndexada(lambda x: x.split()[-1])
+    indexada.agregar("Libro 1")
+    indexada.agregar("Libro 2")
+    indexada.agregar("Libro 3")
+    print(f"¿Se agregó un duplicado? {indexada.agregar('Otro 2')}")
+    print(f"Obtener por clave '3': {indexada.obtener('3')}")
+    indexada.eliminar_por_clave("2")
+    print(f"Lista indexada después de eliminar: {indexada}")
+    print(f"Tamaño de la lista indexada: {indexada.tamanio}")
+    
+    # Prueba del IndiceInvertido
+    class Dato:
+        def __init__(self, titulo, autor):
+            self.titulo = titulo
+            self.autor = autor
+    
+    indice = IndiceInvertido({'titulo': 2, 'autor': 1})
+    indice.agregar(1, Dato("Cien años de soledad", "Gabriel García Márquez"))
+    indice.agregar(2, Dato("El amor en los tiempos del cólera", "Gabriel García Márquez"))
+    indice.agregar(3, Dato("Garcia y los gatos", "Ana Pérez"))
+    print(f"Búsqueda 'garcia': {indice.buscar('garcia')}")
+    print(f"Búsqueda 'gabriel col': {indice.buscar('gabriel col')}")
+    indice.eliminar(2)
+    print(f"Búsqueda 'marquez' tras eliminar: {indice.buscar('marquez')}")
+    
+    # Prueba del IndiceAproximado
+    aproximado = IndiceAproximado({'titulo': 2, 'autor': 1})
+    aproximado.agregar(1, Dato("El Hobbit", "J.R.R. Tolkien"))
+    aproximado.agregar(2, Dato("El gran Gatsby", "F. Scott Fitzgerald"))
+    print(f"Distancia 'tolkein'-'tolkien': {distancia_edicion('tolkein', 'tolkien', 2)}")
+    print(f"Búsqueda aproximada 'Tolkein': {aproximado.buscar_aproximado('Tolkein')}")
+    print(f"Búsqueda aproximada 'Fitzgerlad gatbsy': {aproximado.buscar_aproximado('Fitzgerlad gatbsy')}")
+    
+    # Prueba del IndiceTrigramas
+    trigramas_titulo = IndiceTrigramas('titulo')
+    trigramas_titulo.agregar(1, Dato("Cien años de soledad", "Gabriel García Márquez"))
+    trigramas_titulo.agregar(2, Dato("El amor en los tiempos del cólera", "Gabriel García Márquez"))
+    trigramas_titulo.agregar(3, Dato("Soledades", "Antonio Machado"))
+    print(f"Títulos que contienen 'OLE': {[d.titulo for d in trigramas_titulo.buscar('OLE')]}")
+    trigramas_titulo.actualizar(1, 10, Dato("Cien años", "Gabriel García Márquez"))
+    print(f"Títulos que contienen 'sol' tras actualizar: {[d.titulo for d in trigramas_titulo.buscar('sol')]}")
+    
+    # Prueba del IndiceFechas
+    fechas = IndiceFechas()
+    for clave, dia in (("P1", 10), ("P2", 12), ("P3", 10), ("P4", 15)):
+        fechas.agregar(dia, clave, clave)
+    fechas.eliminar("P3")
+    print(f"Datos antes del día 13: {list(fechas.rango(hasta=13))}")
+    print(f"Datos entre los días 12 y 15: {list(fechas.rango(12, 16))}, total: {fechas.contar(12, 16)}")
+    
     print("=== Prueba completada ===")
\ No newline at end of file
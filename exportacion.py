@@ -0,0 +1,173 @@
+# exportacion.py
+# Exportación y respaldo del estado de la biblioteca a archivos CSV o JSONL.
+# Uso: python exportacion.py DIRECTORIO [--db RUTA | --diario CARPETA] [--formato csv|jsonl] [--sin-compresion]
+import argparse
+import csv
+import json
+import os
+import sys
+
+from importacion import abrir_texto, formato_archivo, importar_archivo
+
+
+# Columnas de cada tipo de registro, en el mismo orden que las claves de to_dict
+COLUMNAS = {
+    'libros': ('isbn', 'titulo', 'autor', 'año_publicacion', 'genero', 'disponible', 'ejemplares'),
+    'usuarios': ('id_usuario', 'nombre', 'contacto'),
+    'prestamos': ('id_prestamo', 'isbn_libro', 'id_usuario', 'fecha_prestamo',
+                  'fecha_devolucion', 'activo', 'codigo_barras'),
+}
+
+
+def exportar(objetos, ruta, columnas):
+    """
+    Escribe objetos con to_dict() en un archivo CSV o JSONL, uno por uno.
+
+    Los objetos se consumen del iterable a medida que se escriben, así que
+    la memoria usada no depende del número de registros. El formato se
+    deduce de la extensión (.csv o .jsonl, con .gz opcional para comprimir).
+    En CSV los valores None se escriben como celdas vacías, que la
+    importación vuelve a convertir en None, y las listas (los códigos de
+    barras de los ejemplares) como sus elementos separados por espacios.
+
+    Args:
+        objetos: Iterable de objetos con método to_dict().
+        ruta (str): Archivo de destino.
+        columnas (tuple): Nombres de las columnas (claves de to_dict).
+
+    Returns:
+        int: Número de registros escritos.
+
+    Raises:
+        ValueError: Si la extensión no es .csv ni .jsonl (ver formato_archivo).
+    """
+    total = 0
+    formato = formato_archivo(ruta)
+    with abrir_texto(ruta, "w") as archivo:
+        if formato == "csv":
+            escritor = csv.writer(archivo)
+            escritor.writerow(columnas)
+            ejemplares = columnas.index('ejemplares') if 'ejemplares' in columnas else None
+            for objeto in objetos:
+                datos = objeto.to_dict()
+                fila = ["" if datos[c] is None else datos[c] for c in columnas]
+                if ejemplares is not None and type(fila[ejemplares]) is list:
+                    fila[ejemplares] = " ".join(fila[ejemplares])
+                escritor.writerow(fila)
+                total += 1
+        else:
+            codificar = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+            escribir = archivo.write
+            for objeto in objetos:
+                escribir(codificar(objeto.to_dict()))
+                escribir("\n")
+                total += 1
+    return total
+
+
+def exportar_libros(sistema, ruta):
+    """Exporta todos los libros del sistema; devuelve el número de registros"""
+    return exportar(sistema.iterar_libros(), ruta, COLUMNAS['libros'])
+
+
+def exportar_usuarios(sistema, ruta):
+    """Exporta todos los usuarios del sistema; devuelve el número de registros"""
+    return exportar(sistema.iterar_usuarios(), ruta, COLUMNAS['usuarios'])
+
+
+def exportar_prestamos(sistema, ruta):
+    """Exporta todo el historial de préstamos; devuelve el número de registros"""
+    return exportar(sistema.iterar_prestamos(), ruta, COLUMNAS['prestamos'])
+
+
+def nombre_archivo(tipo, formato, comprimir):
+    """Devuelve el nombre de archivo de respaldo de un tipo de registro"""
+    return f"{tipo}.{formato}" + (".gz" if comprimir else "")
+
+
+def respaldar(sistema, directorio, formato="jsonl", comprimir=True):
+    """
+    Escribe un respaldo completo del sistema en un directorio.
+
+    Args:
+        sistema (SistemaBiblioteca): Sistema a respaldar.
+        directorio (str): Carpeta de destino (se crea si no existe).
+        formato (str): "jsonl" o "csv".
+        comprimir (bool): Si se comprimen los archivos con gzip.
+
+    Returns:
+        dict: Número de registros escritos por tipo.
+    """
+    os.makedirs(directorio, exist_ok=True)
+    exportadores = {
+        'libros': exportar_libros,
+        'usuarios': exportar_usuarios,
+        'prestamos': exportar_prestamos,
+    }
+    totales = {}
+    for tipo, exportador in exportadores.items():
+        ruta = os.path.join(directorio, nombre_archivo(tipo, formato, comprimir))
+        # Escribir en un temporal y renombrar: un respaldo a medias no pisa al
+        # anterior. El temporal conserva la extensión (libros.tmp.jsonl.gz)
+        temporal = os.path.join(directorio, nombre_archivo(f"{tipo}.tmp", formato, comprimir))
+        totales[tipo] = exportador(sistema, temporal)
+        os.replace(temporal, ruta)
+    return totales
+
+
+def restaurar(sistema, directorio, formato="jsonl", comprimir=True):
+    """
+    Carga en el sistema un respaldo escrito con respaldar().
+
+    Los libros y usuarios se importan antes que los préstamos, que dependen
+    de ellos.
+
+    Args:
+        sistema (SistemaBiblioteca): Sistema de destino (normalmente vacío).
+        directorio (str): Carpeta del respaldo.
+        formato (str): "jsonl" o "csv".
+        comprimir (bool): Si los archivos están comprimidos con gzip.
+
+    Returns:
+        dict: ResultadoImportacion por tipo.
+    """
+    resultados = {}
+    for tipo in ('libros', 'usuarios', 'prestamos'):
+        ruta = os.path.join(directorio, nombre_archivo(tipo, formato, comprimir))
+        resultados[tipo] = importar_archivo(sistema, ruta, tipo)
+    return resultados
+
+
+def main(argumentos=None):
+    """Punto de entrada de la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Respaldo del estado de la biblioteca")
+    parser.add_argument("directorio", help="Carpeta donde escribir el respaldo")
+    origen = parser.add_mutually_exclusive_group()
+    origen.add_argument("--db", help="Base de datos SQLite a respaldar")
+    origen.add_argument("--diario", help="Carpeta del almacenamiento con diario a respaldar")
+    parser.add_argument("--formato", choices=("jsonl", "csv"), default="jsonl")
+    parser.add_argument("--sin-compresion", action="store_true", help="No comprimir con gzip")
+    args = parser.parse_args(argumentos)
+
+    from main import SistemaBiblioteca
+    almacenamiento = None
+    if args.db:
+        from persistencia import AlmacenamientoSQLite
+        almacenamiento = AlmacenamientoSQLite(args.db)
+    elif args.diario:
+        from persistencia import AlmacenamientoDiario
+        almacenamiento = AlmacenamientoDiario(args.diario)
+
+    sistema = SistemaBiblioteca(almacenamiento, datos_ejemplo=almacenamiento is None)
+    try:
+        totales = respaldar(sistema, args.directorio, args.formato, not args.sin_compresion)
+    finally:
+        sistema.cerrar()
+
+    for tipo, total in totales.items():
+        print(f"{tipo}: {total} registros")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+# historial.py
+# Historial de préstamos guardado por columnas: cada campo es un arreglo
+# compacto (array) en lugar de un objeto por préstamo.
+from array import array
+from bisect import bisect_left
+
+from prestamo import Prestamo
+
+
+class HistorialColumnar:
+    """
+    Secuencia de préstamos almacenada como columnas de enteros.
+
+    Un préstamo del historial ocupa unos 29 bytes repartidos en siete
+    arreglos, frente a un objeto Prestamo por registro. Los valores se
+    codifican así:
+
+    - ID "P001", "P002"...: el número (los IDs con otro formato se guardan
+      aparte, como objetos).
+    - ISBN, ID de usuario y código de barras del ejemplar: un código en una
+      tabla de textos compartida, ya que se repiten en todos los préstamos
+      del mismo libro, usuario o ejemplar (-1 si no hay ejemplar).
+    - Fechas: número de día (ver prestamo.fecha_a_dia); 0 si no hay devolución.
+
+    Los préstamos se reconstruyen como objetos Prestamo al leerlos, así que
+    los cambios en un préstamo leído se guardan con actualizar().
+
+    Atributos:
+        numeros (array): Número del ID de cada fila (-1 si no tiene formato PNNN).
+        codigos_libro (array): Código del ISBN de cada fila.
+        codigos_usuario (array): Código del ID de usuario de cada fila.
+        codigos_ejemplar (array): Código del ejemplar de cada fila (-1 = ninguno).
+        dias_prestamo (array): Día del préstamo de cada fila.
+        dias_devolucion (array): Día de la devolución de cada fila (0 = ninguna).
+        activos (bytearray): 1 si el préstamo de la fila está activo.
+        textos (list): Código -> texto (ISBN o ID de usuario).
+        codigos (dict): Texto -> código.
+        especiales (dict): Fila -> Prestamo de los registros que no se pueden
+                           codificar (ID o fechas con otro formato).
+    """
+
+    def __init__(self, prestamos=()):
+        """
+        Crea el historial, opcionalmente con préstamos iniciales.
+
+        Args:
+            prestamos (iterable, optional): Préstamos a agregar.
+        """
+        self.numeros = array('q')
+        self.codigos_libro = array('i')
+        self.codigos_usuario = array('i')
+        self.codigos_ejemplar = array('i')
+        self.dias_prestamo = array('i')
+        self.dias_devolucion = array('i')
+        self.activos = bytearray()
+        self.textos = []
+        self.codigos = {}
+        self.especiales = {}
+        # ID -> fila de los especiales; número -> fila solo si los números dejan de ser crecientes
+        self.filas_especiales = {}
+        self.filas = None
+        for prestamo in prestamos:
+            self.append(prestamo)
+
+    def __len__(self):
+        """Devuelve el número de préstamos del historial"""
+        return len(self.activos)
+
+    def __iter__(self):
+        """Recorre los préstamos en orden de registro"""
+        return self.iterar()
+
+    def __getitem__(self, fila):
+        """Devuelve el préstamo de una fila (admite índices negativos)"""
+        if fila < 0:
+            fila += len(self)
+        if not 0 <= fila < len(self):
+            raise IndexError("Fila fuera del historial")
+        return self._prestamo(fila)
+
+    def _codigo(self, texto):
+        """Devuelve el código de un texto, asignándole uno nuevo si no lo tiene"""
+        codigo = self.codigos.get(texto)
+        if codigo is None:
+            codigo = self.codigos[texto] = len(self.textos)
+            self.textos.append(texto)
+        return codigo
+
+    @staticmethod
+    def _numero(id_prestamo):
+        """Devuelve el número de un ID "PNNN", o None si tiene otro formato"""
+        if type(id_prestamo) is str and id_prestamo[:1] == "P" and id_prestamo[1:].isdigit():
+            numero = int(id_prestamo[1:])
+            # Solo si el ID se puede reconstruir exactamente (P001, no P1 ni P0001)
+            if f"P{numero:03d}" == id_prestamo:
+                return numero
+        return None
+
+    def append(self, prestamo):
+        """
+        Agrega un préstamo al final del historial.
+
+        Args:
+            prestamo (Prestamo): El préstamo a agregar (se copian sus valores).
+        """
+        fila = len(self)
+        numero = self._numero(prestamo.id_prestamo)
+        especial = (numero is None or type(prestamo.dia_prestamo) is not int
+                    or not (prestamo.dia_devolucion is None or type(prestamo.dia_devolucion) is int))
+        if self.filas is None and (especial or self.numeros and numero <= self.numeros[-1]):
+            # Los números dejan de ser crecientes: se pasan a indexar con un diccionario
+            self.filas = {n: f for f, n in enumerate(self.numeros) if n >= 0}
+        if especial:
+            numero = -1
+            self.especiales[fila] = Prestamo.from_dict(prestamo.to_dict())
+            self.filas_especiales[prestamo.id_prestamo] = fila
+        elif self.filas is not None:
+            self.filas[numero] = fila
+        self.numeros.append(numero)
+        self.codigos_libro.append(self._codigo(prestamo.isbn_libro))
+        self.codigos_usuario.append(self._codigo(prestamo.id_usuario))
+        self.codigos_ejemplar.append(-1 if prestamo.codigo_barras is None else self._codigo(prestamo.codigo_barras))
+        self.dias_prestamo.append(0 if especial else prestamo.dia_prestamo)
+        self.dias_devolucion.append(0 if especial else prestamo.dia_devolucion or 0)
+        self.activos.append(1 if prestamo.activo else 0)
+
+    def _fila(self, id_prestamo):
+        """Devuelve la fila de un préstamo por su ID, o None si no está"""
+        fila = self.filas_especiales.get(id_prestamo)
+        if fila is not None:
+            return fila
+        numero = self._numero(id_prestamo)
+        if numero is None:
+            return None
+        if self.filas is not None:
+            return self.filas.get(numero)
+        # Números crecientes (IDs generados por el sistema): búsqueda binaria
+        fila = bisect_left(self.numeros, numero)
+        return fila if fila < len(self.numeros) and self.numeros[fila] == numero else None
+
+    def _prestamo(self, fila):
+        """Reconstruye el Prestamo de una fila"""
+        especial = self.especiales.get(fila)
+        if especial is not None:
+            return Prestamo.from_dict(especial.to_dict())
+        textos = self.textos
+        prestamo = Prestamo(f"P{self.numeros[fila]:03d}", textos[self.codigos_libro[fila]],
+                            textos[self.codigos_usuario[fila]], None)
+        prestamo.dia_prestamo = self.dias_prestamo[fila]
+        prestamo.dia_devolucion = self.dias_devolucion[fila] or None
+        prestamo.activo = self.activos[fila] == 1
+        codigo_ejemplar = self.codigos_ejemplar[fila]
+        if codigo_ejemplar >= 0:
+            prestamo.codigo_barras = textos[codigo_ejemplar]
+        return prestamo
+
+    def iterar(self, inicio=0, fin=None):
+        """
+        Recorre un rango de filas sin reconstruir las anteriores.
+
+        Args:
+            inicio (int): Primera fila.
+            fin (int, optional): Fila final (excluida); por defecto, la última.
+
+        Returns:
+            generator: Objetos Prestamo.
+        """
+        total = len(self)
+        fin = total if fin is None else min(fin, total)
+        return (self._prestamo(fila) for fila in range(inicio, fin))
+
+    def valores(self, inicio=0, fin=None):
+        """
+        Recorre un rango de filas como tuplas de valores, sin crear objetos
+        Prestamo (para recorridos masivos como el cálculo de multas).
+
+        Args:
+            inicio (int): Primera fila.
+            fin (int, optional): Fila final (excluida); por defecto, la última.
+
+        Returns:
+            generator: Tuplas (id_prestamo, isbn_libro, id_usuario,
+                       dia_prestamo, dia_devolucion, activo).
+        """
+        total = len(self)
+        fin = total if fin is None else min(fin, total)
+        textos = self.textos
+        especiales = self.especiales
+        columnas = zip(range(inicio, fin), self.numeros[inicio:fin], self.codigos_libro[inicio:fin],
+                       self.codigos_usuario[inicio:fin], self.dias_prestamo[inicio:fin],
+                       self.dias_devolucion[inicio:fin], self.activos[inicio:fin])
+        for fila, numero, libro, usuario, dia_prestamo, dia_devolucion, activo in columnas:
+            if fila in especiales:
+                prestamo = especiales[fila]
+                yield (prestamo.id_prestamo, prestamo.isbn_libro, prestamo.id_usuario, prestamo.dia_prestamo,
+                       prestamo.dia_devolucion, activo == 1)
+            else:
+                yield (f"P{numero:03d}", textos[libro], textos[usuario], dia_prestamo, dia_devolucion or None,
+                       activo == 1)
+
+    def obtener(self, id_prestamo):
+        """Devuelve el préstamo con un ID, o None si no está en el historial"""
+        fila = self._fila(id_prestamo)
+        return None if fila is None else self._prestamo(fila)
+
+    def actualizar(self, prestamo):
+        """
+        Guarda en las columnas el estado actual de un préstamo del historial.
+
+        Args:
+            prestamo (Prestamo): Préstamo modificado (se busca por su ID).
+
+        Returns:
+            bool: True si estaba en el historial.
+        """
+        fila = self._fila(prestamo.id_prestamo)
+        if fila is None:
+            return False
+        if fila in self.especiales or not (prestamo.dia_devolucion is None or type(prestamo.dia_devolucion) is int):
+            self.especiales[fila] = Prestamo.from_dict(prestamo.to_dict())
+            self.filas_especiales[prestamo.id_prestamo] = fila
+        else:
+            self.dias_devolucion[fila] = prestamo.dia_devolucion or 0
+        self.activos[fila] = 1 if prestamo.activo else 0
+        return True
+
+
+# Bloque de prueba
+if __name__ == "__main__":
+    historial = HistorialColumnar()
+    for i in range(1, 6):
+        historial.append(Prestamo(f"P{i:03d}", f"978-{i % 2}", "U001", f"2024-01-0{i}"))
+    devuelto = historial.obtener("P002")
+    devuelto.registrar_devolucion("2024-01-30")
+    historial.actualizar(devuelto)
+    for prestamo in historial:
+        print(prestamo)
+    print("Retraso de P002:", historial.obtener("P002").dias_retraso(), "días")
+    print("Rango 3-5:", [p.id_prestamo for p in historial.iterar(2, 5)])
@@ -0,0 +1,357 @@
+# importacion.py
+# Importación masiva de libros, usuarios y préstamos desde archivos CSV o JSONL.
+# Uso: python importacion.py {libros,usuarios,prestamos} ARCHIVO [--db RUTA | --diario CARPETA]
+import argparse
+import csv
+import gc
+import gzip
+import json
+import os
+import sys
+
+from libro import Libro
+from usuario import Usuario
+from prestamo import Prestamo, validar_fecha
+
+
+class ResultadoImportacion:
+    """
+    Resumen de una importación masiva.
+
+    Atributos:
+        procesadas (int): Filas leídas del archivo.
+        importadas (int): Registros agregados al sistema.
+        rechazadas (int): Filas con error o duplicadas.
+        errores (list): Primeros errores como tuplas (número de línea, mensaje).
+        max_errores (int): Máximo de errores que se conservan en detalle.
+    """
+
+    def __init__(self, max_errores=1000):
+        """
+        Inicializa un resultado vacío.
+
+        Args:
+            max_errores (int): Máximo de errores que se conservan en detalle,
+                               para que la memoria no crezca con el archivo.
+        """
+        self.procesadas = 0
+        self.importadas = 0
+        self.rechazadas = 0
+        self.errores = []
+        self.max_errores = max_errores
+
+    def registrar_error(self, linea, mensaje):
+        """
+        Registra una fila rechazada.
+
+        Args:
+            linea (int): Número de línea de la fila en el archivo.
+            mensaje (str): Motivo del rechazo.
+        """
+        self.rechazadas += 1
+        if len(self.errores) < self.max_errores:
+            self.errores.append((linea, mensaje))
+
+    def __str__(self):
+        """
+        Devuelve un resumen legible de la importación.
+
+        Returns:
+            str: Cantidad de filas procesadas, importadas y rechazadas.
+        """
+        return (f"Filas procesadas: {self.procesadas}, importadas: {self.importadas}, "
+                f"rechazadas: {self.rechazadas}")
+
+
+# ===== LECTURA DE ARCHIVOS =====
+
+# Extensiones admitidas (antes del .gz opcional) y su formato
+FORMATOS = {".csv": "csv", ".jsonl": "jsonl"}
+
+
+def formato_archivo(ruta):
+    """
+    Deduce el formato de un archivo por su extensión, sin contar el .gz final.
+
+    Solo cuenta la extensión del nombre: una carpeta llamada "datos.csv_export"
+    no convierte en CSV a los archivos que contiene.
+
+    Args:
+        ruta (str): Ruta del archivo.
+
+    Returns:
+        str: "csv" o "jsonl".
+
+    Raises:
+        ValueError: Si la extensión no es .csv ni .jsonl.
+    """
+    extension = os.path.splitext(ruta[:-3] if ruta.endswith(".gz") else ruta)[1].lower()
+    if extension not in FORMATOS:
+        raise ValueError(f"Extensión no admitida en {ruta!r}: se espera .csv o .jsonl (opcionalmente con .gz)")
+    return FORMATOS[extension]
+
+
+def abrir_texto(ruta, modo="r", nivel_compresion=6):
+    """
+    Abre un archivo de texto UTF-8, (des)comprimiéndolo si termina en .gz.
+
+    Args:
+        ruta (str): Ruta del archivo.
+        modo (str): "r" para leer o "w" para escribir.
+        nivel_compresion (int): Nivel de gzip al escribir (1 rápido, 9 compacto).
+
+    Returns:
+        file: El archivo abierto en modo texto.
+    """
+    if ruta.endswith(".gz"):
+        return gzip.open(ruta, modo + "t", compresslevel=nivel_compresion,
+                         encoding="utf-8", newline="")
+    return open(ruta, modo, encoding="utf-8", newline="")
+
+
+def leer_filas(ruta):
+    """
+    Lee un archivo CSV (con encabezado) o JSONL fila por fila.
+
+    Args:
+        ruta (str): Ruta del archivo (.csv, .jsonl, opcionalmente con .gz).
+
+    Yields:
+        tuple: (número de línea, diccionario de la fila o None, mensaje de error o None)
+
+    Raises:
+        ValueError: Si la extensión no es .csv ni .jsonl (ver formato_archivo).
+    """
+    formato = formato_archivo(ruta)
+    with abrir_texto(ruta) as archivo:
+        if formato == "csv":
+            # csv.reader + zip es bastante más rápido que csv.DictReader
+            lector = csv.reader(archivo)
+            encabezado = next(lector, None)
+            if encabezado is None:
+                return
+            columnas = len(encabezado)
+            for valores in lector:
+                if len(valores) != columnas:
+                    if valores:
+                        yield lector.line_num, None, "La fila no tiene el mismo número de columnas que el encabezado"
+                    continue
+                yield lector.line_num, dict(zip(encabezado, valores)), None
+        else:
+            for numero, linea in enumerate(archivo, start=1):
+                if not linea.strip():
+                    continue
+                try:
+                    fila = json.loads(linea)
+                except ValueError as error:
+                    yield numero, None, f"JSON inválido: {error}"
+                    continue
+                if not isinstance(fila, dict):
+                    yield numero, None, "Cada línea debe ser un objeto JSON"
+                else:
+                    yield numero, fila, None
+
+
+# ===== CONVERSIÓN DE FILAS =====
+
+def texto_obligatorio(fila, campo):
+    """Devuelve un campo de texto obligatorio o lanza ValueError si falta"""
+    valor = fila.get(campo)
+    if valor is None or valor == "" or (type(valor) is str and valor.isspace()):
+        raise ValueError(f"Falta el campo obligatorio '{campo}'")
+    return valor if type(valor) is str else str(valor)
+
+
+# Textos aceptados como booleanos (en minúsculas)
+BOOLEANOS = {"true": True, "1": True, "si": True, "sí": True, "yes": True,
+             "false": False, "0": False, "no": False}
+
+
+def a_booleano(valor, por_defecto):
+    """Convierte un valor de CSV o JSON a bool"""
+    if valor is True or valor is False:
+        return valor
+    if valor is None or valor == "":
+        return por_defecto
+    resultado = BOOLEANOS.get(str(valor).strip().lower())
+    if resultado is None:
+        raise ValueError(f"Valor booleano inválido: {valor!r}")
+    return resultado
+
+
+def a_codigos(valor):
+    """Convierte los códigos de barras de CSV (separados por espacios) o JSON (lista) en una lista, o None si no hay"""
+    if valor is None or valor == "":
+        return None
+    codigos = valor.split() if type(valor) is str else valor
+    if type(codigos) is not list or not all(type(codigo) is str and codigo for codigo in codigos):
+        raise ValueError(f"Códigos de ejemplares inválidos: {valor!r}")
+    return codigos
+
+
+def convertir_libro(fila):
+    """Construye un Libro a partir de una fila"""
+    año = fila.get('año_publicacion')
+    try:
+        año = int(año) if año is not None and año != "" else 0
+    except (TypeError, ValueError):
+        raise ValueError(f"Año de publicación inválido: {año!r}")
+    return Libro.from_dict({
+        'isbn': texto_obligatorio(fila, 'isbn'),
+        'titulo': texto_obligatorio(fila, 'titulo'),
+        'autor': texto_obligatorio(fila, 'autor'),
+        'año_publicacion': año,
+        'genero': fila.get('genero') or "",
+        'ejemplares': a_codigos(fila.get('ejemplares'))
+    })
+
+
+def convertir_usuario(fila):
+    """Construye un Usuario a partir de una fila"""
+    return Usuario.from_dict({
+        'id_usuario': texto_obligatorio(fila, 'id_usuario'),
+        'nombre': texto_obligatorio(fila, 'nombre'),
+        'contacto': fila.get('contacto') or ""
+    })
+
+
+def convertir_prestamo(fila):
+    """Construye un Prestamo a partir de una fila (ValueError si alguna fecha no es válida)"""
+    fecha_prestamo = texto_obligatorio(fila, 'fecha_prestamo')
+    fecha_devolucion = fila.get('fecha_devolucion') or None
+    validar_fecha(fecha_prestamo)
+    if fecha_devolucion is not None:
+        validar_fecha(fecha_devolucion)
+    return Prestamo.from_dict({
+        'id_prestamo': texto_obligatorio(fila, 'id_prestamo'),
+        'isbn_libro': texto_obligatorio(fila, 'isbn_libro'),
+        'id_usuario': texto_obligatorio(fila, 'id_usuario'),
+        'fecha_prestamo': fecha_prestamo,
+        'fecha_devolucion': fecha_devolucion,
+        # Sin columna "activo", un préstamo sin devolución se considera activo
+        'activo': a_booleano(fila.get('activo'), fecha_devolucion is None),
+        'codigo_barras': fila.get('codigo_barras') or None
+    })
+
+
+CONVERSORES = {
+    'libros': convertir_libro,
+    'usuarios': convertir_usuario,
+    'prestamos': convertir_prestamo,
+}
+
+
+# ===== IMPORTACIÓN =====
+
+def importar_archivo(sistema, ruta, tipo, tamanio_lote=10000, max_errores=1000):
+    """
+    Importa un archivo completo en el sistema, por lotes y con memoria constante.
+
+    Las filas se validan y convierten una a una; cada lote se entrega al
+    método importar_<tipo> del sistema, que descarta duplicados usando sus
+    índices y guarda el lote en una sola transacción. Las filas con error se
+    registran en el resultado sin detener la importación.
+
+    Args:
+        sistema (SistemaBiblioteca): Sistema donde se importan los datos.
+        ruta (str): Ruta del archivo CSV o JSONL (opcionalmente .gz).
+        tipo (str): "libros", "usuarios" o "prestamos".
+        tamanio_lote (int): Número de filas por lote.
+        max_errores (int): Máximo de errores que se conservan en detalle.
+
+    Returns:
+        ResultadoImportacion: Resumen de la importación.
+
+    Raises:
+        ValueError: Si el tipo o la extensión del archivo no son válidos.
+    """
+    if tipo not in CONVERSORES:
+        raise ValueError(f"Tipo de importación desconocido: {tipo}")
+    # Un formato desconocido se rechaza antes de leer nada
+    formato_archivo(ruta)
+    convertir = CONVERSORES[tipo]
+    importar_lote = getattr(sistema, f"importar_{tipo}")
+
+    resultado = ResultadoImportacion(max_errores)
+    lote = []
+    lineas = {}  # id(objeto) -> número de línea, para informar los rechazos del lote
+
+    def procesar_lote():
+        rechazados = importar_lote(lote)
+        resultado.importadas += len(lote) - len(rechazados)
+        for objeto, motivo in rechazados:
+            resultado.registrar_error(lineas[id(objeto)], motivo)
+        lote.clear()
+        lineas.clear()
+
+    # Los objetos importados viven tanto como el sistema, así que el recolector
+    # de ciclos solo recorrería una y otra vez un heap cada vez más grande
+    recolector_activo = gc.isenabled()
+    gc.disable()
+    try:
+        for numero, fila, error in leer_filas(ruta):
+            resultado.procesadas += 1
+            if error:
+                resultado.registrar_error(numero, error)
+                continue
+            try:
+                objeto = convertir(fila)
+            except (KeyError, TypeError, ValueError) as excepcion:
+                resultado.registrar_error(numero, str(excepcion))
+                continue
+            lote.append(objeto)
+            lineas[id(objeto)] = numero
+            if len(lote) >= tamanio_lote:
+                procesar_lote()
+
+        if lote:
+            procesar_lote()
+    finally:
+        if recolector_activo:
+            gc.enable()
+    return resultado
+
+
+def main(argumentos=None):
+    """Punto de entrada de la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Importación masiva de datos de la biblioteca")
+    parser.add_argument("tipo", choices=sorted(CONVERSORES), help="Tipo de registros del archivo")
+    parser.add_argument("archivo", help="Archivo CSV o JSONL (opcionalmente comprimido con .gz)")
+    destino = parser.add_mutually_exclusive_group()
+    destino.add_argument("--db", help="Base de datos SQLite donde importar")
+    destino.add_argument("--diario", help="Carpeta del almacenamiento con diario donde importar")
+    parser.add_argument("--lote", type=int, default=10000, help="Filas por lote (por defecto 10000)")
+    parser.add_argument("--max-errores", type=int, default=20, help="Errores a mostrar en detalle")
+    args = parser.parse_args(argumentos)
+    try:
+        formato_archivo(args.archivo)
+    except ValueError as error:
+        parser.error(str(error))
+
+    from main import SistemaBiblioteca
+    almacenamiento = None
+    if args.db:
+        from persistencia import AlmacenamientoSQLite
+        almacenamiento = AlmacenamientoSQLite(args.db)
+    elif args.diario:
+        from persistencia import AlmacenamientoDiario
+        almacenamiento = AlmacenamientoDiario(args.diario)
+    else:
+        print("Aviso: sin --db ni --diario los datos solo se validan en memoria")
+
+    sistema = SistemaBiblioteca(almacenamiento, datos_ejemplo=False)
+    try:
+        resultado = importar_archivo(sistema, args.archivo, args.tipo, args.lote, args.max_errores)
+    finally:
+        sistema.cerrar()
+
+    print(resultado)
+    for linea, mensaje in sorted(resultado.errores):
+        print(f"  Línea {linea}: {mensaje}")
+    if resultado.rechazadas > len(resultado.errores):
+        print(f"  ... y {resultado.rechazadas - len(resultado.errores)} errores más")
+    return 0 if resultado.rechazadas == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,16 +8,62 @@ import os
 
 # Importar el sistema de biblioteca desde main.py
 from main import obtener_sistema
+# Tabla que solo crea las filas visibles, para listas de cualquier tamaño
+from tabla_virtual import TablaVirtual, FuenteLista, FuenteIterable, FuentePaginada
+# Búsquedas e informes en segundo plano, sin congelar la ventana
+from ejecutor import EjecutorConsultas, por_lotes
+# Conversión de números de día a fechas YYYY-MM-DD
+from prestamo import dia_a_fecha, dia_actual
+
+
+# Conversión de los registros a las filas de las tablas
+def fila_libro(libro):
+    """Devuelve los valores de un libro para las tablas, con su estado"""
+    estado = "Disponible" if libro.disponible else "Prestado"
+    if libro.total_ejemplares > 1:
+        estado += f" ({libro.ejemplares_disponibles}/{libro.total_ejemplares})"
+    return (libro.isbn, libro.titulo, libro.autor, libro.año_publicacion, libro.genero, estado)
+
+
+def fila_libro_disponible(libro):
+    """Devuelve los valores de un libro para las tablas, sin su estado"""
+    return (libro.isbn, libro.titulo, libro.autor, libro.año_publicacion, libro.genero)
+
+
+def fila_usuario(usuario):
+    """Devuelve los valores de un usuario para las tablas"""
+    return (usuario.id_usuario, usuario.nombre, usuario.contacto)
+
+
+def fila_prestamo(prestamo):
+    """Devuelve los valores de un préstamo para las tablas, con su estado"""
+    estado = "Activo" if prestamo.activo else "Finalizado"
+    return (prestamo.id_prestamo, prestamo.isbn_libro, prestamo.id_usuario,
+            prestamo.fecha_prestamo, prestamo.fecha_devolucion or "No devuelto", estado)
+
+
+def fila_prestamo_activo(prestamo):
+    """Devuelve los valores de un préstamo activo para las tablas"""
+    return (prestamo.id_prestamo, prestamo.isbn_libro, prestamo.id_usuario, prestamo.fecha_prestamo)
+
 
 class BibliotecaApp:
-    def __init__(self, root):
+    # Milisegundos entre actualizaciones de las estadísticas de inicio
+    INTERVALO_ESTADISTICAS = 2000
+    # Géneros mostrados en las estadísticas de inicio
+    GENEROS_EN_INICIO = 5
+    # Filas de los informes de libros más prestados y usuarios más activos
+    PRIMEROS_EN_INFORME = 100
+    
+    def __init__(self, root, almacenamiento=None):
         self.root = root
         self.root.title("Sistema de Gestión de Biblioteca")
         self.root.geometry("1200x800")
         self.root.configure(bg='#f5f5f5')
         
-        # Inicializar el sistema de biblioteca
-        self.sistema = obtener_sistema()
+        # Inicializar el sistema de biblioteca (persistente si se indica almacenamiento);
+        # en modo concurrente, porque las consultas se resuelven en otros hilos
+        self.sistema = obtener_sistema(almacenamiento, concurrente=True)
         
         # Configurar fuentes
         self.title_font = tkfont.Font(family="Helvetica", size=18, weight="bold")
@@ -25,6 +71,10 @@ class BibliotecaApp:
         self.button_font = tkfont.Font(family="Helvetica", size=10)
         self.text_font = tkfont.Font(family="Helvetica", size=10)
         
+        # Hilos para las consultas; leen con el cerrojo del sistema y sus
+        # resultados se reciben en el bucle de Tk
+        self.ejecutor = EjecutorConsultas(root, leer=self.sistema.cerrojo.leer)
+        
         # Variables para estadísticas dinámicas
         self.stats_text = tk.StringVar()
         
@@ -39,8 +89,11 @@ class BibliotecaApp:
         self.crear_pestana_prestamos()
         self.crear_pestana_reportes()
         
-        # Actualizar estadísticas iniciales
-        self.actualizar_estadisticas()
+        # Actualizar estadísticas iniciales y luego periódicamente (préstamos que vencen)
+        self.refrescar_estadisticas_periodicamente()
+        
+        # Aplicar a las tablas cada cambio del sistema, fila por fila
+        self.sistema.suscribir(self.aplicar_cambio)
     
     def crear_pestana_inicio(self):
         # Pestaña de inicio
@@ -88,18 +141,109 @@ class BibliotecaApp:
     
     def actualizar_estadisticas(self):
         """Actualiza las estadísticas con los valores actuales del sistema"""
-        total_libros = len(self.sistema.listar_libros())
-        libros_disponibles = len(self.sistema.listar_libros_disponibles())
-        total_usuarios = len(self.sistema.listar_usuarios())
-        prestamos_activos = len(self.sistema.obtener_prestamos_activos())
+        # Los contadores se mantienen en el sistema: leerlos no recorre ninguna lista
+        estadisticas = self.sistema.estadisticas()
         
         # Actualizar el texto de las estadísticas
-        stats_text = f"Total de libros: {total_libros}\n"
-        stats_text += f"Libros disponibles: {libros_disponibles}\n"
-        stats_text += f"Total de usuarios: {total_usuarios}\n"
-        stats_text += f"Préstamos activos: {prestamos_activos}"
+        stats_text = f"Total de libros: {estadisticas['total_libros']}\n"
+        stats_text += f"Libros disponibles: {estadisticas['libros_disponibles']}\n"
+        stats_text += f"Ejemplares disponibles: {estadisticas['ejemplares_disponibles']} de {estadisticas['total_ejemplares']}\n"
+        stats_text += f"Total de usuarios: {estadisticas['total_usuarios']}\n"
+        stats_text += f"Préstamos activos: {estadisticas['prestamos_activos']}\n"
+        stats_text += f"Préstamos vencidos: {estadisticas['prestamos_vencidos']}"
+        
+        # Los géneros con más libros
+        generos = sorted(estadisticas['libros_por_genero'].items(), key=lambda par: -par[1])
+        if generos:
+            stats_text += "\nPor género: " + ", ".join(
+                f"{genero} ({total})" for genero, total in generos[:self.GENEROS_EN_INICIO])
+        
+        # Evitar redibujar la etiqueta si nada cambió
+        if stats_text != self.stats_text.get():
+            self.stats_text.set(stats_text)
+    
+    def refrescar_estadisticas_periodicamente(self):
+        """Actualiza las estadísticas y se vuelve a programar con root.after"""
+        self.actualizar_estadisticas()
+        self.root.after(self.INTERVALO_ESTADISTICAS, self.refrescar_estadisticas_periodicamente)
+    
+    def aplicar_cambio(self, cambio):
+        """
+        Refleja en la tabla correspondiente un cambio del sistema.
+
+        Solo se toca la fila afectada: no se vuelve a leer la lista completa.
+
+        Args:
+            cambio (Cambio): Evento emitido por SistemaBiblioteca.
+        """
+        tablas = {
+            'libro': self.libros_tabla,
+            'usuario': self.usuarios_tabla,
+            'prestamo': self.prestamos_tabla,
+        }
+        tabla = tablas.get(cambio.entidad)
+        if tabla is None:
+            # Reservas y multas no tienen tabla en la interfaz
+            return
+        if cambio.accion == 'insertado':
+            tabla.fila_insertada(cambio.dato)
+        elif cambio.accion == 'actualizado':
+            tabla.fila_actualizada(cambio.dato, cambio.clave, cambio.clave_anterior)
+        elif cambio.accion == 'eliminado':
+            tabla.fila_eliminada(cambio.dato)
+    
+    def consultar_en_tabla(self, canal, tabla, consulta, convertir):
+        """
+        Resuelve una consulta en segundo plano y muestra sus filas en una tabla.
+
+        Las filas se muestran por lotes a medida que la consulta las entrega;
+        mientras llega el primero la tabla conserva lo que mostraba. Una
+        consulta nueva en el mismo canal descarta la anterior.
+
+        Args:
+            canal (str): Canal del ejecutor ("libros", "usuarios"...).
+            tabla (TablaVirtual): Tabla donde mostrar los resultados.
+            consulta: Función sin argumentos que devuelve un iterable de
+                      registros; se ejecuta fuera del hilo de la interfaz.
+            convertir: Función registro -> tupla de valores.
+        """
+        fuente = FuenteLista([], convertir)
+        
+        def recibir(lote):
+            if tabla.fuente is fuente:
+                tabla.agregar_filas(lote)
+            else:
+                fuente.datos = lote
+                tabla.mostrar(fuente)
         
-        self.stats_text.set(stats_text)
+        def terminar(_):
+            # Sin resultados no llegó ningún lote: se muestra la tabla vacía
+            if tabla.fuente is not fuente:
+                tabla.mostrar(fuente)
+        
+        def fallar(error):
+            messagebox.showerror("Error", f"No se pudo completar la consulta: {error}")
+        
+        self.ejecutor.ejecutar(canal, lambda: por_lotes(consulta()), terminar, recibir, fallar)
+    
+    def buscar_al_escribir(self, canal, variable, activa, buscar, mostrar_todo):
+        """
+        Programa una búsqueda cuando el usuario deja de escribir.
+
+        Args:
+            canal (str): Canal de la búsqueda en el ejecutor.
+            variable (tk.StringVar): Texto de la entrada de búsqueda.
+            activa (tk.BooleanVar): Si está activada la búsqueda al escribir.
+            buscar: Función criterio -> None que lanza la búsqueda.
+            mostrar_todo: Función que muestra la lista completa (entrada vacía).
+        """
+        if not activa.get():
+            return
+        if not variable.get().strip():
+            self.ejecutor.cancelar(canal)
+            mostrar_todo()
+            return
+        self.ejecutor.diferir(canal, lambda: buscar(variable.get()))
     
     def crear_pestana_libros(self):
         # Pestaña de gestión de libros
@@ -115,7 +259,7 @@ class BibliotecaApp:
         search_entry = tk.Entry(search_frame, textvariable=self.libro_search_var, width=30)
         search_entry.pack(side='left', padx=5)
         
-        search_type = ttk.Combobox(search_frame, values=["ISBN", "Título", "Autor"], width=10)
+        search_type = ttk.Combobox(search_frame, values=["ISBN", "Título", "Autor", "Palabras clave", "Aproximada"], width=14)
         search_type.set("Título")
         search_type.pack(side='left', padx=5)
         
@@ -123,25 +267,24 @@ class BibliotecaApp:
             self.libro_search_var.get(), search_type.get()), bg='#3498db', fg='white')
         search_btn.pack(side='left', padx=5)
         
+        # Búsqueda mientras se escribe (se lanza tras una pausa al teclear)
+        self.libro_al_escribir = tk.BooleanVar(value=False)
+        tk.Checkbutton(search_frame, text="Buscar al escribir", variable=self.libro_al_escribir,
+                       bg='#f5f5f5').pack(side='left', padx=5)
+        self.libro_search_var.trace_add('write', lambda *_: self.buscar_al_escribir(
+            "libros", self.libro_search_var, self.libro_al_escribir,
+            lambda criterio: self.buscar_libros(criterio, search_type.get()),
+            self.actualizar_lista_libros))
+        
         # Frame para lista de libros
         list_frame = tk.Frame(self.libros_frame)
         list_frame.pack(fill='both', expand=True, padx=10, pady=10)
         
-        # Treeview para mostrar libros
+        # Tabla virtual para mostrar libros (solo crea las filas visibles)
         columns = ('ISBN', 'Título', 'Autor', 'Año', 'Género', 'Estado')
-        self.libros_tree = ttk.Treeview(list_frame, columns=columns, show='headings')
-        
-        # Configurar columnas
-        for col in columns:
-            self.libros_tree.heading(col, text=col)
-            self.libros_tree.column(col, width=120)
-        
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.libros_tree.yview)
-        self.libros_tree.configure(yscroll=scrollbar.set)
-        
-        self.libros_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.libros_tabla = TablaVirtual(list_frame, columns)
+        self.libros_tabla.pack(fill=tk.BOTH, expand=True)
+        self.libros_tree = self.libros_tabla.tree
         
         # Frame para botones de acción
         action_frame = tk.Frame(self.libros_frame, bg='#f5f5f5')
@@ -165,55 +308,42 @@ class BibliotecaApp:
         self.actualizar_lista_libros()
     
     def actualizar_lista_libros(self):
-        # Limpiar treeview
-        for item in self.libros_tree.get_children():
-            self.libros_tree.delete(item)
-        
-        # Obtener y mostrar libros
-        libros = self.sistema.listar_libros()
-        for libro in libros:
-            estado = "Disponible" if libro.disponible else "Prestado"
-            self.libros_tree.insert('', 'end', values=(
-                libro.isbn, libro.titulo, libro.autor, libro.año_publicacion, 
-                libro.genero, estado
-            ))
+        # Una búsqueda pendiente ya no debe reemplazar la lista completa
+        self.ejecutor.cancelar("libros")
+        # Mostrar los libros sin copiarlos: la tabla solo recorre hasta las filas visibles
+        fuente = FuenteIterable(self.sistema.iterar_libros(), self.sistema.contar_libros(), fila_libro,
+                                lambda: self.sistema.iterar_libros(inverso=True))
+        self.libros_tabla.mostrar(fuente, conservar_posicion=True)
     
     def buscar_libros(self, criterio, tipo):
-        # Limpiar treeview
-        for item in self.libros_tree.get_children():
-            self.libros_tree.delete(item)
-        
-        # Buscar según el tipo
+        # La búsqueda se resuelve en segundo plano y reemplaza a la anterior aún en curso
+        self.consultar_en_tabla("libros", self.libros_tabla,
+                                lambda: self.resolver_busqueda_libros(criterio, tipo), fila_libro)
+    
+    def resolver_busqueda_libros(self, criterio, tipo):
+        # Buscar según el tipo (se ejecuta en un hilo de trabajo)
         if tipo == "ISBN":
             libro = self.sistema.buscar_libro_por_isbn(criterio)
-            if libro:
-                estado = "Disponible" if libro.disponible else "Prestado"
-                self.libros_tree.insert('', 'end', values=(
-                    libro.isbn, libro.titulo, libro.autor, libro.año_publicacion, 
-                    libro.genero, estado
-                ))
+            libros = [libro] if libro else []
         elif tipo == "Título":
             libros = self.sistema.buscar_libros_por_titulo(criterio)
-            for libro in libros:
-                estado = "Disponible" if libro.disponible else "Prestado"
-                self.libros_tree.insert('', 'end', values=(
-                    libro.isbn, libro.titulo, libro.autor, libro.año_publicacion, 
-                    libro.genero, estado
-                ))
         elif tipo == "Autor":
             libros = self.sistema.buscar_libros_por_autor(criterio)
-            for libro in libros:
-                estado = "Disponible" if libro.disponible else "Prestado"
-                self.libros_tree.insert('', 'end', values=(
-                    libro.isbn, libro.titulo, libro.autor, libro.año_publicacion, 
-                    libro.genero, estado
-                ))
+        elif tipo == "Palabras clave":
+            # Búsqueda en el índice invertido, ordenada por relevancia
+            libros = self.sistema.buscar_libros(criterio)
+        elif tipo == "Aproximada":
+            # Tolera errores de escritura, los más parecidos primero
+            libros = self.sistema.buscar_libros_aproximado(criterio)
+        else:
+            libros = []
+        return libros
     
     def agregar_libro(self):
         # Crear ventana para agregar libro
         add_window = tk.Toplevel(self.root)
         add_window.title("Agregar Libro")
-        add_window.geometry("500x400")
+        add_window.geometry("500x440")
         add_window.configure(bg='#f5f5f5')
         add_window.grab_set()  # Hacer la ventana modal
         
@@ -236,7 +366,8 @@ class BibliotecaApp:
             ("Título:", "titulo"),
             ("Autor:", "autor"),
             ("Año de publicación:", "año"),
-            ("Género:", "genero")
+            ("Género:", "genero"),
+            ("Ejemplares:", "ejemplares")
         ]
         
         self.entries = {}
@@ -246,6 +377,7 @@ class BibliotecaApp:
             entry = tk.Entry(form_frame, width=30)
             entry.grid(row=i, column=1, padx=5, pady=5)
             self.entries[field] = entry
+        self.entries['ejemplares'].insert(0, "1")
         
         # Botones
         button_frame = tk.Frame(main_frame, bg='#f5f5f5')
@@ -267,15 +399,21 @@ class BibliotecaApp:
                 messagebox.showerror("Error", "El año debe ser un número válido")
                 return
             
+            # Validar el número de ejemplares
+            try:
+                ejemplares = int(datos['ejemplares']) if datos['ejemplares'] else 1
+            except ValueError:
+                messagebox.showerror("Error", "El número de ejemplares debe ser un número válido")
+                return
+            
             # Agregar libro
             exito, mensaje = self.sistema.agregar_libro(
-                datos['isbn'], datos['titulo'], datos['autor'], año, datos['genero']
+                datos['isbn'], datos['titulo'], datos['autor'], año, datos['genero'], ejemplares
             )
             
             if exito:
                 messagebox.showinfo("Éxito", mensaje)
                 add_window.destroy()
-                self.actualizar_lista_libros()
                 self.actualizar_estadisticas()  # Actualizar estadísticas
             else:
                 messagebox.showerror("Error", mensaje)
@@ -366,7 +504,6 @@ class BibliotecaApp:
             if exito:
                 messagebox.showinfo("Éxito", mensaje)
                 edit_window.destroy()
-                self.actualizar_lista_libros()
                 self.actualizar_estadisticas()  # Actualizar estadísticas
             else:
                 messagebox.showerror("Error", mensaje)
@@ -399,7 +536,6 @@ class BibliotecaApp:
             
             if exito:
                 messagebox.showinfo("Éxito", mensaje)
-                self.actualizar_lista_libros()
                 self.actualizar_estadisticas()  # Actualizar estadísticas
             else:
                 messagebox.showerror("Error", mensaje)
@@ -418,7 +554,7 @@ class BibliotecaApp:
         search_entry = tk.Entry(search_frame, textvariable=self.usuario_search_var, width=30)
         search_entry.pack(side='left', padx=5)
         
-        search_type = ttk.Combobox(search_frame, values=["ID", "Nombre"], width=10)
+        search_type = ttk.Combobox(search_frame, values=["ID", "Nombre", "Aproximada"], width=10)
         search_type.set("Nombre")
         search_type.pack(side='left', padx=5)
         
@@ -426,25 +562,24 @@ class BibliotecaApp:
             self.usuario_search_var.get(), search_type.get()), bg='#3498db', fg='white')
         search_btn.pack(side='left', padx=5)
         
+        # Búsqueda mientras se escribe (se lanza tras una pausa al teclear)
+        self.usuario_al_escribir = tk.BooleanVar(value=False)
+        tk.Checkbutton(search_frame, text="Buscar al escribir", variable=self.usuario_al_escribir,
+                       bg='#f5f5f5').pack(side='left', padx=5)
+        self.usuario_search_var.trace_add('write', lambda *_: self.buscar_al_escribir(
+            "usuarios", self.usuario_search_var, self.usuario_al_escribir,
+            lambda criterio: self.buscar_usuarios(criterio, search_type.get()),
+            self.actualizar_lista_usuarios))
+        
         # Frame para lista de usuarios
         list_frame = tk.Frame(self.usuarios_frame)
         list_frame.pack(fill='both', expand=True, padx=10, pady=10)
         
-        # Treeview para mostrar usuarios
+        # Tabla virtual para mostrar usuarios (solo crea las filas visibles)
         columns = ('ID', 'Nombre', 'Contacto')
-        self.usuarios_tree = ttk.Treeview(list_frame, columns=columns, show='headings')
-        
-        # Configurar columnas
-        for col in columns:
-            self.usuarios_tree.heading(col, text=col)
-            self.usuarios_tree.column(col, width=150)
-        
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.usuarios_tree.yview)
-        self.usuarios_tree.configure(yscroll=scrollbar.set)
-        
-        self.usuarios_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.usuarios_tabla = TablaVirtual(list_frame, columns, [150, 150, 150])
+        self.usuarios_tabla.pack(fill=tk.BOTH, expand=True)
+        self.usuarios_tree = self.usuarios_tabla.tree
         
         # Frame para botones de acción
         action_frame = tk.Frame(self.usuarios_frame, bg='#f5f5f5')
@@ -468,35 +603,31 @@ class BibliotecaApp:
         self.actualizar_lista_usuarios()
     
     def actualizar_lista_usuarios(self):
-        # Limpiar treeview
-        for item in self.usuarios_tree.get_children():
-            self.usuarios_tree.delete(item)
-        
-        # Obtener y mostrar usuarios
-        usuarios = self.sistema.listar_usuarios()
-        for usuario in usuarios:
-            self.usuarios_tree.insert('', 'end', values=(
-                usuario.id_usuario, usuario.nombre, usuario.contacto
-            ))
+        # Una búsqueda pendiente ya no debe reemplazar la lista completa
+        self.ejecutor.cancelar("usuarios")
+        # Mostrar los usuarios sin copiarlos: la tabla solo recorre hasta las filas visibles
+        fuente = FuenteIterable(self.sistema.iterar_usuarios(), self.sistema.contar_usuarios(), fila_usuario,
+                                lambda: self.sistema.iterar_usuarios(inverso=True))
+        self.usuarios_tabla.mostrar(fuente, conservar_posicion=True)
     
     def buscar_usuarios(self, criterio, tipo):
-        # Limpiar treeview
-        for item in self.usuarios_tree.get_children():
-            self.usuarios_tree.delete(item)
-        
-        # Buscar según el tipo
+        # La búsqueda se resuelve en segundo plano y reemplaza a la anterior aún en curso
+        self.consultar_en_tabla("usuarios", self.usuarios_tabla,
+                                lambda: self.resolver_busqueda_usuarios(criterio, tipo), fila_usuario)
+    
+    def resolver_busqueda_usuarios(self, criterio, tipo):
+        # Buscar según el tipo (se ejecuta en un hilo de trabajo)
         if tipo == "ID":
             usuario = self.sistema.buscar_usuario_por_id(criterio)
-            if usuario:
-                self.usuarios_tree.insert('', 'end', values=(
-                    usuario.id_usuario, usuario.nombre, usuario.contacto
-                ))
+            usuarios = [usuario] if usuario else []
         elif tipo == "Nombre":
             usuarios = self.sistema.buscar_usuarios_por_nombre(criterio)
-            for usuario in usuarios:
-                self.usuarios_tree.insert('', 'end', values=(
-                    usuario.id_usuario, usuario.nombre, usuario.contacto
-                ))
+        elif tipo == "Aproximada":
+            # Tolera errores de escritura, los más parecidos primero
+            usuarios = self.sistema.buscar_usuarios_aproximado(criterio)
+        else:
+            usuarios = []
+        return usuarios
     
     def agregar_usuario(self):
         # Crear ventana para agregar usuario
@@ -555,7 +686,6 @@ class BibliotecaApp:
             if exito:
                 messagebox.showinfo("Éxito", mensaje)
                 add_window.destroy()
-                self.actualizar_lista_usuarios()
                 self.actualizar_estadisticas()  # Actualizar estadísticas
             else:
                 messagebox.showerror("Error", mensaje)
@@ -636,7 +766,6 @@ class BibliotecaApp:
             if exito:
                 messagebox.showinfo("Éxito", mensaje)
                 edit_window.destroy()
-                self.actualizar_lista_usuarios()
                 self.actualizar_estadisticas()  # Actualizar estadísticas
             else:
                 messagebox.showerror("Error", mensaje)
@@ -669,7 +798,6 @@ class BibliotecaApp:
             
             if exito:
                 messagebox.showinfo("Éxito", mensaje)
-                self.actualizar_lista_usuarios()
                 self.actualizar_estadisticas()  # Actualizar estadísticas
             else:
                 messagebox.showerror("Error", mensaje)
@@ -701,39 +829,20 @@ class BibliotecaApp:
         list_frame = tk.Frame(self.prestamos_frame)
         list_frame.pack(fill='both', expand=True, padx=10, pady=10)
         
-        # Treeview para mostrar préstamos
+        # Tabla virtual para mostrar préstamos (solo crea las filas visibles)
         columns = ('ID Préstamo', 'ISBN Libro', 'ID Usuario', 'Fecha Préstamo', 'Fecha Devolución', 'Estado')
-        self.prestamos_tree = ttk.Treeview(list_frame, columns=columns, show='headings')
-        
-        # Configurar columnas
         column_widths = [100, 120, 100, 120, 120, 100]
-        for i, col in enumerate(columns):
-            self.prestamos_tree.heading(col, text=col)
-            self.prestamos_tree.column(col, width=column_widths[i])
-        
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.prestamos_tree.yview)
-        self.prestamos_tree.configure(yscroll=scrollbar.set)
-        
-        self.prestamos_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.prestamos_tabla = TablaVirtual(list_frame, columns, column_widths)
+        self.prestamos_tabla.pack(fill=tk.BOTH, expand=True)
+        self.prestamos_tree = self.prestamos_tabla.tree
         
         # Cargar préstamos iniciales
         self.actualizar_lista_prestamos()
     
     def actualizar_lista_prestamos(self):
-        # Limpiar treeview
-        for item in self.prestamos_tree.get_children():
-            self.prestamos_tree.delete(item)
-        
-        # Obtener y mostrar préstamos
-        prestamos = self.sistema.listar_todos_los_prestamos()
-        for prestamo in prestamos:
-            estado = "Activo" if prestamo.activo else "Finalizado"
-            self.prestamos_tree.insert('', 'end', values=(
-                prestamo.id_prestamo, prestamo.isbn_libro, prestamo.id_usuario,
-                prestamo.fecha_prestamo, prestamo.fecha_devolucion or "No devuelto", estado
-            ))
+        # El historial puede estar en disco: la tabla lee solo los rangos que muestra
+        fuente = FuentePaginada(self.sistema.contar_prestamos, self.sistema.iterar_prestamos, fila_prestamo)
+        self.prestamos_tabla.mostrar(fuente, conservar_posicion=True)
     
     def registrar_prestamo(self):
         # Crear ventana para registrar préstamo
@@ -758,7 +867,7 @@ class BibliotecaApp:
         
         # Campos del formulario
         fields = [
-            ("ISBN del libro:", "isbn_libro"),
+            ("ISBN de los libros:", "isbn_libro"),
             ("ID del usuario:", "id_usuario"),
             ("Fecha de préstamo (YYYY-MM-DD):", "fecha_prestamo")
         ]
@@ -784,16 +893,21 @@ class BibliotecaApp:
                 messagebox.showerror("Error", "Todos los campos son obligatorios")
                 return
             
-            # Registrar préstamo
-            exito, mensaje = self.sistema.registrar_prestamo(
-                datos['isbn_libro'], datos['id_usuario'], datos['fecha_prestamo']
-            )
+            # Varios ISBN separados por comas o espacios se prestan juntos:
+            # se registran todos o ninguno
+            isbns = datos['isbn_libro'].replace(',', ' ').split()
+            if len(isbns) > 1:
+                exito, mensaje = self.sistema.registrar_prestamos_lote(
+                    isbns, datos['id_usuario'], datos['fecha_prestamo']
+                )
+            else:
+                exito, mensaje = self.sistema.registrar_prestamo(
+                    isbns[0], datos['id_usuario'], datos['fecha_prestamo']
+                )
             
             if exito:
                 messagebox.showinfo("Éxito", mensaje)
                 prestamo_window.destroy()
-                self.actualizar_lista_prestamos()
-                self.actualizar_lista_libros()  # Actualizar estado de libros
                 self.actualizar_estadisticas()  # Actualizar estadísticas
             else:
                 messagebox.showerror("Error", mensaje)
@@ -810,29 +924,30 @@ class BibliotecaApp:
             messagebox.showwarning("Advertencia", "Por favor seleccione un préstamo para registrar devolución")
             return
         
-        # Obtener ID del préstamo seleccionado
-        id_prestamo = self.prestamos_tree.item(selected_item[0])['values'][0]
-        estado = self.prestamos_tree.item(selected_item[0])['values'][5]
+        # Obtener los IDs de los préstamos seleccionados (puede haber varios)
+        filas = [self.prestamos_tree.item(item)['values'] for item in selected_item]
+        ids_prestamo = [str(fila[0]) for fila in filas]
         
-        # Verificar que el préstamo esté activo
-        if estado != "Activo":
+        # Verificar que los préstamos estén activos
+        if any(fila[5] != "Activo" for fila in filas):
             messagebox.showwarning("Advertencia", "Solo se pueden registrar devoluciones de préstamos activos")
             return
         
         # Pedir fecha de devolución
         fecha_devolucion = simpledialog.askstring(
             "Registrar Devolución", 
-            f"Ingrese la fecha de devolución (YYYY-MM-DD) para el préstamo {id_prestamo}:"
+            f"Ingrese la fecha de devolución (YYYY-MM-DD) para: {', '.join(ids_prestamo)}"
         )
         
         if fecha_devolucion:
-            # Registrar devolución
-            exito, mensaje = self.sistema.registrar_devolucion(id_prestamo, fecha_devolucion)
+            # Registrar la devolución; varias se registran juntas (todas o ninguna)
+            if len(ids_prestamo) > 1:
+                exito, mensaje = self.sistema.registrar_devoluciones_lote(ids_prestamo, fecha_devolucion)
+            else:
+                exito, mensaje = self.sistema.registrar_devolucion(ids_prestamo[0], fecha_devolucion)
             
             if exito:
                 messagebox.showinfo("Éxito", mensaje)
-                self.actualizar_lista_prestamos()
-                self.actualizar_lista_libros()  # Actualizar estado de libros
                 self.actualizar_estadisticas()  # Actualizar estadísticas
             else:
                 messagebox.showerror("Error", mensaje)
@@ -859,8 +974,13 @@ class BibliotecaApp:
         report_buttons = [
             ("Libros Disponibles", self.mostrar_libros_disponibles),
             ("Préstamos Activos", self.mostrar_prestamos_activos),
+            ("Préstamos Vencidos", self.mostrar_prestamos_vencidos),
             ("Todos los Libros", self.mostrar_todos_libros),
-            ("Todos los Usuarios", self.mostrar_todos_usuarios)
+            ("Todos los Usuarios", self.mostrar_todos_usuarios),
+            ("Préstamos por Género", self.mostrar_prestamos_por_genero),
+            ("Libros Más Prestados", self.mostrar_libros_mas_prestados),
+            ("Usuarios Más Activos", self.mostrar_usuarios_mas_activos),
+            ("Duración de Préstamos", self.mostrar_duracion_prestamos)
         ]
         
         for i, (text, command) in enumerate(report_buttons):
@@ -869,6 +989,12 @@ class BibliotecaApp:
                           width=20, height=2, relief='flat')
             btn.grid(row=i//2, column=i%2, padx=10, pady=10)
     
+    def consultar_informe(self, ventana, tabla, consulta, convertir):
+        # Cada ventana de informe tiene su canal; al cerrarla se cancela su consulta
+        canal = str(ventana)
+        ventana.bind("<Destroy>", lambda evento: evento.widget is ventana and self.ejecutor.cancelar(canal))
+        self.consultar_en_tabla(canal, tabla, consulta, convertir)
+    
     def mostrar_libros_disponibles(self):
         # Crear ventana para mostrar libros disponibles
         disp_window = tk.Toplevel(self.root)
@@ -884,29 +1010,14 @@ class BibliotecaApp:
                               font=self.subtitle_font)
         title_label.pack(pady=10)
         
-        # Treeview para mostrar libros disponibles
+        # Tabla virtual para mostrar libros disponibles
         columns = ('ISBN', 'Título', 'Autor', 'Año', 'Género')
-        tree = ttk.Treeview(main_frame, columns=columns, show='headings')
-        
-        # Configurar columnas
-        for col in columns:
-            tree.heading(col, text=col)
-            tree.column(col, width=120)
-        
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(main_frame, orient=tk.VERTICAL, command=tree.yview)
-        tree.configure(yscroll=scrollbar.set)
-        
-        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        
-        # Obtener y mostrar libros disponibles
-        libros = self.sistema.listar_libros_disponibles()
-        for libro in libros:
-            tree.insert('', 'end', values=(
-                libro.isbn, libro.titulo, libro.autor, 
-                libro.año_publicacion, libro.genero
-            ))
+        tabla = TablaVirtual(main_frame, columns)
+        tabla.pack(fill=tk.BOTH, expand=True)
+        
+        # Recorrer el catálogo en segundo plano, mostrando los libros a medida que aparecen
+        self.consultar_informe(disp_window, tabla, lambda: (
+            libro for libro in self.sistema.iterar_libros() if libro.disponible), fila_libro_disponible)
     
     def mostrar_prestamos_activos(self):
         # Crear ventana para mostrar préstamos activos
@@ -923,30 +1034,110 @@ class BibliotecaApp:
                               font=self.subtitle_font)
         title_label.pack(pady=10)
         
-        # Treeview para mostrar préstamos activos
+        # Tabla virtual para mostrar préstamos activos
         columns = ('ID Préstamo', 'ISBN Libro', 'ID Usuario', 'Fecha Préstamo')
-        tree = ttk.Treeview(main_frame, columns=columns, show='headings')
-        
-        # Configurar columnas
         column_widths = [100, 120, 100, 120]
-        for i, col in enumerate(columns):
-            tree.heading(col, text=col)
-            tree.column(col, width=column_widths[i])
-        
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(main_frame, orient=tk.VERTICAL, command=tree.yview)
-        tree.configure(yscroll=scrollbar.set)
-        
-        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        
-        # Obtener y mostrar préstamos activos
-        prestamos = self.sistema.obtener_prestamos_activos()
-        for prestamo in prestamos:
-            tree.insert('', 'end', values=(
-                prestamo.id_prestamo, prestamo.isbn_libro, 
-                prestamo.id_usuario, prestamo.fecha_prestamo
-            ))
+        tabla = TablaVirtual(main_frame, columns, column_widths)
+        tabla.pack(fill=tk.BOTH, expand=True)
+        
+        # Obtener y mostrar préstamos activos en segundo plano
+        self.consultar_informe(activos_window, tabla, self.sistema.obtener_prestamos_activos,
+                               fila_prestamo_activo)
+    
+    def mostrar_prestamos_vencidos(self):
+        # Crear ventana para mostrar los préstamos activos con la fecha límite pasada
+        vencidos_window = tk.Toplevel(self.root)
+        vencidos_window.title("Préstamos Vencidos")
+        vencidos_window.geometry("900x400")
+        
+        # Frame principal
+        main_frame = tk.Frame(vencidos_window)
+        main_frame.pack(fill='both', expand=True, padx=10, pady=10)
+        
+        # Título
+        title_label = tk.Label(main_frame, text="Préstamos Vencidos", 
+                              font=self.subtitle_font)
+        title_label.pack(pady=10)
+        
+        # Tabla virtual, del préstamo más atrasado al menos atrasado
+        columns = ('ID Préstamo', 'ISBN Libro', 'ID Usuario', 'Fecha Préstamo', 'Fecha Límite', 'Días de Retraso')
+        column_widths = [100, 120, 100, 120, 120, 110]
+        tabla = TablaVirtual(main_frame, columns, column_widths)
+        tabla.pack(fill=tk.BOTH, expand=True)
+        
+        hoy = dia_actual()
+        
+        def fila_vencido(prestamo):
+            dias = self.sistema.dias_prestamo(prestamo)
+            return fila_prestamo_activo(prestamo) + (dia_a_fecha(prestamo.dia_limite(dias)),
+                                                     prestamo.dias_retraso(hoy, dias))
+        
+        self.consultar_informe(vencidos_window, tabla, lambda: self.sistema.prestamos_vencidos(hoy),
+                               fila_vencido)
+    
+    def mostrar_informe_circulacion(self, titulo, columns, column_widths, filas, pie=None):
+        # Los informes de circulación ya están calculados (ver reportes.py):
+        # leerlos es inmediato y se hace aquí, en el hilo de la interfaz
+        informe_window = tk.Toplevel(self.root)
+        informe_window.title(titulo)
+        informe_window.geometry("700x400")
+        
+        # Frame principal
+        main_frame = tk.Frame(informe_window)
+        main_frame.pack(fill='both', expand=True, padx=10, pady=10)
+        
+        # Título
+        title_label = tk.Label(main_frame, text=titulo, font=self.subtitle_font)
+        title_label.pack(pady=10)
+        
+        # Texto al pie (totales del informe)
+        if pie:
+            pie_label = tk.Label(main_frame, text=pie, font=self.text_font)
+            pie_label.pack(side=tk.BOTTOM, pady=5)
+        
+        tabla = TablaVirtual(main_frame, columns, column_widths)
+        tabla.pack(fill=tk.BOTH, expand=True)
+        tabla.mostrar(FuenteLista(filas, tuple))
+    
+    def mostrar_prestamos_por_genero(self):
+        # Préstamos de cada género, de mayor a menor
+        por_genero = self.sistema.prestamos_por_genero()
+        total = sum(por_genero.values())
+        filas = [(genero if genero is not None else "(libros fuera del catálogo)", prestamos,
+                  f"{prestamos * 100 / total:.1f} %")
+                 for genero, prestamos in por_genero.items()]
+        self.mostrar_informe_circulacion("Préstamos por Género", ('Género', 'Préstamos', 'Porcentaje'),
+                                         [250, 100, 100], filas, f"Total de préstamos: {total}")
+    
+    def mostrar_libros_mas_prestados(self):
+        # Los libros con más préstamos, con su título si siguen en el catálogo
+        filas = []
+        for isbn, prestamos in self.sistema.libros_mas_prestados(self.PRIMEROS_EN_INFORME):
+            libro = self.sistema.buscar_libro_por_isbn(isbn)
+            filas.append((isbn, libro.titulo if libro else "(fuera del catálogo)",
+                          libro.autor if libro else "", prestamos))
+        self.mostrar_informe_circulacion("Libros Más Prestados", ('ISBN', 'Título', 'Autor', 'Préstamos'),
+                                         [120, 250, 150, 80], filas)
+    
+    def mostrar_usuarios_mas_activos(self):
+        # Los usuarios con más préstamos, con su nombre si siguen registrados
+        filas = []
+        for id_usuario, prestamos in self.sistema.usuarios_mas_activos(self.PRIMEROS_EN_INFORME):
+            usuario = self.sistema.buscar_usuario_por_id(id_usuario)
+            filas.append((id_usuario, usuario.nombre if usuario else "(usuario eliminado)", prestamos))
+        self.mostrar_informe_circulacion("Usuarios Más Activos", ('ID Usuario', 'Nombre', 'Préstamos'),
+                                         [100, 250, 80], filas)
+    
+    def mostrar_duracion_prestamos(self):
+        # Duración promedio de los préstamos devueltos
+        reportes = self.sistema.obtener_reportes()
+        promedio = self.sistema.duracion_promedio_prestamos()
+        filas = [
+            ("Préstamos devueltos", reportes.devoluciones),
+            ("Días prestados en total", reportes.dias_prestados),
+            ("Duración promedio (días)", "-" if promedio is None else f"{promedio:.1f}"),
+        ]
+        self.mostrar_informe_circulacion("Duración de Préstamos", ('Indicador', 'Valor'), [250, 150], filas)
     
     def mostrar_todos_libros(self):
         # Similar a mostrar_libros_disponibles pero con todos los libros
@@ -964,30 +1155,14 @@ class BibliotecaApp:
                               font=self.subtitle_font)
         title_label.pack(pady=10)
         
-        # Treeview para mostrar todos los libros
+        # Tabla virtual para mostrar todos los libros
         columns = ('ISBN', 'Título', 'Autor', 'Año', 'Género', 'Estado')
-        tree = ttk.Treeview(main_frame, columns=columns, show='headings')
-        
-        # Configurar columnas
-        for col in columns:
-            tree.heading(col, text=col)
-            tree.column(col, width=120)
-        
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(main_frame, orient=tk.VERTICAL, command=tree.yview)
-        tree.configure(yscroll=scrollbar.set)
-        
-        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        
-        # Obtener y mostrar todos los libros
-        libros = self.sistema.listar_libros()
-        for libro in libros:
-            estado = "Disponible" if libro.disponible else "Prestado"
-            tree.insert('', 'end', values=(
-                libro.isbn, libro.titulo, libro.autor, 
-                libro.año_publicacion, libro.genero, estado
-            ))
+        tabla = TablaVirtual(main_frame, columns)
+        tabla.pack(fill=tk.BOTH, expand=True)
+        
+        # Mostrar todos los libros sin copiarlos
+        tabla.mostrar(FuenteIterable(self.sistema.iterar_libros(), self.sistema.contar_libros(), fila_libro,
+                                     lambda: self.sistema.iterar_libros(inverso=True)))
     
     def mostrar_todos_usuarios(self):
         # Crear ventana para mostrar todos los usuarios
@@ -1004,33 +1179,19 @@ class BibliotecaApp:
                               font=self.subtitle_font)
         title_label.pack(pady=10)
         
-        # Treeview para mostrar todos los usuarios
+        # Tabla virtual para mostrar todos los usuarios
         columns = ('ID', 'Nombre', 'Contacto')
-        tree = ttk.Treeview(main_frame, columns=columns, show='headings')
-        
-        # Configurar columnas
-        for col in columns:
-            tree.heading(col, text=col)
-            tree.column(col, width=150)
-        
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(main_frame, orient=tk.VERTICAL, command=tree.yview)
-        tree.configure(yscroll=scrollbar.set)
-        
-        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        
-        # Obtener y mostrar todos los usuarios
-        usuarios = self.sistema.listar_usuarios()
-        for usuario in usuarios:
-            tree.insert('', 'end', values=(
-                usuario.id_usuario, usuario.nombre, usuario.contacto
-            ))
+        tabla = TablaVirtual(main_frame, columns, [150, 150, 150])
+        tabla.pack(fill=tk.BOTH, expand=True)
+        
+        # Mostrar todos los usuarios sin copiarlos
+        tabla.mostrar(FuenteIterable(self.sistema.iterar_usuarios(), self.sistema.contar_usuarios(), fila_usuario,
+                                     lambda: self.sistema.iterar_usuarios(inverso=True)))
 
-def main():
+def main(almacenamiento=None):
     # Crear ventana principal
     root = tk.Tk()
-    app = BibliotecaApp(root)
+    app = BibliotecaApp(root, almacenamiento)
     
     # Centrar ventana en la pantalla
     root.update_idletasks()
@@ -1042,6 +1203,10 @@ def main():
     
     # Iniciar loop principal
     root.mainloop()
+    
+    # Detener las consultas en curso y cerrar el almacenamiento al salir
+    app.ejecutor.cerrar()
+    app.sistema.cerrar()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
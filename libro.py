@@ -1,4 +1,7 @@
 # libro.py
+from sys import intern
+
+
 class Libro:
     """
     Clase que representa un libro en el sistema de gestión de biblioteca.
@@ -9,10 +12,22 @@ class Libro:
         autor (str): Autor del libro.
         año_publicacion (int): Año de publicación del libro.
         genero (str): Género literario del libro.
-        disponible (bool): Estado de disponibilidad del libro (True si está disponible, False si está prestado).
+        ejemplares (tuple): Códigos de barras de los ejemplares físicos del libro.
+        libres (list): Códigos de los ejemplares que no están prestados.
+    
+    Un libro puede tener varios ejemplares; por defecto tiene uno, cuyo código
+    de barras es el propio ISBN. Los ejemplares libres forman una pila: prestar
+    cualquiera saca el último en O(1) y devolverlo lo vuelve a apilar, y el
+    número de ejemplares disponibles es su longitud (ver SistemaBiblioteca).
+    
+    Usa __slots__ en lugar de un diccionario de atributos, y el autor y el
+    género se internan al asignarlos (también al actualizar el libro): los
+    libros del mismo autor o género comparten el texto.
     """
     
-    def __init__(self, isbn, titulo, autor, año_publicacion, genero):
+    __slots__ = ('isbn', 'titulo', '_autor', 'año_publicacion', '_genero', 'ejemplares', 'libres')
+    
+    def __init__(self, isbn, titulo, autor, año_publicacion, genero, ejemplares=None):
         """
         Inicializa una nueva instancia de la clase Libro.
         
@@ -22,13 +37,49 @@ class Libro:
             autor (str): Autor del libro.
             año_publicacion (int): Año de publicación del libro.
             genero (str): Género literario del libro.
+            ejemplares (iterable, optional): Códigos de barras de los ejemplares.
+                                             Si no se indica, un único ejemplar con el ISBN como código.
         """
         self.isbn = isbn
         self.titulo = titulo
         self.autor = autor
         self.año_publicacion = año_publicacion
         self.genero = genero
-        self.disponible = True  # Por defecto, el libro está disponible
+        self.ejemplares = tuple(ejemplares) if ejemplares else (isbn,)
+        self.libres = list(self.ejemplares)  # Por defecto, todos los ejemplares están disponibles
+    
+    @property
+    def autor(self):
+        """Autor del libro (texto internado)"""
+        return self._autor
+    
+    @autor.setter
+    def autor(self, autor):
+        self._autor = intern(autor) if type(autor) is str else autor
+    
+    @property
+    def genero(self):
+        """Género literario del libro (texto internado)"""
+        return self._genero
+    
+    @genero.setter
+    def genero(self, genero):
+        self._genero = intern(genero) if type(genero) is str else genero
+    
+    @property
+    def disponible(self):
+        """True si queda algún ejemplar sin prestar"""
+        return bool(self.libres)
+    
+    @property
+    def total_ejemplares(self):
+        """Número de ejemplares del libro"""
+        return len(self.ejemplares)
+    
+    @property
+    def ejemplares_disponibles(self):
+        """Número de ejemplares sin prestar"""
+        return len(self.libres)
     
     def __str__(self):
         """
@@ -38,22 +89,18 @@ class Libro:
             str: Información formateada del libro incluyendo su estado de disponibilidad.
         """
         estado = "Disponible" if self.disponible else "Prestado"
+        if len(self.ejemplares) > 1:
+            estado += f" ({len(self.libres)} de {len(self.ejemplares)} ejemplares)"
         return f"ISBN: {self.isbn}, Título: {self.titulo}, Autor: {self.autor}, Año: {self.año_publicacion}, Género: {self.genero}, Estado: {estado}"
     
-    def cambiar_estado(self):
-        """
-        Cambia el estado de disponibilidad del libro.
-        
-        Si está disponible, lo marca como prestado y viceversa.
-        """
-        self.disponible = not self.disponible
-    
     def to_dict(self):
         """
         Convierte el objeto Libro a un diccionario.
         
         Returns:
-            dict: Diccionario con todos los atributos del libro.
+            dict: Diccionario con todos los atributos del libro. disponible y
+                  ejemplares_disponibles se incluyen como información: al
+                  cargar, se deducen de los préstamos activos.
         """
         return {
             'isbn': self.isbn,
@@ -61,7 +108,9 @@ class Libro:
             'autor': self.autor,
             'año_publicacion': self.año_publicacion,
             'genero': self.genero,
-            'disponible': self.disponible
+            'disponible': self.disponible,
+            'ejemplares': list(self.ejemplares),
+            'ejemplares_disponibles': len(self.libres)
         }
     
     @classmethod
@@ -75,28 +124,30 @@ class Libro:
         Returns:
             Libro: Nueva instancia de la clase Libro.
         """
-        libro = cls(
+        # Todos los ejemplares empiezan libres: los préstamos activos que se
+        # carguen después ocupan los suyos
+        return cls(
             data['isbn'],
             data['titulo'],
             data['autor'],
             data['año_publicacion'],
-            data['genero']
+            data['genero'],
+            data.get('ejemplares')
         )
-        libro.disponible = data['disponible']
-        return libro
 
 
 # Bloque de prueba para verificar el funcionamiento de la clase Libro
 if __name__ == "__main__":
     print("=== Prueba de la clase Libro ===")
     
-    # Crear un libro de prueba
-    libro_prueba = Libro("978-0142437230", "1984", "George Orwell", 1949, "Ciencia Ficción")
+    # Crear un libro de prueba con tres ejemplares
+    libro_prueba = Libro("978-0142437230", "1984", "George Orwell", 1949, "Ciencia Ficción",
+                         ["978-0142437230-1", "978-0142437230-2", "978-0142437230-3"])
     print(f"Libro creado: {libro_prueba}")
     
-    # Cambiar estado del libro
-    libro_prueba.cambiar_estado()
-    print(f"Después de cambiar estado: {libro_prueba}")
+    # Prestar un ejemplar (cualquiera libre)
+    codigo = libro_prueba.libres.pop()
+    print(f"Después de prestar el ejemplar {codigo}: {libro_prueba}")
     
     # Convertir a diccionario
     dict_libro = libro_prueba.to_dict()
@@ -106,4 +157,9 @@ if __name__ == "__main__":
     nuevo_libro = Libro.from_dict(dict_libro)
     print(f"Libro desde diccionario: {nuevo_libro}")
     
+    # Actualizar el autor con un texto nuevo: se guarda el internado
+    autor = "".join(["George ", "Orwell"])
+    nuevo_libro.autor = autor
+    print(f"Autor actualizado comparte el texto: {nuevo_libro.autor is libro_prueba.autor}")
+    
     print("=== Prueba completada ===")
\ No newline at end of file
@@ -1,28 +1,184 @@
 # main.py
 # Importación de módulos necesarios para el sistema
-from estructuras import ListaEnlazada  # Importa la estructura de datos ListaEnlazada
+from estructuras import ListaIndexada, IndiceAproximado, IndiceTrigramas, IndiceFechas  # Estructuras de datos e índices
 from libro import Libro  # Importa la clase Libro para manejar los libros
 from usuario import Usuario  # Importa la clase Usuario para manejar los usuarios
-from prestamo import Prestamo  # Importa la clase Prestamo para manejar los préstamos
+from prestamo import Prestamo, PoliticaPrestamo, fecha_a_dia, dia_a_fecha, validar_fecha, dia_actual, ERROR_FECHA  # Préstamos, su duración y fechas como números de día
+from historial import HistorialColumnar  # Historial de préstamos compacto, por columnas
+from reportes import MotorReportes  # Informes de circulación mantenidos en cada préstamo
+from reservas import Reserva, ColaReservas, DIAS_RECOGIDA, PENDIENTE, LISTA, CUMPLIDA, CANCELADA, VENCIDA  # Reservas
+from multas import MotorMultas  # Multas por retraso calculadas por lotes
+from concurrencia import CerrojoLectoresEscritor, lectura, lectura_por_lotes, escritura  # Modo concurrente
+from collections import namedtuple  # Registro inmutable para los eventos de cambio
+from contextlib import nullcontext  # Contexto vacío cuando no hay almacenamiento o cerrojo
+from heapq import nlargest  # Usuarios con más multas sin ordenarlos todos
+from itertools import islice  # Recorrido de un rango de un iterable
 import os  # Módulo para funcionalidades del sistema operativo
 import sys  # Módulo para interactuar con el intérprete de Python
+import threading  # Cerrojo de la cuenta de préstamos vencidos en modo concurrente
+
+# Evento que reciben los suscriptores (ver SistemaBiblioteca.suscribir):
+# entidad ("libro", "usuario", "prestamo", "reserva" o "multa"), accion ("insertado", "actualizado"
+# o "eliminado"), clave actual, el objeto afectado y la clave anterior si cambió
+Cambio = namedtuple('Cambio', ['entidad', 'accion', 'clave', 'dato', 'clave_anterior'])
+
+# Campos de Libro que no se cambian con actualizar_libro: la disponibilidad
+# se deduce de los ejemplares libres, y estos de los préstamos activos
+CAMPOS_INVENTARIO = frozenset({'disponible', 'ejemplares', 'libres', 'total_ejemplares', 'ejemplares_disponibles'})
 
 # Definición de la clase principal del sistema de biblioteca
 class SistemaBiblioteca:
     # Método constructor de la clase
-    def __init__(self):
-        # Inicializa una lista enlazada para almacenar los libros
-        self.libros = ListaEnlazada()
-        # Inicializa una lista enlazada para almacenar los usuarios
-        self.usuarios = ListaEnlazada()
+    def __init__(self, almacenamiento=None, datos_ejemplo=True, historial_columnar=False, politica=None,
+                 concurrente=False, tarifa_multas=None):
+        # Con concurrente=True el sistema se puede usar desde varios hilos: las
+        # consultas se ejecutan a la vez y cada cambio (préstamo, devolución,
+        # alta...) de forma atómica, sin consultas en curso (ver concurrencia.py)
+        self.cerrojo = CerrojoLectoresEscritor() if concurrente else None
+        # Las consultas de vencidos guardan su última cuenta; en modo concurrente
+        # dos consultas simultáneas no deben mezclar el día de una con la cuenta de otra
+        self.cerrojo_vencidos = threading.Lock() if concurrente else nullcontext()
+        # Igual con los informes, que tras cargar del almacenamiento calcula la primera consulta
+        self.cerrojo_reportes = threading.Lock() if concurrente else nullcontext()
+        # Inicializa una lista indexada por ISBN para almacenar los libros
+        self.libros = ListaIndexada(lambda libro: libro.isbn)
+        # Inicializa una lista indexada por ID para almacenar los usuarios
+        self.usuarios = ListaIndexada(lambda usuario: usuario.id_usuario)
+        # Índice de texto completo sobre título, autor y género, tolerante a
+        # errores de escritura (ver buscar_libros y buscar_libros_aproximado)
+        self.indice_texto = IndiceAproximado({'titulo': 3, 'autor': 2, 'genero': 1})
+        # Índice de palabras de los nombres de usuario (ver buscar_usuarios_aproximado)
+        self.indice_nombres = IndiceAproximado({'nombre': 1})
+        # Índices de trigramas para las búsquedas parciales (subcadenas)
+        self.trigramas_titulo = IndiceTrigramas('titulo')
+        self.trigramas_autor = IndiceTrigramas('autor')
+        self.trigramas_nombre = IndiceTrigramas('nombre')
         # Inicializa una lista (arreglo) para almacenar los préstamos
         self.prestamos = []  # Usamos un arreglo para préstamos
+        # Con historial_columnar, el historial en memoria se guarda en arreglos
+        # compactos (ver historial.py) y solo los préstamos activos son objetos
+        self.historial_columnar = historial_columnar and almacenamiento is None
+        if self.historial_columnar:
+            self.prestamos = HistorialColumnar()
+        # Índices de préstamos actualizados en cada préstamo y devolución
+        self.indice_prestamos = {}  # ID de préstamo -> Prestamo
+        self.prestamos_activos = {}  # ID de préstamo -> Prestamo activo
+        self.prestamos_activos_por_usuario = {}  # ID de usuario -> {ID de préstamo: Prestamo}
+        self.prestamos_activos_por_libro = {}  # ISBN -> {ID de préstamo: Prestamo}
+        # Índice de ejemplares: código de barras -> Libro al que pertenece
+        self.ejemplares = {}
+        # Contadores de las estadísticas, mantenidos en cada cambio (ver estadisticas)
+        self.libros_disponibles = 0  # Libros con algún ejemplar libre
+        self.total_ejemplares = 0
+        self.ejemplares_disponibles = 0
+        self.libros_por_genero = {}  # Género -> número de libros
+        # Duración de los préstamos por género del libro o categoría del usuario
+        self.politica = politica if politica is not None else PoliticaPrestamo()
+        # Préstamos activos ordenados por día límite y por día de préstamo
+        self.vencimientos = IndiceFechas()
+        self.prestamos_por_antiguedad = IndiceFechas()
+        self.dia_vencidos = None  # Día de la última cuenta de vencidos
+        self.total_vencidos = 0  # Préstamos con día límite anterior a dia_vencidos
+        # Agregados de los informes de circulación (ver reportes.py); None
+        # mientras no se hayan calculado sobre el historial guardado
+        self.reportes = MotorReportes()
         # Contador para generar IDs únicos de préstamos
         self.contador_prestamos = 1  # Contador para IDs de préstamos
+        # Reservas activas con su cola de espera por libro (ver reservas.py)
+        self.reservas = ColaReservas()
+        self.contador_reservas = 1
+        # Reservas que cambió la operación en curso, por guardar y notificar
+        self.reservas_modificadas = []
+        # Saldos de multas por usuario, calculados por lotes (ver multas.py)
+        self.multas = MotorMultas(tarifa_multas)
+        # Motor de persistencia opcional (ver persistencia.py)
+        # Sin almacenamiento, self.prestamos guarda todo el historial en memoria;
+        # con almacenamiento, el historial se lee del motor bajo demanda
+        self.almacenamiento = almacenamiento
+        # Funciones notificadas con un Cambio tras cada modificación
+        self.suscriptores = []
         
-        # Llama al método para agregar datos de ejemplo al sistema
-        # Datos de ejemplo para pruebas
-        self.agregar_datos_ejemplo()
+        if almacenamiento is not None and not almacenamiento.esta_vacio():
+            # Cargar el estado guardado
+            self.cargar_desde_almacenamiento()
+        elif datos_ejemplo:
+            # Llama al método para agregar datos de ejemplo al sistema
+            # Datos de ejemplo para pruebas
+            self.agregar_datos_ejemplo()
+    
+    # Método para recibir los cambios de libros, usuarios y préstamos
+    @escritura
+    def suscribir(self, funcion):
+        """Registra una función que recibirá un Cambio por cada modificación"""
+        self.suscriptores.append(funcion)
+    
+    # Método para dejar de recibir cambios
+    @escritura
+    def cancelar_suscripcion(self, funcion):
+        """Quita una función registrada con suscribir()"""
+        if funcion in self.suscriptores:
+            self.suscriptores.remove(funcion)
+    
+    # Método para avisar de un cambio a los suscriptores
+    def _notificar(self, entidad, accion, clave, dato, clave_anterior=None):
+        """Envía un Cambio a todos los suscriptores"""
+        cambio = Cambio(entidad, accion, clave, dato, clave_anterior)
+        for funcion in self.suscriptores:
+            funcion(cambio)
+    
+    # Método para cargar el estado desde el almacenamiento
+    def cargar_desde_almacenamiento(self):
+        """Carga el catálogo y los préstamos activos desde el almacenamiento"""
+        for libro in self.almacenamiento.cargar_libros():
+            if self.libros.agregar(libro):
+                self._indexar_libro(libro, diferido=True)
+        for usuario in self.almacenamiento.cargar_usuarios():
+            if self.usuarios.agregar(usuario):
+                self._indexar_usuario(usuario, diferido=True)
+        # Solo los préstamos activos se cargan en memoria; el resto del
+        # historial se consulta al motor cuando se necesita
+        sin_ejemplar = []
+        for prestamo in self.almacenamiento.cargar_prestamos_activos():
+            self._indexar_prestamo(prestamo)
+            # Los libros se cargan con todos sus ejemplares libres: cada
+            # préstamo activo vuelve a ocupar el suyo
+            if prestamo.codigo_barras is None:
+                sin_ejemplar.append(prestamo)
+            else:
+                self._ocupar_ejemplar(prestamo)
+        # Los préstamos anteriores a los ejemplares ocupan uno libre cualquiera
+        for prestamo in sin_ejemplar:
+            self._ocupar_ejemplar(prestamo)
+        # Las reservas listas vuelven a apartar su ejemplar; si ya no queda
+        # ninguno libre, vuelven a la cola
+        for reserva in self.almacenamiento.cargar_reservas_activas():
+            if reserva.estado == LISTA:
+                libro = self.libros.obtener(reserva.isbn_libro)
+                if libro is not None and libro.libres:
+                    reserva.codigo_barras = self._tomar_ejemplar(libro, reserva.codigo_barras)
+                else:
+                    reserva.estado, reserva.codigo_barras, reserva.dia_limite = PENDIENTE, None, None
+            self.reservas.agregar(reserva)
+        self.contador_prestamos = self.almacenamiento.obtener_contador_prestamos()
+        self.contador_reservas = self.almacenamiento.obtener_contador_reservas()
+        self.multas.restaurar(self.almacenamiento.obtener_estado_multas(), self.almacenamiento.cargar_saldos_multas())
+        # Recorrer el historial guardado retrasaría el arranque: los informes
+        # se calculan en la primera consulta (ver _informes) y, hasta entonces,
+        # los préstamos y devoluciones no los actualizan
+        self.reportes = None
+    
+    # Método para agrupar escrituras en el almacenamiento
+    def _transaccion(self):
+        """Devuelve una transacción del almacenamiento o un contexto vacío"""
+        if self.almacenamiento is None:
+            return nullcontext()
+        return self.almacenamiento.transaccion()
+    
+    # Método para cerrar el almacenamiento
+    def cerrar(self):
+        """Libera el almacenamiento asociado al sistema"""
+        if self.almacenamiento is not None:
+            self.almacenamiento.cerrar()
     
     # Método para agregar datos de ejemplo al sistema
     def agregar_datos_ejemplo(self):
@@ -40,6 +196,7 @@ class SistemaBiblioteca:
         # Itera sobre la lista de libros ejemplo y los agrega al sistema
         for libro in libros_ejemplo:
             self.libros.agregar(libro)
+            self._indexar_libro(libro)
         
         # Agregar algunos usuarios de ejemplo
         # Lista de usuarios predefinidos para pruebas
@@ -53,78 +210,384 @@ class SistemaBiblioteca:
         # Itera sobre la lista de usuarios ejemplo y los agrega al sistema
         for usuario in usuarios_ejemplo:
             self.usuarios.agregar(usuario)
+            self._indexar_usuario(usuario)
+        
+        # Guardar los datos de ejemplo en el almacenamiento, si lo hay
+        if self.almacenamiento is not None:
+            with self._transaccion():
+                for libro in libros_ejemplo:
+                    self.almacenamiento.guardar_libro(libro)
+                for usuario in usuarios_ejemplo:
+                    self.almacenamiento.guardar_usuario(usuario)
     
     # ===== MÉTODOS PARA LIBROS =====
     
     # Método para agregar un nuevo libro al sistema
-    def agregar_libro(self, isbn, titulo, autor, año_publicacion, genero):
-        """Agrega un nuevo libro al sistema"""
-        # Verificar si el libro ya existe buscando por ISBN
-        if self.buscar_libro_por_isbn(isbn):
+    @escritura
+    def agregar_libro(self, isbn, titulo, autor, año_publicacion, genero, ejemplares=1):
+        """Agrega un nuevo libro al sistema con uno o varios ejemplares (ver _codigos_ejemplares)"""
+        # Verificar si el libro ya existe consultando el índice por ISBN
+        if self.libros.contiene(isbn):
             # Retorna False y mensaje de error si ya existe
             return False, "Ya existe un libro con este ISBN"
         
         # Crea una nueva instancia de Libro con los datos proporcionados
-        nuevo_libro = Libro(isbn, titulo, autor, año_publicacion, genero)
-        # Agrega el nuevo libro a la lista enlazada de libros
+        codigos = self._codigos_ejemplares(isbn, ejemplares)
+        if isinstance(codigos, str):
+            return False, codigos
+        nuevo_libro = Libro(isbn, titulo, autor, año_publicacion, genero, codigos)
+        # Agrega el nuevo libro a la lista enlazada de libros y a los índices de búsqueda
         self.libros.agregar(nuevo_libro)
+        self._indexar_libro(nuevo_libro)
+        # Guardar el libro en el almacenamiento
+        if self.almacenamiento is not None:
+            self.almacenamiento.guardar_libro(nuevo_libro)
+        self._notificar("libro", "insertado", isbn, nuevo_libro)
         # Retorna True y mensaje de éxito
         return True, "Libro agregado exitosamente"
     
     # Método para buscar un libro por su ISBN
+    @lectura
     def buscar_libro_por_isbn(self, isbn):
         """Busca un libro por ISBN"""
-        # Utiliza el método buscar de ListaEnlazada con una función lambda
-        # que compara el ISBN del libro con el ISBN buscado
-        return self.libros.buscar(lambda libro: libro.isbn == isbn)
+        # Consulta directa en el índice de la lista (O(1))
+        return self.libros.obtener(isbn)
+    
+    # Método para buscar libros por palabras clave en título, autor y género
+    @lectura
+    def buscar_libros(self, texto, limite=None):
+        """Busca libros por palabras o prefijos, sin distinguir tildes, ordenados por relevancia"""
+        # El índice invertido devuelve los ISBN ordenados por relevancia
+        return [self.libros.obtener(isbn) for isbn in self.indice_texto.buscar(texto, limite)]
+    
+    # Método para buscar libros tolerando errores de escritura
+    @lectura
+    def buscar_libros_aproximado(self, texto, limite=10):
+        """Busca los libros cuyo título, autor o género se parecen más al texto"""
+        # Cada palabra admite hasta dos errores (inserción, borrado, cambio o transposición)
+        return [self.libros.obtener(isbn) for isbn, _ in self.indice_texto.buscar_aproximado(texto, limite)]
     
     # Método para buscar libros por título (búsqueda parcial)
+    @lectura
     def buscar_libros_por_titulo(self, titulo):
         """Busca libros por título (búsqueda parcial)"""
-        # List comprehension que filtra libros cuyo título contiene el texto buscado
-        # (búsqueda case-insensitive)
-        return [libro for libro in self.libros.listar() if titulo.lower() in libro.titulo.lower()]
+        # El índice de trigramas solo verifica los candidatos que comparten el
+        # trigrama menos frecuente del texto buscado (búsqueda case-insensitive)
+        return self.trigramas_titulo.buscar(titulo)
     
     # Método para buscar libros por autor (búsqueda parcial)
+    @lectura
     def buscar_libros_por_autor(self, autor):
         """Busca libros por autor (búsqueda parcial)"""
-        # List comprehension que filtra libros cuyo autor contiene el texto buscado
-        # (búsqueda case-insensitive)
-        return [libro for libro in self.libros.listar() if autor.lower() in libro.autor.lower()]
+        # Consulta el índice de trigramas de autores (búsqueda case-insensitive)
+        return self.trigramas_autor.buscar(autor)
+    
+    # Método para agregar un libro a los índices de búsqueda
+    def _indexar_libro(self, libro, diferido=False):
+        """Agrega un libro y sus ejemplares a los índices de búsqueda y a los contadores"""
+        self._contar_libro(libro, 1)
+        for codigo in libro.ejemplares:
+            self.ejemplares[codigo] = libro
+        # Las cargas e importaciones masivas dejan los índices de texto para
+        # construirlos de una vez en la siguiente búsqueda
+        if diferido:
+            self.indice_texto.agregar_diferido(libro.isbn, libro)
+            self.trigramas_titulo.agregar_diferido(libro.isbn, libro)
+            self.trigramas_autor.agregar_diferido(libro.isbn, libro)
+        else:
+            self.indice_texto.agregar(libro.isbn, libro)
+            self.trigramas_titulo.agregar(libro.isbn, libro)
+            self.trigramas_autor.agregar(libro.isbn, libro)
+    
+    # Método para actualizar un libro modificado en los índices de búsqueda
+    def _reindexar_libro(self, isbn_anterior, libro):
+        """Actualiza un libro modificado en los índices de búsqueda"""
+        self.indice_texto.actualizar(isbn_anterior, libro.isbn, libro)
+        self.trigramas_titulo.actualizar(isbn_anterior, libro.isbn, libro)
+        self.trigramas_autor.actualizar(isbn_anterior, libro.isbn, libro)
+    
+    # Método para quitar un libro de los índices de búsqueda
+    def _desindexar_libro(self, isbn):
+        """Quita un libro de los índices de búsqueda"""
+        self.indice_texto.eliminar(isbn)
+        self.trigramas_titulo.eliminar(isbn)
+        self.trigramas_autor.eliminar(isbn)
+    
+    # Método para sumar o restar un libro en los contadores de estadísticas
+    def _contar_libro(self, libro, cantidad):
+        """Suma (cantidad=1) o resta (cantidad=-1) un libro de los contadores"""
+        if libro.libres:
+            self.libros_disponibles += cantidad
+        self.total_ejemplares += cantidad * len(libro.ejemplares)
+        self.ejemplares_disponibles += cantidad * len(libro.libres)
+        total = self.libros_por_genero.get(libro.genero, 0) + cantidad
+        if total:
+            self.libros_por_genero[libro.genero] = total
+        else:
+            # No conservar géneros sin libros
+            del self.libros_por_genero[libro.genero]
+        # Los préstamos del libro pasan a su género (o salen de él) en los informes
+        if self.reportes is not None:
+            self.reportes.libro_contado(libro.isbn, libro.genero, cantidad)
+    
+    # Método para obtener el género actual de un ISBN
+    def _genero_de(self, isbn):
+        """Devuelve el género del libro con un ISBN, o None si no está en el catálogo"""
+        libro = self.libros.obtener(isbn)
+        return libro.genero if libro is not None else None
+    
+    # Método para recorrer los libros sin copiarlos
+    @lectura_por_lotes
+    def iterar_libros(self, despues_de=None, inverso=False):
+        """
+        Recorre los libros en orden de inserción (solo los posteriores al ISBN
+        despues_de, si se indica) o, con inverso, del último al primero
+        """
+        if inverso:
+            return reversed(self.libros)
+        if despues_de is None:
+            return iter(self.libros)
+        return self.libros.iterar_desde(despues_de)
+    
+    # Método para recorrer los libros con su número de inserción (paginación por cursor)
+    @lectura_por_lotes
+    def iterar_libros_numerados(self, despues_de=None, numero=None):
+        """
+        Recorre pares (número de inserción, libro) desde el principio o tras
+        el ISBN despues_de; con su número, sigue aunque ese libro ya no exista
+        """
+        return self.libros.iterar_numerados(despues_de, numero)
+    
+    # Método para contar los libros sin recorrerlos
+    @lectura
+    def contar_libros(self):
+        """Devuelve el número de libros del catálogo"""
+        return len(self.libros)
     
     # Método para obtener todos los libros del sistema
+    @lectura
     def listar_libros(self):
         """Devuelve todos los libros"""
         # Utiliza el método listar de ListaEnlazada para obtener todos los libros
         return self.libros.listar()
     
     # Método para obtener solo los libros disponibles
+    @lectura
     def listar_libros_disponibles(self):
-        """Devuelve solo los libros disponibles"""
-        # Filtra los libros cuyo atributo disponible es True
-        return [libro for libro in self.libros.listar() if libro.disponible]
+        """Devuelve solo los libros con algún ejemplar disponible"""
+        # Un recorrido por título: la disponibilidad se lee de la pila de
+        # ejemplares libres sin mirar cada ejemplar
+        return list(self.libros.iterar(lambda libro: libro.libres))
+    
+    # ===== MÉTODOS PARA EJEMPLARES =====
+    
+    # Método para generar o validar los códigos de barras de ejemplares nuevos
+    def _codigos_ejemplares(self, isbn, ejemplares, primero=1):
+        """
+        Devuelve los códigos de barras de ejemplares nuevos de un libro.
+        
+        Args:
+            isbn (str): ISBN del libro.
+            ejemplares (int | list): Número de ejemplares (con un solo ejemplar
+                                     nuevo, su código es el ISBN; con varios,
+                                     ISBN-1, ISBN-2...) o sus códigos de barras.
+            primero (int): Número desde el que se generan los códigos.
+        
+        Returns:
+            list | str: Los códigos, o el motivo del rechazo si son inválidos o
+                        ya pertenecen a otro ejemplar.
+        """
+        if isinstance(ejemplares, int):
+            if ejemplares < 1:
+                return "El número de ejemplares debe ser al menos 1"
+            if ejemplares == 1 and primero == 1:
+                codigos = [isbn]
+            else:
+                # Se saltan los números que ya usa otro ejemplar
+                codigos = []
+                numero = primero
+                while len(codigos) < ejemplares:
+                    codigo = f"{isbn}-{numero}"
+                    if codigo not in self.ejemplares:
+                        codigos.append(codigo)
+                    numero += 1
+        else:
+            codigos = list(ejemplares)
+            if not codigos or not all(isinstance(codigo, str) and codigo for codigo in codigos):
+                return "Los códigos de barras deben ser textos no vacíos"
+            if len(set(codigos)) != len(codigos):
+                return "Hay códigos de barras repetidos"
+        for codigo in codigos:
+            if codigo in self.ejemplares:
+                return f"Ya existe un ejemplar con el código {codigo}"
+        return codigos
+    
+    # Método para agregar ejemplares a un libro existente
+    @escritura
+    def agregar_ejemplares(self, isbn, ejemplares=1, fecha=None):
+        """
+        Agrega ejemplares nuevos a un libro.
+        
+        Si el libro tiene reservas pendientes, cada ejemplar nuevo se aparta
+        para la siguiente de la cola en lugar de quedar libre.
+        
+        Args:
+            isbn (str): ISBN del libro.
+            ejemplares (int | list): Número de ejemplares o sus códigos de barras.
+            fecha (str, optional): Fecha del alta (YYYY-MM-DD), desde la que
+                                   corre el plazo de recogida; por defecto, hoy.
+        
+        Returns:
+            tuple: (bool, str) con el resultado de la operación.
+        """
+        libro = self.libros.obtener(isbn)
+        if not libro:
+            return False, "Libro no encontrado"
+        try:
+            dia = self._dia_consulta(fecha)
+        except ValueError as error:
+            return False, str(error)
+        # Los códigos generados continúan la numeración ISBN-N del libro
+        codigos = self._codigos_ejemplares(isbn, ejemplares, len(libro.ejemplares) + 1)
+        if isinstance(codigos, str):
+            return False, codigos
+        
+        self._contar_libro(libro, -1)
+        libro.ejemplares += tuple(codigos)
+        self._contar_libro(libro, 1)
+        for codigo in codigos:
+            self.ejemplares[codigo] = libro
+            self._entregar_ejemplar(libro, codigo, dia)
+        if self.almacenamiento is not None:
+            with self._transaccion():
+                self.almacenamiento.guardar_libro(libro)
+                self._guardar_reservas()
+        self._notificar("libro", "actualizado", isbn, libro)
+        self._notificar_reservas()
+        return True, f"{len(codigos)} ejemplares agregados. Total: {len(libro.ejemplares)}"
+    
+    # Método para dar de baja un ejemplar
+    @escritura
+    def eliminar_ejemplar(self, codigo_barras):
+        """
+        Da de baja un ejemplar que no está prestado.
+        
+        El último ejemplar de un libro no se puede dar de baja: se elimina el
+        libro.
+        
+        Args:
+            codigo_barras (str): Código de barras del ejemplar.
+        
+        Returns:
+            tuple: (bool, str) con el resultado de la operación.
+        """
+        libro = self.ejemplares.get(codigo_barras)
+        if libro is None:
+            return False, "Ejemplar no encontrado"
+        if codigo_barras not in libro.libres:
+            return False, "El ejemplar está prestado o apartado para una reserva"
+        if len(libro.ejemplares) == 1:
+            return False, "Es el único ejemplar del libro: elimine el libro"
+        
+        self._contar_libro(libro, -1)
+        libro.ejemplares = tuple(codigo for codigo in libro.ejemplares if codigo != codigo_barras)
+        libro.libres.remove(codigo_barras)
+        self._contar_libro(libro, 1)
+        del self.ejemplares[codigo_barras]
+        if self.almacenamiento is not None:
+            self.almacenamiento.guardar_libro(libro)
+        self._notificar("libro", "actualizado", libro.isbn, libro)
+        return True, "Ejemplar eliminado exitosamente"
+    
+    # Método para buscar el libro de un ejemplar
+    @lectura
+    def buscar_libro_por_ejemplar(self, codigo_barras):
+        """Devuelve el libro al que pertenece un código de barras, o None"""
+        return self.ejemplares.get(codigo_barras)
+    
+    # Método para consultar los ejemplares disponibles de un libro
+    @lectura
+    def contar_ejemplares_disponibles(self, isbn):
+        """Devuelve cuántos ejemplares libres tiene un libro (0 si no existe), sin recorrerlos"""
+        libro = self.libros.obtener(isbn)
+        return len(libro.libres) if libro is not None else 0
+    
+    # Método para que un préstamo activo cargado o importado ocupe su ejemplar
+    def _ocupar_ejemplar(self, prestamo):
+        """Ocupa el ejemplar de un préstamo (o uno libre si no lo tiene); devuelve el libro, o None si no hay ejemplar libre"""
+        libro = self.libros.obtener(prestamo.isbn_libro)
+        if libro is None or not libro.libres:
+            return None
+        prestamo.codigo_barras = self._tomar_ejemplar(libro, prestamo.codigo_barras)
+        return libro
+    
+    # Método para ocupar un ejemplar libre
+    def _tomar_ejemplar(self, libro, codigo_barras=None):
+        """Saca de la pila de libres el ejemplar indicado (o, si no está libre, cualquiera) y devuelve su código"""
+        libres = libro.libres
+        if codigo_barras is not None and codigo_barras in libres:
+            libres.remove(codigo_barras)
+        else:
+            # El último de la pila: O(1)
+            codigo_barras = libres.pop()
+        self.ejemplares_disponibles -= 1
+        if not libres:
+            self.libros_disponibles -= 1
+        return codigo_barras
+    
+    # Método para liberar el ejemplar de un préstamo devuelto
+    def _liberar_ejemplar(self, libro, codigo_barras):
+        """Vuelve a apilar un ejemplar como libre"""
+        if not libro.libres:
+            self.libros_disponibles += 1
+        libro.libres.append(codigo_barras)
+        self.ejemplares_disponibles += 1
     
     # Método para actualizar los datos de un libro existente
+    @escritura
     def actualizar_libro(self, isbn, nuevos_datos):
         """Actualiza los datos de un libro"""
-        # Busca el libro por ISBN
-        libro = self.buscar_libro_por_isbn(isbn)
         # Si no encuentra el libro, retorna error
-        if not libro:
+        if not self.libros.contiene(isbn):
             return False, "Libro no encontrado"
+        # La disponibilidad se deduce de los préstamos y los ejemplares tienen sus propios métodos
+        if not CAMPOS_INVENTARIO.isdisjoint(nuevos_datos):
+            return False, "Los ejemplares se modifican con agregar_ejemplares y eliminar_ejemplar"
+        # Los préstamos y reservas activos guardan el ISBN: al devolverlos se busca el libro por él
+        if nuevos_datos.get('isbn', isbn) != isbn:
+            if isbn in self.prestamos_activos_por_libro:
+                return False, "No se puede cambiar el ISBN de un libro con préstamos activos"
+            if isbn in self.reservas.por_libro:
+                return False, "No se puede cambiar el ISBN de un libro con reservas activas"
+        
+        # Actualizar los campos proporcionados manteniendo el índice por ISBN;
+        # el libro se descuenta antes y se vuelve a contar con sus valores nuevos
+        libro = self.libros.obtener(isbn)
+        genero_anterior = libro.genero
+        self._contar_libro(libro, -1)
+        actualizado = self.libros.actualizar_por_clave(isbn, nuevos_datos)
+        self._contar_libro(libro, 1)
+        if not actualizado:
+            return False, "Ya existe un libro con este ISBN"
+        # Reindexar el libro con sus valores nuevos
+        self._reindexar_libro(isbn, libro)
+        # La duración de los préstamos depende del género: los activos cambian de día límite
+        if libro.genero != genero_anterior:
+            self._reprogramar_vencimientos(libro.isbn)
         
-        # Actualizar los campos proporcionados
-        # Itera sobre el diccionario de nuevos datos
-        for campo, valor in nuevos_datos.items():
-            # Verifica si el libro tiene el atributo (campo)
-            if hasattr(libro, campo):
-                # Asigna el nuevo valor al campo correspondiente
-                setattr(libro, campo, valor)
+        # Guardar los cambios (si cambió el ISBN, se reemplaza el registro)
+        if self.almacenamiento is not None:
+            with self._transaccion():
+                if libro.isbn != isbn:
+                    self.almacenamiento.eliminar_libro(isbn)
+                self.almacenamiento.guardar_libro(libro)
+        self._notificar("libro", "actualizado", libro.isbn, libro, isbn)
         
         # Retorna éxito después de actualizar
         return True, "Libro actualizado exitosamente"
     
     # Método para eliminar un libro del sistema
+    @escritura
     def eliminar_libro(self, isbn):
         """Elimina un libro del sistema"""
         # Verificar si el libro está prestado
@@ -132,9 +595,21 @@ class SistemaBiblioteca:
         # Si hay préstamos activos, no permite eliminar
         if prestamos_activos:
             return False, "No se puede eliminar el libro porque tiene préstamos activos"
+        if isbn in self.reservas.por_libro:
+            return False, "No se puede eliminar el libro porque tiene reservas activas"
         
-        # Intenta eliminar el libro usando el método eliminar de ListaEnlazada
-        if self.libros.eliminar(lambda libro: libro.isbn == isbn):
+        # Intenta eliminar el libro usando el índice de la lista
+        libro = self.libros.obtener(isbn)
+        if self.libros.eliminar_por_clave(isbn):
+            # Quitarlo de los índices de búsqueda y de los contadores
+            self._desindexar_libro(isbn)
+            self._contar_libro(libro, -1)
+            for codigo in libro.ejemplares:
+                del self.ejemplares[codigo]
+            # Eliminar también del almacenamiento
+            if self.almacenamiento is not None:
+                self.almacenamiento.eliminar_libro(isbn)
+            self._notificar("libro", "eliminado", isbn, libro)
             return True, "Libro eliminado exitosamente"
         else:
             return False, "Libro no encontrado"
@@ -142,59 +617,138 @@ class SistemaBiblioteca:
     # ===== MÉTODOS PARA USUARIOS =====
     
     # Método para agregar un nuevo usuario al sistema
+    @escritura
     def agregar_usuario(self, id_usuario, nombre, contacto):
         """Agrega un nuevo usuario al sistema"""
-        # Verificar si el usuario ya existe buscando por ID
-        if self.buscar_usuario_por_id(id_usuario):
+        # Verificar si el usuario ya existe consultando el índice por ID
+        if self.usuarios.contiene(id_usuario):
             # Retorna error si ya existe
             return False, "Ya existe un usuario con este ID"
         
         # Crea una nueva instancia de Usuario
         nuevo_usuario = Usuario(id_usuario, nombre, contacto)
-        # Agrega el usuario a la lista enlazada
+        # Agrega el usuario a la lista enlazada y al índice de nombres
         self.usuarios.agregar(nuevo_usuario)
+        self._indexar_usuario(nuevo_usuario)
+        # Guardar el usuario en el almacenamiento
+        if self.almacenamiento is not None:
+            self.almacenamiento.guardar_usuario(nuevo_usuario)
+        self._notificar("usuario", "insertado", id_usuario, nuevo_usuario)
         # Retorna éxito
         return True, "Usuario agregado exitosamente"
     
     # Método para buscar un usuario por su ID
+    @lectura
     def buscar_usuario_por_id(self, id_usuario):
         """Busca un usuario por ID"""
-        # Utiliza el método buscar de ListaEnlazada con función lambda
-        return self.usuarios.buscar(lambda usuario: usuario.id_usuario == id_usuario)
+        # Consulta directa en el índice de la lista (O(1))
+        return self.usuarios.obtener(id_usuario)
     
     # Método para buscar usuarios por nombre (búsqueda parcial)
+    @lectura
     def buscar_usuarios_por_nombre(self, nombre):
         """Busca usuarios por nombre (búsqueda parcial)"""
-        # Filtra usuarios cuyo nombre contiene el texto buscado (case-insensitive)
-        return [usuario for usuario in self.usuarios.listar() if nombre.lower() in usuario.nombre.lower()]
+        # Consulta el índice de trigramas de nombres (búsqueda case-insensitive)
+        return self.trigramas_nombre.buscar(nombre)
+    
+    # Método para buscar usuarios tolerando errores de escritura
+    @lectura
+    def buscar_usuarios_aproximado(self, nombre, limite=10):
+        """Busca los usuarios cuyo nombre se parece más al texto"""
+        return [self.usuarios.obtener(id_usuario)
+                for id_usuario, _ in self.indice_nombres.buscar_aproximado(nombre, limite)]
+    
+    # Método para agregar un usuario a los índices de búsqueda
+    def _indexar_usuario(self, usuario, diferido=False):
+        """Agrega un usuario a los índices de búsqueda"""
+        if diferido:
+            self.trigramas_nombre.agregar_diferido(usuario.id_usuario, usuario)
+            self.indice_nombres.agregar_diferido(usuario.id_usuario, usuario)
+        else:
+            self.trigramas_nombre.agregar(usuario.id_usuario, usuario)
+            self.indice_nombres.agregar(usuario.id_usuario, usuario)
+    
+    # Método para actualizar un usuario modificado en los índices de búsqueda
+    def _reindexar_usuario(self, id_anterior, usuario):
+        """Actualiza un usuario modificado en los índices de búsqueda"""
+        self.trigramas_nombre.actualizar(id_anterior, usuario.id_usuario, usuario)
+        self.indice_nombres.actualizar(id_anterior, usuario.id_usuario, usuario)
+    
+    # Método para quitar un usuario de los índices de búsqueda
+    def _desindexar_usuario(self, id_usuario):
+        """Quita un usuario de los índices de búsqueda"""
+        self.trigramas_nombre.eliminar(id_usuario)
+        self.indice_nombres.eliminar(id_usuario)
+    
+    # Método para recorrer los usuarios sin copiarlos
+    @lectura_por_lotes
+    def iterar_usuarios(self, despues_de=None, inverso=False):
+        """
+        Recorre los usuarios en orden de inserción (solo los posteriores al ID
+        despues_de, si se indica) o, con inverso, del último al primero
+        """
+        if inverso:
+            return reversed(self.usuarios)
+        if despues_de is None:
+            return iter(self.usuarios)
+        return self.usuarios.iterar_desde(despues_de)
+    
+    # Método para recorrer los usuarios con su número de inserción (paginación por cursor)
+    @lectura_por_lotes
+    def iterar_usuarios_numerados(self, despues_de=None, numero=None):
+        """
+        Recorre pares (número de inserción, usuario) desde el principio o tras
+        el ID despues_de; con su número, sigue aunque ese usuario ya no exista
+        """
+        return self.usuarios.iterar_numerados(despues_de, numero)
+    
+    # Método para contar los usuarios sin recorrerlos
+    @lectura
+    def contar_usuarios(self):
+        """Devuelve el número de usuarios registrados"""
+        return len(self.usuarios)
     
     # Método para obtener todos los usuarios del sistema
+    @lectura
     def listar_usuarios(self):
         """Devuelve todos los usuarios"""
         # Utiliza el método listar de ListaEnlazada
         return self.usuarios.listar()
     
     # Método para actualizar los datos de un usuario existente
+    @escritura
     def actualizar_usuario(self, id_usuario, nuevos_datos):
         """Actualiza los datos de un usuario"""
-        # Busca el usuario por ID
-        usuario = self.buscar_usuario_por_id(id_usuario)
         # Si no lo encuentra, retorna error
-        if not usuario:
+        if not self.usuarios.contiene(id_usuario):
             return False, "Usuario no encontrado"
+        # Las reservas activas se buscan por el ID del usuario
+        if nuevos_datos.get('id_usuario', id_usuario) != id_usuario and id_usuario in self.reservas.por_usuario:
+            return False, "No se puede cambiar el ID de un usuario con reservas activas"
+        # Los saldos de multas también
+        if nuevos_datos.get('id_usuario', id_usuario) != id_usuario and id_usuario in self.multas.saldos:
+            return False, "No se puede cambiar el ID de un usuario con multas pendientes"
+        
+        # Actualizar los campos proporcionados manteniendo el índice por ID
+        if not self.usuarios.actualizar_por_clave(id_usuario, nuevos_datos):
+            return False, "Ya existe un usuario con este ID"
+        usuario = self.usuarios.obtener(nuevos_datos.get('id_usuario', id_usuario))
+        # Reindexar el usuario con sus valores nuevos
+        self._reindexar_usuario(id_usuario, usuario)
         
-        # Actualizar los campos proporcionados
-        # Itera sobre el diccionario de nuevos datos
-        for campo, valor in nuevos_datos.items():
-            # Verifica si el usuario tiene el atributo
-            if hasattr(usuario, campo):
-                # Asigna el nuevo valor al campo
-                setattr(usuario, campo, valor)
+        # Guardar los cambios (si cambió el ID, se reemplaza el registro)
+        if self.almacenamiento is not None:
+            with self._transaccion():
+                if usuario.id_usuario != id_usuario:
+                    self.almacenamiento.eliminar_usuario(id_usuario)
+                self.almacenamiento.guardar_usuario(usuario)
+        self._notificar("usuario", "actualizado", usuario.id_usuario, usuario, id_usuario)
         
         # Retorna éxito
         return True, "Usuario actualizado exitosamente"
     
     # Método para eliminar un usuario del sistema
+    @escritura
     def eliminar_usuario(self, id_usuario):
         """Elimina un usuario del sistema"""
         # Verificar si el usuario tiene préstamos activos
@@ -202,9 +756,20 @@ class SistemaBiblioteca:
         # Si tiene préstamos activos, no permite eliminar
         if prestamos_activos:
             return False, "No se puede eliminar el usuario porque tiene préstamos activos"
+        if id_usuario in self.reservas.por_usuario:
+            return False, "No se puede eliminar el usuario porque tiene reservas activas"
+        if id_usuario in self.multas.saldos:
+            return False, "No se puede eliminar el usuario porque tiene multas pendientes"
         
-        # Intenta eliminar el usuario
-        if self.usuarios.eliminar(lambda usuario: usuario.id_usuario == id_usuario):
+        # Intenta eliminar el usuario usando el índice de la lista
+        usuario = self.usuarios.obtener(id_usuario)
+        if self.usuarios.eliminar_por_clave(id_usuario):
+            # Quitarlo de los índices de búsqueda
+            self._desindexar_usuario(id_usuario)
+            # Eliminar también del almacenamiento
+            if self.almacenamiento is not None:
+                self.almacenamiento.eliminar_usuario(id_usuario)
+            self._notificar("usuario", "eliminado", id_usuario, usuario)
             return True, "Usuario eliminado exitosamente"
         else:
             return False, "Usuario no encontrado"
@@ -212,93 +777,1010 @@ class SistemaBiblioteca:
     # ===== MÉTODOS PARA PRÉSTAMOS =====
     
     # Método para registrar un nuevo préstamo
-    def registrar_prestamo(self, isbn_libro, id_usuario, fecha_prestamo):
-        """Registra un nuevo préstamo"""
+    @escritura
+    def registrar_prestamo(self, isbn_libro, id_usuario, fecha_prestamo, codigo_barras=None):
+        """Registra un nuevo préstamo de un ejemplar libre (el indicado o cualquiera) o del apartado para el usuario"""
+        # La fecha se guarda como número de día: no se registran fechas no válidas
+        if type(fecha_a_dia(fecha_prestamo)) is not int:
+            return False, ERROR_FECHA
+        # Las reservas que no se recogieron a tiempo ceden antes su ejemplar
+        self._vencer_reservas(fecha_prestamo)
         # Verificar si el libro existe y está disponible
         libro = self.buscar_libro_por_isbn(isbn_libro)
         if not libro:
             return False, "Libro no encontrado"
         
-        # Verifica si el libro está disponible
-        if not libro.disponible:
+        # Verifica si queda algún ejemplar libre (o si lo está el indicado);
+        # el apartado para una reserva del usuario no está entre los libres
+        apartado = self._ejemplar_apartado(id_usuario, isbn_libro)
+        if not libro.libres and apartado is None:
             return False, "El libro no está disponible"
+        if codigo_barras is not None and codigo_barras != apartado:
+            if self.ejemplares.get(codigo_barras) is not libro:
+                return False, "Ejemplar no encontrado"
+            if codigo_barras not in libro.libres:
+                return False, "El ejemplar no está disponible"
         
         # Verificar si el usuario existe
         usuario = self.buscar_usuario_por_id(id_usuario)
         if not usuario:
             return False, "Usuario no encontrado"
         
-        # Generar ID de préstamo con formato P001, P002, etc.
-        id_prestamo = f"P{self.contador_prestamos:03d}"
-        # Incrementa el contador para el próximo préstamo
-        self.contador_prestamos += 1
-        
-        # Registrar préstamo creando una nueva instancia de Prestamo
-        nuevo_prestamo = Prestamo(id_prestamo, isbn_libro, id_usuario, fecha_prestamo)
-        # Agrega el préstamo a la lista de préstamos
-        self.prestamos.append(nuevo_prestamo)
+        # Registrar el préstamo en memoria (ID nuevo, índices, libro prestado)
+        nuevo_prestamo = self._aplicar_prestamo(libro, id_usuario, fecha_prestamo, codigo_barras)
+        id_prestamo = nuevo_prestamo.id_prestamo
         
-        # Actualizar disponibilidad del libro a False
-        libro.disponible = False
+        # Guardar préstamo, libro, contador y reserva cumplida en una sola transacción
+        if self.almacenamiento is not None:
+            with self._transaccion():
+                self.almacenamiento.guardar_prestamo(nuevo_prestamo)
+                self.almacenamiento.guardar_libro(libro)
+                self.almacenamiento.guardar_contador_prestamos(self.contador_prestamos)
+                self._guardar_reservas()
+        self._notificar("prestamo", "insertado", id_prestamo, nuevo_prestamo)
+        self._notificar("libro", "actualizado", isbn_libro, libro)
+        self._notificar_reservas()
         
         # Retorna éxito con el ID del préstamo
         return True, f"Préstamo registrado exitosamente. ID: {id_prestamo}"
     
+    # Método para registrar varios préstamos de un mismo usuario de una vez
+    @escritura
+    def registrar_prestamos_lote(self, isbns, id_usuario, fecha_prestamo):
+        """
+        Registra varios préstamos a un usuario como una sola operación.
+        
+        Se valida todo el lote antes de modificar nada: si un libro no existe
+        o no le quedan ejemplares libres suficientes, no se registra ningún
+        préstamo. Con almacenamiento, todo el lote se guarda en una sola
+        transacción.
+        
+        Args:
+            isbns (list): ISBN de los libros a prestar (un ISBN repetido presta
+                          varios ejemplares del mismo libro).
+            id_usuario (str): ID del usuario.
+            fecha_prestamo (str): Fecha de los préstamos (YYYY-MM-DD).
+        
+        Returns:
+            tuple: (bool, str) con el resultado y los IDs de los préstamos
+                   registrados, o el motivo del rechazo del lote.
+        """
+        if not isbns:
+            return False, "No se indicó ningún libro"
+        if type(fecha_a_dia(fecha_prestamo)) is not int:
+            return False, ERROR_FECHA
+        self._vencer_reservas(fecha_prestamo)
+        # El usuario se comprueba una sola vez para todo el lote
+        if not self.usuarios.contiene(id_usuario):
+            return False, "Usuario no encontrado"
+        libros = []
+        pedidos = {}  # ISBN -> ejemplares pedidos en el lote
+        for isbn in isbns:
+            libro = self.libros.obtener(isbn)
+            if not libro:
+                return False, f"Libro {isbn}: libro no encontrado"
+            pedidos[isbn] = pedidos.get(isbn, 0) + 1
+            # Además de los libres, el usuario puede llevarse el ejemplar apartado para él
+            apartados = 0 if self._ejemplar_apartado(id_usuario, isbn) is None else 1
+            if pedidos[isbn] > len(libro.libres) + apartados:
+                return False, f"Libro {isbn}: el libro no está disponible"
+            libros.append(libro)
+        
+        # Todo el lote es válido: aplicarlo y guardarlo de una vez
+        prestamos = [self._aplicar_prestamo(libro, id_usuario, fecha_prestamo) for libro in libros]
+        if self.almacenamiento is not None:
+            with self._transaccion():
+                for prestamo, libro in zip(prestamos, libros):
+                    self.almacenamiento.guardar_prestamo(prestamo)
+                    self.almacenamiento.guardar_libro(libro)
+                self.almacenamiento.guardar_contador_prestamos(self.contador_prestamos)
+                self._guardar_reservas()
+        if self.suscriptores:
+            for prestamo, libro in zip(prestamos, libros):
+                self._notificar("prestamo", "insertado", prestamo.id_prestamo, prestamo)
+                self._notificar("libro", "actualizado", libro.isbn, libro)
+        self._notificar_reservas()
+        
+        ids = ", ".join(prestamo.id_prestamo for prestamo in prestamos)
+        return True, f"{len(prestamos)} préstamos registrados exitosamente. IDs: {ids}"
+    
+    # Método para crear un préstamo ya validado
+    def _aplicar_prestamo(self, libro, id_usuario, fecha_prestamo, codigo_barras=None):
+        """Presta un ejemplar libre de un libro, o el apartado para el usuario, y actualiza índices y contadores (sin guardar)"""
+        reserva = self.reservas.de_usuario_y_libro(id_usuario, libro.isbn)
+        if reserva is not None and reserva.estado == LISTA and codigo_barras in (None, reserva.codigo_barras):
+            # El ejemplar apartado para el usuario: ya estaba fuera de los libres
+            codigo_barras = reserva.codigo_barras
+            self.reservas.finalizar(reserva, CUMPLIDA)
+            self.reservas_modificadas.append(reserva)
+        else:
+            # Ocupar un ejemplar libre; si el usuario tenía una reserva, queda
+            # cumplida y su ejemplar apartado (si lo tenía) pasa a la siguiente
+            codigo_barras = self._tomar_ejemplar(libro, codigo_barras)
+            if reserva is not None:
+                self._finalizar_reserva(reserva, CUMPLIDA, fecha_a_dia(fecha_prestamo))
+        # Generar ID de préstamo con formato P001, P002, etc.
+        prestamo = Prestamo(self._asignar_id_prestamo(), libro.isbn, id_usuario, fecha_prestamo, codigo_barras)
+        # Agrega el préstamo a los índices y al historial
+        self._indexar_prestamo(prestamo)
+        if self.almacenamiento is None:
+            self.prestamos.append(prestamo)
+        if self.reportes is not None:
+            self.reportes.prestamo_registrado(prestamo, libro.genero)
+        return prestamo
+    
+    # Método para reservar el siguiente ID de préstamo
+    def _asignar_id_prestamo(self):
+        """Devuelve un ID de préstamo nuevo (P001, P002...) y avanza el contador"""
+        # Se llama con el cerrojo de escritura tomado: dos préstamos
+        # simultáneos nunca reciben el mismo número
+        id_prestamo = f"P{self.contador_prestamos:03d}"
+        self.contador_prestamos += 1
+        return id_prestamo
+    
     # Método para registrar la devolución de un préstamo
+    @escritura
     def registrar_devolucion(self, id_prestamo, fecha_devolucion):
         """Registra la devolución de un préstamo"""
-        # Buscar préstamo activo por ID
-        prestamo = next((p for p in self.prestamos if p.id_prestamo == id_prestamo and p.activo), None)
+        # Buscar préstamo activo por ID en el índice de préstamos activos
+        prestamo = self.prestamos_activos.get(id_prestamo)
         # Si no encuentra el préstamo o ya está inactivo, retorna error
         if not prestamo:
             return False, "Préstamo no encontrado o ya devuelto"
+        dia = fecha_a_dia(fecha_devolucion)
+        if type(dia) is not int:
+            return False, ERROR_FECHA
+        if type(prestamo.dia_prestamo) is int and dia < prestamo.dia_prestamo:
+            return False, "La fecha de devolución es anterior a la del préstamo"
+        self._vencer_reservas(dia)
         
-        # Registrar devolución actualizando fechas y estado
-        prestamo.fecha_devolucion = fecha_devolucion
-        prestamo.activo = False
+        # Registrar la devolución en memoria (índices, libro disponible o
+        # apartado para la siguiente reserva)
+        libro = self._aplicar_devolucion(prestamo, fecha_devolucion)
         
-        # Actualizar disponibilidad del libro a True
-        libro = self.buscar_libro_por_isbn(prestamo.isbn_libro)
+        # Guardar préstamo, libro y reserva atendida en una sola transacción
+        if self.almacenamiento is not None:
+            with self._transaccion():
+                self.almacenamiento.guardar_prestamo(prestamo)
+                if libro:
+                    self.almacenamiento.guardar_libro(libro)
+                self._guardar_reservas()
+        self._notificar("prestamo", "actualizado", id_prestamo, prestamo)
         if libro:
-            libro.disponible = True
+            self._notificar("libro", "actualizado", libro.isbn, libro)
+        self._notificar_reservas()
         
         # Retorna éxito
         return True, "Devolución registrada exitosamente"
     
+    # Método para registrar varias devoluciones de una vez
+    @escritura
+    def registrar_devoluciones_lote(self, ids_prestamo, fecha_devolucion):
+        """
+        Registra la devolución de varios préstamos como una sola operación.
+        
+        Si algún préstamo no está activo o se repite, no se registra ninguna
+        devolución. Con almacenamiento, todo el lote se guarda en una sola
+        transacción.
+        
+        Args:
+            ids_prestamo (list): IDs de los préstamos devueltos.
+            fecha_devolucion (str): Fecha de las devoluciones (YYYY-MM-DD).
+        
+        Returns:
+            tuple: (bool, str) con el resultado de la operación.
+        """
+        if not ids_prestamo:
+            return False, "No se indicó ningún préstamo"
+        dia = fecha_a_dia(fecha_devolucion)
+        if type(dia) is not int:
+            return False, ERROR_FECHA
+        prestamos = []
+        vistos = set()
+        for id_prestamo in ids_prestamo:
+            if id_prestamo in vistos:
+                return False, f"Préstamo {id_prestamo}: repetido en el lote"
+            vistos.add(id_prestamo)
+            prestamo = self.prestamos_activos.get(id_prestamo)
+            if not prestamo:
+                return False, f"Préstamo {id_prestamo}: préstamo no encontrado o ya devuelto"
+            if type(prestamo.dia_prestamo) is int and dia < prestamo.dia_prestamo:
+                return False, f"Préstamo {id_prestamo}: la fecha de devolución es anterior a la del préstamo"
+            prestamos.append(prestamo)
+        
+        self._vencer_reservas(dia)
+        libros = [self._aplicar_devolucion(prestamo, fecha_devolucion) for prestamo in prestamos]
+        if self.almacenamiento is not None:
+            with self._transaccion():
+                for prestamo, libro in zip(prestamos, libros):
+                    self.almacenamiento.guardar_prestamo(prestamo)
+                    if libro:
+                        self.almacenamiento.guardar_libro(libro)
+                self._guardar_reservas()
+        if self.suscriptores:
+            for prestamo, libro in zip(prestamos, libros):
+                self._notificar("prestamo", "actualizado", prestamo.id_prestamo, prestamo)
+                if libro:
+                    self._notificar("libro", "actualizado", libro.isbn, libro)
+        self._notificar_reservas()
+        return True, f"{len(prestamos)} devoluciones registradas exitosamente"
+    
+    # Método para cerrar un préstamo activo ya validado
+    def _aplicar_devolucion(self, prestamo, fecha_devolucion):
+        """Marca un préstamo activo como devuelto y libera el libro (sin guardar); devuelve el libro o None"""
+        # Registrar devolución actualizando fechas y estado
+        prestamo.fecha_devolucion = fecha_devolucion
+        prestamo.activo = False
+        # Quitar el préstamo de los índices de préstamos activos
+        self._desindexar_prestamo_activo(prestamo)
+        if self.historial_columnar:
+            # Guardar la devolución en las columnas; el objeto ya no hace falta
+            self.prestamos.actualizar(prestamo)
+            del self.indice_prestamos[prestamo.id_prestamo]
+        if self.reportes is not None:
+            self.reportes.devolucion_registrada(prestamo)
+        
+        # Liberar el ejemplar o apartarlo para la siguiente reserva (los
+        # préstamos anteriores a los ejemplares no tienen código)
+        libro = self.libros.obtener(prestamo.isbn_libro)
+        if libro is not None:
+            codigo = prestamo.codigo_barras
+            if self.ejemplares.get(codigo) is not libro:
+                # Ejemplar dado de baja o desconocido: se libera uno prestado cualquiera
+                ocupados = set(libro.libres)
+                ocupados.update(reserva.codigo_barras for reserva in self.reservas.de_libro(libro.isbn))
+                codigo = next((c for c in libro.ejemplares if c not in ocupados), None)
+            if codigo is not None:
+                self._entregar_ejemplar(libro, codigo, prestamo.dia_devolucion)
+        return libro
+    
+    # Método para agregar un préstamo a los índices
+    def _indexar_prestamo(self, prestamo):
+        """Registra un préstamo en los índices de préstamos"""
+        # El historial columnar ya resuelve las búsquedas de préstamos finalizados
+        if prestamo.activo or not self.historial_columnar:
+            self.indice_prestamos[prestamo.id_prestamo] = prestamo
+        if prestamo.activo:
+            self.prestamos_activos[prestamo.id_prestamo] = prestamo
+            self.prestamos_activos_por_usuario.setdefault(prestamo.id_usuario, {})[prestamo.id_prestamo] = prestamo
+            self.prestamos_activos_por_libro.setdefault(prestamo.isbn_libro, {})[prestamo.id_prestamo] = prestamo
+            self._programar_vencimiento(prestamo)
+    
+    # Método para quitar un préstamo devuelto de los índices de activos
+    def _desindexar_prestamo_activo(self, prestamo):
+        """Quita un préstamo de los índices de préstamos activos"""
+        self.prestamos_activos.pop(prestamo.id_prestamo, None)
+        activos_usuario = self.prestamos_activos_por_usuario.get(prestamo.id_usuario)
+        if activos_usuario is not None:
+            activos_usuario.pop(prestamo.id_prestamo, None)
+            # No conservar entradas vacías para usuarios sin préstamos activos
+            if not activos_usuario:
+                del self.prestamos_activos_por_usuario[prestamo.id_usuario]
+        activos_libro = self.prestamos_activos_por_libro.get(prestamo.isbn_libro)
+        if activos_libro is not None:
+            activos_libro.pop(prestamo.id_prestamo, None)
+            if not activos_libro:
+                del self.prestamos_activos_por_libro[prestamo.isbn_libro]
+        self._desprogramar_vencimiento(prestamo)
+    
+    # Método para obtener la duración de un préstamo según la política
+    @lectura
+    def dias_prestamo(self, prestamo):
+        """Devuelve los días que dura un préstamo según el género del libro y el usuario"""
+        libro = self.libros.obtener(prestamo.isbn_libro)
+        genero = libro.genero if libro is not None else None
+        return self.politica.dias_prestamo(genero, prestamo.id_usuario)
+    
+    # Método para registrar la fecha límite de un préstamo activo
+    def _programar_vencimiento(self, prestamo):
+        """Agrega un préstamo activo a los índices por día límite y por día de préstamo"""
+        limite = prestamo.dia_limite(self.dias_prestamo(prestamo))
+        if limite is None:
+            # Fecha de préstamo con formato no válido: no puede vencer
+            return
+        self.vencimientos.agregar(limite, prestamo.id_prestamo, prestamo)
+        self.prestamos_por_antiguedad.agregar(prestamo.dia_prestamo, prestamo.id_prestamo, prestamo)
+        if self.dia_vencidos is not None and limite < self.dia_vencidos:
+            self.total_vencidos += 1
+    
+    # Método para quitar un préstamo de los índices por fecha
+    def _desprogramar_vencimiento(self, prestamo):
+        """Quita un préstamo de los índices por fecha (y de la cuenta de vencidos, si lo estaba)"""
+        limite = self.vencimientos.eliminar(prestamo.id_prestamo)
+        self.prestamos_por_antiguedad.eliminar(prestamo.id_prestamo)
+        if limite is not None and self.dia_vencidos is not None and limite < self.dia_vencidos:
+            self.total_vencidos -= 1
+    
+    # Método para recalcular los días límite de los préstamos activos de un libro
+    def _reprogramar_vencimientos(self, isbn):
+        """Vuelve a programar los préstamos activos de un libro con la duración de su género actual"""
+        for prestamo in self.prestamos_activos_por_libro.get(isbn, {}).values():
+            self._desprogramar_vencimiento(prestamo)
+            self._programar_vencimiento(prestamo)
+    
+    # Método para cambiar la duración de los préstamos
+    @escritura
+    def cambiar_politica(self, politica):
+        """Aplica una nueva política de duración y recalcula los días límite de los préstamos activos"""
+        self.politica = politica
+        self.vencimientos = IndiceFechas()
+        self.prestamos_por_antiguedad = IndiceFechas()
+        self.dia_vencidos = None
+        for prestamo in self.prestamos_activos.values():
+            self._programar_vencimiento(prestamo)
+    
+    # Método para convertir una fecha (hoy por defecto) en número de día
+    def _dia_consulta(self, fecha):
+        """Devuelve el número de día de una fecha YYYY-MM-DD (hoy si es None); ValueError si no es válida"""
+        return dia_actual() if fecha is None else validar_fecha(fecha)
+    
+    # Método para contar los préstamos activos vencidos en una fecha
+    @lectura
+    def contar_prestamos_vencidos(self, fecha=None):
+        """Devuelve cuántos préstamos activos tienen la fecha límite anterior a una fecha"""
+        dia = self._dia_consulta(fecha)
+        with self.cerrojo_vencidos:
+            if dia != self.dia_vencidos:
+                # Solo se recuenta al cambiar de día; entre tanto, préstamos y
+                # devoluciones mantienen total_vencidos
+                self.total_vencidos = self.vencimientos.contar(hasta=dia)
+                self.dia_vencidos = dia
+            return self.total_vencidos
+    
+    # Método para listar los préstamos activos vencidos en una fecha
+    @lectura
+    def prestamos_vencidos(self, fecha=None):
+        """Devuelve los préstamos activos vencidos en una fecha (hoy por defecto), del más atrasado al menos"""
+        return list(self.vencimientos.rango(hasta=self._dia_consulta(fecha)))
+    
+    # Método para listar los préstamos que vencen en los próximos días
+    @lectura
+    def prestamos_por_vencer(self, dias, fecha=None):
+        """Devuelve los préstamos activos que vencen entre una fecha (hoy por defecto) y N días después"""
+        dia = self._dia_consulta(fecha)
+        return list(self.vencimientos.rango(dia, dia + dias + 1))
+    
+    # Método para listar los préstamos activos más antiguos
+    @lectura
+    def prestamos_mas_antiguos(self, cantidad=10):
+        """Devuelve los préstamos activos con la fecha de préstamo más antigua"""
+        return list(islice(self.prestamos_por_antiguedad.rango(), cantidad))
+    
+    # Método para consultar la fecha límite de un préstamo activo
+    @lectura
+    def fecha_limite(self, id_prestamo):
+        """Devuelve la fecha límite (YYYY-MM-DD) de un préstamo activo, o None"""
+        limite = self.vencimientos.dia(id_prestamo)
+        return None if limite is None else dia_a_fecha(limite)
+    
+    # Método para buscar un préstamo por su ID
+    @lectura
+    def buscar_prestamo_por_id(self, id_prestamo):
+        """Busca un préstamo (activo o finalizado) por ID"""
+        # Consulta directa en el índice de préstamos (O(1))
+        prestamo = self.indice_prestamos.get(id_prestamo)
+        # Los préstamos del historial que no están en memoria se leen del almacenamiento
+        if prestamo is None and self.almacenamiento is not None:
+            prestamo = self.almacenamiento.obtener_prestamo(id_prestamo)
+        elif prestamo is None and self.historial_columnar:
+            prestamo = self.prestamos.obtener(id_prestamo)
+        return prestamo
+    
     # Método para obtener todos los préstamos activos
+    @lectura
     def obtener_prestamos_activos(self):
         """Devuelve todos los préstamos activos"""
-        # Filtra los préstamos cuyo atributo activo es True
-        return [p for p in self.prestamos if p.activo]
+        # Lee el índice de préstamos activos sin recorrer el historial
+        return list(self.prestamos_activos.values())
     
     # Método para obtener préstamos activos de un usuario específico
+    @lectura
     def obtener_prestamos_activos_por_usuario(self, id_usuario):
         """Devuelve los préstamos activos de un usuario"""
-        # Filtra préstamos activos que pertenecen al usuario
-        return [p for p in self.prestamos if p.activo and p.id_usuario == id_usuario]
+        # Lee el índice de préstamos activos por usuario
+        return list(self.prestamos_activos_por_usuario.get(id_usuario, {}).values())
     
     # Método para obtener préstamos activos de un libro específico
+    @lectura
     def obtener_prestamos_activos_por_libro(self, isbn_libro):
         """Devuelve los préstamos activos de un libro"""
-        # Filtra préstamos activos que corresponden al libro
-        return [p for p in self.prestamos if p.activo and p.isbn_libro == isbn_libro]
+        # Lee el índice de préstamos activos por ISBN
+        return list(self.prestamos_activos_por_libro.get(isbn_libro, {}).values())
+    
+    # Método para recorrer todos los préstamos sin cargarlos de una vez
+    @lectura_por_lotes
+    def iterar_prestamos(self, inicio=0, cantidad=None):
+        """Recorre los préstamos (activos e inactivos) en orden de registro, o solo un rango"""
+        if self.historial_columnar:
+            fin = None if cantidad is None else inicio + cantidad
+            # Los préstamos activos se devuelven como los objetos vivos de los índices
+            activos = self.prestamos_activos
+            return (activos.get(p.id_prestamo, p) for p in self.prestamos.iterar(inicio, fin))
+        if self.almacenamiento is None:
+            total = len(self.prestamos)
+            fin = total if cantidad is None else min(inicio + cantidad, total)
+            # Acceso por posición: una página lejana no recorre las anteriores
+            prestamos = self.prestamos
+            return (prestamos[fila] for fila in range(inicio, fin))
+        # Reutiliza los objetos ya cargados para que los cambios se vean en ambos lados
+        return (self.indice_prestamos.get(p.id_prestamo, p)
+                for p in self.almacenamiento.iterar_prestamos(inicio, cantidad))
+    
+    # Método para contar todos los préstamos sin recorrerlos
+    @lectura
+    def contar_prestamos(self):
+        """Devuelve el número de préstamos del historial"""
+        if self.almacenamiento is None:
+            return len(self.prestamos)
+        return self.almacenamiento.contar_prestamos()
     
     # Método para obtener todos los préstamos (activos e inactivos)
+    @lectura
     def listar_todos_los_prestamos(self):
         """Devuelve todos los préstamos"""
-        return self.prestamos
+        if self.almacenamiento is None and not self.historial_columnar:
+            return self.prestamos
+        return list(self.iterar_prestamos())
+    
+    # Método para obtener el historial en columnas NumPy, para análisis masivos
+    @lectura
+    def archivo_prestamos(self):
+        """Devuelve una copia del historial como ArchivoPrestamos (requiere NumPy)"""
+        # Importación diferida: NumPy es opcional y solo se necesita aquí
+        from archivo_prestamos import ArchivoPrestamos
+        if self.historial_columnar:
+            # Copia directa de las columnas, sin crear un objeto por préstamo
+            return ArchivoPrestamos.desde_historial(self.prestamos)
+        return ArchivoPrestamos.desde_prestamos(self.iterar_prestamos())
+    
+    # ===== MÉTODOS PARA RESERVAS =====
+    
+    # Método para poner a un usuario en la cola de espera de un libro
+    @escritura
+    def reservar_libro(self, isbn_libro, id_usuario, fecha_reserva, prioridad=0):
+        """
+        Reserva un libro que no tiene ejemplares libres.
+        
+        Cuando se devuelve un ejemplar, se aparta para la reserva pendiente de
+        menor número de prioridad (a igual prioridad, la más antigua), que
+        tiene DIAS_RECOGIDA días para llevárselo en préstamo; si no lo hace,
+        la reserva vence y el ejemplar pasa a la siguiente.
+        
+        Args:
+            isbn_libro (str): ISBN del libro.
+            id_usuario (str): ID del usuario.
+            fecha_reserva (str): Fecha de la reserva (YYYY-MM-DD).
+            prioridad (int): Menor número, antes en la cola.
+        
+        Returns:
+            tuple: (bool, str) con el resultado y el ID de la reserva.
+        """
+        if type(fecha_a_dia(fecha_reserva)) is not int:
+            return False, ERROR_FECHA
+        self._vencer_reservas(fecha_reserva)
+        libro = self.libros.obtener(isbn_libro)
+        if not libro:
+            return False, "Libro no encontrado"
+        if not self.usuarios.contiene(id_usuario):
+            return False, "Usuario no encontrado"
+        if type(prioridad) is not int:
+            return False, "La prioridad debe ser un número entero"
+        if self.reservas.de_usuario_y_libro(id_usuario, isbn_libro) is not None:
+            return False, "El usuario ya tiene una reserva activa de este libro"
+        # Mientras haya reservas pendientes no quedan ejemplares libres: cada
+        # ejemplar que se libera se aparta para la siguiente
+        if libro.libres:
+            return False, "El libro tiene ejemplares disponibles: puede prestarse sin reservar"
+        
+        reserva = Reserva(self._asignar_id_reserva(), isbn_libro, id_usuario, fecha_reserva, prioridad)
+        self.reservas.agregar(reserva)
+        if self.almacenamiento is not None:
+            with self._transaccion():
+                self.almacenamiento.guardar_reserva(reserva)
+                self.almacenamiento.guardar_contador_reservas(self.contador_reservas)
+        self._notificar("reserva", "insertado", reserva.id_reserva, reserva)
+        return True, f"Reserva registrada exitosamente. ID: {reserva.id_reserva}"
+    
+    # Método para reservar el siguiente ID de reserva
+    def _asignar_id_reserva(self):
+        """Devuelve un ID de reserva nuevo (R001, R002...) y avanza el contador"""
+        id_reserva = f"R{self.contador_reservas:03d}"
+        self.contador_reservas += 1
+        return id_reserva
+    
+    # Método para cancelar una reserva activa
+    @escritura
+    def cancelar_reserva(self, id_reserva, fecha=None):
+        """
+        Cancela una reserva pendiente o lista para recoger.
+        
+        Args:
+            id_reserva (str): ID de la reserva.
+            fecha (str, optional): Fecha de la cancelación (YYYY-MM-DD), desde
+                                   la que corre el plazo de recogida de la
+                                   siguiente reserva; por defecto, hoy.
+        
+        Returns:
+            tuple: (bool, str) con el resultado de la operación.
+        """
+        reserva = self.reservas.obtener(id_reserva)
+        if reserva is None:
+            return False, "Reserva no encontrada o ya finalizada"
+        try:
+            dia = self._dia_consulta(fecha)
+        except ValueError as error:
+            return False, str(error)
+        
+        # Si tenía un ejemplar apartado, pasa a la siguiente reserva o queda libre
+        apartado = reserva.estado == LISTA
+        self._finalizar_reserva(reserva, CANCELADA, dia)
+        libro = self.libros.obtener(reserva.isbn_libro) if apartado else None
+        if self.almacenamiento is not None:
+            with self._transaccion():
+                self._guardar_reservas()
+                if libro:
+                    self.almacenamiento.guardar_libro(libro)
+        self._notificar_reservas()
+        if libro:
+            self._notificar("libro", "actualizado", libro.isbn, libro)
+        return True, "Reserva cancelada exitosamente"
+    
+    # Método para finalizar las reservas que no se recogieron a tiempo
+    @escritura
+    def procesar_reservas_vencidas(self, fecha=None):
+        """
+        Da por vencidas las reservas listas cuyo plazo de recogida terminó
+        antes de una fecha; sus ejemplares pasan a la siguiente reserva.
+        
+        Préstamos, devoluciones y reservas ya lo hacen con su propia fecha;
+        este método sirve para aplicarlo sin esperar a la siguiente operación.
+        
+        Args:
+            fecha (str, optional): Fecha (YYYY-MM-DD); por defecto, hoy.
+        
+        Returns:
+            tuple: (bool, str) con el número de reservas vencidas.
+        """
+        try:
+            dia = self._dia_consulta(fecha)
+        except ValueError as error:
+            return False, str(error)
+        return True, f"Reservas vencidas: {self._vencer_reservas(dia)}"
+    
+    # Método para vencer las reservas antes de una operación con fecha
+    def _vencer_reservas(self, fecha):
+        """Finaliza y guarda las reservas listas vencidas antes de una fecha (o número de día); devuelve cuántas eran"""
+        # Sin reservas listas no hay nada que vencer (ni fecha que convertir)
+        if not self.reservas.recogidas:
+            return 0
+        dia = fecha_a_dia(fecha)
+        if type(dia) is not int:
+            return 0
+        vencidas = 0
+        # Las reservas listas están en un montículo por día límite: solo se
+        # visitan las vencidas
+        reserva = self.reservas.siguiente_vencida(dia)
+        while reserva is not None:
+            # El plazo de la siguiente de la cola empieza al terminar el de esta
+            self._finalizar_reserva(reserva, VENCIDA, reserva.dia_limite + 1)
+            vencidas += 1
+            reserva = self.reservas.siguiente_vencida(dia)
+        if vencidas:
+            with self._transaccion():
+                self._guardar_reservas()
+            self._notificar_reservas()
+        return vencidas
+    
+    # Método para cerrar una reserva activa
+    def _finalizar_reserva(self, reserva, estado, dia):
+        """Finaliza una reserva; su ejemplar apartado, si lo tenía, pasa a la siguiente reserva o queda libre"""
+        codigo = reserva.codigo_barras if reserva.estado == LISTA else None
+        self.reservas.finalizar(reserva, estado)
+        self.reservas_modificadas.append(reserva)
+        if codigo is not None:
+            libro = self.libros.obtener(reserva.isbn_libro)
+            if libro is not None and self.ejemplares.get(codigo) is libro:
+                self._entregar_ejemplar(libro, codigo, dia)
+    
+    # Método para dar destino a un ejemplar que queda sin préstamo
+    def _entregar_ejemplar(self, libro, codigo_barras, dia):
+        """Aparta un ejemplar para la siguiente reserva pendiente del libro (en O(log n)) o, si no hay, lo libera"""
+        limite = dia + DIAS_RECOGIDA if type(dia) is int else None
+        reserva = self.reservas.apartar_siguiente(libro.isbn, codigo_barras, limite)
+        if reserva is None:
+            self._liberar_ejemplar(libro, codigo_barras)
+        else:
+            self.reservas_modificadas.append(reserva)
+    
+    # Método para consultar el ejemplar apartado para un usuario
+    def _ejemplar_apartado(self, id_usuario, isbn):
+        """Devuelve el código del ejemplar apartado para la reserva de un usuario, o None"""
+        reserva = self.reservas.de_usuario_y_libro(id_usuario, isbn)
+        return reserva.codigo_barras if reserva is not None and reserva.estado == LISTA else None
+    
+    # Método para guardar las reservas que cambió la operación en curso
+    def _guardar_reservas(self):
+        """Guarda las reservas modificadas (dentro de la transacción de la operación)"""
+        if self.almacenamiento is not None:
+            for reserva in self.reservas_modificadas:
+                self.almacenamiento.guardar_reserva(reserva)
+    
+    # Método para avisar de las reservas que cambió la operación en curso
+    def _notificar_reservas(self):
+        """Notifica las reservas modificadas y vacía la lista"""
+        modificadas, self.reservas_modificadas = self.reservas_modificadas, []
+        for reserva in modificadas:
+            self._notificar("reserva", "actualizado", reserva.id_reserva, reserva)
+    
+    # Método para buscar una reserva activa
+    @lectura
+    def buscar_reserva_por_id(self, id_reserva):
+        """Devuelve una reserva pendiente o lista por su ID, o None"""
+        return self.reservas.obtener(id_reserva)
+    
+    # Método para obtener las reservas activas de un usuario
+    @lectura
+    def obtener_reservas_por_usuario(self, id_usuario):
+        """Devuelve las reservas activas de un usuario"""
+        return self.reservas.de_usuario(id_usuario)
+    
+    # Método para obtener la cola de reservas de un libro
+    @lectura
+    def obtener_reservas_por_libro(self, isbn):
+        """Devuelve las reservas activas de un libro: primero las listas y luego las pendientes en orden de atención"""
+        return self.reservas.de_libro(isbn)
+    
+    # Método para contar las reservas que esperan un libro
+    @lectura
+    def contar_reservas_pendientes(self, isbn):
+        """Devuelve cuántas reservas esperan un ejemplar de un libro, sin recorrerlas"""
+        return self.reservas.contar_pendientes(isbn)
+    
+    # ===== MULTAS =====
+    
+    # Método para calcular las multas por retraso (proceso nocturno)
+    @escritura
+    def procesar_multas(self, fecha=None):
+        """
+        Calcula por lotes las multas por retraso de todo el historial.
+        
+        La primera vez recorre el historial completo; después solo lee los
+        préstamos registrados desde la pasada anterior y vuelve a mirar los
+        que entonces seguían activos (ver multas.MotorMultas). La multa de un
+        préstamo devuelto se suma una sola vez al saldo del usuario; la de uno
+        activo se cuenta hasta la fecha indicada como multa en curso.
+        
+        Args:
+            fecha (str, optional): Fecha (YYYY-MM-DD) hasta la que se cuenta el
+                                   retraso de los préstamos activos; por defecto, hoy.
+        
+        Returns:
+            tuple: (bool, str) con el resumen de la pasada.
+        """
+        try:
+            dia = self._dia_consulta(fecha)
+        except ValueError as error:
+            return False, str(error)
+        resumen = self.multas.procesar(self._filas_prestamos(self.multas.procesados), self.buscar_prestamo_por_id,
+                                       self._genero_de, self.politica, dia)
+        self._guardar_multas(estado=True)
+        return True, (f"Multas procesadas: {resumen['revisados']} préstamos revisados, "
+                      f"{resumen['liquidados']} multas nuevas por {resumen['importe_liquidado'] / 100:.2f}, "
+                      f"{resumen['en_curso']} préstamos activos con multa")
+    
+    # Método para guardar los saldos de multas que cambiaron
+    def _guardar_multas(self, estado=False):
+        """Guarda y notifica los saldos de multas modificados (y, tras una pasada, su posición)"""
+        modificados, self.multas.modificados = self.multas.modificados, set()
+        if self.almacenamiento is not None:
+            with self._transaccion():
+                for id_usuario in modificados:
+                    saldo = self.multas.saldo(id_usuario)
+                    self.almacenamiento.guardar_saldo_multas(id_usuario, saldo['saldo'], saldo['en_curso'])
+                if estado:
+                    self.almacenamiento.guardar_estado_multas(self.multas.estado())
+        if self.suscriptores:
+            for id_usuario in modificados:
+                self._notificar("multa", "actualizado", id_usuario, self.multas.saldo(id_usuario))
+    
+    # Método para descontar un pago del saldo de multas de un usuario
+    @escritura
+    def registrar_pago_multa(self, id_usuario, importe):
+        """
+        Registra el pago de multas ya liquidadas (las de préstamos devueltos).
+        
+        Args:
+            id_usuario (str): ID del usuario.
+            importe (int): Céntimos pagados.
+        
+        Returns:
+            tuple: (bool, str) con el resultado y el saldo que queda.
+        """
+        if type(importe) is not int or importe <= 0:
+            return False, "El importe debe ser un número entero de céntimos mayor que cero"
+        saldo = self.multas.saldos.get(id_usuario, 0)
+        if not saldo:
+            if not self.usuarios.contiene(id_usuario):
+                return False, "Usuario no encontrado"
+            return False, "El usuario no tiene multas pendientes"
+        if importe > saldo:
+            return False, f"El importe supera el saldo pendiente ({saldo / 100:.2f})"
+        self.multas.pagar(id_usuario, importe)
+        self._guardar_multas()
+        return True, f"Pago registrado exitosamente. Saldo pendiente: {(saldo - importe) / 100:.2f}"
+    
+    # Método para consultar las multas de un usuario
+    @lectura
+    def saldo_multas(self, id_usuario):
+        """Devuelve un diccionario con el saldo, la multa en curso y el total de un usuario, en céntimos"""
+        return self.multas.saldo(id_usuario)
+    
+    # Método para obtener los usuarios que más deben
+    @lectura
+    def usuarios_con_mas_multas(self, cantidad=10):
+        """Devuelve tuplas (ID de usuario, céntimos) con el total de multas, de mayor a menor"""
+        usuarios = self.multas.saldos.keys() | self.multas.en_curso.keys()
+        totales = ((id_usuario, self.multas.saldo(id_usuario)['total']) for id_usuario in usuarios)
+        return nlargest(cantidad, totales, key=lambda par: par[1])
+    
+    # Método para cambiar los importes de las multas
+    @escritura
+    def cambiar_tarifa_multas(self, tarifa):
+        """Aplica una nueva TarifaMultas desde la siguiente pasada (las multas ya liquidadas no cambian)"""
+        self.multas.tarifa = tarifa
+    
+    # Método para recalcular las multas recorriendo todo el historial
+    @lectura
+    def recalcular_multas(self, fecha=None):
+        """Devuelve un MotorMultas calculado desde cero con la tarifa y la política actuales (sin descontar pagos)"""
+        motor = MotorMultas(self.multas.tarifa)
+        motor.procesar(self._filas_prestamos(), self.buscar_prestamo_por_id, self._genero_de, self.politica,
+                       self._dia_consulta(fecha))
+        return motor
+    
+    # Método para recorrer el historial como valores, para los cálculos por lotes
+    def _filas_prestamos(self, inicio=0):
+        """Recorre el historial desde una posición como tuplas (ID, ISBN, usuario, día de préstamo, día de devolución, activo)"""
+        if self.historial_columnar:
+            # Directamente de las columnas, sin crear un Prestamo por fila
+            return self.prestamos.valores(inicio)
+        return ((prestamo.id_prestamo, prestamo.isbn_libro, prestamo.id_usuario, prestamo.dia_prestamo,
+                 prestamo.dia_devolucion, prestamo.activo) for prestamo in self.iterar_prestamos(inicio))
+    
+    # ===== ESTADÍSTICAS =====
+    
+    # Método para obtener los contadores del panel de inicio
+    @lectura
+    def estadisticas(self, fecha=None):
+        """
+        Devuelve las estadísticas generales sin recorrer libros ni préstamos.
+        
+        Los contadores se mantienen en cada alta, baja, préstamo y devolución,
+        así que la llamada cuesta lo mismo con cinco libros que con millones.
+        
+        Args:
+            fecha (str, optional): Fecha (YYYY-MM-DD) para los préstamos
+                                   vencidos; por defecto, hoy.
+        
+        Returns:
+            dict: total_libros, libros_disponibles (con algún ejemplar libre),
+                  total_ejemplares, ejemplares_disponibles, total_usuarios,
+                  prestamos_activos, prestamos_vencidos, reservas_pendientes,
+                  reservas_listas y libros_por_genero (género -> número de libros).
+        """
+        return {
+            'total_libros': len(self.libros),
+            'libros_disponibles': self.libros_disponibles,
+            'total_ejemplares': self.total_ejemplares,
+            'ejemplares_disponibles': self.ejemplares_disponibles,
+            'total_usuarios': len(self.usuarios),
+            'prestamos_activos': len(self.prestamos_activos),
+            'prestamos_vencidos': self.contar_prestamos_vencidos(fecha),
+            'reservas_pendientes': self.reservas.total_pendientes,
+            'reservas_listas': self.reservas.contar_listas(),
+            'libros_por_genero': dict(self.libros_por_genero),
+        }
+    
+    # ===== INFORMES DE CIRCULACIÓN =====
+    
+    # Método para obtener los informes, calculándolos si aún no se hizo
+    def _informes(self):
+        """Devuelve los informes mantenidos; tras cargar del almacenamiento, los calcula la primera vez"""
+        with self.cerrojo_reportes:
+            if self.reportes is None:
+                self.reportes = MotorReportes.calcular(self.iterar_prestamos(), self._genero_de)
+            return self.reportes
+    
+    # Método para obtener los agregados de los informes de circulación
+    @lectura
+    def obtener_reportes(self):
+        """Devuelve el MotorReportes con los agregados actuales (ver reportes.py)"""
+        return self._informes()
+    
+    # Método para contar los préstamos de cada género
+    @lectura
+    def prestamos_por_genero(self):
+        """Devuelve un diccionario género -> préstamos (None: libros que ya no están en el catálogo)"""
+        return self._informes().prestamos_por_genero()
+    
+    # Método para obtener los libros más prestados
+    @lectura
+    def libros_mas_prestados(self, cantidad=10):
+        """Devuelve tuplas (ISBN, préstamos) de los libros más prestados"""
+        return self._informes().libros_mas_prestados(cantidad)
+    
+    # Método para obtener los usuarios con más préstamos
+    @lectura
+    def usuarios_mas_activos(self, cantidad=10):
+        """Devuelve tuplas (ID de usuario, préstamos) de los usuarios con más préstamos"""
+        return self._informes().usuarios_mas_activos(cantidad)
+    
+    # Método para obtener la duración promedio de los préstamos devueltos
+    @lectura
+    def duracion_promedio_prestamos(self):
+        """Devuelve la duración promedio en días de los préstamos devueltos, o None si no hay"""
+        return self._informes().duracion_promedio()
+    
+    # Método para recalcular los informes recorriendo todo el historial
+    @lectura
+    def recalcular_reportes(self):
+        """Devuelve un MotorReportes calculado desde cero, sin tocar el mantenido en cada cambio"""
+        return MotorReportes.calcular(self.iterar_prestamos(), self._genero_de)
+    
+    # Método para comprobar los informes contra un recálculo exacto
+    @escritura
+    def verificar_reportes(self):
+        """Compara los informes mantenidos con un recálculo sobre el historial"""
+        exacto = self.recalcular_reportes()
+        if self.reportes is None:
+            # Aún no se habían calculado: el recálculo pasa a ser los informes mantenidos
+            self.reportes = exacto
+            return True, "Los informes coinciden con el historial"
+        if exacto.resumen() == self.reportes.resumen():
+            return True, "Los informes coinciden con el historial"
+        # Se corrigen con el recálculo para que las siguientes consultas sean exactas
+        self.reportes = exacto
+        return False, "Los informes no coincidían con el historial y se recalcularon"
+    
+    # ===== MÉTODOS DE IMPORTACIÓN MASIVA =====
+    
+    # Método para agregar un lote de libros ya construidos
+    @escritura
+    def importar_libros(self, libros):
+        """Agrega un lote de libros y devuelve una lista de (libro, motivo) rechazados"""
+        agregados = []
+        rechazados = []
+        for libro in libros:
+            # Los códigos de barras no pueden repetirse entre libros
+            repetido = next((codigo for codigo in libro.ejemplares if codigo in self.ejemplares), None)
+            if repetido is not None and not self.libros.contiene(libro.isbn):
+                rechazados.append((libro, f"Ya existe un ejemplar con el código {repetido}"))
+            # agregar() consulta el índice y rechaza los ISBN repetidos en O(1)
+            elif repetido is None and self.libros.agregar(libro):
+                self._indexar_libro(libro, diferido=True)
+                agregados.append(libro)
+            else:
+                rechazados.append((libro, "Ya existe un libro con este ISBN"))
+        
+        # Guardar todo el lote en una sola transacción
+        if self.almacenamiento is not None and agregados:
+            with self._transaccion():
+                for libro in agregados:
+                    self.almacenamiento.guardar_libro(libro)
+        if self.suscriptores:
+            for libro in agregados:
+                self._notificar("libro", "insertado", libro.isbn, libro)
+        return rechazados
+    
+    # Método para agregar un lote de usuarios ya construidos
+    @escritura
+    def importar_usuarios(self, usuarios):
+        """Agrega un lote de usuarios y devuelve una lista de (usuario, motivo) rechazados"""
+        agregados = []
+        rechazados = []
+        for usuario in usuarios:
+            if self.usuarios.agregar(usuario):
+                self._indexar_usuario(usuario, diferido=True)
+                agregados.append(usuario)
+            else:
+                rechazados.append((usuario, "Ya existe un usuario con este ID"))
+        
+        # Guardar todo el lote en una sola transacción
+        if self.almacenamiento is not None and agregados:
+            with self._transaccion():
+                for usuario in agregados:
+                    self.almacenamiento.guardar_usuario(usuario)
+        if self.suscriptores:
+            for usuario in agregados:
+                self._notificar("usuario", "insertado", usuario.id_usuario, usuario)
+        return rechazados
+    
+    # Método para agregar un lote de préstamos ya construidos
+    @escritura
+    def importar_prestamos(self, prestamos):
+        """Agrega un lote de préstamos y devuelve una lista de (prestamo, motivo) rechazados"""
+        agregados = []
+        rechazados = []
+        libros_prestados = []
+        ids_lote = set()  # Detecta IDs repetidos dentro del mismo lote
+        
+        for prestamo in prestamos:
+            # Validar contra los índices antes de modificar nada
+            if prestamo.id_prestamo in ids_lote or self.buscar_prestamo_por_id(prestamo.id_prestamo):
+                rechazados.append((prestamo, "Ya existe un préstamo con este ID"))
+                continue
+            libro = self.libros.obtener(prestamo.isbn_libro)
+            if not libro:
+                rechazados.append((prestamo, "Libro no encontrado"))
+                continue
+            if not self.usuarios.contiene(prestamo.id_usuario):
+                rechazados.append((prestamo, "Usuario no encontrado"))
+                continue
+            # Las fechas deben ser válidas para guardarse como número de día
+            if type(prestamo.dia_prestamo) is not int or (
+                    prestamo.fecha_devolucion is not None and type(prestamo.dia_devolucion) is not int):
+                rechazados.append((prestamo, ERROR_FECHA))
+                continue
+            if prestamo.activo:
+                # Ocupa su ejemplar (o cualquiera libre si no lo indica o ya no está libre)
+                if self._ocupar_ejemplar(prestamo) is None:
+                    rechazados.append((prestamo, "El libro no está disponible"))
+                    continue
+                libros_prestados.append(libro)
+            
+            ids_lote.add(prestamo.id_prestamo)
+            agregados.append(prestamo)
+            if self.reportes is not None:
+                self.reportes.prestamo_registrado(prestamo, libro.genero)
+                if not prestamo.activo:
+                    self.reportes.devolucion_registrada(prestamo)
+            # Con almacenamiento, el historial finalizado no se mantiene en memoria
+            if self.almacenamiento is None:
+                self.prestamos.append(prestamo)
+                self._indexar_prestamo(prestamo)
+            elif prestamo.activo:
+                self._indexar_prestamo(prestamo)
+            
+            # Mantener el contador por delante de los IDs importados (formato P001)
+            numero = prestamo.id_prestamo[1:]
+            if prestamo.id_prestamo.startswith("P") and numero.isdigit():
+                self.contador_prestamos = max(self.contador_prestamos, int(numero) + 1)
+        
+        # Guardar préstamos, libros prestados y contador en una sola transacción
+        if self.almacenamiento is not None and agregados:
+            with self._transaccion():
+                for prestamo in agregados:
+                    self.almacenamiento.guardar_prestamo(prestamo)
+                for libro in libros_prestados:
+                    self.almacenamiento.guardar_libro(libro)
+                self.almacenamiento.guardar_contador_prestamos(self.contador_prestamos)
+        if self.suscriptores:
+            for prestamo in agregados:
+                self._notificar("prestamo", "insertado", prestamo.id_prestamo, prestamo)
+            for libro in libros_prestados:
+                self._notificar("libro", "actualizado", libro.isbn, libro)
+        return rechazados
 
 # Función para obtener la instancia del sistema (para la interfaz gráfica)
-def obtener_sistema():
-    # Retorna una nueva instancia del sistema
-    return SistemaBiblioteca()
+def obtener_sistema(almacenamiento=None, concurrente=False):
+    # Retorna una nueva instancia del sistema, opcionalmente persistente y compartible entre hilos
+    return SistemaBiblioteca(almacenamiento, concurrente=concurrente)
 
 # Punto de entrada principal del programa para interfaz gráfica
 if __name__ == "__main__":
     try:
         # Intenta importar y ejecutar la interfaz gráfica
         from interfaz_grafica import main as gui_main
-        gui_main()
+        # "--diario carpeta" guarda el sistema en un diario de archivos;
+        # cualquier otro argumento se toma como archivo de base de datos SQLite
+        if len(sys.argv) > 2 and sys.argv[1] == "--diario":
+            from persistencia import AlmacenamientoDiario
+            gui_main(AlmacenamientoDiario(sys.argv[2]))
+        elif len(sys.argv) > 1:
+            from persistencia import AlmacenamientoSQLite
+            gui_main(AlmacenamientoSQLite(sys.argv[1]))
+        else:
+            gui_main()
     except ImportError as e:
         # Si no puede importar la interfaz gráfica, muestra mensaje de error
         print(f"Error: No se pudo cargar la interfaz gráfica: {e}")
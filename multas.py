@@ -0,0 +1,305 @@
+# multas.py
+# Multas por retraso: tarifas configurables y un motor que calcula el saldo
+# de cada usuario por lotes (el proceso nocturno), revisando en cada pasada
+# solo los préstamos que cambiaron desde la anterior.
+from prestamo import dia_a_fecha, fecha_a_dia
+
+
+class TarifaMultas:
+    """
+    Importe de las multas por retraso.
+
+    Los importes son céntimos enteros: sumar millones de multas no acumula
+    errores de redondeo como con euros en coma flotante.
+
+    Atributos:
+        por_dia (int): Céntimos por día de retraso.
+        maximo (int): Importe máximo de la multa de un préstamo (None: sin tope).
+        dias_gracia (int): Días de retraso que no se cobran.
+        por_genero (dict): Género -> céntimos por día, para libros con tarifa propia.
+    """
+
+    def __init__(self, por_dia=25, maximo=1000, dias_gracia=0, por_genero=None):
+        """
+        Inicializa la tarifa.
+
+        Args:
+            por_dia (int): Céntimos por día de retraso.
+            maximo (int, optional): Tope por préstamo en céntimos (None: sin tope).
+            dias_gracia (int): Días de retraso que no se cobran.
+            por_genero (dict, optional): Género -> céntimos por día.
+        """
+        self.por_dia = por_dia
+        self.maximo = maximo
+        self.dias_gracia = dias_gracia
+        self.por_genero = dict(por_genero or {})
+
+    def importe(self, dias_retraso, genero=None):
+        """
+        Devuelve la multa de un préstamo.
+
+        Args:
+            dias_retraso (int): Días transcurridos desde el día límite.
+            genero (str, optional): Género del libro.
+
+        Returns:
+            int: Importe en céntimos (0 si no hay retraso que cobrar).
+        """
+        dias = dias_retraso - self.dias_gracia
+        if dias <= 0:
+            return 0
+        importe = dias * self.por_genero.get(genero, self.por_dia)
+        return importe if self.maximo is None else min(importe, self.maximo)
+
+
+class MotorMultas:
+    """
+    Saldos de multas por usuario calculados por lotes e incrementalmente.
+
+    La primera pasada recorre todo el historial. Cada pasada recuerda hasta
+    qué posición del historial llegó y qué préstamos seguían activos; la
+    siguiente solo lee los préstamos registrados después y vuelve a mirar
+    esos activos. Un préstamo devuelto se liquida una sola vez: su multa pasa
+    al saldo del usuario y ya no se revisa. La multa de un préstamo activo
+    crece cada día, así que se recalcula en cada pasada (como en_curso, aparte
+    del saldo, porque aún puede cambiar).
+
+    Las multas ya liquidadas no cambian si después cambia la tarifa o la
+    política de préstamo; se puede obtener un cálculo desde cero con las
+    reglas actuales con MotorMultas(tarifa) y procesar() sobre el historial.
+
+    Atributos:
+        tarifa (TarifaMultas): Importes de las multas.
+        procesados (int): Préstamos del historial (en orden de registro) ya leídos.
+        pendientes (set): IDs de los préstamos que seguían activos en la última pasada.
+        saldos (dict): ID de usuario -> céntimos de multas liquidadas menos pagos.
+        en_curso (dict): ID de usuario -> céntimos que acumulaban sus préstamos
+                         activos el día de la última pasada.
+        dia (int): Día de la última pasada (None si no hubo ninguna).
+        modificados (set): Usuarios cuyo saldo o multa en curso cambió desde
+                           que se guardaron (ver SistemaBiblioteca._guardar_multas).
+    """
+
+    def __init__(self, tarifa=None):
+        """
+        Inicializa el motor sin ninguna pasada.
+
+        Args:
+            tarifa (TarifaMultas, optional): Importes de las multas.
+        """
+        self.tarifa = tarifa if tarifa is not None else TarifaMultas()
+        self.procesados = 0
+        self.pendientes = set()
+        self.saldos = {}
+        self.en_curso = {}
+        self.dia = None
+        self.modificados = set()
+
+    def procesar(self, nuevos, obtener, genero_de, politica, dia):
+        """
+        Hace una pasada: liquida los préstamos devueltos desde la anterior y
+        recalcula la multa en curso de los activos.
+
+        Args:
+            nuevos (iterable): Préstamos del historial desde la posición
+                               procesados, en orden de registro, como tuplas
+                               (id_prestamo, isbn_libro, id_usuario,
+                               dia_prestamo, dia_devolucion, activo).
+            obtener: Función ID de préstamo -> Prestamo en su estado actual
+                     (None si ya no existe).
+            genero_de: Función ISBN -> género actual del libro.
+            politica (PoliticaPrestamo): Duración de los préstamos, para su día límite.
+            dia (int): Día hasta el que se cuenta el retraso de los préstamos activos.
+
+        Returns:
+            dict: revisados (préstamos leídos), liquidados (multas nuevas en
+                  el saldo), importe_liquidado y en_curso (préstamos activos
+                  con multa) de esta pasada.
+        """
+        tarifa = self.tarifa
+        saldos = self.saldos
+        modificados = self.modificados
+        en_curso = {}
+        generos = {}  # ISBN -> género, para consultar cada libro una vez por pasada
+        # Un préstamo que duró menos que esto no tiene multa con ninguna
+        # duración ni tarifa: la mayoría se descarta sin consultar nada más
+        sin_multa = politica.dias_minimos() + tarifa.dias_gracia
+        anteriores = self.pendientes
+        self.pendientes = pendientes = set()
+        resumen = {'revisados': 0, 'liquidados': 0, 'importe_liquidado': 0, 'en_curso': 0}
+
+        def revisar(filas):
+            revisados = liquidados = importe_liquidado = activos_con_multa = 0
+            for id_prestamo, isbn, id_usuario, inicio, devolucion, activo in filas:
+                revisados += 1
+                if activo:
+                    pendientes.add(id_prestamo)
+                    fin = dia
+                else:
+                    fin = devolucion
+                # Los préstamos con fechas no válidas no pueden tener retraso
+                if type(inicio) is not int or type(fin) is not int or fin - inicio <= sin_multa:
+                    continue
+                genero = generos.get(isbn, generos)
+                if genero is generos:
+                    genero = generos[isbn] = genero_de(isbn)
+                importe = tarifa.importe(fin - inicio - politica.dias_prestamo(genero, id_usuario), genero)
+                if not importe:
+                    continue
+                if activo:
+                    en_curso[id_usuario] = en_curso.get(id_usuario, 0) + importe
+                    activos_con_multa += 1
+                else:
+                    saldos[id_usuario] = saldos.get(id_usuario, 0) + importe
+                    modificados.add(id_usuario)
+                    liquidados += 1
+                    importe_liquidado += importe
+            for clave, valor in (('revisados', revisados), ('liquidados', liquidados),
+                                 ('importe_liquidado', importe_liquidado), ('en_curso', activos_con_multa)):
+                resumen[clave] += valor
+            return revisados
+
+        # Los que estaban activos: los que se devolvieron se liquidan y los
+        # demás vuelven a pendientes
+        revisar((prestamo.id_prestamo, prestamo.isbn_libro, prestamo.id_usuario, prestamo.dia_prestamo,
+                 prestamo.dia_devolucion, prestamo.activo)
+                for prestamo in map(obtener, anteriores) if prestamo is not None)
+        # Los registrados desde la pasada anterior
+        self.procesados += revisar(nuevos)
+
+        # Solo se guardan los usuarios cuya multa en curso cambió
+        previas = self.en_curso
+        modificados.update(id_usuario for id_usuario, importe in en_curso.items()
+                           if previas.get(id_usuario) != importe)
+        modificados.update(id_usuario for id_usuario in previas if id_usuario not in en_curso)
+        self.en_curso = en_curso
+        self.dia = dia
+        return resumen
+
+    def pagar(self, id_usuario, importe):
+        """
+        Descuenta un pago del saldo de un usuario.
+
+        Args:
+            id_usuario (str): ID del usuario.
+            importe (int): Céntimos pagados.
+        """
+        saldo = self.saldos.get(id_usuario, 0) - importe
+        if saldo:
+            self.saldos[id_usuario] = saldo
+        else:
+            self.saldos.pop(id_usuario, None)
+        self.modificados.add(id_usuario)
+
+    def saldo(self, id_usuario):
+        """
+        Devuelve las multas de un usuario.
+
+        Returns:
+            dict: saldo (liquidado y sin pagar), en_curso (de sus préstamos
+                  activos a la fecha de la última pasada) y total, en céntimos.
+        """
+        saldo = self.saldos.get(id_usuario, 0)
+        en_curso = self.en_curso.get(id_usuario, 0)
+        return {'saldo': saldo, 'en_curso': en_curso, 'total': saldo + en_curso}
+
+    def estado(self):
+        """
+        Devuelve la posición de la última pasada como valores simples, para guardarla.
+
+        Returns:
+            dict: procesados, fecha (YYYY-MM-DD o None) y pendientes (lista de IDs).
+        """
+        return {
+            'procesados': self.procesados,
+            'fecha': dia_a_fecha(self.dia),
+            'pendientes': sorted(self.pendientes),
+        }
+
+    def restaurar(self, estado, saldos):
+        """
+        Recupera una pasada guardada.
+
+        Args:
+            estado (dict): Valor devuelto por estado(), o None si no hay.
+            saldos (iterable): Tuplas (ID de usuario, saldo, en curso).
+        """
+        if estado is not None:
+            self.procesados = estado['procesados']
+            self.dia = fecha_a_dia(estado['fecha'])
+            self.pendientes = set(estado['pendientes'])
+        for id_usuario, saldo, en_curso in saldos:
+            if saldo:
+                self.saldos[id_usuario] = saldo
+            if en_curso:
+                self.en_curso[id_usuario] = en_curso
+        self.modificados.clear()
+
+
+def main(argumentos=None):
+    """Proceso nocturno: calcula las multas de una biblioteca guardada y muestra el resumen"""
+    import argparse
+    from main import SistemaBiblioteca
+
+    parser = argparse.ArgumentParser(description="Cálculo por lotes de las multas por retraso")
+    grupo = parser.add_mutually_exclusive_group(required=True)
+    grupo.add_argument("--diario", help="Carpeta del diario de archivos")
+    grupo.add_argument("--base", help="Archivo de base de datos SQLite")
+    parser.add_argument("--fecha", help="Fecha (YYYY-MM-DD) hasta la que se cuenta el retraso; por defecto, hoy")
+    opciones = parser.parse_args(argumentos)
+
+    if opciones.diario:
+        from persistencia import AlmacenamientoDiario
+        almacenamiento = AlmacenamientoDiario(opciones.diario)
+    else:
+        from persistencia import AlmacenamientoSQLite
+        almacenamiento = AlmacenamientoSQLite(opciones.base)
+    sistema = SistemaBiblioteca(almacenamiento, datos_ejemplo=False)
+    try:
+        exito, mensaje = sistema.procesar_multas(opciones.fecha)
+        print(mensaje)
+        if exito:
+            for id_usuario, total in sistema.usuarios_con_mas_multas(10):
+                print(f"  {id_usuario}: {total / 100:.2f}")
+        return 0 if exito else 1
+    finally:
+        sistema.cerrar()
+
+
+# Bloque de prueba
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 1:
+        sys.exit(main())
+
+    from prestamo import Prestamo, PoliticaPrestamo
+
+    generos = {"978-1": "Ficción", "978-2": "Referencia"}
+    politica = PoliticaPrestamo(por_genero={"Referencia": 7})
+    tarifa = TarifaMultas(por_dia=25, maximo=1000, dias_gracia=1, por_genero={"Referencia": 50})
+    historial = [Prestamo("P001", "978-1", "U001", "2024-01-01"),
+                 Prestamo("P002", "978-2", "U001", "2024-01-01"),
+                 Prestamo("P003", "978-1", "U002", "2024-01-10")]
+    historial[0].registrar_devolucion("2024-01-20")  # 4 días de retraso, 1 de gracia
+    por_id = {prestamo.id_prestamo: prestamo for prestamo in historial}
+
+    motor = MotorMultas(tarifa)
+    def filas(prestamos):
+        return ((p.id_prestamo, p.isbn_libro, p.id_usuario, p.dia_prestamo, p.dia_devolucion, p.activo)
+                for p in prestamos)
+
+    resumen = motor.procesar(filas(historial), por_id.get, generos.get, politica, fecha_a_dia("2024-01-31"))
+    print("Primera pasada:", resumen)
+    print("U001:", motor.saldo("U001"), "U002:", motor.saldo("U002"))
+
+    # Se devuelve P002 y se registra otro préstamo: solo se revisan esos y los activos
+    historial[1].registrar_devolucion("2024-02-05")
+    historial.append(Prestamo("P004", "978-2", "U002", "2024-02-01"))
+    por_id["P004"] = historial[3]
+    resumen = motor.procesar(filas(historial[motor.procesados:]), por_id.get, generos.get, politica,
+                             fecha_a_dia("2024-02-10"))
+    print("Segunda pasada:", resumen)
+    motor.pagar("U001", 500)
+    print("U001 tras pagar 5,00:", motor.saldo("U001"), "U002:", motor.saldo("U002"))
+    print("Estado guardado:", motor.estado())
@@ -0,0 +1,1036 @@
+# persistencia.py
+import json
+import os
+import sqlite3
+import time
+import zlib
+from contextlib import contextmanager
+from itertools import islice
+
+from libro import Libro
+from usuario import Usuario
+from prestamo import Prestamo
+from reservas import Reserva, ESTADOS_ACTIVOS
+
+
+class Almacenamiento:
+    """
+    Interfaz base de los motores de persistencia del sistema de biblioteca.
+
+    SistemaBiblioteca solo usa los métodos definidos aquí, de modo que se
+    puede cambiar el motor (SQLite, archivos, etc.) sin modificar el sistema.
+    Los objetos se guardan y se reconstruyen con sus métodos to_dict/from_dict.
+
+    El catálogo (libros y usuarios) se carga completo al iniciar, pero el
+    historial de préstamos se lee bajo demanda: al arrancar solo se cargan
+    los préstamos activos.
+    """
+
+    def esta_vacio(self):
+        """
+        Verifica si el almacenamiento no contiene datos.
+
+        Returns:
+            bool: True si no hay libros ni usuarios guardados.
+        """
+        raise NotImplementedError
+
+    def cargar_libros(self):
+        """
+        Devuelve todos los libros guardados, en orden de inserción.
+
+        Returns:
+            iterable: Instancias de Libro.
+        """
+        raise NotImplementedError
+
+    def cargar_usuarios(self):
+        """
+        Devuelve todos los usuarios guardados, en orden de inserción.
+
+        Returns:
+            iterable: Instancias de Usuario.
+        """
+        raise NotImplementedError
+
+    def cargar_prestamos_activos(self):
+        """
+        Devuelve los préstamos que aún no han sido devueltos.
+
+        Returns:
+            iterable: Instancias de Prestamo activas.
+        """
+        raise NotImplementedError
+
+    def obtener_prestamo(self, id_prestamo):
+        """
+        Busca un préstamo guardado por su ID.
+
+        Args:
+            id_prestamo (str): Identificador del préstamo.
+
+        Returns:
+            Prestamo: El préstamo encontrado o None si no existe.
+        """
+        raise NotImplementedError
+
+    def iterar_prestamos(self, inicio=0, cantidad=None):
+        """
+        Recorre el historial de préstamos en orden de registro.
+
+        Args:
+            inicio (int): Posición del primer préstamo a devolver.
+            cantidad (int, optional): Máximo de préstamos; por defecto, hasta el final.
+
+        Returns:
+            iterable: Instancias de Prestamo, generadas bajo demanda.
+        """
+        raise NotImplementedError
+
+    def contar_prestamos(self):
+        """
+        Cuenta los préstamos del historial (activos e inactivos).
+
+        Returns:
+            int: Número de préstamos guardados.
+        """
+        raise NotImplementedError
+
+    def obtener_contador_prestamos(self):
+        """
+        Devuelve el siguiente número a usar para generar IDs de préstamo.
+
+        Returns:
+            int: El valor guardado del contador (1 si no hay ninguno).
+        """
+        raise NotImplementedError
+
+    def guardar_contador_prestamos(self, valor):
+        """
+        Guarda el siguiente número a usar para generar IDs de préstamo.
+
+        Args:
+            valor (int): Nuevo valor del contador.
+        """
+        raise NotImplementedError
+
+    def guardar_libro(self, libro):
+        """
+        Inserta o reemplaza un libro.
+
+        Args:
+            libro (Libro): El libro a guardar.
+        """
+        raise NotImplementedError
+
+    def eliminar_libro(self, isbn):
+        """
+        Elimina un libro por su ISBN.
+
+        Args:
+            isbn (str): ISBN del libro a eliminar.
+        """
+        raise NotImplementedError
+
+    def guardar_usuario(self, usuario):
+        """
+        Inserta o reemplaza un usuario.
+
+        Args:
+            usuario (Usuario): El usuario a guardar.
+        """
+        raise NotImplementedError
+
+    def eliminar_usuario(self, id_usuario):
+        """
+        Elimina un usuario por su ID.
+
+        Args:
+            id_usuario (str): ID del usuario a eliminar.
+        """
+        raise NotImplementedError
+
+    def guardar_prestamo(self, prestamo):
+        """
+        Inserta o reemplaza un préstamo.
+
+        Args:
+            prestamo (Prestamo): El préstamo a guardar.
+        """
+        raise NotImplementedError
+
+    def cargar_reservas_activas(self):
+        """
+        Devuelve las reservas pendientes o listas para recoger, en orden de registro.
+
+        Returns:
+            iterable: Instancias de Reserva activas.
+        """
+        raise NotImplementedError
+
+    def obtener_contador_reservas(self):
+        """
+        Devuelve el siguiente número a usar para generar IDs de reserva.
+
+        Returns:
+            int: El valor guardado del contador (1 si no hay ninguno).
+        """
+        raise NotImplementedError
+
+    def guardar_contador_reservas(self, valor):
+        """
+        Guarda el siguiente número a usar para generar IDs de reserva.
+
+        Args:
+            valor (int): Nuevo valor del contador.
+        """
+        raise NotImplementedError
+
+    def guardar_reserva(self, reserva):
+        """
+        Inserta o reemplaza una reserva.
+
+        Args:
+            reserva (Reserva): La reserva a guardar.
+        """
+        raise NotImplementedError
+
+    def cargar_saldos_multas(self):
+        """
+        Devuelve los saldos de multas guardados.
+
+        Returns:
+            iterable: Tuplas (ID de usuario, saldo, en curso), en céntimos.
+        """
+        raise NotImplementedError
+
+    def guardar_saldo_multas(self, id_usuario, saldo, en_curso):
+        """
+        Inserta o reemplaza el saldo de multas de un usuario (lo elimina si ambos son 0).
+
+        Args:
+            id_usuario (str): ID del usuario.
+            saldo (int): Céntimos de multas liquidadas sin pagar.
+            en_curso (int): Céntimos que acumulan sus préstamos activos.
+        """
+        raise NotImplementedError
+
+    def obtener_estado_multas(self):
+        """
+        Devuelve la posición de la última pasada de multas (ver MotorMultas.estado).
+
+        Returns:
+            dict: El estado guardado, o None si nunca se calcularon multas.
+        """
+        raise NotImplementedError
+
+    def guardar_estado_multas(self, estado):
+        """
+        Guarda la posición de la última pasada de multas.
+
+        Args:
+            estado (dict): Valor devuelto por MotorMultas.estado().
+        """
+        raise NotImplementedError
+
+    @contextmanager
+    def transaccion(self):
+        """
+        Agrupa varias escrituras para que se confirmen juntas.
+
+        La implementación base no agrupa nada; los motores que lo soportan
+        la redefinen.
+        """
+        yield self
+
+    def cerrar(self):
+        """Libera los recursos del almacenamiento."""
+        pass
+
+
+class AlmacenamientoSQLite(Almacenamiento):
+    """
+    Motor de persistencia sobre una base de datos SQLite.
+
+    Usa el modo WAL para que las lecturas no bloqueen las escrituras, consultas
+    parametrizadas (que sqlite3 prepara una sola vez y reutiliza) e índices
+    sobre ISBN, usuario y préstamos activos.
+
+    Atributos:
+        ruta (str): Ruta del archivo de base de datos.
+        conexion (sqlite3.Connection): Conexión abierta con la base de datos.
+    """
+
+    ESQUEMA = """
+        CREATE TABLE IF NOT EXISTS libros (
+            isbn TEXT PRIMARY KEY,
+            titulo TEXT NOT NULL,
+            autor TEXT NOT NULL,
+            "año_publicacion" INTEGER,
+            genero TEXT,
+            disponible INTEGER NOT NULL DEFAULT 1,
+            ejemplares TEXT
+        );
+        CREATE TABLE IF NOT EXISTS usuarios (
+            id_usuario TEXT PRIMARY KEY,
+            nombre TEXT NOT NULL,
+            contacto TEXT
+        );
+        CREATE TABLE IF NOT EXISTS prestamos (
+            orden INTEGER PRIMARY KEY,
+            id_prestamo TEXT NOT NULL UNIQUE,
+            isbn_libro TEXT NOT NULL,
+            id_usuario TEXT NOT NULL,
+            fecha_prestamo TEXT NOT NULL,
+            fecha_devolucion TEXT,
+            activo INTEGER NOT NULL DEFAULT 1,
+            codigo_barras TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_prestamos_isbn ON prestamos (isbn_libro);
+        CREATE INDEX IF NOT EXISTS idx_prestamos_usuario ON prestamos (id_usuario);
+        CREATE INDEX IF NOT EXISTS idx_prestamos_activos ON prestamos (activo) WHERE activo = 1;
+        CREATE TABLE IF NOT EXISTS reservas (
+            orden INTEGER PRIMARY KEY,
+            id_reserva TEXT NOT NULL UNIQUE,
+            isbn_libro TEXT NOT NULL,
+            id_usuario TEXT NOT NULL,
+            fecha_reserva TEXT NOT NULL,
+            prioridad INTEGER NOT NULL DEFAULT 0,
+            estado TEXT NOT NULL,
+            codigo_barras TEXT,
+            fecha_limite TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_reservas_activas ON reservas (estado)
+            WHERE estado IN ('pendiente', 'lista');
+        CREATE TABLE IF NOT EXISTS saldos_multas (
+            id_usuario TEXT PRIMARY KEY,
+            saldo INTEGER NOT NULL,
+            en_curso INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS metadatos (
+            clave TEXT PRIMARY KEY,
+            valor TEXT
+        );
+    """
+
+    # Columnas de cada tabla, en el mismo orden que las claves de to_dict
+    COLUMNAS_LIBRO = ('isbn', 'titulo', 'autor', 'año_publicacion', 'genero', 'disponible', 'ejemplares')
+    COLUMNAS_USUARIO = ('id_usuario', 'nombre', 'contacto')
+    COLUMNAS_PRESTAMO = ('id_prestamo', 'isbn_libro', 'id_usuario', 'fecha_prestamo',
+                         'fecha_devolucion', 'activo', 'codigo_barras')
+    COLUMNAS_RESERVA = ('id_reserva', 'isbn_libro', 'id_usuario', 'fecha_reserva', 'prioridad', 'estado',
+                        'codigo_barras', 'fecha_limite')
+    # Columnas agregadas después de la primera versión del esquema: se crean
+    # al abrir una base antigua (tabla -> [(columna, tipo)])
+    COLUMNAS_NUEVAS = {
+        'libros': [('ejemplares', 'TEXT')],
+        'prestamos': [('codigo_barras', 'TEXT')],
+    }
+
+    SQL_GUARDAR_LIBRO = (
+        'INSERT INTO libros (isbn, titulo, autor, "año_publicacion", genero, disponible, ejemplares) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?) '
+        'ON CONFLICT (isbn) DO UPDATE SET titulo = excluded.titulo, autor = excluded.autor, '
+        '"año_publicacion" = excluded."año_publicacion", genero = excluded.genero, '
+        'disponible = excluded.disponible, ejemplares = excluded.ejemplares'
+    )
+    SQL_GUARDAR_USUARIO = (
+        'INSERT INTO usuarios (id_usuario, nombre, contacto) VALUES (?, ?, ?) '
+        'ON CONFLICT (id_usuario) DO UPDATE SET nombre = excluded.nombre, contacto = excluded.contacto'
+    )
+    SQL_GUARDAR_PRESTAMO = (
+        'INSERT INTO prestamos (id_prestamo, isbn_libro, id_usuario, fecha_prestamo, '
+        'fecha_devolucion, activo, codigo_barras) VALUES (?, ?, ?, ?, ?, ?, ?) '
+        'ON CONFLICT (id_prestamo) DO UPDATE SET isbn_libro = excluded.isbn_libro, '
+        'id_usuario = excluded.id_usuario, fecha_prestamo = excluded.fecha_prestamo, '
+        'fecha_devolucion = excluded.fecha_devolucion, activo = excluded.activo, '
+        'codigo_barras = excluded.codigo_barras'
+    )
+    SQL_GUARDAR_RESERVA = (
+        'INSERT INTO reservas (id_reserva, isbn_libro, id_usuario, fecha_reserva, prioridad, estado, '
+        'codigo_barras, fecha_limite) VALUES (?, ?, ?, ?, ?, ?, ?, ?) '
+        'ON CONFLICT (id_reserva) DO UPDATE SET estado = excluded.estado, '
+        'codigo_barras = excluded.codigo_barras, fecha_limite = excluded.fecha_limite'
+    )
+    SQL_SELECT_PRESTAMOS = (
+        'SELECT id_prestamo, isbn_libro, id_usuario, fecha_prestamo, fecha_devolucion, activo, '
+        'codigo_barras FROM prestamos'
+    )
+
+    def __init__(self, ruta):
+        """
+        Abre (o crea) la base de datos indicada.
+
+        Args:
+            ruta (str): Ruta del archivo de base de datos.
+        """
+        self.ruta = ruta
+        # isolation_level=None: cada escritura se confirma sola salvo que
+        # se agrupe explícitamente con transaccion()
+        # check_same_thread=False: las consultas de la interfaz y del modo
+        # concurrente leen desde otros hilos (SQLite serializa el acceso)
+        self.conexion = sqlite3.connect(ruta, isolation_level=None, cached_statements=256,
+                                        check_same_thread=False)
+        self.conexion.execute("PRAGMA journal_mode = WAL")
+        self.conexion.execute("PRAGMA synchronous = NORMAL")
+        self.conexion.executescript(self.ESQUEMA)
+        self._migrar()
+        self.nivel_transaccion = 0  # Permite anidar llamadas a transaccion()
+
+    def _migrar(self):
+        """Agrega a una base creada con un esquema anterior las columnas que le falten"""
+        for tabla, columnas in self.COLUMNAS_NUEVAS.items():
+            existentes = {fila[1] for fila in self.conexion.execute(f"PRAGMA table_info({tabla})")}
+            for columna, tipo in columnas:
+                if columna not in existentes:
+                    self.conexion.execute(f"ALTER TABLE {tabla} ADD COLUMN {columna} {tipo}")
+
+    # ===== LECTURA =====
+
+    def esta_vacio(self):
+        """Verifica si la base de datos no contiene libros ni usuarios"""
+        libros = self.conexion.execute("SELECT 1 FROM libros LIMIT 1").fetchone()
+        usuarios = self.conexion.execute("SELECT 1 FROM usuarios LIMIT 1").fetchone()
+        return libros is None and usuarios is None
+
+    def cargar_libros(self):
+        """Devuelve todos los libros en orden de inserción"""
+        cursor = self.conexion.execute(
+            'SELECT isbn, titulo, autor, "año_publicacion", genero, disponible, ejemplares '
+            'FROM libros ORDER BY rowid'
+        )
+        for fila in cursor:
+            datos = dict(zip(self.COLUMNAS_LIBRO, fila))
+            datos['disponible'] = bool(datos['disponible'])
+            # NULL: un único ejemplar con el ISBN como código (ver guardar_libro)
+            if datos['ejemplares'] is not None:
+                datos['ejemplares'] = json.loads(datos['ejemplares'])
+            yield Libro.from_dict(datos)
+
+    def cargar_usuarios(self):
+        """Devuelve todos los usuarios en orden de inserción"""
+        cursor = self.conexion.execute(
+            "SELECT id_usuario, nombre, contacto FROM usuarios ORDER BY rowid"
+        )
+        for fila in cursor:
+            yield Usuario.from_dict(dict(zip(self.COLUMNAS_USUARIO, fila)))
+
+    def _fila_a_prestamo(self, fila):
+        """Convierte una fila de la tabla prestamos en un Prestamo"""
+        datos = dict(zip(self.COLUMNAS_PRESTAMO, fila))
+        datos['activo'] = bool(datos['activo'])
+        return Prestamo.from_dict(datos)
+
+    def cargar_prestamos_activos(self):
+        """Devuelve los préstamos activos usando el índice parcial sobre activo"""
+        cursor = self.conexion.execute(self.SQL_SELECT_PRESTAMOS + " WHERE activo = 1 ORDER BY orden")
+        for fila in cursor:
+            yield self._fila_a_prestamo(fila)
+
+    def obtener_prestamo(self, id_prestamo):
+        """Busca un préstamo por su ID"""
+        fila = self.conexion.execute(
+            self.SQL_SELECT_PRESTAMOS + " WHERE id_prestamo = ?", (id_prestamo,)
+        ).fetchone()
+        return self._fila_a_prestamo(fila) if fila else None
+
+    def iterar_prestamos(self, inicio=0, cantidad=None):
+        """Recorre el historial de préstamos (o un rango) sin cargarlo en memoria"""
+        # Los préstamos nunca se borran y SQLite numera orden desde 1 sin huecos:
+        # la posición se resuelve por la clave primaria en lugar de saltar filas con OFFSET
+        cursor = self.conexion.execute(
+            self.SQL_SELECT_PRESTAMOS + " WHERE orden > ? ORDER BY orden LIMIT ?",
+            (inicio, -1 if cantidad is None else cantidad)
+        )
+        for fila in cursor:
+            yield self._fila_a_prestamo(fila)
+
+    def contar_prestamos(self):
+        """Cuenta los préstamos del historial"""
+        return self.conexion.execute("SELECT COUNT(*) FROM prestamos").fetchone()[0]
+
+    def obtener_contador_prestamos(self):
+        """Devuelve el siguiente número de préstamo guardado"""
+        return self._leer_contador('contador_prestamos')
+
+    def cargar_reservas_activas(self):
+        """Devuelve las reservas activas usando el índice parcial sobre estado"""
+        cursor = self.conexion.execute(
+            "SELECT id_reserva, isbn_libro, id_usuario, fecha_reserva, prioridad, estado, codigo_barras, "
+            "fecha_limite FROM reservas WHERE estado IN ('pendiente', 'lista') ORDER BY orden"
+        )
+        for fila in cursor:
+            yield Reserva.from_dict(dict(zip(self.COLUMNAS_RESERVA, fila)))
+
+    def obtener_contador_reservas(self):
+        """Devuelve el siguiente número de reserva guardado"""
+        return self._leer_contador('contador_reservas')
+
+    def cargar_saldos_multas(self):
+        """Devuelve los saldos de multas de todos los usuarios con alguno"""
+        return self.conexion.execute("SELECT id_usuario, saldo, en_curso FROM saldos_multas")
+
+    def obtener_estado_multas(self):
+        """Devuelve la posición de la última pasada de multas, o None"""
+        fila = self.conexion.execute("SELECT valor FROM metadatos WHERE clave = 'estado_multas'").fetchone()
+        return json.loads(fila[0]) if fila else None
+
+    def _leer_contador(self, clave):
+        """Devuelve un contador de la tabla de metadatos (1 si no está)"""
+        fila = self.conexion.execute("SELECT valor FROM metadatos WHERE clave = ?", (clave,)).fetchone()
+        return int(fila[0]) if fila else 1
+
+    # ===== ESCRITURA =====
+
+    def _guardar_contador(self, clave, valor):
+        """Guarda un contador en la tabla de metadatos"""
+        self.conexion.execute(
+            "INSERT INTO metadatos (clave, valor) VALUES (?, ?) "
+            "ON CONFLICT (clave) DO UPDATE SET valor = excluded.valor",
+            (clave, str(valor))
+        )
+
+    def guardar_contador_prestamos(self, valor):
+        """Guarda el siguiente número de préstamo"""
+        self._guardar_contador('contador_prestamos', valor)
+
+    def guardar_contador_reservas(self, valor):
+        """Guarda el siguiente número de reserva"""
+        self._guardar_contador('contador_reservas', valor)
+
+    def guardar_libro(self, libro):
+        """Inserta o reemplaza un libro"""
+        datos = libro.to_dict()
+        # Los códigos de barras se guardan como lista JSON, salvo el caso
+        # habitual de un único ejemplar con el ISBN como código
+        ejemplares = datos['ejemplares']
+        datos['ejemplares'] = None if ejemplares == [libro.isbn] else json.dumps(ejemplares, ensure_ascii=False)
+        self.conexion.execute(self.SQL_GUARDAR_LIBRO, [datos[c] for c in self.COLUMNAS_LIBRO])
+
+    def eliminar_libro(self, isbn):
+        """Elimina un libro por su ISBN"""
+        self.conexion.execute("DELETE FROM libros WHERE isbn = ?", (isbn,))
+
+    def guardar_usuario(self, usuario):
+        """Inserta o reemplaza un usuario"""
+        datos = usuario.to_dict()
+        self.conexion.execute(self.SQL_GUARDAR_USUARIO, [datos[c] for c in self.COLUMNAS_USUARIO])
+
+    def eliminar_usuario(self, id_usuario):
+        """Elimina un usuario por su ID"""
+        self.conexion.execute("DELETE FROM usuarios WHERE id_usuario = ?", (id_usuario,))
+
+    def guardar_prestamo(self, prestamo):
+        """Inserta o reemplaza un préstamo"""
+        datos = prestamo.to_dict()
+        self.conexion.execute(self.SQL_GUARDAR_PRESTAMO, [datos[c] for c in self.COLUMNAS_PRESTAMO])
+
+    def guardar_reserva(self, reserva):
+        """Inserta o actualiza una reserva"""
+        datos = reserva.to_dict()
+        self.conexion.execute(self.SQL_GUARDAR_RESERVA, [datos[c] for c in self.COLUMNAS_RESERVA])
+
+    def guardar_saldo_multas(self, id_usuario, saldo, en_curso):
+        """Inserta o reemplaza el saldo de multas de un usuario (lo elimina si queda a 0)"""
+        if not saldo and not en_curso:
+            self.conexion.execute("DELETE FROM saldos_multas WHERE id_usuario = ?", (id_usuario,))
+            return
+        self.conexion.execute(
+            "INSERT INTO saldos_multas (id_usuario, saldo, en_curso) VALUES (?, ?, ?) "
+            "ON CONFLICT (id_usuario) DO UPDATE SET saldo = excluded.saldo, en_curso = excluded.en_curso",
+            (id_usuario, saldo, en_curso)
+        )
+
+    def guardar_estado_multas(self, estado):
+        """Guarda la posición de la última pasada de multas en la tabla de metadatos"""
+        self.conexion.execute(
+            "INSERT INTO metadatos (clave, valor) VALUES ('estado_multas', ?) "
+            "ON CONFLICT (clave) DO UPDATE SET valor = excluded.valor",
+            (json.dumps(estado, ensure_ascii=False),)
+        )
+
+    @contextmanager
+    def transaccion(self):
+        """
+        Agrupa las escrituras en una sola transacción de SQLite.
+
+        Si ocurre una excepción se deshacen todos los cambios del bloque. Las
+        transacciones anidadas se integran en la más externa.
+        """
+        if self.nivel_transaccion == 0:
+            self.conexion.execute("BEGIN")
+        self.nivel_transaccion += 1
+        try:
+            yield self
+        except BaseException:
+            self.nivel_transaccion -= 1
+            if self.nivel_transaccion == 0:
+                self.conexion.execute("ROLLBACK")
+            raise
+        else:
+            self.nivel_transaccion -= 1
+            if self.nivel_transaccion == 0:
+                self.conexion.execute("COMMIT")
+
+    def cerrar(self):
+        """Cierra la conexión con la base de datos"""
+        self.conexion.close()
+
+
+class AlmacenamientoDiario(Almacenamiento):
+    """
+    Motor de persistencia basado en archivos: un diario de solo anexado más
+    una instantánea periódica.
+
+    Cada escritura agrega un registro compacto al diario (una línea con su
+    CRC32 y el JSON del cambio) en lugar de reescribir todos los datos. Las
+    llamadas a fsync se agrupan: se hacen cada cierto número de registros o
+    de segundos, al confirmar una transacción y al cerrar. Cuando el diario
+    supera un tamaño umbral se escribe una instantánea del estado completo y
+    el diario se vacía. Al abrir se carga la instantánea y solo se reproduce
+    el diario posterior; si la última línea quedó incompleta por una caída,
+    se descarta y el archivo se trunca hasta el último registro válido.
+
+    Atributos:
+        directorio (str): Carpeta donde se guardan la instantánea y el diario.
+        libros (dict): ISBN -> diccionario del libro.
+        usuarios (dict): ID de usuario -> diccionario del usuario.
+        prestamos (dict): ID de préstamo -> diccionario del préstamo.
+        contador_prestamos (int): Siguiente número de préstamo.
+        reservas (dict): ID de reserva -> diccionario de la reserva.
+        contador_reservas (int): Siguiente número de reserva.
+        saldos_multas (dict): ID de usuario -> [saldo, en curso] de sus multas.
+        estado_multas (dict): Posición de la última pasada de multas, o None.
+    """
+
+    ARCHIVO_INSTANTANEA = "instantanea.jsonl"
+    ARCHIVO_DIARIO = "diario.log"
+
+    # Códigos de operación de los registros del diario
+    OP_LIBRO = "L"
+    OP_ELIMINAR_LIBRO = "-L"
+    OP_USUARIO = "U"
+    OP_ELIMINAR_USUARIO = "-U"
+    OP_PRESTAMO = "P"
+    OP_CONTADOR = "C"
+    OP_RESERVA = "R"
+    OP_CONTADOR_RESERVAS = "CR"
+    OP_SALDO_MULTAS = "M"
+    OP_ESTADO_MULTAS = "EM"
+    OP_TRANSACCION = "T"
+
+    def __init__(self, directorio, fsync_cada=64, intervalo_fsync=0.05,
+                 umbral_compactacion=8 * 1024 * 1024):
+        """
+        Abre (o crea) el almacenamiento en la carpeta indicada.
+
+        Args:
+            directorio (str): Carpeta de los archivos del almacenamiento.
+            fsync_cada (int): Número máximo de registros pendientes antes de hacer fsync.
+            intervalo_fsync (float): Segundos máximos entre un registro y su fsync.
+            umbral_compactacion (int): Tamaño del diario (bytes) que dispara una instantánea.
+        """
+        self.directorio = directorio
+        self.fsync_cada = fsync_cada
+        self.intervalo_fsync = intervalo_fsync
+        self.umbral_compactacion = umbral_compactacion
+
+        self.libros = {}
+        self.usuarios = {}
+        self.prestamos = {}
+        self.contador_prestamos = 1
+        self.reservas = {}
+        self.contador_reservas = 1
+        self.saldos_multas = {}
+        self.estado_multas = None
+
+        self.pendientes_fsync = 0        # Registros escritos aún sin fsync
+        self.ultimo_fsync = time.monotonic()
+        self.nivel_transaccion = 0       # Permite anidar llamadas a transaccion()
+        self.operaciones_transaccion = []
+
+        os.makedirs(directorio, exist_ok=True)
+        self.ruta_instantanea = os.path.join(directorio, self.ARCHIVO_INSTANTANEA)
+        self.ruta_diario = os.path.join(directorio, self.ARCHIVO_DIARIO)
+
+        self._cargar_instantanea()
+        self._reproducir_diario()
+        self.diario = open(self.ruta_diario, "ab")
+
+    # ===== RECUPERACIÓN =====
+
+    def _cargar_instantanea(self):
+        """Carga el estado guardado en la última instantánea, si existe"""
+        if not os.path.exists(self.ruta_instantanea):
+            return
+        with open(self.ruta_instantanea, "r", encoding="utf-8") as archivo:
+            for linea in archivo:
+                operacion, dato = json.loads(linea)
+                self._aplicar(operacion, dato)
+
+    def _reproducir_diario(self):
+        """
+        Aplica los registros del diario posteriores a la instantánea.
+
+        Se detiene en el primer registro incompleto o corrupto y trunca el
+        diario en ese punto para que las nuevas escrituras sigan a un
+        registro válido.
+        """
+        if not os.path.exists(self.ruta_diario):
+            return
+
+        posicion_valida = 0
+        with open(self.ruta_diario, "rb") as archivo:
+            for linea in archivo:
+                registro = self._decodificar(linea)
+                if registro is None:
+                    break
+                self._aplicar(*registro)
+                posicion_valida += len(linea)
+
+        if posicion_valida < os.path.getsize(self.ruta_diario):
+            with open(self.ruta_diario, "r+b") as archivo:
+                archivo.truncate(posicion_valida)
+                archivo.flush()
+                os.fsync(archivo.fileno())
+
+    @staticmethod
+    def _codificar(operacion, dato):
+        """Convierte un registro en una línea del diario con su CRC32"""
+        cuerpo = json.dumps([operacion, dato], ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return b"%08x %s\n" % (zlib.crc32(cuerpo), cuerpo)
+
+    @staticmethod
+    def _decodificar(linea):
+        """
+        Convierte una línea del diario en un registro.
+
+        Returns:
+            tuple: (operacion, dato), o None si la línea está incompleta o corrupta.
+        """
+        if not linea.endswith(b"\n") or len(linea) < 10:
+            return None
+        cuerpo = linea[9:-1]
+        try:
+            if int(linea[:8], 16) != zlib.crc32(cuerpo):
+                return None
+            operacion, dato = json.loads(cuerpo)
+        except ValueError:
+            return None
+        return operacion, dato
+
+    def _aplicar(self, operacion, dato):
+        """Aplica un registro al estado en memoria"""
+        if operacion == self.OP_LIBRO:
+            self.libros[dato['isbn']] = dato
+        elif operacion == self.OP_ELIMINAR_LIBRO:
+            self.libros.pop(dato, None)
+        elif operacion == self.OP_USUARIO:
+            self.usuarios[dato['id_usuario']] = dato
+        elif operacion == self.OP_ELIMINAR_USUARIO:
+            self.usuarios.pop(dato, None)
+        elif operacion == self.OP_PRESTAMO:
+            self.prestamos[dato['id_prestamo']] = dato
+        elif operacion == self.OP_CONTADOR:
+            self.contador_prestamos = dato
+        elif operacion == self.OP_RESERVA:
+            self.reservas[dato['id_reserva']] = dato
+        elif operacion == self.OP_CONTADOR_RESERVAS:
+            self.contador_reservas = dato
+        elif operacion == self.OP_SALDO_MULTAS:
+            id_usuario, saldo, en_curso = dato
+            if saldo or en_curso:
+                self.saldos_multas[id_usuario] = [saldo, en_curso]
+            else:
+                self.saldos_multas.pop(id_usuario, None)
+        elif operacion == self.OP_ESTADO_MULTAS:
+            self.estado_multas = dato
+        elif operacion == self.OP_TRANSACCION:
+            for registro in dato:
+                self._aplicar(*registro)
+
+    # ===== ESCRITURA EN EL DIARIO =====
+
+    def _registrar(self, operacion, dato):
+        """Aplica un cambio y lo agrega al diario (o a la transacción en curso)"""
+        if self.nivel_transaccion > 0:
+            self.operaciones_transaccion.append((operacion, dato))
+            return
+        self._aplicar(operacion, dato)
+        self._escribir(operacion, dato)
+
+    def _escribir(self, operacion, dato):
+        """Agrega un registro al diario y hace fsync si corresponde"""
+        self.diario.write(self._codificar(operacion, dato))
+        self.pendientes_fsync += 1
+        if (self.pendientes_fsync >= self.fsync_cada
+                or time.monotonic() - self.ultimo_fsync >= self.intervalo_fsync):
+            self.sincronizar()
+        if self.diario.tell() >= self.umbral_compactacion:
+            self.compactar()
+
+    def sincronizar(self):
+        """Vacía el búfer del diario y fuerza su escritura en disco"""
+        self.diario.flush()
+        os.fsync(self.diario.fileno())
+        self.pendientes_fsync = 0
+        self.ultimo_fsync = time.monotonic()
+
+    def compactar(self):
+        """
+        Escribe una instantánea del estado completo y vacía el diario.
+
+        La instantánea se escribe en un archivo temporal y luego reemplaza a
+        la anterior, de modo que una caída a mitad del proceso deja intacta
+        la instantánea previa junto con su diario.
+        """
+        self.sincronizar()
+        ruta_temporal = self.ruta_instantanea + ".tmp"
+        with open(ruta_temporal, "w", encoding="utf-8") as archivo:
+            archivo.write(json.dumps([self.OP_CONTADOR, self.contador_prestamos]) + "\n")
+            archivo.write(json.dumps([self.OP_CONTADOR_RESERVAS, self.contador_reservas]) + "\n")
+            if self.estado_multas is not None:
+                archivo.write(json.dumps([self.OP_ESTADO_MULTAS, self.estado_multas], ensure_ascii=False) + "\n")
+            for id_usuario, (saldo, en_curso) in self.saldos_multas.items():
+                archivo.write(json.dumps([self.OP_SALDO_MULTAS, [id_usuario, saldo, en_curso]],
+                                         ensure_ascii=False) + "\n")
+            for operacion, datos in ((self.OP_LIBRO, self.libros),
+                                     (self.OP_USUARIO, self.usuarios),
+                                     (self.OP_PRESTAMO, self.prestamos),
+                                     (self.OP_RESERVA, self.reservas)):
+                for dato in datos.values():
+                    archivo.write(json.dumps([operacion, dato], ensure_ascii=False, separators=(",", ":")))
+                    archivo.write("\n")
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        os.replace(ruta_temporal, self.ruta_instantanea)
+
+        # Reproducir el diario viejo sobre la nueva instantánea es inofensivo
+        # (los registros guardan valores completos), así que basta con vaciarlo
+        self.diario.truncate(0)
+        self.diario.seek(0)
+        self.sincronizar()
+
+    # ===== LECTURA =====
+
+    def esta_vacio(self):
+        """Verifica si no hay libros ni usuarios guardados"""
+        return not self.libros and not self.usuarios
+
+    def cargar_libros(self):
+        """Devuelve todos los libros en orden de inserción"""
+        return (Libro.from_dict(dato) for dato in self.libros.values())
+
+    def cargar_usuarios(self):
+        """Devuelve todos los usuarios en orden de inserción"""
+        return (Usuario.from_dict(dato) for dato in self.usuarios.values())
+
+    def cargar_prestamos_activos(self):
+        """Devuelve los préstamos activos"""
+        return (Prestamo.from_dict(dato) for dato in self.prestamos.values() if dato['activo'])
+
+    def obtener_prestamo(self, id_prestamo):
+        """Busca un préstamo por su ID"""
+        dato = self.prestamos.get(id_prestamo)
+        return Prestamo.from_dict(dato) if dato else None
+
+    def iterar_prestamos(self, inicio=0, cantidad=None):
+        """Recorre el historial de préstamos (o un rango) en orden de registro"""
+        fin = None if cantidad is None else inicio + cantidad
+        # Se copia el rango para que registrar préstamos mientras se recorre no falle
+        datos = list(islice(self.prestamos.values(), inicio, fin))
+        return (Prestamo.from_dict(dato) for dato in datos)
+
+    def contar_prestamos(self):
+        """Cuenta los préstamos del historial"""
+        return len(self.prestamos)
+
+    def obtener_contador_prestamos(self):
+        """Devuelve el siguiente número de préstamo"""
+        return self.contador_prestamos
+
+    def cargar_reservas_activas(self):
+        """Devuelve las reservas activas"""
+        return (Reserva.from_dict(dato) for dato in self.reservas.values()
+                if dato['estado'] in ESTADOS_ACTIVOS)
+
+    def obtener_contador_reservas(self):
+        """Devuelve el siguiente número de reserva"""
+        return self.contador_reservas
+
+    def cargar_saldos_multas(self):
+        """Devuelve los saldos de multas de todos los usuarios con alguno"""
+        return [(id_usuario, saldo, en_curso) for id_usuario, (saldo, en_curso) in self.saldos_multas.items()]
+
+    def obtener_estado_multas(self):
+        """Devuelve la posición de la última pasada de multas, o None"""
+        return self.estado_multas
+
+    # ===== ESCRITURA =====
+
+    def guardar_contador_prestamos(self, valor):
+        """Guarda el siguiente número de préstamo"""
+        self._registrar(self.OP_CONTADOR, valor)
+
+    def guardar_libro(self, libro):
+        """Inserta o reemplaza un libro"""
+        self._registrar(self.OP_LIBRO, libro.to_dict())
+
+    def eliminar_libro(self, isbn):
+        """Elimina un libro por su ISBN"""
+        self._registrar(self.OP_ELIMINAR_LIBRO, isbn)
+
+    def guardar_usuario(self, usuario):
+        """Inserta o reemplaza un usuario"""
+        self._registrar(self.OP_USUARIO, usuario.to_dict())
+
+    def eliminar_usuario(self, id_usuario):
+        """Elimina un usuario por su ID"""
+        self._registrar(self.OP_ELIMINAR_USUARIO, id_usuario)
+
+    def guardar_prestamo(self, prestamo):
+        """Inserta o reemplaza un préstamo"""
+        self._registrar(self.OP_PRESTAMO, prestamo.to_dict())
+
+    def guardar_contador_reservas(self, valor):
+        """Guarda el siguiente número de reserva"""
+        self._registrar(self.OP_CONTADOR_RESERVAS, valor)
+
+    def guardar_reserva(self, reserva):
+        """Inserta o reemplaza una reserva"""
+        self._registrar(self.OP_RESERVA, reserva.to_dict())
+
+    def guardar_saldo_multas(self, id_usuario, saldo, en_curso):
+        """Inserta o reemplaza el saldo de multas de un usuario (lo elimina si queda a 0)"""
+        self._registrar(self.OP_SALDO_MULTAS, [id_usuario, saldo, en_curso])
+
+    def guardar_estado_multas(self, estado):
+        """Guarda la posición de la última pasada de multas"""
+        self._registrar(self.OP_ESTADO_MULTAS, estado)
+
+    @contextmanager
+    def transaccion(self):
+        """
+        Agrupa las escrituras en un único registro del diario.
+
+        Los cambios se aplican y se escriben juntos al salir del bloque, por
+        lo que tras una caída aparecen todos o ninguno. Si ocurre una
+        excepción se descartan. Las transacciones anidadas se integran en la
+        más externa.
+        """
+        self.nivel_transaccion += 1
+        try:
+            yield self
+        except BaseException:
+            self.nivel_transaccion -= 1
+            if self.nivel_transaccion == 0:
+                self.operaciones_transaccion = []
+            raise
+        else:
+            self.nivel_transaccion -= 1
+            if self.nivel_transaccion == 0 and self.operaciones_transaccion:
+                operaciones, self.operaciones_transaccion = self.operaciones_transaccion, []
+                self._aplicar(self.OP_TRANSACCION, operaciones)
+                self._escribir(self.OP_TRANSACCION, operaciones)
+                self.sincronizar()
+
+    def cerrar(self):
+        """Hace fsync de los registros pendientes y cierra el diario"""
+        self.sincronizar()
+        self.diario.close()
+
+
+# Bloque de prueba para verificar el funcionamiento de la persistencia
+if __name__ == "__main__":
+    import os
+    import tempfile
+
+    print("=== Prueba del almacenamiento SQLite ===")
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "biblioteca.db")
+
+        # Guardar algunos datos
+        almacenamiento = AlmacenamientoSQLite(ruta)
+        with almacenamiento.transaccion():
+            almacenamiento.guardar_libro(Libro("978-0142437230", "1984", "George Orwell", 1949, "Ciencia Ficción"))
+            almacenamiento.guardar_usuario(Usuario("U001", "Juan Pérez", "juan@email.com"))
+            almacenamiento.guardar_prestamo(Prestamo("P001", "978-0142437230", "U001", "2023-10-15"))
+            almacenamiento.guardar_contador_prestamos(2)
+        almacenamiento.cerrar()
+
+        # Reabrir y leer
+        almacenamiento = AlmacenamientoSQLite(ruta)
+        print(f"Libros: {[str(libro) for libro in almacenamiento.cargar_libros()]}")
+        print(f"Usuarios: {[str(usuario) for usuario in almacenamiento.cargar_usuarios()]}")
+        print(f"Préstamos activos: {[str(p) for p in almacenamiento.cargar_prestamos_activos()]}")
+        print(f"Contador de préstamos: {almacenamiento.obtener_contador_prestamos()}")
+        almacenamiento.cerrar()
+
+    print("=== Prueba del almacenamiento con diario ===")
+
+    import random
+    import shutil
+
+    def estado(almacenamiento):
+        """Devuelve una copia comparable del estado de un almacenamiento"""
+        return (dict(almacenamiento.libros), dict(almacenamiento.usuarios),
+                dict(almacenamiento.prestamos), almacenamiento.contador_prestamos)
+
+    with tempfile.TemporaryDirectory() as directorio:
+        original = os.path.join(directorio, "original")
+
+        # Generar una secuencia de cambios guardando el estado tras cada registro
+        almacenamiento = AlmacenamientoDiario(original, umbral_compactacion=1 << 30)
+        estados = [estado(almacenamiento)]
+        generador = random.Random(42)
+        for i in range(300):
+            isbn = f"ISBN-{generador.randrange(40)}"
+            opcion = generador.random()
+            if opcion < 0.5:
+                almacenamiento.guardar_libro(Libro(isbn, f"Título {i}", "Autor", 2000, "Ficción"))
+            elif opcion < 0.6:
+                almacenamiento.eliminar_libro(isbn)
+            elif opcion < 0.8:
+                almacenamiento.guardar_usuario(Usuario(f"U{i % 25}", f"Usuario {i}", "contacto"))
+            else:
+                with almacenamiento.transaccion():
+                    almacenamiento.guardar_prestamo(Prestamo(f"P{i:03d}", isbn, "U1", "2024-01-01"))
+                    almacenamiento.guardar_contador_prestamos(i + 1)
+            estados.append(estado(almacenamiento))
+        almacenamiento.cerrar()
+
+        with open(os.path.join(original, AlmacenamientoDiario.ARCHIVO_DIARIO), "rb") as archivo:
+            contenido = archivo.read()
+
+        # Truncar el diario en posiciones aleatorias y verificar que se recupera
+        # exactamente el estado tras el último registro completo
+        for _ in range(200):
+            corte = generador.randrange(len(contenido) + 1)
+            copia = os.path.join(directorio, "copia")
+            shutil.rmtree(copia, ignore_errors=True)
+            os.makedirs(copia)
+            with open(os.path.join(copia, AlmacenamientoDiario.ARCHIVO_DIARIO), "wb") as archivo:
+                archivo.write(contenido[:corte])
+
+            recuperado = AlmacenamientoDiario(copia)
+            registros_completos = contenido[:corte].count(b"\n")
+            assert estado(recuperado) == estados[registros_completos], f"Fallo al truncar en {corte}"
+            # El diario queda listo para seguir escribiendo
+            recuperado.guardar_contador_prestamos(999)
+            recuperado.cerrar()
+            assert AlmacenamientoDiario(copia).contador_prestamos == 999
+        print("Recuperación tras truncar el diario en 200 posiciones aleatorias: correcta")
+
+        # Compactación: la instantánea más el diario restante reproducen el estado
+        compactado = os.path.join(directorio, "compactado")
+        almacenamiento = AlmacenamientoDiario(compactado, umbral_compactacion=4096)
+        for i in range(500):
+            almacenamiento.guardar_libro(Libro(f"ISBN-{i % 50}", f"Título {i}", "Autor", 2000, "Ficción"))
+        esperado = estado(almacenamiento)
+        tamanio_diario = os.path.getsize(almacenamiento.ruta_diario)
+        almacenamiento.cerrar()
+        assert estado(AlmacenamientoDiario(compactado)) == esperado
+        print(f"Compactación: diario de {tamanio_diario} bytes tras 500 escrituras, estado correcto")
+
+    print("=== Prueba completada ===")
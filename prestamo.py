@@ -1,5 +1,137 @@
 # prestamo.py
-from datetime import datetime
+from datetime import date
+from functools import lru_cache
+from sys import intern
+
+# Días que dura un préstamo antes de considerarse con retraso
+DIAS_PRESTAMO = 15
+
+# Mensaje de error de las fechas de entrada que no son una fecha YYYY-MM-DD existente
+ERROR_FECHA = "Fecha con formato no válido (se espera YYYY-MM-DD)"
+
+# Fechas distintas que recuerdan el conversor y el formateador: un historial
+# usa pocas (una por día), así que casi todas las conversiones son aciertos
+FECHAS_EN_CACHE = 16384
+
+
+@lru_cache(maxsize=FECHAS_EN_CACHE)
+def _dia_de_texto(fecha):
+    """Convierte un texto "YYYY-MM-DD" en número de día, o None si no es una fecha válida"""
+    if len(fecha) == 10 and fecha[4] == fecha[7] == "-" and fecha.isascii():
+        try:
+            return date.fromisoformat(fecha).toordinal()
+        except ValueError:
+            pass
+    return None
+
+
+@lru_cache(maxsize=FECHAS_EN_CACHE)
+def _texto_de_dia(dia):
+    """Convierte un número de día en texto YYYY-MM-DD"""
+    return date.fromordinal(dia).isoformat()
+
+
+def fecha_a_dia(fecha):
+    """
+    Convierte una fecha "YYYY-MM-DD" en su número de día (date.toordinal).
+    
+    Un entero ocupa menos que el texto y se compara y resta directamente.
+    Los valores que no son una fecha válida (o None) se devuelven sin cambios,
+    para conservar los registros antiguos; las fechas nuevas se comprueban
+    con validar_fecha.
+    
+    Args:
+        fecha (str): Fecha en formato YYYY-MM-DD.
+    
+    Returns:
+        int: Número de día, o el valor recibido si no es una fecha válida.
+    """
+    if isinstance(fecha, str):
+        dia = _dia_de_texto(fecha)
+        if dia is not None:
+            return dia
+    return fecha
+
+
+def dia_a_fecha(dia):
+    """Convierte un número de día en texto "YYYY-MM-DD"; otros valores no cambian"""
+    return _texto_de_dia(dia) if type(dia) is int else dia
+
+
+def validar_fecha(fecha):
+    """
+    Convierte una fecha de entrada en número de día, comprobando que es válida.
+    
+    Args:
+        fecha (str): Fecha en formato YYYY-MM-DD (o un número de día).
+    
+    Returns:
+        int: Número de día.
+    
+    Raises:
+        ValueError: Si no es una fecha YYYY-MM-DD existente.
+    """
+    dia = fecha_a_dia(fecha)
+    if type(dia) is not int:
+        raise ValueError(ERROR_FECHA)
+    return dia
+
+
+def dia_actual():
+    """Devuelve el número de día de hoy"""
+    return date.today().toordinal()
+
+
+class PoliticaPrestamo:
+    """
+    Duración de los préstamos según la categoría del usuario o el género del libro.
+    
+    La categoría del usuario tiene prioridad (por ejemplo, un profesor conserva
+    cualquier libro 30 días); si el usuario no tiene categoría con duración
+    propia, se usa la del género del libro, y si tampoco, la duración general.
+    
+    Atributos:
+        dias (int): Duración general en días.
+        por_genero (dict): Género -> días.
+        por_categoria (dict): Categoría de usuario -> días.
+        categorias_usuario (dict): ID de usuario -> categoría.
+    """
+    
+    def __init__(self, dias=DIAS_PRESTAMO, por_genero=None, por_categoria=None, categorias_usuario=None):
+        """
+        Inicializa la política.
+        
+        Args:
+            dias (int): Duración general en días.
+            por_genero (dict, optional): Género -> días.
+            por_categoria (dict, optional): Categoría de usuario -> días.
+            categorias_usuario (dict, optional): ID de usuario -> categoría.
+        """
+        self.dias = dias
+        self.por_genero = dict(por_genero or {})
+        self.por_categoria = dict(por_categoria or {})
+        self.categorias_usuario = dict(categorias_usuario or {})
+    
+    def dias_prestamo(self, genero, id_usuario):
+        """
+        Devuelve la duración de un préstamo.
+        
+        Args:
+            genero (str): Género del libro (None si no se conoce).
+            id_usuario (str): ID del usuario.
+        
+        Returns:
+            int: Días que dura el préstamo.
+        """
+        categoria = self.categorias_usuario.get(id_usuario)
+        if categoria in self.por_categoria:
+            return self.por_categoria[categoria]
+        return self.por_genero.get(genero, self.dias)
+    
+    def dias_minimos(self):
+        """Devuelve la duración más corta que puede tener un préstamo con esta política"""
+        return min([self.dias, *self.por_genero.values(), *self.por_categoria.values()])
+
 
 class Prestamo:
     """
@@ -12,9 +144,20 @@ class Prestamo:
         fecha_prestamo (str): Fecha en que se realizó el préstamo (formato YYYY-MM-DD).
         fecha_devolucion (str): Fecha en que se devolvió el libro (formato YYYY-MM-DD).
         activo (bool): Estado del préstamo (True si está activo, False si está finalizado).
+        codigo_barras (str): Código de barras del ejemplar prestado (None en
+                             préstamos anteriores a los ejemplares).
+    
+    Las fechas se guardan como número de día en dia_prestamo y dia_devolucion
+    (ver fecha_a_dia); fecha_prestamo y fecha_devolucion las leen y escriben
+    como texto. Con __slots__ y el ISBN y el ID de usuario internados (se
+    repiten en todos los préstamos del mismo libro o usuario), cada préstamo
+    ocupa una fracción de lo que ocupaba con un diccionario de atributos.
     """
     
-    def __init__(self, id_prestamo, isbn_libro, id_usuario, fecha_prestamo):
+    __slots__ = ('id_prestamo', 'isbn_libro', 'id_usuario', 'dia_prestamo', 'dia_devolucion', 'activo',
+                 'codigo_barras')
+    
+    def __init__(self, id_prestamo, isbn_libro, id_usuario, fecha_prestamo, codigo_barras=None):
         """
         Inicializa una nueva instancia de la clase Prestamo.
         
@@ -23,13 +166,33 @@ class Prestamo:
             isbn_libro (str): ISBN del libro prestado.
             id_usuario (str): ID del usuario que realizó el préstamo.
             fecha_prestamo (str): Fecha en que se realizó el préstamo.
+            codigo_barras (str, optional): Código del ejemplar prestado.
         """
         self.id_prestamo = id_prestamo
-        self.isbn_libro = isbn_libro
-        self.id_usuario = id_usuario
-        self.fecha_prestamo = fecha_prestamo
-        self.fecha_devolucion = None  # Inicialmente no hay fecha de devolución
+        self.isbn_libro = intern(isbn_libro) if type(isbn_libro) is str else isbn_libro
+        self.id_usuario = intern(id_usuario) if type(id_usuario) is str else id_usuario
+        self.dia_prestamo = fecha_a_dia(fecha_prestamo)
+        self.dia_devolucion = None  # Inicialmente no hay fecha de devolución
         self.activo = True  # Por defecto, el préstamo está activo
+        self.codigo_barras = codigo_barras
+    
+    @property
+    def fecha_prestamo(self):
+        """Fecha del préstamo en formato YYYY-MM-DD"""
+        return dia_a_fecha(self.dia_prestamo)
+    
+    @fecha_prestamo.setter
+    def fecha_prestamo(self, fecha):
+        self.dia_prestamo = fecha_a_dia(fecha)
+    
+    @property
+    def fecha_devolucion(self):
+        """Fecha de devolución en formato YYYY-MM-DD, o None si no se devolvió"""
+        return dia_a_fecha(self.dia_devolucion)
+    
+    @fecha_devolucion.setter
+    def fecha_devolucion(self, fecha):
+        self.dia_devolucion = fecha_a_dia(fecha)
     
     def __str__(self):
         """
@@ -49,12 +212,12 @@ class Prestamo:
         Args:
             fecha_devolucion (str, optional): Fecha de devolución. Si no se proporciona, 
                                               se usa la fecha actual.
-        """
-        if fecha_devolucion is None:
-            # Usar fecha actual si no se proporciona
-            fecha_devolucion = datetime.now().strftime("%Y-%m-%d")
         
-        self.fecha_devolucion = fecha_devolucion
+        Raises:
+            ValueError: Si la fecha no es una fecha YYYY-MM-DD válida.
+        """
+        # Sin fecha, el número de día de hoy (sin pasar por texto)
+        self.dia_devolucion = dia_actual() if fecha_devolucion is None else validar_fecha(fecha_devolucion)
         self.activo = False
     
     def to_dict(self):
@@ -70,7 +233,8 @@ class Prestamo:
             'id_usuario': self.id_usuario,
             'fecha_prestamo': self.fecha_prestamo,
             'fecha_devolucion': self.fecha_devolucion,
-            'activo': self.activo
+            'activo': self.activo,
+            'codigo_barras': self.codigo_barras
         }
     
     @classmethod
@@ -88,35 +252,65 @@ class Prestamo:
             data['id_prestamo'],
             data['isbn_libro'],
             data['id_usuario'],
-            data['fecha_prestamo']
+            data['fecha_prestamo'],
+            data.get('codigo_barras')
         )
         prestamo.fecha_devolucion = data['fecha_devolucion']
         prestamo.activo = data['activo']
         return prestamo
     
-    def dias_retraso(self):
+    def fecha_limite(self):
         """
-        Calcula los días de retraso en la devolución.
+        Calcula la fecha en que vence el préstamo.
         
         Returns:
-            int: Número de días de retraso (0 si no hay retraso o el préstamo está activo).
+            str: Fecha límite (formato YYYY-MM-DD), o None si la fecha de
+                 préstamo no tiene un formato válido.
         """
-        if self.activo or not self.fecha_devolucion:
-            return 0
+        return dia_a_fecha(self.dia_limite())
+    
+    def dia_limite(self, dias_prestamo=DIAS_PRESTAMO):
+        """
+        Calcula el número de día en que vence el préstamo.
         
-        # Convertir fechas a objetos datetime para calcular la diferencia
-        fecha_prestamo = datetime.strptime(self.fecha_prestamo, "%Y-%m-%d")
-        fecha_devolucion = datetime.strptime(self.fecha_devolucion, "%Y-%m-%d")
+        Args:
+            dias_prestamo (int): Duración del préstamo en días.
         
-        # Suponemos que el período de préstamo es de 15 días
-        dias_prestamo = 15
-        fecha_limite = fecha_prestamo + timedelta(days=dias_prestamo)
+        Returns:
+            int: Día límite, o None si la fecha de préstamo no es válida.
+        """
+        if type(self.dia_prestamo) is not int:
+            return None
+        return self.dia_prestamo + dias_prestamo
+    
+    def dias_retraso(self, fecha=None, dias_prestamo=DIAS_PRESTAMO):
+        """
+        Calcula los días de retraso en la devolución.
+        
+        Args:
+            fecha (str, optional): Para un préstamo activo, fecha (YYYY-MM-DD)
+                                   hasta la que se cuenta el retraso.
+            dias_prestamo (int): Duración del préstamo en días.
+        
+        Returns:
+            int: Número de días de retraso (0 si no hay retraso, o si el
+                 préstamo está activo y no se indica fecha).
+        """
+        if self.activo:
+            if fecha is None:
+                return 0
+            fin = fecha_a_dia(fecha)
+        elif not self.dia_devolucion:
+            return 0
+        else:
+            fin = self.dia_devolucion
         
-        if fecha_devolucion > fecha_limite:
-            retraso = (fecha_devolucion - fecha_limite).days
-            return retraso
+        # Las fechas ya son números de día: la diferencia es una resta
+        if type(self.dia_prestamo) is not int or type(fin) is not int:
+            raise ValueError(ERROR_FECHA)
         
-        return 0
+        retraso = fin - self.dia_limite(dias_prestamo)
+        return retraso if retraso > 0 else 0
 
 
 # Bloque de prueba para verificar el funcionamiento de la clase Prestamo
@@ -143,5 +337,14 @@ if __name__ == "__main__":
     prestamo_retraso = Prestamo("P002", "978-0061120084", "U002", "2023-10-01")
     prestamo_retraso.registrar_devolucion("2023-10-20")  # 4 días de retraso (15 días de préstamo)
     print(f"Días de retraso: {prestamo_retraso.dias_retraso()}")
+    print(f"Fecha límite: {prestamo_retraso.fecha_limite()}")
+    
+    # Duración según la categoría del usuario o el género del libro
+    politica = PoliticaPrestamo(por_genero={"Referencia": 7}, por_categoria={"profesor": 30},
+                                categorias_usuario={"U002": "profesor"})
+    dias = politica.dias_prestamo("Ficción", "U002")
+    print(f"Duración para un profesor: {dias} días, retraso: {prestamo_retraso.dias_retraso(dias_prestamo=dias)}")
+    activo = Prestamo("P003", "978-0544003415", "U001", "2023-10-01")
+    print(f"Retraso de un préstamo activo al 2023-10-20: {activo.dias_retraso('2023-10-20')} días")
     
     print("=== Prueba completada ===")
\ No newline at end of file
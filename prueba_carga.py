@@ -0,0 +1,221 @@
+# prueba_carga.py
+# Prueba de carga de la API (servidor_api.py): muchos clientes simultáneos,
+# cada uno con una conexión persistente, y latencias p50/p99 de las peticiones.
+#
+# Uso: python prueba_carga.py [--clientes 1000] [--peticiones 20] [--servidor host:puerto]
+# Sin --servidor, arranca la API en un proceso aparte y le carga libros sintéticos.
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+
+
+class ClienteHTTP:
+    """
+    Cliente HTTP/1.1 mínimo sobre una conexión persistente.
+
+    Atributos:
+        host (str): Dirección del servidor.
+        puerto (int): Puerto del servidor.
+    """
+
+    def __init__(self, host, puerto):
+        """
+        Inicializa el cliente (la conexión se abre con conectar()).
+
+        Args:
+            host (str): Dirección del servidor.
+            puerto (int): Puerto del servidor.
+        """
+        self.host = host
+        self.puerto = puerto
+        self.lector = None
+        self.escritor = None
+
+    async def conectar(self):
+        """Abre la conexión con el servidor"""
+        self.lector, self.escritor = await asyncio.open_connection(self.host, self.puerto)
+
+    async def pedir(self, metodo, ruta, datos=None):
+        """
+        Envía una petición y espera su respuesta por la misma conexión.
+
+        Args:
+            metodo (str): GET o POST.
+            ruta (str): Ruta con la cadena de consulta.
+            datos (dict, optional): Cuerpo JSON de la petición.
+
+        Returns:
+            tuple: (código de estado, respuesta decodificada).
+        """
+        cuerpo = json.dumps(datos).encode("utf-8") if datos is not None else b""
+        self.escritor.write(f"{metodo} {ruta} HTTP/1.1\r\nHost: {self.host}\r\n"
+                            f"Content-Length: {len(cuerpo)}\r\n\r\n".encode("latin-1") + cuerpo)
+        await self.escritor.drain()
+        encabezado = (await self.lector.readuntil(b"\r\n\r\n")).decode("latin-1")
+        estado = int(encabezado.split(" ", 2)[1])
+        longitud = 0
+        for linea in encabezado.split("\r\n")[1:]:
+            nombre, _, valor = linea.partition(":")
+            if nombre.lower() == "content-length":
+                longitud = int(valor)
+        respuesta = await self.lector.readexactly(longitud)
+        return estado, json.loads(respuesta)
+
+    async def cerrar(self):
+        """Cierra la conexión"""
+        if self.escritor is not None:
+            self.escritor.close()
+            try:
+                await self.escritor.wait_closed()
+            except ConnectionError:
+                pass
+
+
+def percentil(valores_ordenados, porcentaje):
+    """Devuelve el percentil de una lista ya ordenada (método del rango más cercano)"""
+    if not valores_ordenados:
+        return 0.0
+    posicion = max(0, min(len(valores_ordenados) - 1, round(porcentaje / 100 * len(valores_ordenados)) - 1))
+    return valores_ordenados[posicion]
+
+
+async def cargar_libros(host, puerto, cantidad):
+    """Agrega libros sintéticos por la API y devuelve sus ISBN"""
+    cliente = ClienteHTTP(host, puerto)
+    await cliente.conectar()
+    generos = ("Ficción", "Historia", "Poesía", "Ensayo", "Ciencia Ficción")
+    isbns = []
+    for i in range(cantidad):
+        isbn = f"ISBN-{i:07d}"
+        await cliente.pedir("POST", "/libros", {"isbn": isbn, "titulo": f"Crónica número {i}",
+                                                "autor": f"García {i % 500}", "año_publicacion": 1900 + i % 120,
+                                                "genero": generos[i % len(generos)]})
+        isbns.append(isbn)
+    await cliente.cerrar()
+    return isbns
+
+
+async def simular_cliente(host, puerto, isbns, peticiones, conectados, salida, latencias, errores, semilla):
+    """Abre una conexión, espera la señal de salida y lanza una mezcla de consultas"""
+    azar = random.Random(semilla)
+    cliente = ClienteHTTP(host, puerto)
+    try:
+        await cliente.conectar()
+    finally:
+        # También si falla, para que la prueba no espere a este cliente
+        conectados.release()
+    await salida.wait()
+    cursor = None
+    try:
+        for _ in range(peticiones):
+            tipo = azar.random()
+            if tipo < 0.5:
+                ruta = f"/libros/{azar.choice(isbns)}"
+            elif tipo < 0.75:
+                # Recorre el catálogo página a página con el cursor
+                ruta = "/libros?limite=20" + (f"&cursor={cursor}" if cursor else "")
+            elif tipo < 0.9:
+                ruta = f"/libros/buscar?q=garcia+{azar.randrange(500)}&limite=10"
+            else:
+                ruta = "/reportes/estadisticas"
+            inicio = time.perf_counter()
+            estado, respuesta = await cliente.pedir("GET", ruta)
+            latencias.append(time.perf_counter() - inicio)
+            if estado != 200:
+                errores.append((ruta, estado))
+            elif ruta.startswith("/libros?"):
+                cursor = respuesta["siguiente"]
+    finally:
+        await cliente.cerrar()
+
+
+async def ejecutar_prueba(host, puerto, clientes, peticiones, libros):
+    """
+    Carga los datos, conecta los clientes y mide las latencias.
+
+    Returns:
+        tuple: (latencias en segundos, respuestas con error, clientes que
+               fallaron, duración de la prueba en segundos).
+    """
+    isbns = await cargar_libros(host, puerto, libros)
+    latencias = []
+    errores = []
+    conectados = asyncio.Semaphore(0)
+    salida = asyncio.Event()
+    tareas = [asyncio.create_task(simular_cliente(host, puerto, isbns, peticiones, conectados, salida,
+                                                  latencias, errores, semilla))
+              for semilla in range(clientes)]
+    # Todas las conexiones se abren antes de empezar a medir
+    for _ in range(clientes):
+        await conectados.acquire()
+    inicio = time.perf_counter()
+    salida.set()
+    resultados = await asyncio.gather(*tareas, return_exceptions=True)
+    duracion = time.perf_counter() - inicio
+    fallidos = [resultado for resultado in resultados if isinstance(resultado, Exception)]
+    return latencias, errores, fallidos, duracion
+
+
+def subir_limite_archivos(necesarios):
+    """Sube el límite de descriptores abiertos del proceso, si el sistema lo permite"""
+    try:
+        import resource
+    except ImportError:
+        # Windows no tiene el módulo resource ni este límite
+        return
+    actual, maximo = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if actual < necesarios:
+        nuevo = necesarios if maximo == resource.RLIM_INFINITY else min(necesarios, maximo)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (nuevo, maximo))
+
+
+def arrancar_servidor():
+    """Arranca servidor_api.py en otro proceso y devuelve (proceso, puerto)"""
+    proceso = subprocess.Popen([sys.executable, "servidor_api.py", "--puerto", "0", "--sin-ejemplos"],
+                               stdout=subprocess.PIPE, text=True)
+    # La primera línea es "API escuchando en http://host:puerto"
+    linea = proceso.stdout.readline()
+    return proceso, int(linea.rsplit(":", 1)[1])
+
+
+def main():
+    """Ejecuta la prueba de carga e imprime las latencias"""
+    parser = argparse.ArgumentParser(description="Prueba de carga de la API de la biblioteca")
+    parser.add_argument("--clientes", type=int, default=1000, help="Clientes simultáneos")
+    parser.add_argument("--peticiones", type=int, default=20, help="Peticiones por cliente")
+    parser.add_argument("--libros", type=int, default=2000, help="Libros sintéticos a cargar")
+    parser.add_argument("--servidor", help="host:puerto de una API ya en marcha")
+    opciones = parser.parse_args()
+
+    subir_limite_archivos(opciones.clientes + 100)
+    proceso = None
+    if opciones.servidor:
+        host, puerto = opciones.servidor.rsplit(":", 1)
+        puerto = int(puerto)
+    else:
+        host = "127.0.0.1"
+        proceso, puerto = arrancar_servidor()
+    try:
+        latencias, errores, fallidos, duracion = asyncio.run(
+            ejecutar_prueba(host, puerto, opciones.clientes, opciones.peticiones, opciones.libros))
+    finally:
+        if proceso is not None:
+            proceso.terminate()
+            proceso.wait()
+
+    latencias.sort()
+    print(f"=== Prueba de carga: {opciones.clientes} clientes x {opciones.peticiones} peticiones ===")
+    print(f"Peticiones completadas: {len(latencias)} en {duracion:.2f}s ({len(latencias) / duracion:.0f}/s)")
+    for nombre, porcentaje in (("p50", 50), ("p90", 90), ("p99", 99), ("máximo", 100)):
+        print(f"{nombre:>8}: {percentil(latencias, porcentaje) * 1000:.1f}ms")
+    print(f"Respuestas con error: {len(errores)}, clientes fallidos: {len(fallidos)}")
+    for fallo in fallidos[:3]:
+        print(f"  {type(fallo).__name__}: {fallo}")
+
+
+if __name__ == "__main__":
+    main()
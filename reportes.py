@@ -0,0 +1,239 @@
+# reportes.py
+# Informes de circulación (préstamos por género, libros más prestados,
+# usuarios más activos y duración promedio) mantenidos al registrar cada
+# préstamo y devolución, en lugar de recorrer el historial al consultarlos.
+from bisect import bisect_left, insort
+from itertools import islice
+
+
+class Ranking:
+    """
+    Contadores por clave que se consultan de mayor a menor.
+
+    Las claves se agrupan por su cuenta (cuenta -> claves) y se mantiene
+    ordenada la lista de cuentas distintas. Sumar a una clave la mueve de
+    grupo en O(1) más una búsqueda binaria entre las cuentas distintas, que
+    son muchas menos que las claves; los N primeros se obtienen en O(N) sin
+    ordenar todas las claves.
+
+    Atributos:
+        conteos (dict): Clave -> cuenta.
+        grupos (dict): Cuenta -> {clave: None}, en el orden en que llegaron a esa cuenta.
+        cuentas (list): Cuentas con alguna clave, ordenadas de menor a mayor.
+    """
+
+    def __init__(self):
+        """Inicializa un ranking vacío."""
+        self.conteos = {}
+        self.grupos = {}
+        self.cuentas = []
+
+    def __len__(self):
+        """Devuelve el número de claves con cuenta distinta de cero"""
+        return len(self.conteos)
+
+    def cuenta(self, clave):
+        """Devuelve la cuenta de una clave (0 si no tiene)"""
+        return self.conteos.get(clave, 0)
+
+    def sumar(self, clave, cantidad=1):
+        """
+        Suma una cantidad (puede ser negativa) a la cuenta de una clave.
+
+        Args:
+            clave: Clave a contar.
+            cantidad (int): Cantidad a sumar.
+        """
+        anterior = self.conteos.get(clave, 0)
+        nueva = anterior + cantidad
+        if anterior:
+            grupo = self.grupos[anterior]
+            del grupo[clave]
+            if not grupo:
+                del self.grupos[anterior]
+                del self.cuentas[bisect_left(self.cuentas, anterior)]
+        if nueva:
+            grupo = self.grupos.get(nueva)
+            if grupo is None:
+                grupo = self.grupos[nueva] = {}
+                insort(self.cuentas, nueva)
+            grupo[clave] = None
+            self.conteos[clave] = nueva
+        else:
+            # No conservar claves sin cuenta
+            self.conteos.pop(clave, None)
+
+    def mayores(self, cantidad=10):
+        """
+        Devuelve las claves con mayor cuenta.
+
+        Args:
+            cantidad (int): Número de claves a devolver.
+
+        Returns:
+            list: Tuplas (clave, cuenta) de mayor a menor cuenta; a igual
+                  cuenta, primero la que la alcanzó antes.
+        """
+        grupos = self.grupos
+        pares = ((clave, cuenta) for cuenta in reversed(self.cuentas) for clave in grupos[cuenta])
+        return list(islice(pares, cantidad))
+
+
+class MotorReportes:
+    """
+    Agregados de circulación mantenidos en cada préstamo y devolución.
+
+    Los préstamos por género se atribuyen al género actual del libro: si un
+    libro cambia de género, sus préstamos pasan al nuevo; los préstamos de
+    ISBN que ya no están en el catálogo se cuentan con género None. Así los
+    agregados coinciden siempre con un recálculo exacto sobre el historial
+    (ver calcular).
+
+    Atributos:
+        por_genero (dict): Género -> número de préstamos.
+        por_libro (Ranking): ISBN -> número de préstamos.
+        por_usuario (Ranking): ID de usuario -> número de préstamos.
+        devoluciones (int): Préstamos devueltos con fechas válidas.
+        dias_prestados (int): Suma de la duración, en días, de esas devoluciones.
+    """
+
+    def __init__(self):
+        """Inicializa los agregados vacíos."""
+        self.por_genero = {}
+        self.por_libro = Ranking()
+        self.por_usuario = Ranking()
+        self.devoluciones = 0
+        self.dias_prestados = 0
+
+    @classmethod
+    def calcular(cls, prestamos, genero_de):
+        """
+        Calcula los agregados desde cero recorriendo un historial.
+
+        Args:
+            prestamos (iterable): Todos los préstamos (activos y finalizados).
+            genero_de: Función ISBN -> género actual del libro, o None si el
+                       ISBN no está en el catálogo.
+
+        Returns:
+            MotorReportes: Agregados exactos del historial.
+        """
+        motor = cls()
+        for prestamo in prestamos:
+            motor.prestamo_registrado(prestamo, genero_de(prestamo.isbn_libro))
+            if not prestamo.activo:
+                motor.devolucion_registrada(prestamo)
+        return motor
+
+    def _sumar_genero(self, genero, cantidad):
+        """Suma préstamos a un género, sin conservar géneros a cero"""
+        total = self.por_genero.get(genero, 0) + cantidad
+        if total:
+            self.por_genero[genero] = total
+        else:
+            self.por_genero.pop(genero, None)
+
+    def prestamo_registrado(self, prestamo, genero):
+        """
+        Cuenta un préstamo nuevo.
+
+        Args:
+            prestamo (Prestamo): El préstamo registrado.
+            genero (str): Género actual del libro (None si no está en el catálogo).
+        """
+        self.por_libro.sumar(prestamo.isbn_libro)
+        self.por_usuario.sumar(prestamo.id_usuario)
+        self._sumar_genero(genero, 1)
+
+    def devolucion_registrada(self, prestamo):
+        """
+        Cuenta la duración de un préstamo devuelto.
+
+        Args:
+            prestamo (Prestamo): El préstamo ya marcado como devuelto.
+        """
+        # Solo entran en el promedio los préstamos con ambas fechas válidas
+        if type(prestamo.dia_prestamo) is int and type(prestamo.dia_devolucion) is int:
+            self.devoluciones += 1
+            self.dias_prestados += prestamo.dia_devolucion - prestamo.dia_prestamo
+
+    def libro_contado(self, isbn, genero, cantidad):
+        """
+        Mueve los préstamos de un ISBN al entrar (1) o salir (-1) del catálogo.
+
+        Se llama con los valores del libro cada vez que se agrega, modifica o
+        elimina (ver SistemaBiblioteca._contar_libro): sus préstamos pasan
+        entre su género y None.
+
+        Args:
+            isbn (str): ISBN del libro.
+            genero (str): Género del libro.
+            cantidad (int): 1 si el libro entra en el catálogo, -1 si sale.
+        """
+        prestamos = self.por_libro.cuenta(isbn)
+        if prestamos:
+            self._sumar_genero(genero, cantidad * prestamos)
+            self._sumar_genero(None, -cantidad * prestamos)
+
+    def prestamos_por_genero(self):
+        """Devuelve un diccionario género -> préstamos, de mayor a menor"""
+        return dict(sorted(self.por_genero.items(), key=lambda par: par[1], reverse=True))
+
+    def libros_mas_prestados(self, cantidad=10):
+        """Devuelve tuplas (ISBN, préstamos) de los libros más prestados"""
+        return self.por_libro.mayores(cantidad)
+
+    def usuarios_mas_activos(self, cantidad=10):
+        """Devuelve tuplas (ID de usuario, préstamos) de los usuarios con más préstamos"""
+        return self.por_usuario.mayores(cantidad)
+
+    def duracion_promedio(self):
+        """Devuelve la duración promedio en días de los préstamos devueltos, o None si no hay"""
+        if not self.devoluciones:
+            return None
+        return self.dias_prestados / self.devoluciones
+
+    def resumen(self):
+        """
+        Devuelve todos los agregados como valores simples, para compararlos.
+
+        Returns:
+            dict: prestamos_por_genero, prestamos_por_libro,
+                  prestamos_por_usuario, devoluciones y dias_prestados.
+        """
+        return {
+            'prestamos_por_genero': dict(self.por_genero),
+            'prestamos_por_libro': dict(self.por_libro.conteos),
+            'prestamos_por_usuario': dict(self.por_usuario.conteos),
+            'devoluciones': self.devoluciones,
+            'dias_prestados': self.dias_prestados,
+        }
+
+
+# Bloque de prueba
+if __name__ == "__main__":
+    from prestamo import Prestamo
+
+    generos = {"978-1": "Ficción", "978-2": "Ficción", "978-3": "Historia"}
+    motor = MotorReportes()
+    prestamos = []
+    for numero, (isbn, usuario) in enumerate([("978-1", "U001"), ("978-2", "U001"), ("978-1", "U002"),
+                                               ("978-3", "U001"), ("978-1", "U003")], 1):
+        prestamo = Prestamo(f"P{numero:03d}", isbn, usuario, f"2024-01-0{numero}")
+        motor.prestamo_registrado(prestamo, generos[isbn])
+        prestamos.append(prestamo)
+    for prestamo in prestamos[:3]:
+        prestamo.registrar_devolucion("2024-01-20")
+        motor.devolucion_registrada(prestamo)
+
+    print("Préstamos por género:", motor.prestamos_por_genero())
+    print("Libros más prestados:", motor.libros_mas_prestados(2))
+    print("Usuarios más activos:", motor.usuarios_mas_activos(2))
+    print("Duración promedio:", motor.duracion_promedio(), "días")
+
+    # El libro 978-3 sale del catálogo: sus préstamos pasan a género None
+    motor.libro_contado("978-3", "Historia", -1)
+    del generos["978-3"]
+    exacto = MotorReportes.calcular(prestamos, generos.get)
+    print("Tras quitar 978-3:", motor.prestamos_por_genero())
+    print("Coincide con el recálculo:", motor.resumen() == exacto.resumen())
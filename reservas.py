@@ -0,0 +1,349 @@
+# reservas.py
+# Reservas de libros sin ejemplares libres: una cola de espera por libro,
+# ordenada por prioridad y antigüedad, y el plazo para recoger el ejemplar
+# que se aparta al devolverse.
+import heapq
+from itertools import count
+from sys import intern
+
+from prestamo import fecha_a_dia, dia_a_fecha
+
+# Días que se guarda un ejemplar apartado antes de pasarlo a la siguiente reserva
+DIAS_RECOGIDA = 3
+
+# Estados de una reserva: las dos primeras están activas, el resto son finales
+PENDIENTE = "pendiente"  # En la cola, esperando un ejemplar
+LISTA = "lista"          # Con un ejemplar apartado, esperando a que lo recojan
+CUMPLIDA = "cumplida"    # El usuario se llevó el libro en préstamo
+CANCELADA = "cancelada"
+VENCIDA = "vencida"      # No se recogió el ejemplar a tiempo
+
+ESTADOS_ACTIVOS = (PENDIENTE, LISTA)
+
+
+class Reserva:
+    """
+    Clase que representa la reserva de un libro por un usuario.
+
+    Atributos:
+        id_reserva (str): Identificador único de la reserva.
+        isbn_libro (str): ISBN del libro reservado.
+        id_usuario (str): ID del usuario que reserva.
+        fecha_reserva (str): Fecha de la reserva (formato YYYY-MM-DD).
+        prioridad (int): Las reservas de menor número se atienden antes; a
+                         igual prioridad, por orden de llegada.
+        estado (str): pendiente, lista, cumplida, cancelada o vencida.
+        codigo_barras (str): Ejemplar apartado para el usuario (estado lista).
+        fecha_limite (str): Último día para recoger el ejemplar apartado.
+
+    Como en Prestamo, las fechas se guardan como número de día en
+    dia_reserva y dia_limite.
+    """
+
+    __slots__ = ('id_reserva', 'isbn_libro', 'id_usuario', 'dia_reserva', 'prioridad', 'estado',
+                 'codigo_barras', 'dia_limite')
+
+    def __init__(self, id_reserva, isbn_libro, id_usuario, fecha_reserva, prioridad=0):
+        """
+        Inicializa una nueva reserva pendiente.
+
+        Args:
+            id_reserva (str): Identificador único de la reserva.
+            isbn_libro (str): ISBN del libro reservado.
+            id_usuario (str): ID del usuario que reserva.
+            fecha_reserva (str): Fecha de la reserva.
+            prioridad (int): Prioridad en la cola (menor número, antes).
+        """
+        self.id_reserva = id_reserva
+        self.isbn_libro = intern(isbn_libro) if type(isbn_libro) is str else isbn_libro
+        self.id_usuario = intern(id_usuario) if type(id_usuario) is str else id_usuario
+        self.dia_reserva = fecha_a_dia(fecha_reserva)
+        self.prioridad = prioridad
+        self.estado = PENDIENTE
+        self.codigo_barras = None
+        self.dia_limite = None
+
+    @property
+    def fecha_reserva(self):
+        """Fecha de la reserva en formato YYYY-MM-DD"""
+        return dia_a_fecha(self.dia_reserva)
+
+    @property
+    def fecha_limite(self):
+        """Último día para recoger el ejemplar apartado, o None"""
+        return dia_a_fecha(self.dia_limite)
+
+    @property
+    def activa(self):
+        """True si la reserva está pendiente o lista para recoger"""
+        return self.estado in ESTADOS_ACTIVOS
+
+    def __str__(self):
+        """
+        Devuelve una representación en string de la reserva.
+
+        Returns:
+            str: Información formateada de la reserva.
+        """
+        texto = (f"ID: {self.id_reserva}, Libro: {self.isbn_libro}, Usuario: {self.id_usuario}, "
+                 f"Reserva: {self.fecha_reserva}, Estado: {self.estado}")
+        if self.estado == LISTA:
+            texto += f", Ejemplar: {self.codigo_barras}, Recoger hasta: {self.fecha_limite}"
+        return texto
+
+    def to_dict(self):
+        """
+        Convierte el objeto Reserva a un diccionario.
+
+        Returns:
+            dict: Diccionario con todos los atributos de la reserva.
+        """
+        return {
+            'id_reserva': self.id_reserva,
+            'isbn_libro': self.isbn_libro,
+            'id_usuario': self.id_usuario,
+            'fecha_reserva': self.fecha_reserva,
+            'prioridad': self.prioridad,
+            'estado': self.estado,
+            'codigo_barras': self.codigo_barras,
+            'fecha_limite': self.fecha_limite
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Crea una instancia de Reserva a partir de un diccionario.
+
+        Args:
+            data (dict): Diccionario con los datos de la reserva.
+
+        Returns:
+            Reserva: Nueva instancia de la clase Reserva.
+        """
+        reserva = cls(
+            data['id_reserva'],
+            data['isbn_libro'],
+            data['id_usuario'],
+            data['fecha_reserva'],
+            data.get('prioridad') or 0
+        )
+        reserva.estado = data['estado']
+        reserva.codigo_barras = data.get('codigo_barras')
+        reserva.dia_limite = fecha_a_dia(data.get('fecha_limite'))
+        return reserva
+
+
+class ColaReservas:
+    """
+    Reservas activas con una cola de prioridad por libro.
+
+    Cada libro tiene un montículo de sus reservas pendientes con entradas
+    (prioridad, orden de llegada, ID), así que atender la siguiente cuesta
+    O(log n). Las reservas listas para recoger están en otro montículo
+    ordenado por día límite, del que se sacan las vencidas sin recorrer las
+    demás. Cancelar no busca la entrada en el montículo: la reserva sale de
+    los índices y su entrada se descarta al llegar a la cima (y si las
+    entradas descartadas de un libro superan a las vigentes, su montículo
+    se reconstruye).
+
+    Atributos:
+        reservas (dict): ID de reserva -> Reserva activa.
+        colas (dict): ISBN -> montículo de entradas de reservas pendientes.
+        pendientes (dict): ISBN -> reservas pendientes vigentes en su montículo.
+        por_libro (dict): ISBN -> {ID de reserva: Reserva} activas.
+        por_usuario (dict): ID de usuario -> {ID de reserva: Reserva} activas.
+        por_usuario_libro (dict): (ID de usuario, ISBN) -> Reserva activa.
+        recogidas (list): Montículo (día límite, orden, ID) de las reservas listas.
+        total_pendientes (int): Reservas pendientes de todos los libros.
+    """
+
+    def __init__(self):
+        """Inicializa una cola sin reservas."""
+        self.reservas = {}
+        self.colas = {}
+        self.pendientes = {}
+        self.por_libro = {}
+        self.por_usuario = {}
+        self.por_usuario_libro = {}
+        self.recogidas = []
+        self.total_pendientes = 0
+        self.orden = count()
+
+    def __len__(self):
+        """Devuelve el número de reservas activas"""
+        return len(self.reservas)
+
+    def obtener(self, id_reserva):
+        """Devuelve una reserva activa por su ID, o None"""
+        return self.reservas.get(id_reserva)
+
+    def de_usuario_y_libro(self, id_usuario, isbn):
+        """Devuelve la reserva activa de un usuario para un libro, o None"""
+        return self.por_usuario_libro.get((id_usuario, isbn))
+
+    def de_usuario(self, id_usuario):
+        """Devuelve las reservas activas de un usuario, en orden de registro"""
+        return list(self.por_usuario.get(id_usuario, {}).values())
+
+    def de_libro(self, isbn):
+        """
+        Devuelve las reservas activas de un libro en el orden en que se atienden.
+
+        Returns:
+            list: Primero las listas para recoger y luego las pendientes por
+                  prioridad y antigüedad.
+        """
+        activas = self.por_libro.get(isbn, {})
+        listas = [reserva for reserva in activas.values() if reserva.estado == LISTA]
+        vigentes = sorted(entrada for entrada in self.colas.get(isbn, ()) if self._vigente(entrada))
+        return listas + [activas[id_reserva] for _, _, id_reserva in vigentes]
+
+    def contar_pendientes(self, isbn):
+        """Devuelve cuántas reservas de un libro esperan un ejemplar"""
+        return self.pendientes.get(isbn, 0)
+
+    def contar_listas(self):
+        """Devuelve cuántas reservas tienen un ejemplar apartado"""
+        return len(self.reservas) - self.total_pendientes
+
+    def _vigente(self, entrada):
+        """Indica si una entrada de la cola de un libro sigue siendo de una reserva pendiente"""
+        reserva = self.reservas.get(entrada[2])
+        return reserva is not None and reserva.estado == PENDIENTE
+
+    def agregar(self, reserva):
+        """
+        Agrega una reserva activa a los índices y a la cola que le toca.
+
+        Las reservas deben agregarse en orden de llegada: a igual prioridad,
+        se atienden en ese orden.
+
+        Args:
+            reserva (Reserva): Reserva pendiente o lista.
+        """
+        isbn = reserva.isbn_libro
+        self.reservas[reserva.id_reserva] = reserva
+        self.por_libro.setdefault(isbn, {})[reserva.id_reserva] = reserva
+        self.por_usuario.setdefault(reserva.id_usuario, {})[reserva.id_reserva] = reserva
+        self.por_usuario_libro[(reserva.id_usuario, isbn)] = reserva
+        if reserva.estado == PENDIENTE:
+            heapq.heappush(self.colas.setdefault(isbn, []),
+                           (reserva.prioridad, next(self.orden), reserva.id_reserva))
+            self.pendientes[isbn] = self.pendientes.get(isbn, 0) + 1
+            self.total_pendientes += 1
+        elif type(reserva.dia_limite) is int:
+            heapq.heappush(self.recogidas, (reserva.dia_limite, next(self.orden), reserva.id_reserva))
+
+    def apartar_siguiente(self, isbn, codigo_barras, dia_limite):
+        """
+        Aparta un ejemplar para la siguiente reserva pendiente de un libro.
+
+        Args:
+            isbn (str): ISBN del libro.
+            codigo_barras (str): Ejemplar que se aparta.
+            dia_limite (int): Último día para recogerlo (None: sin plazo).
+
+        Returns:
+            Reserva: La reserva que pasa a estar lista, o None si no hay
+                     reservas pendientes del libro.
+        """
+        if not self.pendientes.get(isbn):
+            return None
+        cola = self.colas[isbn]
+        while True:
+            entrada = heapq.heappop(cola)
+            if self._vigente(entrada):
+                break
+        reserva = self.reservas[entrada[2]]
+        self._descontar_pendiente(isbn)
+        reserva.estado = LISTA
+        reserva.codigo_barras = codigo_barras
+        reserva.dia_limite = dia_limite
+        if type(dia_limite) is int:
+            heapq.heappush(self.recogidas, (dia_limite, next(self.orden), reserva.id_reserva))
+        return reserva
+
+    def siguiente_vencida(self, dia):
+        """
+        Devuelve una reserva lista cuyo día límite es anterior a un día.
+
+        La reserva sigue activa hasta que se finaliza; las entradas de
+        reservas ya finalizadas se descartan por el camino.
+
+        Args:
+            dia (int): Número de día de la consulta.
+
+        Returns:
+            Reserva: La reserva lista con el día límite más antiguo, si venció; si no, None.
+        """
+        recogidas = self.recogidas
+        while recogidas and recogidas[0][0] < dia:
+            _, _, id_reserva = heapq.heappop(recogidas)
+            reserva = self.reservas.get(id_reserva)
+            if reserva is not None and reserva.estado == LISTA:
+                return reserva
+        return None
+
+    def finalizar(self, reserva, estado):
+        """
+        Quita una reserva activa de los índices y le asigna un estado final.
+
+        Args:
+            reserva (Reserva): La reserva activa.
+            estado (str): cumplida, cancelada o vencida.
+        """
+        isbn = reserva.isbn_libro
+        del self.reservas[reserva.id_reserva]
+        for indice, clave in ((self.por_libro, isbn), (self.por_usuario, reserva.id_usuario)):
+            grupo = indice[clave]
+            del grupo[reserva.id_reserva]
+            # No conservar entradas vacías
+            if not grupo:
+                del indice[clave]
+        del self.por_usuario_libro[(reserva.id_usuario, isbn)]
+        if reserva.estado == PENDIENTE:
+            # Su entrada queda en el montículo y se descarta al llegar a la cima
+            self._descontar_pendiente(isbn)
+        reserva.estado = estado
+
+    def _descontar_pendiente(self, isbn):
+        """Resta una reserva pendiente de un libro y compacta su montículo si conviene"""
+        vigentes = self.pendientes[isbn] - 1
+        self.total_pendientes -= 1
+        cola = self.colas[isbn]
+        if not vigentes:
+            del self.pendientes[isbn]
+            del self.colas[isbn]
+            return
+        self.pendientes[isbn] = vigentes
+        if len(cola) > 2 * vigentes:
+            cola[:] = [entrada for entrada in cola if self._vigente(entrada)]
+            heapq.heapify(cola)
+
+
+# Bloque de prueba para verificar el funcionamiento de las reservas
+if __name__ == "__main__":
+    print("=== Prueba de las reservas ===")
+
+    cola = ColaReservas()
+    for numero, (usuario, prioridad) in enumerate([("U001", 0), ("U002", 0), ("U003", -1)], 1):
+        cola.agregar(Reserva(f"R{numero:03d}", "978-0142437230", usuario, "2023-10-15", prioridad))
+    print(f"En espera: {[r.id_usuario for r in cola.de_libro('978-0142437230')]} (U003 tiene prioridad)")
+
+    # Se devuelve un ejemplar: lo recibe la primera reserva de la cola
+    dia = fecha_a_dia("2023-10-20")
+    reserva = cola.apartar_siguiente("978-0142437230", "978-0142437230", dia + DIAS_RECOGIDA)
+    print(f"Ejemplar apartado: {reserva}")
+
+    # Cancelar una pendiente no toca el montículo
+    cola.finalizar(cola.obtener("R001"), CANCELADA)
+    print(f"Pendientes tras cancelar R001: {cola.contar_pendientes('978-0142437230')}")
+
+    # Nadie lo recoge: vence y el ejemplar pasa a la siguiente (U002)
+    vencida = cola.siguiente_vencida(dia + DIAS_RECOGIDA + 1)
+    cola.finalizar(vencida, VENCIDA)
+    siguiente = cola.apartar_siguiente("978-0142437230", vencida.codigo_barras, vencida.dia_limite + DIAS_RECOGIDA)
+    print(f"Vencida: {vencida.id_reserva}, nueva lista: {siguiente}")
+    print(f"Desde diccionario: {Reserva.from_dict(siguiente.to_dict())}")
+
+    print("=== Prueba completada ===")
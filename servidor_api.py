@@ -0,0 +1,647 @@
+# servidor_api.py
+# API HTTP/JSON sobre un SistemaBiblioteca compartido, para las terminales de
+# las sucursales y el catálogo web. Usa solo asyncio (sin dependencias): un
+# único bucle de eventos atiende miles de conexiones persistentes (keep-alive)
+# y ejecuta las operaciones del sistema de una en una, sin bloqueos.
+#
+# Uso: python servidor_api.py [--puerto 8080] [--diario carpeta | --base archivo.db]
+import argparse
+import asyncio
+import base64
+import json
+import re
+from itertools import islice
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from main import SistemaBiblioteca
+
+
+class ErrorAPI(Exception):
+    """
+    Error que se devuelve al cliente como respuesta JSON.
+
+    Atributos:
+        estado (int): Código de estado HTTP.
+        mensaje (str): Descripción del error.
+    """
+
+    def __init__(self, estado, mensaje):
+        """
+        Inicializa el error.
+
+        Args:
+            estado (int): Código de estado HTTP.
+            mensaje (str): Descripción del error.
+        """
+        super().__init__(mensaje)
+        self.estado = estado
+        self.mensaje = mensaje
+
+
+def codificar_cursor(valor):
+    """Convierte la posición de una página en un cursor opaco para la URL"""
+    return base64.urlsafe_b64encode(json.dumps(valor).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(cursor):
+    """Recupera la posición guardada en un cursor (ErrorAPI 400 si no es válido)"""
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(cursor + relleno))
+    except ValueError:
+        raise ErrorAPI(400, "Cursor no válido") from None
+
+
+class ServidorAPI:
+    """
+    Servidor HTTP/1.1 con respuestas JSON sobre un SistemaBiblioteca.
+
+    Las operaciones del sistema se ejecutan en el hilo del bucle de eventos,
+    así que nunca hay dos a la vez y el sistema no necesita bloqueos; todas
+    son consultas a índices o actualizaciones puntuales, de modo que cada
+    una dura poco y el bucle sigue atendiendo al resto de conexiones.
+
+    Los listados (libros, usuarios y préstamos) se paginan por cursor: cada
+    respuesta trae {"datos": [...], "siguiente": cursor}, y el cursor se
+    pasa en ?cursor= para pedir la página siguiente. El cursor guarda la
+    clave y el número de inserción del último elemento (o la posición en el
+    historial, que solo crece), así que pedir una página lejana no recorre
+    las anteriores y las altas y bajas entre páginas, incluida la del propio
+    último elemento, no repiten ni saltan elementos.
+
+    Atributos:
+        sistema (SistemaBiblioteca): Sistema compartido por todos los clientes.
+        host (str): Dirección en la que se escucha.
+        puerto (int): Puerto en el que se escucha (0 elige uno libre).
+        rutas (list): Tuplas (método, expresión de la ruta, función).
+        servidor (asyncio.Server): Servidor en marcha, o None.
+    """
+
+    # Elementos por página si el cliente no indica ?limite=, y el máximo admitido
+    LIMITE_POR_DEFECTO = 50
+    LIMITE_MAXIMO = 1000
+    # Segundos que una conexión persistente puede esperar la siguiente petición
+    ESPERA_INACTIVA = 30
+    # Tamaño máximo del cuerpo de una petición, en bytes
+    CUERPO_MAXIMO = 1_000_000
+    # Conexiones pendientes de aceptar que admite el sistema operativo
+    PENDIENTES = 4096
+
+    MOTIVOS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+               405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large",
+               500: "Internal Server Error"}
+
+    def __init__(self, sistema, host="127.0.0.1", puerto=8080):
+        """
+        Inicializa el servidor (no empieza a escuchar hasta iniciar()).
+
+        Args:
+            sistema (SistemaBiblioteca): Sistema a exponer.
+            host (str): Dirección en la que escuchar.
+            puerto (int): Puerto en el que escuchar.
+        """
+        self.sistema = sistema
+        self.host = host
+        self.puerto = puerto
+        self.servidor = None
+        # Las rutas fijas van antes que las que tienen parámetros (/libros/buscar antes que /libros/{isbn})
+        self.rutas = [
+            ("GET", r"/libros", self.listar_libros),
+            ("POST", r"/libros", self.agregar_libro),
+            ("GET", r"/libros/buscar", self.buscar_libros),
+            ("GET", r"/libros/(?P<isbn>[^/]+)", self.obtener_libro),
+            ("POST", r"/libros/(?P<isbn>[^/]+)/ejemplares", self.agregar_ejemplares),
+            ("GET", r"/libros/(?P<isbn>[^/]+)/reservas", self.reservas_de_libro),
+            ("GET", r"/ejemplares/(?P<codigo_barras>[^/]+)", self.obtener_ejemplar),
+            ("GET", r"/usuarios", self.listar_usuarios),
+            ("POST", r"/usuarios", self.agregar_usuario),
+            ("GET", r"/usuarios/buscar", self.buscar_usuarios),
+            ("GET", r"/usuarios/(?P<id_usuario>[^/]+)", self.obtener_usuario),
+            ("GET", r"/usuarios/(?P<id_usuario>[^/]+)/prestamos", self.prestamos_de_usuario),
+            ("GET", r"/usuarios/(?P<id_usuario>[^/]+)/reservas", self.reservas_de_usuario),
+            ("GET", r"/usuarios/(?P<id_usuario>[^/]+)/multas", self.multas_de_usuario),
+            ("POST", r"/usuarios/(?P<id_usuario>[^/]+)/pagos", self.registrar_pago_multa),
+            ("GET", r"/prestamos", self.listar_prestamos),
+            ("POST", r"/prestamos", self.registrar_prestamo),
+            ("POST", r"/prestamos/lote", self.registrar_prestamos_lote),
+            ("POST", r"/prestamos/devoluciones", self.registrar_devoluciones_lote),
+            ("GET", r"/prestamos/vencidos", self.prestamos_vencidos),
+            ("GET", r"/prestamos/por-vencer", self.prestamos_por_vencer),
+            ("GET", r"/prestamos/(?P<id_prestamo>[^/]+)", self.obtener_prestamo),
+            ("POST", r"/prestamos/(?P<id_prestamo>[^/]+)/devolucion", self.registrar_devolucion),
+            ("POST", r"/reservas", self.reservar_libro),
+            ("POST", r"/reservas/vencidas", self.procesar_reservas_vencidas),
+            ("GET", r"/reservas/(?P<id_reserva>[^/]+)", self.obtener_reserva),
+            ("POST", r"/reservas/(?P<id_reserva>[^/]+)/cancelacion", self.cancelar_reserva),
+            ("GET", r"/reportes/estadisticas", self.estadisticas),
+            ("GET", r"/reportes/generos", self.prestamos_por_genero),
+            ("GET", r"/reportes/libros", self.libros_mas_prestados),
+            ("GET", r"/reportes/usuarios", self.usuarios_mas_activos),
+            ("GET", r"/reportes/duracion", self.duracion_promedio),
+            ("GET", r"/reportes/multas", self.usuarios_con_mas_multas),
+        ]
+        self.rutas = [(metodo, re.compile(ruta + "$"), funcion) for metodo, ruta, funcion in self.rutas]
+
+    # ===== CONEXIONES =====
+
+    async def iniciar(self):
+        """Empieza a aceptar conexiones y devuelve el puerto en el que escucha"""
+        self.servidor = await asyncio.start_server(self._atender_conexion, self.host, self.puerto,
+                                                   backlog=self.PENDIENTES)
+        self.puerto = self.servidor.sockets[0].getsockname()[1]
+        return self.puerto
+
+    async def servir(self):
+        """Inicia el servidor (si hace falta) y atiende conexiones hasta que se cancele"""
+        if self.servidor is None:
+            await self.iniciar()
+        async with self.servidor:
+            await self.servidor.serve_forever()
+
+    async def cerrar(self):
+        """Deja de aceptar conexiones nuevas"""
+        if self.servidor is not None:
+            self.servidor.close()
+            await self.servidor.wait_closed()
+            self.servidor = None
+
+    async def _atender_conexion(self, lector, escritor):
+        """Atiende las peticiones de una conexión hasta que el cliente la cierre o quede inactiva"""
+        try:
+            while True:
+                try:
+                    peticion = await asyncio.wait_for(self._leer_peticion(lector), self.ESPERA_INACTIVA)
+                except ErrorAPI as error:
+                    # Petición mal formada: se responde y se cierra, el flujo ya no es fiable
+                    escritor.write(self._respuesta(error.estado, {"error": error.mensaje}, False))
+                    await escritor.drain()
+                    break
+                if peticion is None:
+                    break
+                metodo, objetivo, version, cabeceras, cuerpo = peticion
+                conexion = cabeceras.get("connection", "").lower()
+                persistente = conexion != "close" if version == "HTTP/1.1" else conexion == "keep-alive"
+                estado, datos = self.despachar(metodo, objetivo, cuerpo)
+                escritor.write(self._respuesta(estado, datos, persistente))
+                await escritor.drain()
+                if not persistente:
+                    break
+        except (asyncio.TimeoutError, ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            escritor.close()
+
+    async def _leer_peticion(self, lector):
+        """
+        Lee una petición HTTP completa.
+
+        Returns:
+            tuple: (método, objetivo, versión, cabeceras, cuerpo), o None si
+                   el cliente cerró la conexión entre peticiones.
+        """
+        try:
+            encabezado = await lector.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError as error:
+            if not error.partial.strip():
+                return None
+            raise ErrorAPI(400, "Petición incompleta") from None
+        except asyncio.LimitOverrunError:
+            raise ErrorAPI(400, "Cabeceras demasiado largas") from None
+        lineas = encabezado.decode("latin-1").split("\r\n")
+        partes = lineas[0].split(" ")
+        if len(partes) != 3 or not partes[2].startswith("HTTP/"):
+            raise ErrorAPI(400, "Línea de petición no válida")
+        metodo, objetivo, version = partes
+        cabeceras = {}
+        for linea in lineas[1:]:
+            if linea:
+                nombre, _, valor = linea.partition(":")
+                cabeceras[nombre.strip().lower()] = valor.strip()
+        try:
+            longitud = int(cabeceras.get("content-length", 0))
+        except ValueError:
+            raise ErrorAPI(400, "Content-Length no válido") from None
+        if longitud > self.CUERPO_MAXIMO:
+            raise ErrorAPI(413, "Cuerpo demasiado grande")
+        cuerpo = await lector.readexactly(longitud) if longitud > 0 else b""
+        return metodo, objetivo, version, cabeceras, cuerpo
+
+    def _respuesta(self, estado, datos, persistente):
+        """Codifica una respuesta HTTP con cuerpo JSON"""
+        cuerpo = json.dumps(datos, ensure_ascii=False).encode("utf-8")
+        cabecera = (f"HTTP/1.1 {estado} {self.MOTIVOS.get(estado, '')}\r\n"
+                    "Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(cuerpo)}\r\n"
+                    f"Connection: {'keep-alive' if persistente else 'close'}\r\n\r\n")
+        return cabecera.encode("latin-1") + cuerpo
+
+    # ===== DESPACHO =====
+
+    def despachar(self, metodo, objetivo, cuerpo=b""):
+        """
+        Resuelve una petición y devuelve su respuesta.
+
+        Args:
+            metodo (str): Método HTTP (GET, POST).
+            objetivo (str): Ruta con la cadena de consulta.
+            cuerpo (bytes): Cuerpo de la petición (JSON en los POST).
+
+        Returns:
+            tuple: (código de estado, datos a codificar en JSON).
+        """
+        url = urlsplit(objetivo)
+        ruta = unquote(url.path).rstrip("/") or "/"
+        consulta = {clave: valores[-1] for clave, valores in parse_qs(url.query).items()}
+        ruta_encontrada = False
+        for metodo_ruta, expresion, funcion in self.rutas:
+            coincidencia = expresion.match(ruta)
+            if coincidencia is None:
+                continue
+            ruta_encontrada = True
+            if metodo_ruta != metodo:
+                continue
+            try:
+                datos = self._leer_json(cuerpo) if metodo == "POST" else None
+                return funcion(consulta, datos, **coincidencia.groupdict())
+            except ErrorAPI as error:
+                return error.estado, {"error": error.mensaje}
+            except Exception as error:
+                return 500, {"error": f"Error interno: {error}"}
+        if ruta_encontrada:
+            return 405, {"error": "Método no permitido"}
+        return 404, {"error": "Ruta no encontrada"}
+
+    @staticmethod
+    def _leer_json(cuerpo):
+        """Decodifica el cuerpo JSON de una petición (debe ser un objeto)"""
+        try:
+            datos = json.loads(cuerpo or b"{}")
+        except ValueError:
+            raise ErrorAPI(400, "El cuerpo no es JSON válido") from None
+        if not isinstance(datos, dict):
+            raise ErrorAPI(400, "El cuerpo debe ser un objeto JSON")
+        return datos
+
+    def _limite(self, consulta):
+        """Lee ?limite= y lo acota a LIMITE_MAXIMO"""
+        try:
+            limite = int(consulta.get("limite", self.LIMITE_POR_DEFECTO))
+        except ValueError:
+            raise ErrorAPI(400, "El límite debe ser un número entero") from None
+        if limite < 1:
+            raise ErrorAPI(400, "El límite debe ser mayor que cero")
+        return min(limite, self.LIMITE_MAXIMO)
+
+    @staticmethod
+    def _campos(datos, *nombres):
+        """Devuelve los campos obligatorios de un cuerpo JSON (ErrorAPI 400 si falta alguno)"""
+        faltan = [nombre for nombre in nombres if nombre not in datos]
+        if faltan:
+            raise ErrorAPI(400, f"Faltan campos: {', '.join(faltan)}")
+        return [datos[nombre] for nombre in nombres]
+
+    @staticmethod
+    def _resultado(exito, mensaje, estado_exito=200, datos=None):
+        """Convierte el (bool, str) de las operaciones del sistema en una respuesta"""
+        if not exito:
+            # "no encontrado" se distingue de los conflictos (duplicado, no disponible...)
+            return (404 if "no encontrad" in mensaje.lower() else 409), {"error": mensaje}
+        respuesta = {"mensaje": mensaje}
+        if datos is not None:
+            respuesta["dato"] = datos
+        return estado_exito, respuesta
+
+    def _pagina_por_clave(self, consulta, iterar, clave):
+        """Pagina un recorrido numerado que puede empezar tras una clave (libros, usuarios)"""
+        limite = self._limite(consulta)
+        despues_de = numero = None
+        if "cursor" in consulta:
+            # [clave, número de inserción] del último elemento de la página anterior
+            posicion = decodificar_cursor(consulta["cursor"])
+            if (type(posicion) is not list or len(posicion) != 2
+                    or type(posicion[0]) is not str or type(posicion[1]) is not int):
+                raise ErrorAPI(400, "Cursor no válido")
+            despues_de, numero = posicion
+        # Uno más del límite para saber si hay página siguiente
+        pagina = list(islice(iterar(despues_de, numero), limite + 1))
+        siguiente = None
+        if len(pagina) > limite:
+            numero, ultimo = pagina[limite - 1]
+            siguiente = codificar_cursor([clave(ultimo), numero])
+        return 200, {"datos": [dato.to_dict() for _, dato in pagina[:limite]], "siguiente": siguiente}
+
+    # ===== LIBROS =====
+
+    def listar_libros(self, consulta, datos):
+        """GET /libros?limite=&cursor="""
+        return self._pagina_por_clave(consulta, self.sistema.iterar_libros_numerados, lambda libro: libro.isbn)
+
+    def agregar_libro(self, consulta, datos):
+        """POST /libros {isbn, titulo, autor, año_publicacion, genero, ejemplares?}"""
+        campos = self._campos(datos, "isbn", "titulo", "autor", "año_publicacion", "genero")
+        ejemplares = self._ejemplares(datos.get("ejemplares", 1))
+        exito, mensaje = self.sistema.agregar_libro(*campos, ejemplares)
+        libro = self.sistema.buscar_libro_por_isbn(campos[0]) if exito else None
+        return self._resultado(exito, mensaje, 201, libro and libro.to_dict())
+
+    def agregar_ejemplares(self, consulta, datos, isbn):
+        """POST /libros/{isbn}/ejemplares {ejemplares}: número de ejemplares o lista de códigos"""
+        (ejemplares,) = self._campos(datos, "ejemplares")
+        exito, mensaje = self.sistema.agregar_ejemplares(isbn, self._ejemplares(ejemplares))
+        libro = self.sistema.buscar_libro_por_isbn(isbn) if exito else None
+        return self._resultado(exito, mensaje, 201, libro and libro.to_dict())
+
+    def _ejemplares(self, valor):
+        """Valida el campo ejemplares: un entero o una lista de códigos (ErrorAPI 400 si no)"""
+        if type(valor) is not int:
+            self._validar_lista(valor, "ejemplares")
+        return valor
+
+    def obtener_ejemplar(self, consulta, datos, codigo_barras):
+        """GET /ejemplares/{codigo}: libro del ejemplar y su préstamo activo, si lo tiene"""
+        libro = self.sistema.buscar_libro_por_ejemplar(codigo_barras)
+        if libro is None:
+            raise ErrorAPI(404, "Ejemplar no encontrado")
+        prestamo = next((prestamo for prestamo in self.sistema.obtener_prestamos_activos_por_libro(libro.isbn)
+                         if prestamo.codigo_barras == codigo_barras), None)
+        return 200, {"codigo_barras": codigo_barras, "isbn": libro.isbn,
+                     "prestamo": prestamo and prestamo.to_dict()}
+
+    def buscar_libros(self, consulta, datos):
+        """GET /libros/buscar?q=&limite=&aproximado=1"""
+        texto = consulta.get("q", "")
+        limite = self._limite(consulta)
+        if consulta.get("aproximado") in ("1", "true", "si"):
+            libros = self.sistema.buscar_libros_aproximado(texto, limite)
+        else:
+            libros = self.sistema.buscar_libros(texto, limite)
+        return 200, {"datos": [libro.to_dict() for libro in libros]}
+
+    def obtener_libro(self, consulta, datos, isbn):
+        """GET /libros/{isbn}"""
+        libro = self.sistema.buscar_libro_por_isbn(isbn)
+        if libro is None:
+            raise ErrorAPI(404, "Libro no encontrado")
+        return 200, libro.to_dict()
+
+    # ===== USUARIOS =====
+
+    def listar_usuarios(self, consulta, datos):
+        """GET /usuarios?limite=&cursor="""
+        return self._pagina_por_clave(consulta, self.sistema.iterar_usuarios_numerados, lambda usuario: usuario.id_usuario)
+
+    def agregar_usuario(self, consulta, datos):
+        """POST /usuarios {id_usuario, nombre, contacto}"""
+        campos = self._campos(datos, "id_usuario", "nombre", "contacto")
+        exito, mensaje = self.sistema.agregar_usuario(*campos)
+        usuario = self.sistema.buscar_usuario_por_id(campos[0]) if exito else None
+        return self._resultado(exito, mensaje, 201, usuario and usuario.to_dict())
+
+    def buscar_usuarios(self, consulta, datos):
+        """GET /usuarios/buscar?q=&limite=&aproximado=1"""
+        texto = consulta.get("q", "")
+        limite = self._limite(consulta)
+        if consulta.get("aproximado") in ("1", "true", "si"):
+            usuarios = self.sistema.buscar_usuarios_aproximado(texto, limite)
+        else:
+            usuarios = self.sistema.buscar_usuarios_por_nombre(texto)[:limite]
+        return 200, {"datos": [usuario.to_dict() for usuario in usuarios]}
+
+    def obtener_usuario(self, consulta, datos, id_usuario):
+        """GET /usuarios/{id}"""
+        usuario = self.sistema.buscar_usuario_por_id(id_usuario)
+        if usuario is None:
+            raise ErrorAPI(404, "Usuario no encontrado")
+        return 200, usuario.to_dict()
+
+    def prestamos_de_usuario(self, consulta, datos, id_usuario):
+        """GET /usuarios/{id}/prestamos (préstamos activos)"""
+        if self.sistema.buscar_usuario_por_id(id_usuario) is None:
+            raise ErrorAPI(404, "Usuario no encontrado")
+        prestamos = self.sistema.obtener_prestamos_activos_por_usuario(id_usuario)
+        return 200, {"datos": [prestamo.to_dict() for prestamo in prestamos]}
+
+    # ===== PRÉSTAMOS =====
+
+    def listar_prestamos(self, consulta, datos):
+        """GET /prestamos?limite=&cursor= (historial completo en orden de registro)"""
+        limite = self._limite(consulta)
+        inicio = decodificar_cursor(consulta["cursor"]) if "cursor" in consulta else 0
+        if type(inicio) is not int or inicio < 0:
+            raise ErrorAPI(400, "Cursor no válido")
+        # El historial solo crece: la posición sirve de cursor
+        pagina = [prestamo.to_dict() for prestamo in self.sistema.iterar_prestamos(inicio, limite)]
+        fin = inicio + len(pagina)
+        siguiente = codificar_cursor(fin) if fin < self.sistema.contar_prestamos() else None
+        return 200, {"datos": pagina, "siguiente": siguiente}
+
+    def registrar_prestamo(self, consulta, datos):
+        """POST /prestamos {isbn_libro, id_usuario, fecha_prestamo, codigo_barras?}"""
+        isbn, id_usuario, fecha = self._campos(datos, "isbn_libro", "id_usuario", "fecha_prestamo")
+        exito, mensaje = self.sistema.registrar_prestamo(isbn, id_usuario, fecha, datos.get("codigo_barras"))
+        prestamos = self._prestamos_registrados(mensaje) if exito else None
+        return self._resultado(exito, mensaje, 201, prestamos and prestamos[0])
+
+    def registrar_prestamos_lote(self, consulta, datos):
+        """POST /prestamos/lote {isbns, id_usuario, fecha_prestamo}: todos o ninguno"""
+        isbns, id_usuario, fecha = self._campos(datos, "isbns", "id_usuario", "fecha_prestamo")
+        self._validar_lista(isbns, "isbns")
+        exito, mensaje = self.sistema.registrar_prestamos_lote(isbns, id_usuario, fecha)
+        prestamos = self._prestamos_registrados(mensaje) if exito else None
+        return self._resultado(exito, mensaje, 201, prestamos)
+
+    def _prestamos_registrados(self, mensaje):
+        """Devuelve los préstamos cuyos IDs cierran el mensaje de éxito ("... ID: P001" o "... IDs: P001, P002")"""
+        ids = mensaje.rsplit(": ", 1)[1].split(", ")
+        return [self.sistema.buscar_prestamo_por_id(id_prestamo).to_dict() for id_prestamo in ids]
+
+    @staticmethod
+    def _validar_lista(valor, nombre):
+        """Comprueba que un campo sea una lista de textos (ErrorAPI 400 si no)"""
+        if not isinstance(valor, list) or not all(isinstance(elemento, str) for elemento in valor):
+            raise ErrorAPI(400, f"El campo {nombre} debe ser una lista de textos")
+
+    def prestamos_vencidos(self, consulta, datos):
+        """GET /prestamos/vencidos?fecha=&limite="""
+        try:
+            prestamos = self.sistema.prestamos_vencidos(consulta.get("fecha"))
+        except ValueError as error:
+            raise ErrorAPI(400, str(error)) from None
+        limite = self._limite(consulta)
+        return 200, {"datos": [prestamo.to_dict() for prestamo in prestamos[:limite]], "total": len(prestamos)}
+
+    def prestamos_por_vencer(self, consulta, datos):
+        """GET /prestamos/por-vencer?dias=&fecha="""
+        try:
+            dias = int(consulta.get("dias", 7))
+            prestamos = self.sistema.prestamos_por_vencer(dias, consulta.get("fecha"))
+        except ValueError as error:
+            raise ErrorAPI(400, str(error)) from None
+        limite = self._limite(consulta)
+        return 200, {"datos": [prestamo.to_dict() for prestamo in prestamos[:limite]], "total": len(prestamos)}
+
+    def obtener_prestamo(self, consulta, datos, id_prestamo):
+        """GET /prestamos/{id}"""
+        prestamo = self.sistema.buscar_prestamo_por_id(id_prestamo)
+        if prestamo is None:
+            raise ErrorAPI(404, "Préstamo no encontrado")
+        respuesta = prestamo.to_dict()
+        if prestamo.activo:
+            respuesta["fecha_limite"] = self.sistema.fecha_limite(id_prestamo)
+        return 200, respuesta
+
+    def registrar_devolucion(self, consulta, datos, id_prestamo):
+        """POST /prestamos/{id}/devolucion {fecha_devolucion}"""
+        (fecha,) = self._campos(datos, "fecha_devolucion")
+        exito, mensaje = self.sistema.registrar_devolucion(id_prestamo, fecha)
+        return self._resultado(exito, mensaje)
+
+    def registrar_devoluciones_lote(self, consulta, datos):
+        """POST /prestamos/devoluciones {ids_prestamo, fecha_devolucion}: todas o ninguna"""
+        ids, fecha = self._campos(datos, "ids_prestamo", "fecha_devolucion")
+        self._validar_lista(ids, "ids_prestamo")
+        exito, mensaje = self.sistema.registrar_devoluciones_lote(ids, fecha)
+        return self._resultado(exito, mensaje)
+
+    # ===== RESERVAS =====
+
+    def reservar_libro(self, consulta, datos):
+        """POST /reservas {isbn_libro, id_usuario, fecha_reserva, prioridad?}"""
+        isbn, id_usuario, fecha = self._campos(datos, "isbn_libro", "id_usuario", "fecha_reserva")
+        prioridad = datos.get("prioridad", 0)
+        if type(prioridad) is not int:
+            raise ErrorAPI(400, "La prioridad debe ser un número entero")
+        exito, mensaje = self.sistema.reservar_libro(isbn, id_usuario, fecha, prioridad)
+        reserva = self.sistema.buscar_reserva_por_id(mensaje.rsplit(": ", 1)[1]) if exito else None
+        return self._resultado(exito, mensaje, 201, reserva and reserva.to_dict())
+
+    def obtener_reserva(self, consulta, datos, id_reserva):
+        """GET /reservas/{id} (reservas pendientes o listas para recoger)"""
+        reserva = self.sistema.buscar_reserva_por_id(id_reserva)
+        if reserva is None:
+            raise ErrorAPI(404, "Reserva no encontrada o ya finalizada")
+        return 200, reserva.to_dict()
+
+    def cancelar_reserva(self, consulta, datos, id_reserva):
+        """POST /reservas/{id}/cancelacion {fecha?}"""
+        exito, mensaje = self.sistema.cancelar_reserva(id_reserva, datos.get("fecha"))
+        return self._resultado(exito, mensaje)
+
+    def procesar_reservas_vencidas(self, consulta, datos):
+        """POST /reservas/vencidas {fecha?}: vence las reservas no recogidas a tiempo"""
+        exito, mensaje = self.sistema.procesar_reservas_vencidas(datos.get("fecha"))
+        if not exito:
+            raise ErrorAPI(400, mensaje)
+        return self._resultado(exito, mensaje)
+
+    def reservas_de_libro(self, consulta, datos, isbn):
+        """GET /libros/{isbn}/reservas (en el orden en que se atienden)"""
+        if self.sistema.buscar_libro_por_isbn(isbn) is None:
+            raise ErrorAPI(404, "Libro no encontrado")
+        reservas = self.sistema.obtener_reservas_por_libro(isbn)
+        return 200, {"datos": [reserva.to_dict() for reserva in reservas]}
+
+    def reservas_de_usuario(self, consulta, datos, id_usuario):
+        """GET /usuarios/{id}/reservas (reservas activas)"""
+        if self.sistema.buscar_usuario_por_id(id_usuario) is None:
+            raise ErrorAPI(404, "Usuario no encontrado")
+        reservas = self.sistema.obtener_reservas_por_usuario(id_usuario)
+        return 200, {"datos": [reserva.to_dict() for reserva in reservas]}
+
+    # ===== MULTAS =====
+    # El cálculo por lotes (procesar_multas) recorre el historial: se ejecuta
+    # como proceso nocturno (python multas.py), no desde el bucle de la API
+
+    def multas_de_usuario(self, consulta, datos, id_usuario):
+        """GET /usuarios/{id}/multas (céntimos, a la fecha del último cálculo)"""
+        if self.sistema.buscar_usuario_por_id(id_usuario) is None:
+            raise ErrorAPI(404, "Usuario no encontrado")
+        return 200, self.sistema.saldo_multas(id_usuario)
+
+    def registrar_pago_multa(self, consulta, datos, id_usuario):
+        """POST /usuarios/{id}/pagos {importe} (céntimos)"""
+        importe, = self._campos(datos, "importe")
+        if type(importe) is not int:
+            raise ErrorAPI(400, "El importe debe ser un número entero de céntimos")
+        exito, mensaje = self.sistema.registrar_pago_multa(id_usuario, importe)
+        return self._resultado(exito, mensaje, datos=self.sistema.saldo_multas(id_usuario) if exito else None)
+
+    # ===== REPORTES =====
+
+    def estadisticas(self, consulta, datos):
+        """GET /reportes/estadisticas?fecha="""
+        try:
+            return 200, self.sistema.estadisticas(consulta.get("fecha"))
+        except ValueError as error:
+            raise ErrorAPI(400, str(error)) from None
+
+    def prestamos_por_genero(self, consulta, datos):
+        """GET /reportes/generos"""
+        # JSON no admite claves None: los libros fuera del catálogo van aparte
+        por_genero = self.sistema.prestamos_por_genero()
+        fuera = por_genero.pop(None, 0)
+        return 200, {"datos": por_genero, "fuera_del_catalogo": fuera}
+
+    def libros_mas_prestados(self, consulta, datos):
+        """GET /reportes/libros?limite="""
+        pares = self.sistema.libros_mas_prestados(self._limite(consulta))
+        return 200, {"datos": [{"isbn": isbn, "prestamos": total} for isbn, total in pares]}
+
+    def usuarios_mas_activos(self, consulta, datos):
+        """GET /reportes/usuarios?limite="""
+        pares = self.sistema.usuarios_mas_activos(self._limite(consulta))
+        return 200, {"datos": [{"id_usuario": id_usuario, "prestamos": total} for id_usuario, total in pares]}
+
+    def duracion_promedio(self, consulta, datos):
+        """GET /reportes/duracion"""
+        reportes = self.sistema.obtener_reportes()
+        return 200, {"duracion_promedio": self.sistema.duracion_promedio_prestamos(),
+                     "devoluciones": reportes.devoluciones}
+
+    def usuarios_con_mas_multas(self, consulta, datos):
+        """GET /reportes/multas?limite= (céntimos)"""
+        pares = self.sistema.usuarios_con_mas_multas(self._limite(consulta))
+        return 200, {"datos": [{"id_usuario": id_usuario, "multas": total} for id_usuario, total in pares]}
+
+
+def crear_sistema(diario=None, base=None, datos_ejemplo=True):
+    """Crea el sistema a exponer, con almacenamiento si se indica"""
+    almacenamiento = None
+    if diario:
+        from persistencia import AlmacenamientoDiario
+        almacenamiento = AlmacenamientoDiario(diario)
+    elif base:
+        from persistencia import AlmacenamientoSQLite
+        almacenamiento = AlmacenamientoSQLite(base)
+    return SistemaBiblioteca(almacenamiento, datos_ejemplo=datos_ejemplo)
+
+
+def main(argumentos=None):
+    """Arranca el servidor desde la línea de comandos"""
+    parser = argparse.ArgumentParser(description="API HTTP/JSON del sistema de biblioteca")
+    parser.add_argument("--host", default="127.0.0.1", help="Dirección en la que escuchar")
+    parser.add_argument("--puerto", type=int, default=8080, help="Puerto en el que escuchar")
+    grupo = parser.add_mutually_exclusive_group()
+    grupo.add_argument("--diario", help="Carpeta del diario de archivos")
+    grupo.add_argument("--base", help="Archivo de base de datos SQLite")
+    parser.add_argument("--sin-ejemplos", action="store_true", help="No cargar los datos de ejemplo")
+    opciones = parser.parse_args(argumentos)
+
+    sistema = crear_sistema(opciones.diario, opciones.base, not opciones.sin_ejemplos)
+    servidor = ServidorAPI(sistema, opciones.host, opciones.puerto)
+
+    async def arrancar():
+        puerto = await servidor.iniciar()
+        print(f"API escuchando en http://{opciones.host}:{puerto}", flush=True)
+        await servidor.servir()
+
+    try:
+        asyncio.run(arrancar())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sistema.cerrar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,640 @@
+# tabla_virtual.py
+# Tabla virtualizada sobre ttk.Treeview: solo crea las filas visibles, así que
+# mostrar o refrescar un millón de registros cuesta lo mismo que mostrar veinte.
+import tkinter as tk
+from collections import OrderedDict
+from itertools import islice
+from tkinter import ttk
+
+
+# ===== FUENTES DE DATOS =====
+
+class FuenteDatos:
+    """
+    Interfaz de una fuente de filas para TablaVirtual.
+
+    Las fuentes solo convierten a filas los registros que la tabla pide, por
+    bloques, así que pueden envolver colecciones de cualquier tamaño. Cada
+    fuente tiene un atributo "convertir" (registro -> tupla de valores).
+    """
+
+    def __len__(self):
+        """
+        Devuelve el número total de filas.
+
+        Returns:
+            int: Cantidad de filas de la fuente.
+        """
+        raise NotImplementedError
+
+    def filas(self, inicio, fin):
+        """
+        Devuelve las filas en el rango [inicio, fin).
+
+        Args:
+            inicio (int): Índice de la primera fila.
+            fin (int): Índice siguiente a la última fila.
+
+        Returns:
+            list: Tuplas con los valores de cada columna.
+        """
+        raise NotImplementedError
+
+    def agregar(self, dato):
+        """
+        Registra un dato agregado al final del origen.
+
+        Args:
+            dato: El registro agregado.
+
+        Returns:
+            int: Índice de la nueva fila, o None si la fuente no lo muestra.
+        """
+        return None
+
+    def eliminar(self, dato, indice=None):
+        """
+        Registra un dato eliminado del origen.
+
+        Args:
+            dato: El registro eliminado.
+            indice (int, optional): Posición de su fila, si se conoce (la
+                                    tabla la toma de sus posiciones); evita
+                                    buscarla entre las filas leídas.
+
+        Returns:
+            int: Índice que ocupaba la fila (las siguientes se desplazan), o
+                 None si no cambia ninguna de las filas ya leídas.
+        """
+        return None
+
+
+class FuenteLista(FuenteDatos):
+    """
+    Fuente sobre una secuencia con acceso por índice (lista, tupla).
+
+    Atributos:
+        datos: La secuencia de registros.
+        convertir: Función que transforma un registro en una tupla de valores.
+    """
+
+    def __init__(self, datos, convertir):
+        """
+        Inicializa la fuente.
+
+        Args:
+            datos: Secuencia de registros.
+            convertir: Función registro -> tupla de valores.
+        """
+        self.datos = datos
+        self.convertir = convertir
+
+    def __len__(self):
+        """Devuelve el número de registros"""
+        return len(self.datos)
+
+    def filas(self, inicio, fin):
+        """Convierte los registros del rango pedido"""
+        return [self.convertir(dato) for dato in self.datos[inicio:fin]]
+
+    def extender(self, datos):
+        """Añade registros al final (resultados parciales de una consulta)"""
+        if not isinstance(self.datos, list):
+            self.datos = list(self.datos)
+        self.datos.extend(datos)
+
+    def eliminar(self, dato, indice=None):
+        """Quita el dato de la lista si estaba en ella"""
+        # Los resultados de una búsqueda no incluyen registros nuevos: agregar() no se redefine
+        if indice is None or indice >= len(self.datos) or self.datos[indice] is not dato:
+            try:
+                indice = self.datos.index(dato)
+            except ValueError:
+                return None
+        del self.datos[indice]
+        return indice
+
+
+class FuenteIterable(FuenteDatos):
+    """
+    Fuente perezosa sobre un iterable sin acceso por índice (p. ej. una lista enlazada).
+
+    Los registros se extraen del iterador solo cuando la tabla llega a ellos
+    y se guardan las referencias, para poder volver atrás sin recorrer de
+    nuevo. Abrir la tabla cuesta lo mismo con diez registros que con un
+    millón. Si además se indica cómo recorrerla en orden inverso, las filas
+    más cercanas al final que a lo ya leído se piden desde el último
+    registro, así que saltar al final tampoco recorre la colección.
+
+    Atributos:
+        total (int): Número de registros esperado (p. ej. len() de la colección).
+        convertir: Función que transforma un registro en una tupla de valores.
+        cargados (list): Registros ya extraídos del iterador, desde el primero.
+        finales (list): Registros extraídos del iterador inverso, desde el último.
+    """
+
+    def __init__(self, iterable, total, convertir, inverso=None):
+        """
+        Inicializa la fuente.
+
+        Args:
+            iterable: Iterable de registros.
+            total (int): Número de registros del iterable.
+            convertir: Función registro -> tupla de valores.
+            inverso (optional): Función sin argumentos que devuelve un iterador
+                                sobre los mismos registros, del último al primero.
+        """
+        self.iterador = iter(iterable)
+        self.recorrer_inverso = inverso
+        self.inverso = None
+        self.total = total
+        self.convertir = convertir
+        self.cargados = []
+        self.finales = []
+
+    def __len__(self):
+        """Devuelve el número de registros"""
+        return self.total
+
+    def filas(self, inicio, fin):
+        """Extrae de los iteradores lo que falte y convierte el rango pedido"""
+        fin = min(fin, self.total)
+        cargados = self.cargados
+        finales = self.finales
+        # Índice de la primera fila ya leída desde el final
+        frontera = self.total - len(finales)
+        if fin > len(cargados) and inicio < frontera:
+            if self.recorrer_inverso is not None and inicio - len(cargados) > self.total - fin:
+                # Más cerca del final que de lo leído: se lee hacia atrás
+                if self.inverso is None:
+                    # Tras un cambio se vuelve a empezar desde el último, saltando lo ya leído
+                    self.inverso = islice(self.recorrer_inverso(), len(finales), None)
+                faltan = frontera - inicio
+                finales.extend(islice(self.inverso, faltan))
+                if len(finales) < self.total - inicio:
+                    # Se llegó al primer registro: el inverso ya lo contiene todo
+                    self._unir(recorrido=True)
+            else:
+                faltan = min(fin, frontera) - len(cargados)
+                cargados.extend(islice(self.iterador, faltan))
+                if len(cargados) < min(fin, frontera):
+                    # El iterable tenía menos registros de los esperados
+                    self.total = len(cargados) + len(finales)
+            if len(self.cargados) + len(self.finales) >= self.total:
+                self._unir()
+        fin = min(fin, self.total)
+        return [self.convertir(dato) for dato in self._registros(inicio, fin)]
+
+    def _registros(self, inicio, fin):
+        """Devuelve los registros ya leídos del rango [inicio, fin)"""
+        leidos = len(self.cargados)
+        registros = self.cargados[inicio:fin]
+        if fin > leidos:
+            # El resto está en finales, que va del último hacia atrás
+            ultimo = self.total - 1
+            registros.extend(self.finales[ultimo - indice] for indice in range(max(inicio, leidos), fin))
+        return registros
+
+    def _unir(self, recorrido=False):
+        """Pasa a cargados los registros leídos desde el final cuando ya no queda hueco"""
+        if recorrido:
+            # El inverso llegó al primero: tiene toda la colección
+            self.cargados = self.finales[::-1]
+            self.total = len(self.cargados)
+        else:
+            self.cargados.extend(reversed(self.finales))
+        self.finales = []
+        # Todo está leído: los registros nuevos se agregan a mano (ver agregar)
+        self.iterador = iter(())
+        self.recorrer_inverso = None
+
+    def agregar(self, dato):
+        """Cuenta un dato agregado al final de la colección"""
+        # El iterador inverso empezó antes del cambio: se recreará al necesitarlo
+        self.inverso = None
+        if self.finales:
+            # Ya se leyó el final: el nuevo registro pasa a ser el último
+            self.finales.insert(0, dato)
+        elif len(self.cargados) >= self.total:
+            # Todo estaba leído: se agrega a mano y el iterador no debe entregarlo otra vez
+            self.iterador = iter(())
+            self.cargados.append(dato)
+        # Si no, el iterador lo entregará al llegar al final de la colección
+        self.total += 1
+        return self.total - 1
+
+    def _registro(self, indice):
+        """Devuelve el registro ya leído de un índice, o None"""
+        if 0 <= indice < len(self.cargados):
+            return self.cargados[indice]
+        posicion = self.total - 1 - indice
+        if 0 <= posicion < len(self.finales):
+            return self.finales[posicion]
+        return None
+
+    def _posicion(self, dato):
+        """Busca entre los registros leídos el índice de uno, o None"""
+        try:
+            return self.cargados.index(dato)
+        except ValueError:
+            pass
+        try:
+            return self.total - 1 - self.finales.index(dato)
+        except ValueError:
+            return None
+
+    def eliminar(self, dato, indice=None):
+        """Quita un dato de las referencias leídas y del total"""
+        self.inverso = None
+        if indice is None or self._registro(indice) is not dato:
+            # Fila fuera del búfer de la tabla: se busca entre las leídas
+            indice = self._posicion(dato)
+        if indice is None:
+            if len(self.cargados) + len(self.finales) < self.total:
+                # Aún no leído: los iteradores ya no lo entregarán
+                self.total -= 1
+                # Las filas leídas desde el final se desplazan una posición
+                return len(self.cargados) if self.finales else None
+            return None
+        if indice < len(self.cargados):
+            del self.cargados[indice]
+        else:
+            del self.finales[self.total - 1 - indice]
+        self.total -= 1
+        return indice
+
+
+class FuentePaginada(FuenteDatos):
+    """
+    Fuente que lee cada rango directamente de su origen (p. ej. una base de datos).
+
+    Atributos:
+        contar: Función sin argumentos que devuelve el número de registros.
+        leer: Función (inicio, cantidad) -> iterable de registros de ese rango.
+        convertir: Función que transforma un registro en una tupla de valores.
+    """
+
+    def __init__(self, contar, leer, convertir):
+        """
+        Inicializa la fuente.
+
+        Args:
+            contar: Función que devuelve el número total de registros.
+            leer: Función (inicio, cantidad) que devuelve los registros del rango.
+            convertir: Función registro -> tupla de valores.
+        """
+        self.contar = contar
+        self.leer = leer
+        self.convertir = convertir
+        self.total = contar()
+
+    def __len__(self):
+        """Devuelve el número de registros contado al crear la fuente"""
+        return self.total
+
+    def filas(self, inicio, fin):
+        """Lee y convierte los registros del rango pedido"""
+        return [self.convertir(dato) for dato in self.leer(inicio, fin - inicio)]
+
+    def agregar(self, dato):
+        """Cuenta un dato agregado al final del origen"""
+        self.total += 1
+        return self.total - 1
+
+    def eliminar(self, dato, indice=None):
+        """Descuenta un dato eliminado del origen"""
+        self.total -= 1
+        # Sin su posición se invalidan todas las filas leídas
+        return 0 if indice is None else indice
+
+
+# ===== TABLA =====
+
+class TablaVirtual(tk.Frame):
+    """
+    Tabla con desplazamiento virtual basada en ttk.Treeview.
+
+    El Treeview solo contiene tantos elementos como filas caben en pantalla.
+    Al desplazarse no se insertan ni se borran elementos: se reescriben sus
+    valores con las filas de la nueva posición, que se piden a la fuente por
+    bloques y se guardan en un búfer limitado. La barra de desplazamiento se
+    calcula sobre el total de la fuente.
+
+    La selección se guarda como índice absoluto de fila, así que sobrevive
+    al desplazamiento. El Treeview interno queda accesible como "tree" para
+    leer la fila seleccionada con selection() e item().
+
+    Los cambios de un solo registro se aplican con fila_insertada,
+    fila_actualizada y fila_eliminada, sin volver a leer la fuente: una
+    edición reescribe como mucho un elemento del Treeview.
+
+    Atributos:
+        tree (ttk.Treeview): El Treeview que dibuja las filas visibles.
+        fuente (FuenteDatos): Origen de las filas mostradas.
+        inicio (int): Índice de la primera fila visible.
+        seleccionada (int): Índice absoluto de la fila seleccionada, o None.
+        posiciones (dict): Clave (valor de columna_clave) -> índice, para las
+                           filas del búfer.
+    """
+
+    # Filas que se piden a la fuente de una vez
+    TAMANIO_BLOQUE = 256
+    # Bloques que se conservan en el búfer
+    MAXIMO_BLOQUES = 64
+    # Altura aproximada del encabezado, en píxeles
+    ALTO_ENCABEZADO = 25
+
+    def __init__(self, padre, columnas, anchos=None, columna_clave=0, **opciones):
+        """
+        Crea la tabla vacía.
+
+        Args:
+            padre: Widget contenedor.
+            columnas (tuple): Títulos de las columnas.
+            anchos (list, optional): Ancho de cada columna en píxeles.
+            columna_clave (int): Columna que identifica cada fila (ISBN, ID...).
+            **opciones: Opciones adicionales para el Frame.
+        """
+        super().__init__(padre, **opciones)
+        self.columna_clave = columna_clave
+        self.posiciones = {}
+        self.fuente = FuenteLista((), tuple)
+        self.inicio = 0
+        self.seleccionada = None
+        self.filas_visibles = 20
+        self.bloques = OrderedDict()
+
+        self.tree = ttk.Treeview(self, columns=columnas, show='headings', selectmode='browse')
+        for i, columna in enumerate(columnas):
+            self.tree.heading(columna, text=columna)
+            self.tree.column(columna, width=anchos[i] if anchos else 120)
+
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._desplazar_barra)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        estilo = ttk.Style(self)
+        self.alto_fila = int(estilo.lookup('Treeview', 'rowheight') or 20)
+
+        self.tree.bind('<Configure>', self._al_redimensionar)
+        self.tree.bind('<<TreeviewSelect>>', self._al_seleccionar)
+        self.tree.bind('<MouseWheel>', self._rueda)
+        self.tree.bind('<Button-4>', lambda evento: self._rueda(evento, -3))
+        self.tree.bind('<Button-5>', lambda evento: self._rueda(evento, 3))
+        for tecla, paso in (('<Up>', -1), ('<Down>', 1)):
+            self.tree.bind(tecla, lambda evento, paso=paso: self._mover_seleccion(paso))
+        for tecla, paginas in (('<Prior>', -1), ('<Next>', 1)):
+            self.tree.bind(tecla, lambda evento, paginas=paginas:
+                           self._mover_seleccion(paginas * self.filas_visibles))
+        self.tree.bind('<Home>', lambda evento: self._mover_seleccion(-len(self.fuente)))
+        self.tree.bind('<End>', lambda evento: self._mover_seleccion(len(self.fuente)))
+
+    # ----- Datos -----
+
+    def mostrar(self, fuente, conservar_posicion=False):
+        """
+        Cambia la fuente de la tabla y redibuja las filas visibles.
+
+        Args:
+            fuente (FuenteDatos): Nueva fuente de filas.
+            conservar_posicion (bool): Si se mantiene el desplazamiento y la
+                                       selección (útil al refrescar).
+        """
+        self.fuente = fuente
+        self._descartar_bloques()
+        if not conservar_posicion:
+            self.inicio = 0
+            self.seleccionada = None
+        elif self.seleccionada is not None and self.seleccionada >= len(fuente):
+            self.seleccionada = None
+        self._dibujar()
+
+    def refrescar(self):
+        """Vuelve a pedir a la fuente las filas visibles (tras modificar los datos)"""
+        self.mostrar(self.fuente, conservar_posicion=True)
+
+    def _fila(self, indice):
+        """Devuelve una fila desde el búfer, pidiendo su bloque si hace falta"""
+        numero, posicion = divmod(indice, self.TAMANIO_BLOQUE)
+        bloque = self.bloques.get(numero)
+        if bloque is None:
+            inicio = numero * self.TAMANIO_BLOQUE
+            bloque = self.fuente.filas(inicio, inicio + self.TAMANIO_BLOQUE)
+            self.bloques[numero] = bloque
+            columna = self.columna_clave
+            for desplazamiento, fila in enumerate(bloque):
+                self.posiciones[fila[columna]] = inicio + desplazamiento
+            if len(self.bloques) > self.MAXIMO_BLOQUES:
+                self._olvidar_bloque(*self.bloques.popitem(last=False))
+        else:
+            self.bloques.move_to_end(numero)
+        return bloque[posicion] if posicion < len(bloque) else None
+
+    def _olvidar_bloque(self, numero, bloque):
+        """Quita de posiciones las claves de un bloque que sale del búfer"""
+        inicio = numero * self.TAMANIO_BLOQUE
+        columna = self.columna_clave
+        for desplazamiento, fila in enumerate(bloque):
+            if self.posiciones.get(fila[columna]) == inicio + desplazamiento:
+                del self.posiciones[fila[columna]]
+
+    def _descartar_bloques(self, desde=0):
+        """Descarta del búfer los bloques a partir de un número de bloque"""
+        for numero in [numero for numero in self.bloques if numero >= desde]:
+            self._olvidar_bloque(numero, self.bloques.pop(numero))
+
+    # ----- Cambios de un registro -----
+
+    def fila_insertada(self, dato):
+        """
+        Muestra un registro agregado al final del origen.
+
+        Args:
+            dato: El registro agregado.
+        """
+        indice = self.fuente.agregar(dato)
+        if indice is None:
+            return
+        self._invalidar_desde(indice)
+
+    def agregar_filas(self, datos):
+        """
+        Añade un lote de registros al final de una FuenteLista.
+
+        Permite mostrar los resultados de una consulta a medida que llegan:
+        solo se redibuja si el lote cae dentro de la vista.
+
+        Args:
+            datos (list): Registros a añadir.
+        """
+        indice = len(self.fuente)
+        self.fuente.extender(datos)
+        self._invalidar_desde(indice)
+
+    def fila_actualizada(self, dato, clave, clave_anterior=None):
+        """
+        Reescribe la fila de un registro modificado, si está en el búfer.
+
+        Args:
+            dato: El registro con sus valores nuevos.
+            clave: Clave actual del registro.
+            clave_anterior: Clave que tenía antes, si cambió.
+        """
+        indice = self.posiciones.pop(clave if clave_anterior is None else clave_anterior, None)
+        if indice is None:
+            # No se ha leído todavía: se convertirá con sus valores nuevos al mostrarse
+            return
+        fila = self.fuente.convertir(dato)
+        numero, posicion = divmod(indice, self.TAMANIO_BLOQUE)
+        self.bloques[numero][posicion] = fila
+        self.posiciones[clave] = indice
+        if self.inicio <= indice < self.inicio + self.filas_visibles:
+            elemento = self.tree.get_children()[indice - self.inicio]
+            self.tree.item(elemento, values=fila)
+
+    def fila_eliminada(self, dato):
+        """
+        Quita la fila de un registro eliminado del origen.
+
+        Args:
+            dato: El registro eliminado.
+        """
+        total_anterior = len(self.fuente)
+        # Si la fila está en el búfer, su posición se conoce sin buscarla
+        clave = self.fuente.convertir(dato)[self.columna_clave]
+        indice = self.fuente.eliminar(dato, self.posiciones.get(clave))
+        if indice is None:
+            if len(self.fuente) != total_anterior:
+                self._actualizar_barra()
+            return
+        if self.seleccionada is not None:
+            if self.seleccionada == indice:
+                self.seleccionada = None
+            elif self.seleccionada > indice:
+                self.seleccionada -= 1
+        if indice < self.inicio:
+            # Las filas visibles solo se desplazan una posición: se sigue viendo lo mismo
+            self.inicio -= 1
+        self._invalidar_desde(indice)
+
+    def _invalidar_desde(self, indice):
+        """Descarta los bloques afectados por un cambio en un índice y redibuja si hace falta"""
+        numero = indice // self.TAMANIO_BLOQUE
+        self._descartar_bloques(numero)
+        if numero * self.TAMANIO_BLOQUE < self.inicio + self.filas_visibles:
+            # Filas visibles en bloques descartados: se releen para que sigan en posiciones
+            self._dibujar()
+        else:
+            self._actualizar_barra()
+
+    # ----- Dibujo -----
+
+    def _dibujar(self):
+        """Reescribe los elementos del Treeview con las filas de la posición actual"""
+        total = len(self.fuente)
+        self.inicio = max(0, min(self.inicio, total - self.filas_visibles))
+
+        elementos = self.tree.get_children()
+        necesarios = min(self.filas_visibles, total - self.inicio)
+        # Ajustar la cantidad de elementos a las filas que caben (solo al redimensionar)
+        for elemento in elementos[necesarios:]:
+            self.tree.delete(elemento)
+        for _ in range(len(elementos), necesarios):
+            self.tree.insert('', 'end')
+        elementos = self.tree.get_children()
+
+        seleccion = ()
+        for desplazamiento, elemento in enumerate(elementos):
+            indice = self.inicio + desplazamiento
+            fila = self._fila(indice)
+            self.tree.item(elemento, values=fila if fila is not None else ())
+            if indice == self.seleccionada:
+                seleccion = (elemento,)
+        self.tree.selection_set(seleccion)
+        self._actualizar_barra()
+
+    def _actualizar_barra(self):
+        """Ajusta la barra de desplazamiento a la posición y al total actuales"""
+        total = len(self.fuente)
+        if total:
+            visibles = min(self.filas_visibles, total - self.inicio)
+            self.scrollbar.set(self.inicio / total, (self.inicio + visibles) / total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def _al_redimensionar(self, evento):
+        """Recalcula cuántas filas caben al cambiar el tamaño del Treeview"""
+        filas = max(1, (evento.height - self.ALTO_ENCABEZADO) // self.alto_fila)
+        if filas != self.filas_visibles:
+            self.filas_visibles = filas
+            self._dibujar()
+
+    # ----- Desplazamiento -----
+
+    def desplazar(self, filas):
+        """
+        Desplaza la vista un número de filas (negativo hacia arriba).
+
+        Args:
+            filas (int): Filas a desplazar.
+        """
+        self.ir_a(self.inicio + filas)
+
+    def ir_a(self, indice):
+        """
+        Muestra la vista empezando en una fila.
+
+        Args:
+            indice (int): Índice de la primera fila visible.
+        """
+        self.inicio = indice
+        self._dibujar()
+
+    def _desplazar_barra(self, accion, cantidad, unidad=None):
+        """Atiende los comandos de la barra de desplazamiento (moveto / scroll)"""
+        if accion == 'moveto':
+            self.ir_a(int(float(cantidad) * len(self.fuente)))
+        elif accion == 'scroll':
+            paso = self.filas_visibles if unidad == 'pages' else 1
+            self.desplazar(int(cantidad) * paso)
+
+    def _rueda(self, evento, filas=None):
+        """Desplaza con la rueda del ratón (delta en Windows y macOS, botones 4/5 en X11)"""
+        if filas is None:
+            filas = -3 if evento.delta > 0 else 3
+        self.desplazar(filas)
+        return 'break'
+
+    # ----- Selección -----
+
+    def _al_seleccionar(self, evento):
+        """Guarda como índice absoluto la fila seleccionada con el ratón"""
+        seleccion = self.tree.selection()
+        # Una selección vacía solo significa que la fila elegida salió de la vista
+        if seleccion:
+            self.seleccionada = self.inicio + self.tree.index(seleccion[0])
+
+    def _mover_seleccion(self, paso):
+        """Mueve la selección con el teclado, desplazando la vista si sale de ella"""
+        total = len(self.fuente)
+        if not total:
+            return 'break'
+        actual = self.seleccionada if self.seleccionada is not None else self.inicio - 1
+        self.seleccionada = max(0, min(total - 1, actual + paso))
+        if self.seleccionada < self.inicio:
+            self.inicio = self.seleccionada
+        elif self.seleccionada >= self.inicio + self.filas_visibles:
+            self.inicio = self.seleccionada - self.filas_visibles + 1
+        self._dibujar()
+        return 'break'
+
+
+# Bloque de prueba: una tabla con un millón de filas sintéticas
+if __name__ == "__main__":
+    root = tk.Tk()
+    root.title("TablaVirtual: 1.000.000 de filas")
+    root.geometry("700x500")
+    tabla = TablaVirtual(root, ('Número', 'Cuadrado', 'Texto'), [120, 160, 300])
+    tabla.pack(fill='both', expand=True, padx=10, pady=10)
+    tabla.mostrar(FuenteLista(range(1_000_000), lambda n: (n, n * n, f"Fila {n}")))
+    root.mainloop()
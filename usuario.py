@@ -9,6 +9,9 @@ class Usuario:
         contacto (str): Información de contacto del usuario (email, teléfono, etc.).
     """
     
+    # Sin diccionario de atributos por instancia
+    __slots__ = ('id_usuario', 'nombre', 'contacto')
+    
     def __init__(self, id_usuario, nombre, contacto):
         """
         Inicializa una nueva instancia de la clase Usuario.